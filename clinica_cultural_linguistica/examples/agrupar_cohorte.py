@@ -0,0 +1,71 @@
+"""
+Agrupa los perfiles de una cohorte (ccl.agrupamiento)
+
+Lee un .npy de características escrito con EscritorCaracteristicas, agrupa
+los perfiles con k-means por mini-lotes y escribe junto a él
+"<ruta>.grupos.csv" y "<ruta>.centroides.json".
+
+Con --sintetico N, genera antes un .npy de N perfiles sintéticos para medir
+el tiempo con cohortes grandes.
+
+Uso:
+    python examples/agrupar_cohorte.py sesiones.npy --k 8
+    python examples/agrupar_cohorte.py /tmp/cohorte.npy --sintetico 500000 --k 12
+
+Requiere numpy.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np  # noqa: E402
+
+from ccl.agrupamiento import agrupar_caracteristicas, ruta_centroides, ruta_grupos  # noqa: E402
+from ccl.caracteristicas import NUM_CARACTERISTICAS, EscritorCaracteristicas  # noqa: E402
+
+
+def escribir_sintetico(ruta, filas, tipos=12, semilla=0):
+    """Escribe `filas` vectores de características (conteos) alrededor de `tipos` perfiles."""
+    generador = np.random.default_rng(semilla)
+    medias = generador.gamma(1.5, 2.0, size=(tipos, NUM_CARACTERISTICAS))
+    with EscritorCaracteristicas(ruta) as escritor:
+        for inicio in range(0, filas, 10000):
+            cantidad = min(10000, filas - inicio)
+            tipo = generador.integers(0, tipos, size=cantidad)
+            bloque = generador.poisson(medias[tipo]).astype(np.float32)
+            for i, fila in enumerate(bloque):
+                escritor.escribir_vector(fila.tolist(), f"sujeto_{inicio + i}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("ruta", help="Fichero .npy de características")
+    parser.add_argument("--k", type=int, default=8, help="Número de grupos")
+    parser.add_argument("--lote", type=int, default=4096, help="Filas por mini-lote")
+    parser.add_argument("--sintetico", type=int, metavar="N",
+                        help="Genera antes N perfiles sintéticos en la ruta")
+    args = parser.parse_args()
+
+    if args.sintetico:
+        inicio = time.perf_counter()
+        escribir_sintetico(args.ruta, args.sintetico)
+        print(f"Generados {args.sintetico:,} perfiles en {time.perf_counter() - inicio:.1f} s")
+
+    inicio = time.perf_counter()
+    resumen = agrupar_caracteristicas(args.ruta, k=args.k, tam_lote=args.lote)
+    segundos = time.perf_counter() - inicio
+
+    print(f"\n{resumen['filas']:,} perfiles en {args.k} grupos: {segundos:.1f} s "
+          f"({resumen['iteraciones']} iteraciones, inercia {resumen['inercia']:,.0f})")
+    for grupo, (tamaño, centroide) in enumerate(zip(resumen["tamaños"], resumen["centroides"])):
+        destacados = sorted(centroide.items(), key=lambda par: -par[1])[:3]
+        print(f"  Grupo {grupo:>2}: {tamaño:>8,}  " + ", ".join(f"{n}={v:.1f}" for n, v in destacados))
+    print(f"\n📂 {ruta_grupos(args.ruta)}\n📂 {ruta_centroides(args.ruta)}\n")
+
+
+if __name__ == "__main__":
+    main()
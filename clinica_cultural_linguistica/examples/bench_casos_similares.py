@@ -0,0 +1,100 @@
+"""
+Benchmark de la búsqueda de casos similares (ccl.casos_similares)
+
+Genera perfiles sintéticos agrupados en "tipos de caso", los inserta en un
+IndiceCasos por lotes y mide:
+- la inserción incremental (perfiles por segundo)
+- la latencia de la búsqueda exacta (una consulta y lotes de consultas)
+- la construcción del IVF y su latencia, con el recall@k frente a la exacta
+
+Uso:
+    python examples/bench_casos_similares.py [--n 1000000] [--k 20] [--nprobe 16 32 64]
+
+Requiere numpy.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np  # noqa: E402
+
+from ccl.casos_similares import DIMENSION_PERFIL, IndiceCasos  # noqa: E402
+
+
+def perfiles_sinteticos(n, generador, tipos=200):
+    """Perfiles no negativos alrededor de `tipos` centros, como log(1 + conteos)."""
+    centros = generador.gamma(1.0, 1.0, size=(tipos, DIMENSION_PERFIL))
+    tipo = generador.integers(0, tipos, size=n)
+    ruido = generador.normal(0, 0.3, size=(n, DIMENSION_PERFIL))
+    return np.maximum(centros[tipo] + ruido, 0).astype(np.float32)
+
+
+def medir(funcion, repeticiones=5):
+    """Mediana del tiempo de varias ejecuciones, en segundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=1_000_000, help="Perfiles en el índice")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--consultas", type=int, default=100)
+    parser.add_argument("--lote", type=int, default=10_000, help="Perfiles por inserción")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[16, 32, 64])
+    args = parser.parse_args()
+
+    generador = np.random.default_rng(0)
+    datos = perfiles_sinteticos(args.n, generador)
+    consultas = perfiles_sinteticos(args.consultas, generador)
+
+    print(f"\n{args.n:,} perfiles de {DIMENSION_PERFIL} componentes, k={args.k}\n")
+
+    indice = IndiceCasos()
+    inicio = time.perf_counter()
+    for desde in range(0, args.n, args.lote):
+        hasta = min(desde + args.lote, args.n)
+        indice.añadir_lote(range(desde, hasta), datos[desde:hasta])
+    segundos = time.perf_counter() - inicio
+    print(f"Inserción:          {segundos:8.2f} s   ({args.n / segundos:,.0f} perfiles/s)")
+
+    uno = medir(lambda: indice.buscar(consultas[0], args.k, exacto=True))
+    lote = medir(lambda: indice.buscar_lote(consultas, args.k, exacto=True), repeticiones=3)
+    print(f"Exacta, 1 consulta: {uno * 1000:8.1f} ms")
+    print(f"Exacta, {args.consultas} consultas: {lote * 1000:8.1f} ms "
+          f"({lote / args.consultas * 1000:.2f} ms por consulta)")
+
+    inicio = time.perf_counter()
+    indice.construir_ivf()
+    print(f"Construir IVF:      {time.perf_counter() - inicio:8.2f} s   "
+          f"({len(indice._listas)} listas)")
+
+    exactos = [set(i for i, _ in fila) for fila in indice.buscar_lote(consultas, args.k, exacto=True)]
+    for nprobe in args.nprobe:
+        tiempo = medir(lambda: indice.buscar_lote(consultas, args.k, nprobe=nprobe), repeticiones=3)
+        aproximados = indice.buscar_lote(consultas, args.k, nprobe=nprobe)
+        recall = np.mean([
+            len(exacto & set(i for i, _ in fila)) / len(exacto)
+            for exacto, fila in zip(exactos, aproximados)
+        ])
+        print(f"IVF nprobe={nprobe:<3}:    {tiempo / args.consultas * 1000:8.2f} ms por consulta   "
+              f"recall@{args.k} = {recall:.3f}")
+
+    # Inserción incremental con el IVF construido
+    extra = perfiles_sinteticos(args.lote, generador)
+    inicio = time.perf_counter()
+    indice.añadir_lote(range(args.n, args.n + args.lote), extra)
+    segundos = time.perf_counter() - inicio
+    print(f"Inserción con IVF:  {args.lote / segundos:,.0f} perfiles/s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Comprobación de analisis_con_plazo (ccl.plazos) con textos enormes
+
+Para cada texto (normal, sin espacios, y normal con un tramo largo sin
+espacios en medio) comprueba que:
+
+1. analisis_con_plazo responde dentro del plazo (con un margen pequeño)
+2. el resultado en segundo plano es idéntico al de analisis_completo
+
+Uso:
+    python examples/comprobar_plazos.py [--plazo 0.2] [--megas 5] [--margen 0.05]
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ccl import analisis_completo, analisis_con_plazo, convertir_para_json  # noqa: E402
+
+
+_FRASE = (
+    "Cuando llegué a Madrid no entendía nada y me sentía muy sola, pero "
+    "ahora hablo con mis compañeros de clase y a veces me río mucho. "
+)
+
+
+def textos(caracteres):
+    """Textos de unos `caracteres` caracteres, por nombre."""
+    normal = _FRASE * (caracteres // len(_FRASE))
+    return {
+        "normal": normal,
+        "sin_espacios": "a" * caracteres,
+        "tramo_sin_espacios": normal[:caracteres // 4] + "x" * (caracteres // 2) + " " + normal[:caracteres // 4],
+    }
+
+
+def _serializar(resultado):
+    return json.dumps(resultado, ensure_ascii=False, sort_keys=True, default=convertir_para_json)
+
+
+def comprobar(nombre, texto, plazo, margen, ejecutor):
+    """Devuelve True si el texto respeta el plazo y el resultado completo coincide."""
+    entrada = {"id_sujeto": "sujeto_001", "texto": texto, "fecha": "2026-01-01"}
+
+    inicio = time.perf_counter()
+    parcial, futuro = analisis_con_plazo(entrada, plazo, ejecutor=ejecutor)
+    segundos = time.perf_counter() - inicio
+
+    completo = futuro.result() if futuro is not None else parcial
+    completo = {clave: valor for clave, valor in completo.items() if clave != "etapas"}
+    igual = _serializar(completo) == _serializar(analisis_completo(entrada))
+    a_tiempo = segundos <= plazo + margen
+
+    print(f"  {'✅' if a_tiempo and igual else '❌'} {nombre:<20} {len(texto) / 2**20:5.1f} MB  "
+          f"{segundos:6.3f} s  cobertura {parcial['cobertura']:<6}  "
+          f"{'igual' if igual else 'DISTINTO'} que analisis_completo")
+    return a_tiempo and igual
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--plazo", type=float, default=0.2, help="Segundos del plazo")
+    parser.add_argument("--megas", type=float, default=5, help="Tamaño de los textos en MB")
+    parser.add_argument("--margen", type=float, default=0.05, help="Segundos que se tolera pasarse del plazo")
+    args = parser.parse_args()
+
+    print(f"\nanalisis_con_plazo con plazo de {args.plazo} s:")
+    correctos = True
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        for nombre, texto in textos(int(args.megas * 2**20)).items():
+            correctos &= comprobar(nombre, texto, args.plazo, args.margen, ejecutor)
+    return 0 if correctos else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,7 @@ from ccl import (
     seguimiento_progreso,
     riesgo_psico_emocional_basico,
     analisis_completo,
+    convertir_para_json,
 )
 
 
@@ -261,7 +262,7 @@ def ejemplo_analisis_completo():
     print("\n--- EXPORTACIÓN A JSON ---")
     output_file = Path(__file__).parent / "resultado_analisis_completo.json"
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(resultado, f, ensure_ascii=False, indent=2)
+        json.dump(resultado, f, ensure_ascii=False, indent=2, default=convertir_para_json)
     print(f"Resultado exportado a: {output_file}")
 
 
@@ -0,0 +1,237 @@
+"""
+Prueba de estrés y rendimiento del modo con hilos (ccl.hilos)
+
+1. Comprueba que el estado de módulo de ccl es inmutable (estado_mutable).
+2. Ejecuta todas las etapas a la vez desde un pool de hilos, sobre un corpus
+   sintético y en orden aleatorio, y comprueba que cada resultado es
+   idéntico al de la ejecución en serie. Con GIL, el intervalo de cambio de
+   hilo se reduce al mínimo para que los hilos se intercalen lo más posible.
+3. Mide las entradas por segundo de analizar_lote en serie, con hilos
+   (analizar_lote_en_hilos) y con procesos (ProcessPoolExecutor).
+
+Uso:
+    python examples/estres_hilos.py [--entradas 2000] [--hilos 8] [--procesos 4] [--rondas 3]
+
+Con GIL, los hilos no pueden ir más rápido que la ejecución en serie; la
+comparación con procesos tiene sentido en un CPython sin GIL (ej: python3.13t).
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ccl import (  # noqa: E402
+    analisis_completo,
+    analizar_lote,
+    bloqueos_desde_resumen,
+    convertir_para_json,
+    deteccion_bloqueos_discursivos,
+    diagnostico_desde_resumen,
+    diagnostico_linguistico_emocional,
+    prescripcion_tareas,
+    radiografia_cultural,
+    radiografia_desde_resumen,
+    resumir_trozos,
+    riesgo_desde_resumen,
+    riesgo_psico_emocional_basico,
+    seguimiento_progreso,
+    vigilancia_desde_historial,
+)
+from ccl.hilos import analizar_lote_en_hilos, estado_mutable, gil_activo  # noqa: E402
+from ccl.radiografia_cultural import (  # noqa: E402
+    CAMPOS_CULTURALES,
+    INDICADORES_TENSION,
+    REFERENTES_CULTURALES,
+)
+from ccl.riesgo_psico_emocional import CATEGORIAS_SEÑALES  # noqa: E402
+from ccl.utils import CONECTORES, PALABRAS_EMOCIONALES, TEMAS_PALABRAS_CLAVE  # noqa: E402
+
+
+# =============================================================================
+# CORPUS SINTÉTICO
+# =============================================================================
+
+_RELLENO = (
+    "ayer fui al mercado con mi hermana", "hablé con mi profesora después de clase",
+    "no sé cómo explicar lo que siento", "aquí la gente come muy tarde",
+    "cuando era pequeña vivíamos cerca del río", "mañana tengo un examen",
+    "me gusta caminar por el barrio", "todo es diferente y a veces difícil",
+)
+
+
+def entradas_sinteticas(n, semilla=0, sujetos=50):
+    """Entradas con palabras de todos los léxicos, de longitudes variadas."""
+    generador = random.Random(semilla)
+    vocabulario = sorted(
+        set(CONECTORES)
+        | {p for lexico in (PALABRAS_EMOCIONALES, TEMAS_PALABRAS_CLAVE, CAMPOS_CULTURALES,
+                            INDICADORES_TENSION, CATEGORIAS_SEÑALES) for ps in lexico.values() for p in ps}
+        | {p for pais in REFERENTES_CULTURALES.values() for ps in pais.values() for p in ps}
+    )
+    paises = sorted(REFERENTES_CULTURALES)
+    entradas = []
+    for i in range(n):
+        frases = []
+        for _ in range(generador.randint(3, 60)):
+            palabras = generador.sample(vocabulario, generador.randint(1, 6))
+            frases.append(f"{generador.choice(_RELLENO)} {' '.join(palabras)}.")
+        entradas.append({
+            "id_sujeto": f"sujeto_{i % sujetos:03d}",
+            "texto": " ".join(frases).capitalize(),
+            "fecha": f"2026-{1 + i // sujetos % 12:02d}-01",
+            "metadatos": {"pais_origen": generador.choice(paises), "pais_residencia": "españa"},
+        })
+    return entradas
+
+
+# =============================================================================
+# ETAPAS
+# =============================================================================
+
+def _prescripcion(entrada):
+    return prescripcion_tareas(
+        entrada,
+        diagnostico_linguistico_emocional(entrada),
+        radiografia_cultural(entrada),
+        deteccion_bloqueos_discursivos(entrada),
+    )
+
+
+def _desde_resumen(entrada):
+    # Segmentos pequeños: varios por texto, que se combinan
+    resumen = resumir_trozos([entrada["texto"]], tam_segmento=256)
+    return (
+        diagnostico_desde_resumen(entrada, resumen),
+        radiografia_desde_resumen(entrada, resumen),
+        bloqueos_desde_resumen(entrada, resumen),
+        riesgo_desde_resumen(entrada, resumen),
+    )
+
+
+def etapas(historiales):
+    """Funciones de etapa, cada una de una entrada (y su posición)."""
+    return {
+        "diagnostico": lambda entrada, i: diagnostico_linguistico_emocional(entrada),
+        "radiografia": lambda entrada, i: radiografia_cultural(entrada),
+        "bloqueos": lambda entrada, i: deteccion_bloqueos_discursivos(entrada),
+        "riesgo": lambda entrada, i: riesgo_psico_emocional_basico(entrada),
+        "prescripcion": lambda entrada, i: _prescripcion(entrada),
+        "desde_resumen": lambda entrada, i: _desde_resumen(entrada),
+        "seguimiento": lambda entrada, i: seguimiento_progreso(historiales[i]),
+        "vigilancia": lambda entrada, i: vigilancia_desde_historial(historiales[i]),
+        "completo": lambda entrada, i: analisis_completo(entrada),
+    }
+
+
+def _serializar(resultado):
+    return json.dumps(resultado, ensure_ascii=False, sort_keys=True, default=convertir_para_json)
+
+
+def historiales_por_entrada(entradas, analisis):
+    """Historial del sujeto de cada entrada hasta ella (incluida)."""
+    por_sujeto = {}
+    historiales = []
+    for entrada, resultado in zip(entradas, analisis):
+        historial = por_sujeto.setdefault(entrada["id_sujeto"], [])
+        historial.append(resultado)
+        historiales.append(list(historial[-8:]))
+    return historiales
+
+
+def estres(entradas, hilos, rondas):
+    """Todas las etapas a la vez desde hilos; devuelve los resultados distintos de la serie."""
+    historiales = historiales_por_entrada(entradas, [analisis_completo(e) for e in entradas])
+    funciones = etapas(historiales)
+    esperados = {
+        (nombre, i): _serializar(funcion(entrada, i))
+        for nombre, funcion in funciones.items()
+        for i, entrada in enumerate(entradas)
+    }
+
+    tareas = list(esperados) * rondas
+    random.Random(1).shuffle(tareas)
+    distintos = []
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(hilos) as ejecutor:
+            futuros = [
+                (clave, ejecutor.submit(funciones[clave[0]], entradas[clave[1]], clave[1]))
+                for clave in tareas
+            ]
+            for clave, futuro in futuros:
+                if _serializar(futuro.result()) != esperados[clave]:
+                    distintos.append(clave)
+
+            # Lote con duplicados: la reutilización no depende del reparto
+            duplicadas = entradas + entradas[::3]
+            serie = [_serializar(r) for r in analizar_lote(duplicadas, deduplicar=True)]
+            paralelo = [_serializar(r) for r in analizar_lote(duplicadas, deduplicar=True, ejecutor=ejecutor)]
+            distintos.extend(("lote_deduplicado", i) for i, (a, b) in enumerate(zip(serie, paralelo)) if a != b)
+    finally:
+        sys.setswitchinterval(intervalo)
+    return len(tareas), distintos
+
+
+# =============================================================================
+# RENDIMIENTO
+# =============================================================================
+
+def medir(funcion, repeticiones=3):
+    """Mediana del tiempo de varias ejecuciones, en segundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entradas", type=int, default=2000)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rondas", type=int, default=3, help="Veces que se repite cada etapa en el estrés")
+    args = parser.parse_args()
+
+    print(f"\nPython {sys.version.split()[0]}, GIL {'activo' if gil_activo() else 'desactivado'}, "
+          f"{os.cpu_count()} CPU\n")
+
+    mutables = estado_mutable()
+    print(f"Estado de módulo: {'inmutable' if not mutables else 'MUTABLE: ' + ', '.join(mutables)}")
+
+    entradas = entradas_sinteticas(args.entradas)
+    estres_entradas = entradas[:max(1, args.entradas // 10)]
+    inicio = time.perf_counter()
+    ejecutadas, distintos = estres(estres_entradas, args.hilos, args.rondas)
+    print(f"Estrés: {ejecutadas:,} etapas en {args.hilos} hilos en "
+          f"{time.perf_counter() - inicio:.1f} s, {len(distintos)} distintas de la serie")
+    for clave in distintos[:10]:
+        print(f"   ❌ {clave}")
+
+    analizar_lote(entradas[:100])  # calentamiento
+    serie = medir(lambda: analizar_lote(entradas))
+    hilos = medir(lambda: analizar_lote_en_hilos(entradas, hilos=args.hilos))
+    with ProcessPoolExecutor(args.procesos) as ejecutor:
+        analizar_lote(entradas[:args.procesos], ejecutor=ejecutor)  # arranque de los procesos
+        procesos = medir(lambda: analizar_lote(entradas, ejecutor=ejecutor))
+
+    print(f"\nanalizar_lote con {len(entradas):,} entradas:")
+    for nombre, segundos in (("serie", serie), (f"{args.hilos} hilos", hilos),
+                             (f"{args.procesos} procesos", procesos)):
+        print(f"  {nombre:<12} {segundos:7.2f} s   {len(entradas) / segundos:8,.0f} entradas/s   "
+              f"x{serie / segundos:.2f}")
+
+    return 1 if mutables or distintos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,10 +27,88 @@ __author__ = "Tu Nombre"
 from .diagnostico_linguistico_emocional import diagnostico_linguistico_emocional
 from .radiografia_cultural import radiografia_cultural
 from .deteccion_bloqueos_discursivos import deteccion_bloqueos_discursivos
-from .prescripcion_tareas import prescripcion_tareas
-from .seguimiento_progreso import seguimiento_progreso
+from .prescripcion_tareas import prescripcion_tareas, MotorReglas
+from .seguimiento_progreso import (
+    seguimiento_progreso,
+    crear_vigilancia,
+    actualizar_vigilancia,
+    vigilancia_desde_historial,
+    vigilar_cohorte,
+)
 from .riesgo_psico_emocional import riesgo_psico_emocional_basico
 
+# Agregados incrementales para el historial de cada sujeto
+from .deteccion_bloqueos_discursivos import (
+    crear_agregado_temas,
+    actualizar_agregado_temas,
+    agregado_temas_desde_historial,
+)
+
+# Resúmenes combinables para textos muy largos
+from .resumen_texto import (
+    ResumenTexto,
+    resumir_texto,
+    resumir_trozos,
+    combinar_resumenes,
+)
+from .diagnostico_linguistico_emocional import diagnostico_desde_resumen
+from .radiografia_cultural import radiografia_desde_resumen
+from .deteccion_bloqueos_discursivos import bloqueos_desde_resumen
+from .riesgo_psico_emocional import riesgo_desde_resumen
+
+# Lectura de corpus grandes proyectados en memoria
+from .corpus import LectorCorpus, resumir_bytes, analizar_corpus
+
+# Análisis por lotes y detección de casi duplicados
+from .lotes import analizar_lote, AlmacenResultados
+from .duplicados import firma_minhash, similitud_firmas, IndiceLSH
+
+# Análisis por lotes con hilos (estado de módulo inmutable, compartido entre hilos)
+from .hilos import analizar_lote_en_hilos, estado_mutable, gil_activo
+
+# Exportación en registros binarios y en columnas
+from .exportacion import (
+    escribir_registros,
+    leer_registros,
+    exportar_columnas,
+    leer_columnas,
+)
+
+# Vectores de características para modelos
+from .caracteristicas import (
+    vector_caracteristicas,
+    EscritorCaracteristicas,
+    exportar_caracteristicas,
+    cargar_caracteristicas,
+)
+
+# Casos con perfil parecido (k vecinos más cercanos; requiere numpy)
+from .casos_similares import vector_perfil, IndiceCasos
+
+# Agrupamiento de cohortes (k-means por mini-lotes; requiere numpy)
+from .agrupamiento import agrupar_caracteristicas
+
+# Índice posicional de los textos de las sesiones
+from .indice_sesiones import IndiceSesiones
+
+# Análisis con tiempo máximo y resultados parciales
+from .plazos import Plazo, analisis_con_plazo
+
+# Reanálisis de corpus con puntos de control (también: python -m ccl reanalizar)
+from .reanalisis import reanalizar_corpus
+
+# Reanálisis repartido entre trabajadores por TCP (python -m ccl coordinar / trabajador)
+from .distribuido import Coordinador, ejecutar_trabajador, fragmento_de
+
+# Perfilado: pstats, pilas para flamegraph y tiempo por etapa (también: --profile)
+from .perfilado import perfilar, tabla_etapas
+
+# Búsqueda en los materiales del curso
+from .indice_materiales import IndiceMateriales, materiales_para_tareas
+
+# Clases de resultado (se leen como dicts; to_dict() y a_dicts() los convierten)
+from .resultados import Diagnostico, Radiografia, Bloqueos, Riesgo, Progreso, a_dicts
+
 # Importar funciones auxiliares útiles
 from .utils import (
     validar_entrada,
@@ -38,6 +116,8 @@ from .utils import (
     contar_palabras,
     calcular_variedad_lexica,
     tokenizar,
+    iter_tokens,
+    convertir_para_json,
 )
 
 # Definir qué se exporta cuando se hace "from ccl import *"
@@ -47,15 +127,100 @@ __all__ = [
     "radiografia_cultural",
     "deteccion_bloqueos_discursivos",
     "prescripcion_tareas",
+    "MotorReglas",
     "seguimiento_progreso",
     "riesgo_psico_emocional_basico",
 
+    # Agregados de historial
+    "crear_agregado_temas",
+    "actualizar_agregado_temas",
+    "agregado_temas_desde_historial",
+
+    # Vigilancia en línea (EWMA y CUSUM)
+    "crear_vigilancia",
+    "actualizar_vigilancia",
+    "vigilancia_desde_historial",
+    "vigilar_cohorte",
+
+    # Resúmenes de texto
+    "ResumenTexto",
+    "resumir_texto",
+    "resumir_trozos",
+    "combinar_resumenes",
+    "diagnostico_desde_resumen",
+    "radiografia_desde_resumen",
+    "bloqueos_desde_resumen",
+    "riesgo_desde_resumen",
+
+    # Corpus
+    "LectorCorpus",
+    "resumir_bytes",
+    "analizar_corpus",
+    "reanalizar_corpus",
+    "Coordinador",
+    "ejecutar_trabajador",
+    "fragmento_de",
+
+    # Perfilado
+    "perfilar",
+    "tabla_etapas",
+
+    # Lotes y duplicados
+    "analizar_lote",
+    "AlmacenResultados",
+    "firma_minhash",
+    "similitud_firmas",
+    "IndiceLSH",
+    "analizar_lote_en_hilos",
+    "estado_mutable",
+    "gil_activo",
+
+    # Exportación
+    "escribir_registros",
+    "leer_registros",
+    "exportar_columnas",
+    "leer_columnas",
+
+    # Características
+    "vector_caracteristicas",
+    "EscritorCaracteristicas",
+    "exportar_caracteristicas",
+    "cargar_caracteristicas",
+
+    # Casos similares
+    "vector_perfil",
+    "IndiceCasos",
+
+    # Agrupamiento
+    "agrupar_caracteristicas",
+
+    # Índice de sesiones
+    "IndiceSesiones",
+
+    # Plazos
+    "Plazo",
+    "analisis_con_plazo",
+
+    # Materiales del curso
+    "IndiceMateriales",
+    "materiales_para_tareas",
+
+    # Resultados
+    "Diagnostico",
+    "Radiografia",
+    "Bloqueos",
+    "Riesgo",
+    "Progreso",
+    "a_dicts",
+
     # Funciones auxiliares
     "validar_entrada",
     "limpiar_texto",
     "contar_palabras",
     "calcular_variedad_lexica",
     "tokenizar",
+    "iter_tokens",
+    "convertir_para_json",
 
     # Metadata
     "__version__",
@@ -63,7 +228,16 @@ __all__ = [
 ]
 
 
-def analisis_completo(entrada, incluir_riesgo=True, historial=None):
+def analisis_completo(
+    entrada,
+    incluir_riesgo=True,
+    historial=None,
+    agregado_temas=None,
+    resumen=None,
+    indice_sesiones=None,
+    vigilancia=None,
+    plazo=None
+):
     """
     Ejecuta un análisis completo combinando todos los módulos.
 
@@ -74,9 +248,22 @@ def analisis_completo(entrada, incluir_riesgo=True, historial=None):
         entrada: Dict con los datos del sujeto y texto
         incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
         historial: Lista opcional de análisis previos para seguimiento
+        agregado_temas: Agregado de temas opcional del sujeto (ver
+            crear_agregado_temas); se usa para comparar temas y se actualiza
+        resumen: ResumenTexto opcional del texto (ver resumir_trozos). Si se
+            pasa, se analiza el resumen y la entrada no necesita "texto"
+        indice_sesiones: IndiceSesiones opcional; si se pasa, el texto de la
+            entrada se añade al índice del sujeto
+        vigilancia: Estado de vigilancia opcional del sujeto (ver
+            crear_vigilancia); se actualiza con esta sesión y sus alertas se
+            añaden al resultado en "alertas_tempranas"
+        plazo: Segundos (o Plazo) opcionales para todo el análisis; si se
+            pasa, el resultado puede ser parcial (ver analisis_con_plazo,
+            que además puede terminar el resto en segundo plano)
 
     Returns:
-        Dict con todos los análisis integrados
+        Dict con todos los análisis integrados, con las secciones ya
+        convertidas a dicts (ver a_dicts): se guarda con json.dump sin más
 
     Ejemplo:
         >>> entrada = {
@@ -89,16 +276,32 @@ def analisis_completo(entrada, incluir_riesgo=True, historial=None):
         ... }
         >>> resultado = analisis_completo(entrada)
     """
+    # Con plazo: etapas por prioridad y resultado posiblemente parcial
+    if plazo is not None and resumen is None:
+        resultado_parcial, _ = analisis_con_plazo(
+            entrada, plazo, incluir_riesgo, historial, agregado_temas,
+            indice_sesiones, vigilancia
+        )
+        return resultado_parcial
+
     # Ejecutar todos los análisis
-    diagnostico = diagnostico_linguistico_emocional(entrada)
-    radiografia = radiografia_cultural(entrada)
-    bloqueos = deteccion_bloqueos_discursivos(entrada, historial)
+    if resumen is None:
+        diagnostico = diagnostico_linguistico_emocional(entrada)
+        radiografia = radiografia_cultural(entrada)
+        bloqueos = deteccion_bloqueos_discursivos(entrada, historial, agregado_temas)
+    else:
+        diagnostico = diagnostico_desde_resumen(entrada, resumen)
+        radiografia = radiografia_desde_resumen(entrada, resumen)
+        bloqueos = bloqueos_desde_resumen(entrada, resumen, historial, agregado_temas)
     tareas = prescripcion_tareas(entrada, diagnostico, radiografia, bloqueos)
 
     # Análisis de riesgo (opcional)
     riesgo = None
     if incluir_riesgo:
-        riesgo = riesgo_psico_emocional_basico(entrada)
+        if resumen is None:
+            riesgo = riesgo_psico_emocional_basico(entrada)
+        else:
+            riesgo = riesgo_desde_resumen(entrada, resumen)
 
     # Seguimiento de progreso (solo si hay historial)
     progreso = None
@@ -126,7 +329,19 @@ def analisis_completo(entrada, incluir_riesgo=True, historial=None):
     if progreso:
         resultado_completo["seguimiento_progreso"] = progreso
 
-    return resultado_completo
+    # Detectores en línea: alertas en cuanto llega la sesión
+    if vigilancia is not None:
+        resultado_completo["alertas_tempranas"] = actualizar_vigilancia(
+            vigilancia, resultado_completo, entrada.get("fecha")
+        )
+
+    # Indexar el texto de la sesión para búsquedas posteriores
+    if indice_sesiones is not None:
+        indice_sesiones.indexar_entrada(entrada)
+
+    # Las etapas devuelven objetos de resultado; el resultado integrado se
+    # entrega en dicts, como siempre, para que json.dump lo acepte sin default
+    return a_dicts(resultado_completo)
 
 
 # Añadir analisis_completo a las exportaciones
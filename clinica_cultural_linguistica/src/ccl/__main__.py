@@ -0,0 +1,218 @@
+"""
+Línea de comandos de CCL.
+
+Uso:
+    python -m ccl reanalizar archivo.jsonl -o resultados.jsonl [--procesos 4]
+    python -m ccl reanalizar archivo.jsonl -o resultados.jsonl --resume
+    python -m ccl reanalizar archivo.jsonl -o resultados.jsonl --hilos 8   # CPython sin GIL
+    python -m ccl coordinar archivo.jsonl -o resultados.jsonl --locales 4
+    python -m ccl trabajador coordinador.local:5555
+
+Con --profile, cualquier comando se ejecuta bajo perfilar() (ver
+perfilado.py) y deja "<prefijo>.pstats", "<prefijo>.pilas.txt" y
+"<prefijo>.etapas.json" (por defecto, con el prefijo "<salida>.perfil").
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .distribuido import FRAGMENTOS, PLAZO_TRABAJADOR, Coordinador, ejecutar_trabajador
+from .perfilado import perfilar, tabla_etapas
+from .reanalisis import CADA_REGISTROS, CADA_SEGUNDOS, reanalizar_corpus
+
+
+def _mostrar_avance(punto):
+    """Una línea por punto de control guardado."""
+    fraccion = punto["posicion_entrada"] / max(1, punto["entrada"]["tamaño"])
+    print(f"  💾 {punto['registros']:,} resultados · {fraccion:.1%} del corpus", file=sys.stderr)
+
+
+def comando_reanalizar(args) -> int:
+    if args.hilos > 1:
+        ejecutor = ThreadPoolExecutor(args.hilos)
+    elif args.procesos > 1:
+        ejecutor = ProcessPoolExecutor(args.procesos)
+    else:
+        ejecutor = None
+    try:
+        resumen = reanalizar_corpus(
+            args.entrada,
+            args.salida,
+            reanudar=args.reanudar,
+            incluir_riesgo=not args.sin_riesgo,
+            campo_texto=args.campo_texto,
+            ejecutor=ejecutor,
+            cada_registros=args.cada,
+            cada_segundos=args.intervalo,
+            al_avanzar=None if args.silencioso else _mostrar_avance,
+        )
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrumpido; para continuar, repite el comando con --resume", file=sys.stderr)
+        return 130
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    if resumen["reanudado_desde"]:
+        print(f"↪️  Reanudado tras {resumen['reanudado_desde']:,} resultados ya escritos")
+    print(
+        f"✅ {resumen['nuevos']:,} documentos analizados en {resumen['segundos']:.1f} s "
+        f"({resumen['registros']:,} resultados en {args.salida})"
+    )
+    return 0
+
+
+def comando_coordinar(args) -> int:
+    coordinador = Coordinador(
+        args.entrada,
+        args.salida,
+        fragmentos=args.fragmentos,
+        host=args.host,
+        puerto=args.puerto,
+        incluir_riesgo=not args.sin_riesgo,
+        seguimiento=args.seguimiento,
+        vigilancia=args.vigilancia,
+        campo_texto=args.campo_texto,
+        plazo_trabajador=args.plazo_trabajador or None,
+    )
+    print(f"📡 Coordinador en {coordinador.host}:{coordinador.puerto}", file=sys.stderr)
+    try:
+        resumen = coordinador.ejecutar(trabajadores_locales=args.locales)
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(
+        f"✅ {resumen['entradas']:,} entradas ({resumen['cohorte']['sujetos']:,} sujetos) en "
+        f"{resumen['fragmentos']} fragmentos y {resumen['segundos']:.1f} s"
+    )
+    for nombre, fragmentos in sorted(resumen["trabajadores"].items()):
+        print(f"   {nombre}: {fragmentos} fragmentos")
+    return 0
+
+
+def comando_trabajador(args) -> int:
+    host, _, puerto = args.coordinador.rpartition(":")
+    try:
+        analizados = ejecutar_trabajador(host or "127.0.0.1", int(puerto))
+    except (ConnectionError, OSError) as e:
+        print(f"❌ Conexión con el coordinador perdida: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {analizados} fragmentos analizados", file=sys.stderr)
+    return 0
+
+
+def _mostrar_perfil(perfil):
+    print(f"\n⏱️  Perfil de {perfil.segundos:.1f} s ({perfil.muestras:,} muestras):", file=sys.stderr)
+    print(tabla_etapas(perfil.etapas), file=sys.stderr)
+    for ruta in perfil.rutas.values():
+        print(f"   📂 {ruta}", file=sys.stderr)
+
+
+def _prefijo_perfil(args) -> str:
+    if getattr(args, "salida", None):
+        return f"{args.salida}.perfil"
+    return f"trabajador-{os.getpid()}.perfil"
+
+
+def _añadir_perfil(subparser):
+    subparser.add_argument(
+        "--profile", "--perfil", dest="perfil", nargs="?", const="", default=None,
+        metavar="PREFIJO",
+        help="Perfila la ejecución: escribe PREFIJO.pstats, PREFIJO.pilas.txt "
+             "(pilas para flamegraph) y PREFIJO.etapas.json",
+    )
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m ccl",
+        description="Clínica Cultural y Lingüística: análisis de corpus desde la línea de comandos",
+    )
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    reanalizar = subcomandos.add_parser(
+        "reanalizar",
+        help="Analiza un corpus entero con puntos de control (reanudable)",
+    )
+    reanalizar.add_argument("entrada", help="Corpus .jsonl (un documento por línea) o .txt")
+    reanalizar.add_argument("-o", "--salida", required=True,
+                            help="Fichero de resultados (un JSON por línea)")
+    reanalizar.add_argument("--resume", "--reanudar", dest="reanudar", action="store_true",
+                            help="Continúa desde el último punto de control")
+    paralelo = reanalizar.add_mutually_exclusive_group()
+    paralelo.add_argument("--procesos", type=int, default=1,
+                          help="Procesos para resumir los textos en paralelo")
+    paralelo.add_argument("--hilos", type=int, default=1,
+                          help="Hilos para resumir los textos en paralelo "
+                               "(sin copias ni pickle; en paralelo real solo sin GIL)")
+    reanalizar.add_argument("--cada", type=int, default=CADA_REGISTROS,
+                            help="Documentos entre puntos de control")
+    reanalizar.add_argument("--intervalo", type=float, default=CADA_SEGUNDOS,
+                            help="Segundos máximos entre puntos de control")
+    reanalizar.add_argument("--campo-texto", default="texto",
+                            help="Campo con el texto en cada línea JSONL")
+    reanalizar.add_argument("--sin-riesgo", action="store_true",
+                            help="No incluye el análisis de riesgo psico-emocional")
+    reanalizar.add_argument("--silencioso", action="store_true",
+                            help="No muestra el avance en cada punto de control")
+    _añadir_perfil(reanalizar)
+    reanalizar.set_defaults(funcion=comando_reanalizar)
+
+    coordinar = subcomandos.add_parser(
+        "coordinar",
+        help="Reparte un corpus entre trabajadores por sujeto y une los resultados",
+    )
+    coordinar.add_argument("entrada", help="Corpus .jsonl (una entrada por línea, con id_sujeto)")
+    coordinar.add_argument("-o", "--salida", required=True,
+                           help="Fichero de resultados (un JSON por línea, en el orden del corpus)")
+    coordinar.add_argument("--host", default="127.0.0.1",
+                           help="Dirección de escucha (0.0.0.0 para trabajadores de otras máquinas)")
+    coordinar.add_argument("--puerto", type=int, default=0, help="Puerto (0: uno libre)")
+    coordinar.add_argument("--locales", type=int, default=0,
+                           help="Trabajadores que se lanzan en esta máquina")
+    coordinar.add_argument("--fragmentos", type=int, default=FRAGMENTOS,
+                           help="Fragmentos en que se reparte el corpus")
+    coordinar.add_argument("--seguimiento", action="store_true",
+                           help="Analiza cada sesión con el historial de su sujeto")
+    coordinar.add_argument("--vigilancia", action="store_true",
+                           help="Añade las alertas tempranas (EWMA/CUSUM) de cada sujeto")
+    coordinar.add_argument("--campo-texto", default="texto",
+                           help="Campo con el texto en cada línea JSONL")
+    coordinar.add_argument("--sin-riesgo", action="store_true",
+                           help="No incluye el análisis de riesgo psico-emocional")
+    coordinar.add_argument("--plazo-trabajador", type=float, default=PLAZO_TRABAJADOR,
+                           help="Segundos sin noticias de un trabajador tras los que su "
+                                "fragmento pasa a otro (0: sin límite)")
+    _añadir_perfil(coordinar)
+    coordinar.set_defaults(funcion=comando_coordinar)
+
+    trabajador = subcomandos.add_parser(
+        "trabajador",
+        help="Analiza los fragmentos que le envía un coordinador",
+    )
+    trabajador.add_argument("coordinador", help="host:puerto del coordinador")
+    _añadir_perfil(trabajador)
+    trabajador.set_defaults(funcion=comando_trabajador)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = crear_parser().parse_args(argv)
+    if args.perfil is None:
+        return args.funcion(args)
+
+    with perfilar(args.perfil or _prefijo_perfil(args), todos_los_hilos=True) as perfil:
+        codigo = args.funcion(args)
+    _mostrar_perfil(perfil)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+agrupamiento.py
+
+Agrupamiento de perfiles de estudiantes en toda una cohorte.
+
+Agrupa con k-means por mini-lotes los perfiles (ver casos_similares.py:
+métricas, emociones, campos culturales, tensiones y temas) de una matriz
+de características escrita con EscritorCaracteristicas. La matriz se lee
+proyectada en memoria y por bloques, así que el tamaño de la cohorte no
+está limitado por la memoria:
+
+1. Una pasada por bloques calcula la media y la desviación de cada
+   componente, para estandarizarlos.
+2. Los centroides iniciales se eligen con k-means++ sobre una muestra.
+3. Cada iteración lee un mini-lote de filas al azar, las asigna a su
+   centroide más cercano y mueve cada centroide hacia la media de sus
+   filas con paso 1/(filas vistas por ese centroide).
+4. Una última pasada por bloques asigna cada fila a su grupo.
+
+El resultado se guarda junto al .npy: "<ruta>.grupos.csv" (id_sujeto,
+grupo y distancia al centroide de cada fila) y "<ruta>.centroides.json"
+(centroides en las unidades de las características, tamaño de cada grupo
+e inercia).
+
+Requiere numpy.
+
+Uso:
+    >>> resumen = agrupar_caracteristicas("sesiones.npy", k=8)
+    >>> resumen["tamaños"]
+    [10234, 8812, ...]
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from .caracteristicas import NUM_CARACTERISTICAS, cargar_caracteristicas, leer_ids, ruta_ids
+from .casos_similares import NOMBRES_PERFIL, _numpy, matriz_perfiles
+
+
+# Versión del formato de los centroides guardados
+VERSION_AGRUPAMIENTO = 1
+
+# Filas por bloque en las pasadas completas sobre la matriz
+TAM_BLOQUE = 1 << 16
+
+# Filas por mini-lote
+TAM_LOTE = 4096
+
+# Iteraciones máximas de k-means por mini-lotes
+ITERACIONES = 300
+
+# Desplazamiento medio de los centroides (en desviaciones) por debajo del
+# cual se da por terminado el ajuste
+TOLERANCIA = 1e-3
+
+# Filas de la muestra para elegir los centroides iniciales
+TAM_MUESTRA_INICIAL = 20000
+
+
+def ruta_grupos(ruta: Union[str, Path]) -> Path:
+    ruta = Path(ruta)
+    return ruta.with_name(ruta.name + ".grupos.csv")
+
+
+def ruta_centroides(ruta: Union[str, Path]) -> Path:
+    ruta = Path(ruta)
+    return ruta.with_name(ruta.name + ".centroides.json")
+
+
+# =============================================================================
+# K-MEANS POR MINI-LOTES
+# =============================================================================
+
+def _estadisticos(matriz, transformar: Callable, tam_bloque: int):
+    """Media y desviación de cada componente transformado, en una pasada por bloques."""
+    np = _numpy()
+    suma = suma_cuadrados = None
+    for inicio in range(0, len(matriz), tam_bloque):
+        bloque = transformar(matriz[inicio:inicio + tam_bloque]).astype(np.float64)
+        if suma is None:
+            suma = bloque.sum(axis=0)
+            suma_cuadrados = (bloque ** 2).sum(axis=0)
+        else:
+            suma += bloque.sum(axis=0)
+            suma_cuadrados += (bloque ** 2).sum(axis=0)
+    media = suma / len(matriz)
+    desviacion = np.sqrt(np.maximum(suma_cuadrados / len(matriz) - media ** 2, 0))
+    desviacion[desviacion == 0] = 1
+    return media.astype(np.float32), desviacion.astype(np.float32)
+
+
+def _distancias_cuadradas(puntos, centroides, normas_centroides):
+    """Distancia euclídea al cuadrado de cada punto a cada centroide."""
+    np = _numpy()
+    distancias = (puntos ** 2).sum(axis=1, keepdims=True) - 2 * (puntos @ centroides.T) + normas_centroides
+    return np.maximum(distancias, 0, out=distancias)
+
+
+def _kmeans_mas_mas(puntos, k: int, generador):
+    """Centroides iniciales con k-means++."""
+    np = _numpy()
+    centroides = [puntos[generador.integers(len(puntos))]]
+    minimas = ((puntos - centroides[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = minimas.sum()
+        if total <= 0:
+            indice = generador.integers(len(puntos))
+        else:
+            indice = generador.choice(len(puntos), p=minimas / total)
+        centroides.append(puntos[indice])
+        minimas = np.minimum(minimas, ((puntos - puntos[indice]) ** 2).sum(axis=1))
+    return np.array(centroides, dtype=np.float32)
+
+
+def kmeans_minilotes(
+    matriz,
+    k: int,
+    transformar: Optional[Callable] = None,
+    tam_lote: int = TAM_LOTE,
+    iteraciones: int = ITERACIONES,
+    tolerancia: float = TOLERANCIA,
+    semilla: int = 0,
+    tam_bloque: int = TAM_BLOQUE
+) -> Tuple[object, Dict]:
+    """
+    Ajusta k centroides con k-means por mini-lotes.
+
+    Args:
+        matriz: Array 2D de numpy (puede ser un memmap); solo se leen
+            bloques y mini-lotes
+        k: Número de grupos
+        transformar: Función que convierte un bloque de filas en los puntos
+            a agrupar (ej: matriz_perfiles); por defecto, las filas tal cual
+        tam_lote: Filas por mini-lote
+        iteraciones: Iteraciones máximas
+        tolerancia: Desplazamiento medio de los centroides, en el espacio
+            estandarizado, por debajo del cual se para
+        semilla: Semilla del muestreo
+        tam_bloque: Filas por bloque en las pasadas completas
+
+    Returns:
+        (centroides en el espacio estandarizado, info) con info = {"media",
+        "desviacion", "iteraciones"}; media y desviación sirven para
+        estandarizar (ver asignar_grupos)
+    """
+    np = _numpy()
+    if transformar is None:
+        transformar = lambda bloque: np.asarray(bloque, dtype=np.float32)  # noqa: E731
+    n = len(matriz)
+    if n < k:
+        raise ValueError(f"Hay {n} filas para {k} grupos")
+
+    media, desviacion = _estadisticos(matriz, transformar, tam_bloque)
+
+    def lote(indices):
+        # Índices ordenados: lecturas más secuenciales en el memmap
+        return (transformar(matriz[np.sort(indices)]) - media) / desviacion
+
+    generador = np.random.default_rng(semilla)
+    muestra = lote(generador.choice(n, size=min(n, max(TAM_MUESTRA_INICIAL, k)), replace=False))
+    centroides = _kmeans_mas_mas(muestra, k, generador)
+    vistos = np.zeros(k, dtype=np.float64)
+
+    iteracion = 0
+    for iteracion in range(1, iteraciones + 1):
+        puntos = lote(generador.integers(0, n, size=min(tam_lote, n)))
+        asignacion = np.argmin(
+            _distancias_cuadradas(puntos, centroides, (centroides ** 2).sum(axis=1)), axis=1
+        )
+
+        cuentas = np.bincount(asignacion, minlength=k)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, puntos)
+        usados = cuentas > 0
+        vistos[usados] += cuentas[usados]
+
+        # c += (suma - n·c) / vistos: media móvil con paso 1/vistos por punto
+        paso = (sumas[usados] - cuentas[usados, None] * centroides[usados]) / vistos[usados, None]
+        centroides[usados] += paso.astype(np.float32)
+
+        if np.sqrt((paso ** 2).sum(axis=1)).sum() / k < tolerancia:
+            break
+
+    return centroides, {"media": media, "desviacion": desviacion, "iteraciones": iteracion}
+
+
+def asignar_grupos(
+    matriz,
+    centroides,
+    media,
+    desviacion,
+    transformar: Optional[Callable] = None,
+    tam_bloque: int = TAM_BLOQUE
+):
+    """
+    Asigna cada fila a su centroide más cercano, recorriendo la matriz por bloques.
+
+    Args:
+        matriz: Array 2D de numpy (puede ser un memmap)
+        centroides, media, desviacion: Resultado de kmeans_minilotes
+        transformar: La misma función que en kmeans_minilotes
+        tam_bloque: Filas por bloque
+
+    Returns:
+        (grupos, distancias): arrays con el grupo de cada fila y su
+        distancia euclídea (estandarizada) al centroide
+    """
+    np = _numpy()
+    if transformar is None:
+        transformar = lambda bloque: np.asarray(bloque, dtype=np.float32)  # noqa: E731
+    grupos = np.empty(len(matriz), dtype=np.int32)
+    distancias = np.empty(len(matriz), dtype=np.float32)
+    normas = (centroides ** 2).sum(axis=1)
+    for inicio in range(0, len(matriz), tam_bloque):
+        puntos = (transformar(matriz[inicio:inicio + tam_bloque]) - media) / desviacion
+        cuadrados = _distancias_cuadradas(puntos, centroides, normas)
+        fin = inicio + len(puntos)
+        grupos[inicio:fin] = np.argmin(cuadrados, axis=1)
+        distancias[inicio:fin] = np.sqrt(cuadrados[np.arange(len(puntos)), grupos[inicio:fin]])
+    return grupos, distancias
+
+
+# =============================================================================
+# COHORTES
+# =============================================================================
+
+def agrupar_caracteristicas(
+    ruta: Union[str, Path],
+    k: int = 8,
+    tam_lote: int = TAM_LOTE,
+    iteraciones: int = ITERACIONES,
+    semilla: int = 0,
+    guardar: bool = True
+) -> Dict:
+    """
+    Agrupa los perfiles de un .npy de características y guarda el resultado.
+
+    Args:
+        ruta: Fichero .npy escrito con EscritorCaracteristicas
+        k: Número de grupos
+        tam_lote: Filas por mini-lote
+        iteraciones: Iteraciones máximas de k-means
+        semilla: Semilla del muestreo
+        guardar: Si True, escribe "<ruta>.grupos.csv" y "<ruta>.centroides.json"
+
+    Returns:
+        Dict {"filas", "k", "iteraciones", "inercia", "tamaños", "centroides",
+        "grupos", "distancias"}; "centroides" es una lista de dicts
+        {componente del perfil: valor} en las unidades de las
+        características, y "grupos" y "distancias" son arrays por fila
+
+    Raises:
+        ImportError: Si numpy no está instalado
+        ValueError: Si el fichero es de otra versión del esquema
+    """
+    np = _numpy()
+    matriz = cargar_caracteristicas(ruta, mmap=True)
+    if matriz.ndim != 2 or matriz.shape[1] != NUM_CARACTERISTICAS:
+        raise ValueError(f"Forma de la matriz inesperada: {matriz.shape}")
+
+    centroides, info = kmeans_minilotes(
+        matriz, k, matriz_perfiles, tam_lote=tam_lote, iteraciones=iteraciones, semilla=semilla
+    )
+    grupos, distancias = asignar_grupos(
+        matriz, centroides, info["media"], info["desviacion"], matriz_perfiles
+    )
+
+    # Centroides en las unidades originales: se deshace la estandarización y log(1 + x)
+    originales = np.expm1(centroides * info["desviacion"] + info["media"])
+    resumen = {
+        "filas": len(matriz),
+        "k": k,
+        "iteraciones": info["iteraciones"],
+        "inercia": float((distancias.astype(np.float64) ** 2).sum()),
+        "tamaños": np.bincount(grupos, minlength=k).tolist(),
+        "centroides": [
+            {nombre: round(float(valor), 4) for nombre, valor in zip(NOMBRES_PERFIL, fila)}
+            for fila in originales
+        ],
+    }
+
+    if guardar:
+        ids = leer_ids(ruta) if ruta_ids(ruta).exists() else [""] * len(matriz)
+        with open(ruta_grupos(ruta), "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["fila", "id_sujeto", "grupo", "distancia"])
+            for fila, (id_sujeto, grupo, distancia) in enumerate(zip(ids, grupos, distancias)):
+                escritor.writerow([fila, id_sujeto, int(grupo), f"{distancia:.4f}"])
+
+        with open(ruta_centroides(ruta), "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": VERSION_AGRUPAMIENTO, "componentes": NOMBRES_PERFIL, **resumen},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    resumen["grupos"] = grupos
+    resumen["distancias"] = distancias
+    return resumen
@@ -0,0 +1,283 @@
+"""
+caracteristicas.py
+
+Vectores numéricos de longitud fija para modelos.
+
+Convierte el resultado de analisis_completo en un vector float32 con todas
+las magnitudes numéricas de los módulos: métricas, conteos de emociones,
+temas, campos culturales y tensiones, indicadores de las categorías de
+riesgo, número de bloqueos y niveles como ordinales. El vector no tiene un
+esquema propio: son las columnas numéricas de exportacion.ESQUEMA_COLUMNAS,
+con el mismo nombre y en el mismo orden, más las columnas de nivel
+(ESCALAS_COLUMNAS) codificadas por su posición en la escala. Las columnas de
+texto sin escala (id_sujeto, estado o tensión dominante) quedan fuera.
+NOMBRES_CARACTERISTICAS da el nombre de cada posición y
+VERSION_CARACTERISTICAS es la versión del esquema de columnas.
+
+Las secciones que faltan en el resultado (ej: riesgo no evaluado) dejan sus
+posiciones a NaN.
+
+EscritorCaracteristicas escribe los vectores según llegan en un fichero
+.npy (float32, little-endian, una fila por texto) sin necesidad de numpy;
+se leen proyectados en memoria con cargar_caracteristicas() o
+numpy.load(ruta, mmap_mode="r"). Junto al .npy se guarda
+"<ruta>.esquema.json" con la versión y los nombres de las columnas, y
+"<ruta>.ids.txt" con el id_sujeto de cada fila (una línea por fila).
+
+Uso:
+    >>> with EscritorCaracteristicas("sesiones.npy") as escritor:
+    ...     for resultado in analizar_lote(entradas):
+    ...         escritor.escribir(resultado)
+    >>> X = cargar_caracteristicas("sesiones.npy")   # numpy.memmap (n, d)
+"""
+
+import json
+import math
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .exportacion import (
+    ESCALAS_COLUMNAS,
+    ESQUEMA_COLUMNAS,
+    METRICAS_DIAGNOSTICO,
+    NIVELES_LINGUISTICOS,
+    NIVELES_RIESGO,
+    NIVELES_RIESGO_BLOQUEO,
+    TIPO_TEXTO,
+    VERSION_ESQUEMA_COLUMNAS,
+)
+
+
+# =============================================================================
+# ESQUEMA
+# =============================================================================
+
+# Versión del esquema de características: la del esquema de columnas del que
+# se derivan
+VERSION_CARACTERISTICAS = VERSION_ESQUEMA_COLUMNAS
+
+# Métricas del diagnóstico, en el orden del esquema
+METRICAS = tuple(metrica for metrica, _ in METRICAS_DIAGNOSTICO)
+
+
+def _ordinal(valor: str, niveles: Sequence[str]) -> float:
+    """Posición de un nivel en su escala (NaN si no está)."""
+    try:
+        return float(niveles.index(valor))
+    except ValueError:
+        return math.nan
+
+
+# Columnas del vector: (nombre, extractor, escala o None). Son las columnas
+# numéricas de ESQUEMA_COLUMNAS y las de texto con escala (los niveles)
+_COLUMNAS: Tuple[Tuple[str, Callable[[Dict], Any], Optional[Tuple[str, ...]]], ...] = tuple(
+    (nombre, extraer, ESCALAS_COLUMNAS.get(nombre))
+    for nombre, tipo, extraer in ESQUEMA_COLUMNAS
+    if tipo != TIPO_TEXTO or nombre in ESCALAS_COLUMNAS
+)
+
+# Nombre de cada posición del vector, en orden
+NOMBRES_CARACTERISTICAS: Tuple[str, ...] = tuple(nombre for nombre, _, _ in _COLUMNAS)
+
+# Longitud de los vectores
+NUM_CARACTERISTICAS = len(NOMBRES_CARACTERISTICAS)
+
+
+def vector_caracteristicas(resultado: Dict) -> List[float]:
+    """
+    Calcula el vector de características de un resultado.
+
+    Args:
+        resultado: Resultado de analisis_completo
+
+    Returns:
+        Lista de NUM_CARACTERISTICAS floats, en el orden de
+        NOMBRES_CARACTERISTICAS (NaN en las secciones que faltan)
+    """
+    vector = []
+    for _, extraer, escala in _COLUMNAS:
+        valor = extraer(resultado)
+        if valor is None:
+            vector.append(math.nan)
+        elif escala is not None:
+            vector.append(_ordinal(valor, escala))
+        else:
+            vector.append(float(valor))
+    return vector
+
+
+# =============================================================================
+# ESCRITURA EN .npy
+# =============================================================================
+
+_MAGIA_NPY = b"\x93NUMPY\x01\x00"
+
+# Longitud total de la cabecera reservada (múltiplo de 64), suficiente para
+# cualquier número de filas; se reescribe al cerrar con la forma final
+_TAM_CABECERA_NPY = 128
+
+
+def _cabecera_npy(filas: int, columnas: int) -> bytes:
+    """Cabecera .npy (versión 1.0) de una matriz float32 (filas, columnas)."""
+    descripcion = (
+        f"{{'descr': '<f4', 'fortran_order': False, 'shape': ({filas}, {columnas}), }}"
+    ).encode("latin1")
+    tam_diccionario = _TAM_CABECERA_NPY - len(_MAGIA_NPY) - 2
+    descripcion = descripcion.ljust(tam_diccionario - 1) + b"\n"
+    return _MAGIA_NPY + struct.pack("<H", tam_diccionario) + descripcion
+
+
+def ruta_esquema(ruta: Union[str, Path]) -> Path:
+    """Ruta del fichero de esquema que acompaña a un .npy de características."""
+    ruta = Path(ruta)
+    return ruta.with_name(ruta.name + ".esquema.json")
+
+
+def ruta_ids(ruta: Union[str, Path]) -> Path:
+    """Ruta del fichero con el id_sujeto de cada fila de un .npy de características."""
+    ruta = Path(ruta)
+    return ruta.with_name(ruta.name + ".ids.txt")
+
+
+def leer_ids(ruta: Union[str, Path]) -> List[str]:
+    """
+    Identificadores de las filas de un .npy de características.
+
+    Args:
+        ruta: Fichero .npy
+
+    Returns:
+        Lista con el id_sujeto de cada fila ("" si no se indicó)
+    """
+    with open(ruta_ids(ruta), encoding="utf-8") as f:
+        return [linea.rstrip("\n") for linea in f]
+
+
+class EscritorCaracteristicas:
+    """
+    Escribe vectores de características en un .npy según llegan.
+
+    Las filas se escriben en secuencia tras una cabecera reservada, que se
+    completa con el número final de filas al cerrar. No necesita numpy.
+    Usar como gestor de contexto o llamar a cerrar(); un fichero sin cerrar
+    no es un .npy válido.
+    """
+
+    def __init__(self, ruta: Union[str, Path]):
+        """
+        Args:
+            ruta: Fichero .npy de salida (se sobrescribe)
+        """
+        self.ruta = Path(ruta)
+        self.filas = 0
+        self._fichero = open(self.ruta, "wb")
+        self._fichero.write(_cabecera_npy(0, NUM_CARACTERISTICAS))
+        self._ids = open(ruta_ids(self.ruta), "w", encoding="utf-8")
+
+    def __enter__(self) -> "EscritorCaracteristicas":
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def escribir(self, resultado: Dict):
+        """Añade la fila de un resultado de analisis_completo."""
+        self.escribir_vector(vector_caracteristicas(resultado), resultado.get("id_sujeto"))
+
+    def escribir_vector(self, vector: Sequence[float], id_sujeto: Optional[str] = None):
+        """
+        Añade una fila ya calculada.
+
+        Args:
+            vector: Vector de características
+            id_sujeto: Identificador de la fila (opcional)
+
+        Raises:
+            ValueError: Si el vector no tiene NUM_CARACTERISTICAS elementos
+        """
+        if len(vector) != NUM_CARACTERISTICAS:
+            raise ValueError(
+                f"El vector tiene {len(vector)} elementos; se esperaban {NUM_CARACTERISTICAS}"
+            )
+        fila = array("f", vector)
+        if sys.byteorder == "big":
+            fila.byteswap()
+        self._fichero.write(fila.tobytes())
+        # Sin saltos de línea: una línea por fila
+        self._ids.write(" ".join(str(id_sujeto or "").splitlines()) + "\n")
+        self.filas += 1
+
+    def cerrar(self):
+        """Completa la cabecera con el número de filas y escribe el esquema."""
+        if self._fichero.closed:
+            return
+        self._fichero.seek(0)
+        self._fichero.write(_cabecera_npy(self.filas, NUM_CARACTERISTICAS))
+        self._fichero.close()
+        self._ids.close()
+
+        with open(ruta_esquema(self.ruta), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": VERSION_CARACTERISTICAS,
+                    "filas": self.filas,
+                    "nombres": NOMBRES_CARACTERISTICAS,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+def exportar_caracteristicas(resultados: Iterable[Dict], ruta: Union[str, Path]) -> int:
+    """
+    Escribe los vectores de características de unos resultados en un .npy.
+
+    Args:
+        resultados: Resultados de analisis_completo (puede ser un generador)
+        ruta: Fichero .npy de salida
+
+    Returns:
+        Número de filas escritas
+    """
+    with EscritorCaracteristicas(ruta) as escritor:
+        for resultado in resultados:
+            escritor.escribir(resultado)
+    return escritor.filas
+
+
+def cargar_caracteristicas(ruta: Union[str, Path], mmap: bool = True):
+    """
+    Carga una matriz de características escrita con EscritorCaracteristicas.
+
+    Args:
+        ruta: Fichero .npy
+        mmap: Si True, proyecta el fichero en memoria en lugar de leerlo
+
+    Returns:
+        Array de numpy float32 de forma (filas, NUM_CARACTERISTICAS)
+
+    Raises:
+        ImportError: Si numpy no está instalado
+        ValueError: Si el fichero es de otra versión del esquema
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("Para cargar características instala numpy: pip install numpy") from None
+
+    esquema = ruta_esquema(ruta)
+    version: Optional[int] = None
+    if esquema.exists():
+        with open(esquema, encoding="utf-8") as f:
+            version = json.load(f).get("version")
+    if version != VERSION_CARACTERISTICAS:
+        raise ValueError(
+            f"El fichero usa la versión {version} del esquema de características; "
+            f"se esperaba la {VERSION_CARACTERISTICAS}"
+        )
+
+    return np.load(ruta, mmap_mode="r" if mmap else None, allow_pickle=False)
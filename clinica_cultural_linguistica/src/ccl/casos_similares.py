@@ -0,0 +1,432 @@
+"""
+casos_similares.py
+
+Búsqueda de los casos más parecidos a un perfil (k vecinos más cercanos).
+
+Responde a "¿qué 20 sujetos anteriores tienen un perfil más parecido a
+este?", para que el equipo clínico pueda revisar qué funcionó con ellos. El
+perfil de un análisis reúne, del vector de características (ver
+caracteristicas.py), las métricas lingüísticas, las emociones, los campos
+culturales, las tensiones y los temas. Cada componente se comprime con
+log(1 + x) para que ninguna escala domine y el vector se normaliza a
+norma 1: la similitud entre dos perfiles es su producto escalar (coseno).
+
+IndiceCasos guarda los perfiles en una matriz float32 que crece al añadir
+casos (inserción incremental) y ofrece dos búsquedas:
+
+- Exacta: productos de matrices por bloques de TAM_BLOQUE filas, con
+  selección parcial de los k mejores de cada bloque. Adecuada hasta
+  cientos de miles de casos.
+- Aproximada (IVF): tras construir_ivf(), los perfiles se reparten en
+  listas según su centroide más cercano (k-means esférico) y cada consulta
+  solo recorre las nprobe listas más cercanas. Para cohortes grandes; los
+  casos añadidos después se asignan a su lista al insertarlos.
+
+Requiere numpy.
+
+Uso:
+    >>> indice = IndiceCasos()
+    >>> for resultado in resultados:
+    ...     indice.añadir(resultado["id_sujeto"], resultado)
+    >>> indice.buscar(resultado_nuevo, k=20)
+    [('paciente_042', 0.97), ...]
+"""
+
+import math
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .caracteristicas import METRICAS, NOMBRES_CARACTERISTICAS, vector_caracteristicas
+
+
+# =============================================================================
+# PERFILES
+# =============================================================================
+
+_PREFIJOS_PERFIL = (
+    "diagnostico.emocion.",
+    "radiografia.campo.",
+    "radiografia.tension.",
+    "bloqueos.tema.",
+)
+
+# Componentes del perfil, en orden
+NOMBRES_PERFIL: Tuple[str, ...] = tuple(f"diagnostico.{metrica}" for metrica in METRICAS) + tuple(
+    nombre for nombre in NOMBRES_CARACTERISTICAS if nombre.startswith(_PREFIJOS_PERFIL)
+)
+
+DIMENSION_PERFIL = len(NOMBRES_PERFIL)
+
+_POSICIONES_PERFIL = tuple(NOMBRES_CARACTERISTICAS.index(nombre) for nombre in NOMBRES_PERFIL)
+
+# Filas de cada bloque en la búsqueda exacta
+TAM_BLOQUE = 1 << 16
+
+# Vecinos devueltos por defecto
+K_POR_DEFECTO = 20
+
+# Listas del IVF que recorre cada consulta por defecto
+NPROBE_POR_DEFECTO = 32
+
+
+def vector_perfil(resultado: Dict) -> List[float]:
+    """
+    Perfil de un resultado de analisis_completo, sin normalizar.
+
+    Args:
+        resultado: Resultado de analisis_completo
+
+    Returns:
+        Lista de DIMENSION_PERFIL floats, en el orden de NOMBRES_PERFIL, con
+        log(1 + x) aplicado (las secciones que faltan cuentan como 0)
+    """
+    caracteristicas = vector_caracteristicas(resultado)
+    perfil = []
+    for posicion in _POSICIONES_PERFIL:
+        valor = caracteristicas[posicion]
+        perfil.append(0.0 if math.isnan(valor) or valor <= 0 else math.log1p(valor))
+    return perfil
+
+
+def matriz_perfiles(caracteristicas):
+    """
+    Perfiles (sin normalizar) de una matriz de características.
+
+    Equivale a vector_perfil fila a fila, para matrices escritas con
+    EscritorCaracteristicas (ver cargar_caracteristicas).
+
+    Args:
+        caracteristicas: Array de numpy (n, NUM_CARACTERISTICAS)
+
+    Returns:
+        Array float32 (n, DIMENSION_PERFIL)
+    """
+    np = _numpy()
+    perfiles = np.asarray(caracteristicas, dtype=np.float32)[:, _POSICIONES_PERFIL]
+    perfiles = np.nan_to_num(perfiles, nan=0.0)
+    np.maximum(perfiles, 0, out=perfiles)
+    return np.log1p(perfiles, out=perfiles)
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError(
+            "Para buscar casos similares instala numpy: pip install numpy"
+        ) from None
+    return np
+
+
+# =============================================================================
+# ÍNDICE
+# =============================================================================
+
+class IndiceCasos:
+    """
+    Índice de perfiles normalizados para buscar los k casos más parecidos.
+
+    Atributos:
+        ids: Identificador de cada caso, en orden de inserción
+    """
+
+    def __init__(self, dimension: int = DIMENSION_PERFIL, capacidad: int = 1024):
+        """
+        Args:
+            dimension: Longitud de los perfiles (DIMENSION_PERFIL para los
+                de vector_perfil)
+            capacidad: Filas reservadas inicialmente (la matriz crece sola)
+
+        Raises:
+            ImportError: Si numpy no está instalado
+        """
+        self._np = _numpy()
+        self.dimension = dimension
+        self.ids: List[Hashable] = []
+        self._vectores = self._np.empty((capacidad, dimension), dtype=self._np.float32)
+
+        # IVF (ver construir_ivf)
+        self._centroides = None
+        self._listas: List = []          # índices de fila de cada lista
+        self._tam_listas = None          # filas ocupadas de cada lista
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vectores(self):
+        """Matriz (n, dimension) de los perfiles normalizados (vista, sin copia)."""
+        return self._vectores[:len(self.ids)]
+
+    @property
+    def tiene_ivf(self) -> bool:
+        return self._centroides is not None
+
+    # -- Inserción -----------------------------------------------------------
+
+    def _normalizar(self, matriz):
+        np = self._np
+        matriz = np.asarray(matriz, dtype=np.float32)
+        if matriz.ndim != 2 or matriz.shape[1] != self.dimension:
+            raise ValueError(
+                f"Los perfiles deben tener {self.dimension} componentes; forma recibida {matriz.shape}"
+            )
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        normas[normas == 0] = 1
+        return matriz / normas
+
+    def _como_matriz(self, perfiles):
+        """Resultados de analisis_completo o vectores -> matriz normalizada."""
+        filas = [
+            vector_perfil(perfil) if isinstance(perfil, Mapping) else perfil
+            for perfil in perfiles
+        ]
+        if not filas:
+            return self._np.empty((0, self.dimension), dtype=self._np.float32)
+        return self._normalizar(filas)
+
+    def añadir(self, id_caso: Hashable, perfil: Union[Dict, Sequence[float]]):
+        """
+        Añade un caso.
+
+        Args:
+            id_caso: Identificador del caso (ej: id_sujeto)
+            perfil: Resultado de analisis_completo o vector de DIMENSION_PERFIL
+                componentes (ver vector_perfil)
+        """
+        self.añadir_lote([id_caso], [perfil])
+
+    def añadir_lote(self, ids: Sequence[Hashable], perfiles) -> None:
+        """
+        Añade varios casos de una vez.
+
+        Args:
+            ids: Identificadores de los casos
+            perfiles: Resultados de analisis_completo, vectores o una matriz
+                de numpy (n, dimension)
+        """
+        np = self._np
+        if isinstance(perfiles, np.ndarray):
+            matriz = self._normalizar(perfiles)
+        else:
+            matriz = self._como_matriz(perfiles)
+        if len(ids) != len(matriz):
+            raise ValueError(f"{len(ids)} identificadores para {len(matriz)} perfiles")
+
+        inicio = len(self.ids)
+        fin = inicio + len(matriz)
+        if fin > len(self._vectores):
+            nueva = np.empty((max(fin, 2 * len(self._vectores)), self.dimension), dtype=np.float32)
+            nueva[:inicio] = self._vectores[:inicio]
+            self._vectores = nueva
+        self._vectores[inicio:fin] = matriz
+        self.ids.extend(ids)
+
+        if self._centroides is not None:
+            self._asignar(np.arange(inicio, fin), matriz)
+
+    # -- Búsqueda exacta -----------------------------------------------------
+
+    def _mejores(self, similitudes, indices, k):
+        """Los k mejores de cada fila, de mayor a menor similitud."""
+        np = self._np
+        if similitudes.shape[1] > k:
+            parcial = np.argpartition(-similitudes, k - 1, axis=1)[:, :k]
+            similitudes = np.take_along_axis(similitudes, parcial, axis=1)
+            indices = np.take_along_axis(indices, parcial, axis=1)
+        orden = np.argsort(-similitudes, axis=1, kind="stable")
+        return np.take_along_axis(similitudes, orden, axis=1), np.take_along_axis(indices, orden, axis=1)
+
+    def _buscar_exacto(self, consultas, k):
+        np = self._np
+        vectores = self.vectores
+        num_consultas = len(consultas)
+        mejores_sim = np.empty((num_consultas, 0), dtype=np.float32)
+        mejores_idx = np.empty((num_consultas, 0), dtype=np.int64)
+
+        for inicio in range(0, len(vectores), TAM_BLOQUE):
+            bloque = vectores[inicio:inicio + TAM_BLOQUE]
+            similitudes = consultas @ bloque.T
+            indices = np.broadcast_to(
+                np.arange(inicio, inicio + len(bloque), dtype=np.int64), similitudes.shape
+            )
+            similitudes, indices = self._mejores(similitudes, indices, k)
+            mejores_sim, mejores_idx = self._mejores(
+                np.concatenate([mejores_sim, similitudes], axis=1),
+                np.concatenate([mejores_idx, indices], axis=1),
+                k,
+            )
+        return mejores_sim, mejores_idx
+
+    # -- IVF -----------------------------------------------------------------
+
+    def construir_ivf(
+        self,
+        num_listas: Optional[int] = None,
+        iteraciones: int = 10,
+        muestra: int = 1 << 16,
+        semilla: int = 0
+    ):
+        """
+        Construye el índice aproximado (IVF) sobre los casos actuales.
+
+        Los centroides se entrenan con k-means esférico sobre una muestra y
+        todos los casos se asignan a la lista de su centroide más cercano.
+        Si el índice crece mucho después de construirlo (varias veces su
+        tamaño), conviene volver a construirlo.
+
+        Args:
+            num_listas: Número de listas (por defecto, 4·√n)
+            iteraciones: Iteraciones de k-means
+            muestra: Casos como máximo para entrenar los centroides
+            semilla: Semilla del muestreo
+        """
+        np = self._np
+        vectores = self.vectores
+        n = len(vectores)
+        if n == 0:
+            raise ValueError("El índice está vacío")
+        if num_listas is None:
+            num_listas = max(1, int(4 * math.sqrt(n)))
+        num_listas = min(num_listas, n)
+
+        generador = np.random.default_rng(semilla)
+        entrenamiento = vectores[generador.choice(n, size=min(n, max(muestra, num_listas)), replace=False)]
+        centroides = entrenamiento[generador.choice(len(entrenamiento), size=num_listas, replace=False)].copy()
+
+        for _ in range(iteraciones):
+            asignacion = self._mas_cercano(entrenamiento, centroides)
+            sumas = np.zeros_like(centroides)
+            np.add.at(sumas, asignacion, entrenamiento)
+            cuentas = np.bincount(asignacion, minlength=num_listas)
+            vacias = cuentas == 0
+            if vacias.any():
+                # Las listas vacías se vuelven a sembrar con casos al azar
+                sumas[vacias] = entrenamiento[generador.choice(len(entrenamiento), size=int(vacias.sum()))]
+            normas = np.linalg.norm(sumas, axis=1, keepdims=True)
+            normas[normas == 0] = 1
+            centroides = (sumas / normas).astype(np.float32)
+
+        self._centroides = centroides
+        self._listas = [np.empty(16, dtype=np.int64) for _ in range(num_listas)]
+        self._tam_listas = np.zeros(num_listas, dtype=np.int64)
+        self._asignar(np.arange(n), vectores)
+
+    def _mas_cercano(self, matriz, centroides):
+        """Índice del centroide más cercano a cada fila, por bloques."""
+        np = self._np
+        asignacion = np.empty(len(matriz), dtype=np.int64)
+        for inicio in range(0, len(matriz), TAM_BLOQUE):
+            bloque = matriz[inicio:inicio + TAM_BLOQUE]
+            asignacion[inicio:inicio + len(bloque)] = np.argmax(bloque @ centroides.T, axis=1)
+        return asignacion
+
+    def _asignar(self, filas, matriz):
+        """Añade unas filas a las listas de sus centroides más cercanos."""
+        np = self._np
+        asignacion = self._mas_cercano(matriz, self._centroides)
+        orden = np.argsort(asignacion, kind="stable")
+        listas, inicios = np.unique(asignacion[orden], return_index=True)
+        fines = np.append(inicios[1:], len(orden))
+
+        for lista, inicio, fin in zip(listas, inicios, fines):
+            nuevas = filas[orden[inicio:fin]]
+            ocupadas = self._tam_listas[lista]
+            total = ocupadas + len(nuevas)
+            actual = self._listas[lista]
+            if total > len(actual):
+                ampliada = np.empty(max(total, 2 * len(actual)), dtype=np.int64)
+                ampliada[:ocupadas] = actual[:ocupadas]
+                self._listas[lista] = actual = ampliada
+            actual[ocupadas:total] = nuevas
+            self._tam_listas[lista] = total
+
+    def _buscar_ivf(self, consultas, k, nprobe):
+        np = self._np
+        vectores = self.vectores
+        nprobe = min(nprobe, len(self._centroides))
+        cercanas = np.argpartition(-(consultas @ self._centroides.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        mejores_sim = np.full((len(consultas), k), -np.inf, dtype=np.float32)
+        mejores_idx = np.full((len(consultas), k), -1, dtype=np.int64)
+        for i, consulta in enumerate(consultas):
+            candidatos = np.concatenate([
+                self._listas[lista][:self._tam_listas[lista]] for lista in cercanas[i]
+            ])
+            if not len(candidatos):
+                continue
+            similitudes, indices = self._mejores(
+                (vectores[candidatos] @ consulta)[None, :], candidatos[None, :], k
+            )
+            mejores_sim[i, :similitudes.shape[1]] = similitudes[0]
+            mejores_idx[i, :indices.shape[1]] = indices[0]
+        return mejores_sim, mejores_idx
+
+    # -- API -----------------------------------------------------------------
+
+    def buscar_lote(
+        self,
+        perfiles,
+        k: int = K_POR_DEFECTO,
+        exacto: Optional[bool] = None,
+        nprobe: int = NPROBE_POR_DEFECTO
+    ) -> List[List[Tuple[Hashable, float]]]:
+        """
+        Busca los k casos más parecidos a cada uno de varios perfiles.
+
+        Args:
+            perfiles: Resultados de analisis_completo, vectores o una matriz
+                de numpy (m, dimension)
+            k: Número de vecinos por perfil
+            exacto: True para la búsqueda exacta, False para el IVF; None usa
+                el IVF si se ha construido
+            nprobe: Listas del IVF que se recorren por consulta (más listas:
+                más exacto y más lento)
+
+        Returns:
+            Para cada perfil, lista de (id del caso, similitud coseno) de
+            mayor a menor similitud ([] si no hay perfiles)
+        """
+        np = self._np
+        if isinstance(perfiles, np.ndarray):
+            consultas = self._normalizar(perfiles)
+        else:
+            consultas = self._como_matriz(perfiles)
+        if len(consultas) == 0:
+            return []
+        k = min(k, len(self.ids))
+        if k == 0:
+            return [[] for _ in range(len(consultas))]
+
+        if exacto is None:
+            exacto = self._centroides is None
+        if exacto:
+            similitudes, indices = self._buscar_exacto(consultas, k)
+        else:
+            if self._centroides is None:
+                raise ValueError("El IVF no está construido (ver construir_ivf)")
+            similitudes, indices = self._buscar_ivf(consultas, k, nprobe)
+
+        return [
+            [(self.ids[indice], float(similitud))
+             for similitud, indice in zip(fila_sim, fila_idx) if indice >= 0]
+            for fila_sim, fila_idx in zip(similitudes, indices)
+        ]
+
+    def buscar(
+        self,
+        perfil: Union[Dict, Sequence[float]],
+        k: int = K_POR_DEFECTO,
+        exacto: Optional[bool] = None,
+        nprobe: int = NPROBE_POR_DEFECTO
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Busca los k casos más parecidos a un perfil.
+
+        Args:
+            perfil: Resultado de analisis_completo o vector (ver vector_perfil)
+            k, exacto, nprobe: Ver buscar_lote
+
+        Returns:
+            Lista de (id del caso, similitud coseno), de mayor a menor
+        """
+        return self.buscar_lote([perfil], k, exacto, nprobe)[0]
@@ -0,0 +1,687 @@
+"""
+corpus.py
+
+Lectura de corpus grandes (ficheros .txt y .jsonl) proyectados en memoria.
+
+Pensado para análisis offline sobre el archivo completo (decenas de GB): los
+ficheros se abren con mmap y el texto se tokeniza directamente sobre los
+bytes UTF-8 con expresiones regulares compiladas, sin convertir el fichero
+en objetos str. De cada segmento solo se decodifican los tipos distintos
+(una vez por segmento, no por aparición), los bordes y las ventanas de
+contexto alrededor de las palabras emocionales. El resultado es un
+ResumenTexto por documento, idéntico al que daría resumir_texto() sobre el
+texto decodificado, que alimenta a los módulos de análisis.
+
+Al trabajar sobre mmap, las pasadas repetidas sobre el mismo corpus
+aprovechan la caché de páginas del sistema operativo.
+
+Formatos:
+- .txt: cada fichero es un documento (id_sujeto = nombre del fichero)
+- .jsonl / .ndjson: un documento por línea, con el texto en campo_texto y el
+  resto de campos como entrada (id_sujeto, fecha, metadatos...)
+
+Uso:
+    >>> with LectorCorpus("archivo/sesiones.jsonl") as lector:
+    ...     for resultado in lector.analizar():
+    ...         print(resultado["id_sujeto"])
+"""
+
+import json
+import mmap
+import re
+from collections import Counter, deque
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .utils import es_verbo_pasado
+from .deteccion_bloqueos_discursivos import (
+    PALABRAS_EMOCIONALES_IMPORTANTES,
+    RADIO_CONTEXTO_EMOCIONAL,
+)
+from .resumen_texto import (
+    CARACTERES_BUSCADOS,
+    EXPRESIONES_BUSCADAS,
+    LONGITUD_BORDE,
+    TAM_SEGMENTO,
+    VOCABULARIO_LEXICO,
+    ResumenTexto,
+    _contexto_breve,
+    resumir_segmento,
+    resumir_texto,
+)
+
+
+# =============================================================================
+# PATRONES SOBRE BYTES UTF-8
+# =============================================================================
+
+def _clase_bytes_latinos(condicion) -> bytes:
+    """
+    Construye una alternativa de regex de bytes con los caracteres de
+    U+0080 a U+017F (dos bytes en UTF-8) que cumplen la condición.
+    """
+    por_inicial = {}
+    for codigo in range(0x80, 0x180):
+        caracter = chr(codigo)
+        if condicion(caracter):
+            inicial, segundo = caracter.encode('utf-8')
+            por_inicial.setdefault(inicial, []).append(segundo)
+    return b'|'.join(
+        re.escape(bytes([inicial])) + b'[' + b''.join(
+            re.escape(bytes([segundo])) for segundo in segundos
+        ) + b']'
+        for inicial, segundos in sorted(por_inicial.items())
+    )
+
+
+# Tokens: equivalente de r'\w+' para los caracteres hasta U+017F (ASCII,
+# Latin-1 y Latin Extended-A, que cubren el español y las lenguas europeas
+# occidentales). Los segmentos con letras fuera de ese rango se resumen por
+# la ruta de texto (ver _requiere_texto).
+_PATRON_TOKEN_BYTES = re.compile(
+    rb'(?:[0-9A-Za-z_]|'
+    + _clase_bytes_latinos(lambda c: re.match(r'\w', c) is not None)
+    + rb')+'
+)
+
+_PATRON_FRASE_BYTES = re.compile(rb'[.!?]')
+
+# Espacios que r'\s' reconoce en str: los multibyte se pasan a b' ' con el
+# patrón y los separadores \x1c-\x1f con la tabla; el resto son los que
+# bytes.split() ya reconoce
+_PATRON_ESPACIOS_MULTIBYTE = re.compile(
+    rb'\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]'
+    rb'|\xe2\x81\x9f|\xe3\x80\x80'
+)
+_TABLA_SEPARADORES = bytes.maketrans(b'\x1c\x1d\x1e\x1f', b'    ')
+
+# Espacios de un solo byte: los únicos puntos donde se cortan segmentos
+_PATRON_CORTE_BYTES = re.compile(rb'[\t\n\x0b\x0c\r\x1c-\x1f ]')
+
+# Mayúsculas de U+0080 a U+017F y su minúscula (mismo número de bytes)
+_MINUSCULAS_LATINAS = MappingProxyType({
+    chr(codigo).encode('utf-8'): chr(codigo).lower().encode('utf-8')
+    for codigo in range(0x80, 0x180)
+    if codigo != 0x130 and chr(codigo).lower() != chr(codigo)
+})
+_PATRON_MAYUSCULA_LATINA = re.compile(
+    rb'(?:' + _clase_bytes_latinos(lambda c: c.encode('utf-8') in _MINUSCULAS_LATINAS) + rb')'
+)
+
+# Caracteres de tres o cuatro bytes (y los de dos bytes a partir de U+0180)
+_PATRON_CARACTER_ALTO = re.compile(rb'[\xc6-\xf4][\x80-\xbf]+')
+
+# 'İ' es el único carácter cuya minúscula cambia de longitud
+_I_CON_PUNTO = 'İ'.encode('utf-8')
+
+_BOM = b'\xef\xbb\xbf'
+
+_PATRON_CADENA_JSON = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_PATRON_ESTRUCTURA_JSON = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_PATRON_DOS_PUNTOS_JSON = re.compile(rb'\s*:\s*')
+
+# Secuencias de escape de una cadena JSON: par suplente, \uXXXX, escape de
+# un carácter o barra inválida (que se deja a json.loads)
+_PATRON_ESCAPE_JSON = re.compile(
+    rb'\\u([dD][89abAB][0-9a-fA-F]{2})\\u([dD][c-fC-F][0-9a-fA-F]{2})'
+    rb'|\\u([0-9a-fA-F]{4})|\\(["\\/bfnrt])|\\'
+)
+_ESCAPES_JSON = MappingProxyType({
+    b'"': b'"', b'\\': b'\\', b'/': b'/', b'b': b'\b',
+    b'f': b'\f', b'n': b'\n', b'r': b'\r', b't': b'\t',
+})
+
+_EXPRESIONES_BYTES = tuple(
+    (expresion, expresion.encode('utf-8')) for expresion in EXPRESIONES_BUSCADAS
+)
+_CARACTERES_BYTES = tuple(
+    (caracter, caracter.encode('utf-8')) for caracter in CARACTERES_BUSCADOS
+)
+_PALABRAS_EMOCIONALES_BYTES = tuple(
+    (palabra, re.compile(palabra.encode('utf-8')))
+    for palabra in PALABRAS_EMOCIONALES_IMPORTANTES
+)
+_BYTES_CONTINUACION = bytes(range(0x80, 0xc0))
+
+
+# =============================================================================
+# RESUMEN DE UN SEGMENTO EN BYTES
+# =============================================================================
+
+@lru_cache(maxsize=4096)
+def _es_caracter_palabra(caracter: bytes) -> bool:
+    """Indica si un carácter codificado es de palabra (r'\\w') en str."""
+    return re.match(r'\w', caracter.decode('utf-8', 'replace')) is not None
+
+
+def _requiere_texto(segmento: bytes) -> bool:
+    """
+    Indica si el segmento debe resumirse decodificado.
+
+    Ocurre si contiene letras fuera de U+0000-U+017F (que el patrón de bytes
+    no reconoce) o 'İ', cuya minúscula cambia la longitud del texto.
+    """
+    if _I_CON_PUNTO in segmento:
+        return True
+    return any(
+        _es_caracter_palabra(caracter)
+        for caracter in set(_PATRON_CARACTER_ALTO.findall(segmento))
+    )
+
+
+def _minusculas(segmento: bytes) -> bytes:
+    """Equivalente en bytes de str.lower() para segmentos sin _requiere_texto."""
+    minusculas = segmento.lower()
+    if segmento.isascii():
+        return minusculas
+    return _PATRON_MAYUSCULA_LATINA.sub(
+        lambda m: _MINUSCULAS_LATINAS[m.group()], minusculas
+    )
+
+
+def _numero_caracteres(datos: bytes) -> int:
+    """Número de caracteres de un texto UTF-8 (bytes que no son de continuación)."""
+    if datos.isascii():
+        return len(datos)
+    return len(datos.translate(None, _BYTES_CONTINUACION))
+
+
+def _retroceder(datos: bytes, posicion: int, caracteres: int) -> Tuple[int, bool]:
+    """Retrocede un número de caracteres; indica si había suficientes."""
+    while caracteres and posicion > 0:
+        posicion -= 1
+        if datos[posicion] & 0xc0 != 0x80:
+            caracteres -= 1
+    return posicion, caracteres == 0
+
+
+def _avanzar(datos: bytes, posicion: int, caracteres: int) -> Tuple[int, bool]:
+    """Avanza un número de caracteres; indica si había suficientes."""
+    longitud = len(datos)
+    while caracteres and posicion < longitud:
+        posicion += 1
+        while posicion < longitud and datos[posicion] & 0xc0 == 0x80:
+            posicion += 1
+        caracteres -= 1
+    return posicion, caracteres == 0
+
+
+def resumir_bytes(segmento: bytes) -> ResumenTexto:
+    """
+    Resume un segmento de texto limpio codificado en UTF-8.
+
+    Equivale a resumir_segmento(segmento.decode('utf-8')) sin decodificar el
+    segmento: los tokens se extraen y cuentan sobre los bytes y solo se
+    decodifican los tipos distintos, los bordes y las ventanas de contexto.
+
+    Args:
+        segmento: Trozo del texto ya limpio en UTF-8, cortado por un espacio
+
+    Returns:
+        ResumenTexto del segmento
+    """
+    segmento = bytes(segmento)
+    if _requiere_texto(segmento):
+        return resumir_segmento(segmento.decode('utf-8', 'replace'))
+
+    resumen = ResumenTexto()
+    if not segmento:
+        return resumen
+
+    longitud = _numero_caracteres(segmento)
+    resumen.longitud = longitud
+    fin_cabeza, _ = _avanzar(segmento, 0, LONGITUD_BORDE)
+    inicio_cola, _ = _retroceder(segmento, len(segmento), LONGITUD_BORDE)
+    resumen.cabeza = segmento[:fin_cabeza].decode('utf-8', 'replace')
+    resumen.cola = segmento[inicio_cola:].decode('utf-8', 'replace')
+
+    # Tokens y frases sobre los bytes en minúsculas
+    segmento_lower = _minusculas(segmento)
+    fragmentos = _PATRON_FRASE_BYTES.split(segmento_lower)
+    ultimo = len(fragmentos) - 1
+    contador = Counter()
+
+    for i, fragmento in enumerate(fragmentos):
+        tokens = _PATRON_TOKEN_BYTES.findall(fragmento)
+        contador.update(tokens)
+
+        estado = (len(tokens), bool(fragmento.strip(b' ')))
+        if i == 0:
+            resumen.frase_inicio = estado
+        if i == ultimo:
+            resumen.frase_fin = estado
+        if 0 < i < ultimo and estado[1]:
+            resumen.frases += 1
+            if estado[0] < 5:
+                resumen.frases_cortas += 1
+
+    resumen.con_delimitador = ultimo > 0
+
+    # Léxicos: cada tipo distinto se decodifica una sola vez
+    tipos = resumen.tipos
+    conteos = resumen.conteos
+    for crudo, apariciones in contador.items():
+        token = crudo.decode('utf-8')
+        tipos.add(token)
+        resumen.numero_tokens += apariciones
+        if token in VOCABULARIO_LEXICO:
+            conteos[token] += apariciones
+        if es_verbo_pasado(token):
+            resumen.numero_pasado += apariciones
+
+    # Expresiones y caracteres presentes
+    resumen.expresiones = {
+        expresion for expresion, codificada in _EXPRESIONES_BYTES
+        if codificada in segmento_lower
+    }
+    resumen.caracteres = {
+        caracter for caracter, codificado in _CARACTERES_BYTES
+        if codificado in segmento
+    }
+
+    # Palabras emocionales cuyo contexto completo cae dentro del segmento
+    radio = RADIO_CONTEXTO_EMOCIONAL
+    for palabra, patron in _PALABRAS_EMOCIONALES_BYTES:
+        for m in patron.finditer(segmento_lower):
+            inicio, completo_antes = _retroceder(segmento, m.start(), radio)
+            fin, completo_despues = _avanzar(segmento, m.start(), radio)
+            if completo_antes and completo_despues:
+                contexto = segmento[inicio:fin].decode('utf-8', 'replace')
+                if _contexto_breve(contexto):
+                    resumen.sin_desarrollo.add(palabra)
+                    break
+
+    return resumen
+
+
+def _resumir_segmento_corpus(segmento: Union[bytes, str]) -> ResumenTexto:
+    """Resume un segmento de bytes o un texto completo ya decodificado."""
+    if isinstance(segmento, str):
+        return resumir_texto(segmento)
+    return resumir_bytes(segmento)
+
+
+# =============================================================================
+# SEGMENTACIÓN
+# =============================================================================
+
+def segmentos_bytes(
+    datos,
+    inicio: int = 0,
+    fin: Optional[int] = None,
+    tam_segmento: int = TAM_SEGMENTO
+) -> Iterator[bytes]:
+    """
+    Limpia y reparte en segmentos resumibles un rango de bytes UTF-8.
+
+    Equivalente en bytes de segmentos_limpios(): la concatenación de los
+    segmentos es limpiar_texto() del texto del rango, y cada corte cae justo
+    antes de un espacio. Solo se copia a memoria un segmento cada vez.
+
+    Args:
+        datos: Objeto tipo bytes (bytes, mmap...) con el texto en UTF-8
+        inicio: Posición inicial del rango
+        fin: Posición final del rango (por defecto, el final de datos)
+        tam_segmento: Tamaño aproximado de cada segmento en bytes
+
+    Yields:
+        Segmentos de texto limpio en UTF-8
+    """
+    if fin is None:
+        fin = len(datos)
+    espacio = False
+    primero = True
+
+    posicion = inicio
+    while posicion < fin:
+        corte = fin
+        if posicion + tam_segmento < fin:
+            m = _PATRON_CORTE_BYTES.search(datos, posicion + tam_segmento, fin)
+            if m:
+                corte = m.start()
+
+        crudo = datos[posicion:corte]
+        posicion = corte
+        if not crudo.isascii():
+            crudo = _PATRON_ESPACIOS_MULTIBYTE.sub(b' ', crudo)
+        crudo = crudo.translate(_TABLA_SEPARADORES)
+        limpio = b' '.join(crudo.split())
+
+        if crudo[:1].isspace():
+            espacio = True
+        termina_en_espacio = crudo[-1:].isspace()
+
+        if limpio:
+            if espacio and not primero:
+                limpio = b' ' + limpio
+            yield limpio
+            primero = False
+            espacio = termina_en_espacio
+
+
+def _caracter_escapado(escape: re.Match) -> bytes:
+    """UTF-8 de una secuencia de escape JSON (ValueError si no es válida)."""
+    alto, bajo, codigo, simple = escape.groups()
+    if simple is not None:
+        return _ESCAPES_JSON[simple]
+    if alto is not None:
+        punto = 0x10000 + ((int(alto, 16) - 0xd800) << 10) + int(bajo, 16) - 0xdc00
+        return chr(punto).encode('utf-8')
+    if codigo is None:
+        raise ValueError("escape no válido")
+    # Un suplente suelto no se puede codificar en UTF-8
+    return chr(int(codigo, 16)).encode('utf-8')
+
+
+def _decodificar_escapes(cadena: bytes) -> Optional[bytes]:
+    """
+    Contenido de una cadena JSON con escapes, en UTF-8, sin pasar por str.
+
+    Los escapes (\\n, \\", \\uXXXX de ensure_ascii...) se sustituyen por
+    sus bytes y el resto de la cadena se copia tal cual. Devuelve None si
+    algún escape no es válido o es un suplente suelto: esas cadenas se
+    decodifican con json.
+    """
+    try:
+        return _PATRON_ESCAPE_JSON.sub(_caracter_escapado, cadena)
+    except (ValueError, UnicodeEncodeError):
+        return None
+
+
+# =============================================================================
+# LECTOR DE CORPUS
+# =============================================================================
+
+def _localizar_cadena(linea: bytes, campo: str) -> Optional[Tuple[int, int]]:
+    """
+    Localiza el valor de un campo de tipo cadena en el primer nivel de un
+    objeto JSON, sin decodificar la línea.
+
+    Returns:
+        (inicio, fin) del contenido de la cadena, sin comillas, o None si el
+        campo no existe o no es una cadena
+    """
+    clave = json.dumps(campo).encode('utf-8')
+    profundidad = 0
+    for m in _PATRON_ESTRUCTURA_JSON.finditer(linea):
+        caracter = linea[m.start()]
+        if caracter in b'{[':
+            profundidad += 1
+        elif caracter in b'}]':
+            profundidad -= 1
+        elif (
+            profundidad == 1
+            and m.end() - m.start() == len(clave)
+            and linea[m.start():m.end()] == clave
+        ):
+            separador = _PATRON_DOS_PUNTOS_JSON.match(linea, m.end())
+            if separador is None:
+                continue
+            valor = _PATRON_CADENA_JSON.match(linea, separador.end())
+            if valor is None:
+                return None
+            return valor.start() + 1, valor.end() - 1
+    return None
+
+
+def _contar_lineas(datos, fin: int, tam_bloque: int = 1 << 26) -> int:
+    """Saltos de línea en datos[:fin], por bloques (datos puede ser un mmap)."""
+    return sum(
+        datos[inicio:min(inicio + tam_bloque, fin)].count(b'\n')
+        for inicio in range(0, fin, tam_bloque)
+    )
+
+
+class LectorCorpus:
+    """
+    Lector de un fichero de corpus (.txt o .jsonl) proyectado en memoria.
+
+    Se usa como gestor de contexto; documentos() da la entrada y el
+    ResumenTexto de cada documento, y analizar() el análisis completo.
+    """
+
+    FORMATOS = ('txt', 'jsonl')
+
+    def __init__(
+        self,
+        ruta: Union[str, Path],
+        formato: Optional[str] = None,
+        campo_texto: str = 'texto',
+        tam_segmento: int = TAM_SEGMENTO
+    ):
+        """
+        Args:
+            ruta: Ruta del fichero
+            formato: 'txt' o 'jsonl' (por defecto, según la extensión)
+            campo_texto: Campo con el texto en cada línea JSONL
+            tam_segmento: Tamaño aproximado de los segmentos en bytes
+
+        Raises:
+            ValueError: Si el formato no está soportado
+        """
+        self.ruta = Path(ruta)
+        if formato is None:
+            formato = 'jsonl' if self.ruta.suffix.lower() in ('.jsonl', '.ndjson') else 'txt'
+        if formato not in self.FORMATOS:
+            raise ValueError(
+                f"Formato '{formato}' no soportado. Use uno de: {', '.join(self.FORMATOS)}"
+            )
+        self.formato = formato
+        self.campo_texto = campo_texto
+        self.tam_segmento = tam_segmento
+        self._fichero = None
+        self._mapa = None
+
+    def __enter__(self) -> 'LectorCorpus':
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def abrir(self):
+        """Abre el fichero y lo proyecta en memoria (solo lectura)."""
+        if self._fichero is not None:
+            return
+        self._fichero = open(self.ruta, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._fichero.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Fichero vacío: no se puede proyectar
+            self._mapa = b''
+        else:
+            if hasattr(self._mapa, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                self._mapa.madvise(mmap.MADV_SEQUENTIAL)
+
+    def cerrar(self):
+        """Libera la proyección y cierra el fichero."""
+        if isinstance(self._mapa, mmap.mmap):
+            self._mapa.close()
+        if self._fichero is not None:
+            self._fichero.close()
+        self._mapa = None
+        self._fichero = None
+
+    def documentos(
+        self,
+        ejecutor=None,
+        max_en_vuelo: int = 8
+    ) -> Iterator[Tuple[Dict, ResumenTexto]]:
+        """
+        Recorre los documentos del corpus, en orden.
+
+        Args:
+            ejecutor: concurrent.futures.Executor opcional para resumir los
+                segmentos en paralelo (ej: ProcessPoolExecutor)
+            max_en_vuelo: Máximo de segmentos enviados al ejecutor sin recoger
+
+        Yields:
+            Tuplas (entrada, resumen); la entrada no incluye el texto
+        """
+        for entrada, resumen, _ in self.documentos_desde(0, ejecutor, max_en_vuelo):
+            yield entrada, resumen
+
+    def documentos_desde(
+        self,
+        desde: int = 0,
+        ejecutor=None,
+        max_en_vuelo: int = 8
+    ) -> Iterator[Tuple[Dict, ResumenTexto, int]]:
+        """
+        Recorre los documentos a partir de una posición del fichero.
+
+        Sirve para reanudar un recorrido interrumpido: la posición que
+        acompaña a cada documento es la del siguiente, de modo que pasarla
+        como desde continúa justo después de él.
+
+        Args:
+            desde: Posición en bytes donde empieza un documento (0 o una
+                posición devuelta por este método)
+            ejecutor: concurrent.futures.Executor opcional (ver documentos())
+            max_en_vuelo: Máximo de segmentos enviados al ejecutor sin recoger
+
+        Yields:
+            Tuplas (entrada, resumen, posición en bytes tras el documento)
+        """
+        self.abrir()
+        if ejecutor is None:
+            for entrada, segmentos, fin in self._documentos_en_segmentos(desde):
+                resumen = ResumenTexto()
+                for segmento in segmentos:
+                    resumen.extender(_resumir_segmento_corpus(segmento))
+                yield entrada, resumen, fin
+            return
+
+        # Cada pendiente es [entrada, resumen parcial, futuros sin recoger, fin]
+        pendientes = deque()
+        en_vuelo = 0
+        for entrada, segmentos, fin in self._documentos_en_segmentos(desde):
+            actual = [entrada, ResumenTexto(), deque(), fin]
+            pendientes.append(actual)
+            for segmento in segmentos:
+                actual[2].append(ejecutor.submit(_resumir_segmento_corpus, segmento))
+                en_vuelo += 1
+                while en_vuelo >= max_en_vuelo:
+                    primero = pendientes[0]
+                    if primero[2]:
+                        primero[1].extender(primero[2].popleft().result())
+                        en_vuelo -= 1
+                    if not primero[2] and primero is not actual:
+                        pendientes.popleft()
+                        yield primero[0], primero[1], primero[3]
+
+        while pendientes:
+            entrada, resumen, futuros, fin = pendientes.popleft()
+            while futuros:
+                resumen.extender(futuros.popleft().result())
+            yield entrada, resumen, fin
+
+    def analizar(
+        self,
+        incluir_riesgo: bool = True,
+        ejecutor=None,
+        max_en_vuelo: int = 8
+    ) -> Iterator[Dict]:
+        """
+        Ejecuta analisis_completo() sobre cada documento del corpus.
+
+        Args:
+            incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
+            ejecutor: concurrent.futures.Executor opcional (ver documentos())
+            max_en_vuelo: Máximo de segmentos enviados al ejecutor sin recoger
+
+        Yields:
+            Dict con el análisis integrado de cada documento
+        """
+        from . import analisis_completo
+
+        for entrada, resumen in self.documentos(ejecutor, max_en_vuelo):
+            yield analisis_completo(entrada, incluir_riesgo=incluir_riesgo, resumen=resumen)
+
+    def _documentos_en_segmentos(self, desde: int = 0) -> Iterator[Tuple[Dict, Iterable, int]]:
+        if self.formato == 'txt':
+            if desde == 0:
+                yield self._documento_txt() + (len(self._mapa),)
+        else:
+            yield from self._documentos_jsonl(desde)
+
+    def _documento_txt(self) -> Tuple[Dict, Iterable[bytes]]:
+        datos = self._mapa
+        inicio = len(_BOM) if datos[:len(_BOM)] == _BOM else 0
+        entrada = {'id_sujeto': self.ruta.stem}
+        return entrada, segmentos_bytes(datos, inicio, len(datos), self.tam_segmento)
+
+    def _documentos_jsonl(self, desde: int = 0) -> Iterator[Tuple[Dict, Iterable, int]]:
+        datos = self._mapa
+        tamaño = len(datos)
+        posicion = desde
+        # Al reanudar, el número de línea solo se usa en los mensajes de error
+        numero_linea = _contar_lineas(datos, desde)
+
+        while posicion < tamaño:
+            fin = datos.find(b'\n', posicion)
+            if fin == -1:
+                fin = tamaño
+            linea = datos[posicion:fin]
+            posicion = fin + 1
+            numero_linea += 1
+            if numero_linea == 1 and linea.startswith(_BOM):
+                linea = linea[len(_BOM):]
+            if not linea.strip():
+                continue
+
+            yield self._documento_jsonl(linea, numero_linea) + (min(posicion, tamaño),)
+
+    def _documento_jsonl(self, linea: bytes, numero_linea: int) -> Tuple[Dict, Iterable]:
+        rango = _localizar_cadena(linea, self.campo_texto)
+        try:
+            if rango is None:
+                entrada = json.loads(linea)
+            else:
+                inicio, fin = rango
+                entrada = json.loads(linea[:inicio] + linea[fin:])
+        except ValueError as e:
+            raise ValueError(
+                f"Línea {numero_linea} de {self.ruta} no es JSON válido: {e}"
+            ) from e
+        if not isinstance(entrada, dict):
+            raise ValueError(
+                f"Línea {numero_linea} de {self.ruta} no es un objeto JSON"
+            )
+        entrada.pop(self.campo_texto, None)
+
+        if rango is None:
+            return entrada, []
+        inicio, fin = rango
+        if b'\\' in linea[inicio:fin]:
+            # Cadena con secuencias de escape: se sustituyen en los bytes y
+            # solo si alguna no es válida se decodifica con json
+            texto = _decodificar_escapes(linea[inicio:fin])
+            if texto is None:
+                return entrada, [json.loads(linea[inicio - 1:fin + 1])]
+            return entrada, segmentos_bytes(texto, 0, len(texto), self.tam_segmento)
+        return entrada, segmentos_bytes(linea, inicio, fin, self.tam_segmento)
+
+
+def analizar_corpus(
+    ruta: Union[str, Path],
+    incluir_riesgo: bool = True,
+    campo_texto: str = 'texto',
+    ejecutor=None
+) -> Iterator[Dict]:
+    """
+    Analiza todos los documentos de un fichero de corpus.
+
+    Args:
+        ruta: Ruta del fichero .txt o .jsonl
+        incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
+        campo_texto: Campo con el texto en cada línea JSONL
+        ejecutor: concurrent.futures.Executor opcional para paralelizar
+
+    Yields:
+        Dict con el análisis integrado de cada documento
+    """
+    with LectorCorpus(ruta, campo_texto=campo_texto) as lector:
+        yield from lector.analizar(incluir_riesgo=incluir_riesgo, ejecutor=ejecutor)
@@ -11,11 +11,32 @@ Analiza:
 """
 
 from typing import Dict, List, Optional
-from collections import Counter
+from collections import Counter, deque
 import re
+from .resultados import Bloqueos
 from .utils import tokenizar, detectar_temas, limpiar_texto, validar_entrada
 
 
+# =============================================================================
+# LISTAS DE REFERENCIA
+# =============================================================================
+
+# Palabras emocionales que, sin desarrollo alrededor, pueden indicar bloqueo
+PALABRAS_EMOCIONALES_IMPORTANTES = (
+    'miedo', 'angustia', 'trauma', 'violencia', 'dolor',
+    'tristeza', 'depresión', 'ansiedad', 'pánico'
+)
+
+# Generalizaciones que dificultan acceder a situaciones concretas
+GENERALIZACIONES = (
+    'siempre', 'nunca', 'todo', 'nada', 'todos', 'nadie',
+    'todo el tiempo', 'para siempre', 'en general'
+)
+
+# Radio (en caracteres) del contexto alrededor de una palabra emocional
+RADIO_CONTEXTO_EMOCIONAL = 50
+
+
 # =============================================================================
 # FUNCIONES DE DETECCIÓN DE TEMAS Y PROFUNDIDAD
 # =============================================================================
@@ -44,8 +65,20 @@ def analizar_temas_detallados(texto: str) -> List[Dict]:
         ]
     """
     # Detectar temas básicos
-    temas_conteo = detectar_temas(texto)
+    return detallar_temas(detectar_temas(texto))
+
+
+def detallar_temas(temas_conteo: Dict[str, int]) -> List[Dict]:
+    """
+    Construye la lista de temas detallados a partir del conteo de menciones.
+
+    Args:
+        temas_conteo: Dict con conteo de menciones de cada tema
 
+    Returns:
+        Lista de temas detectados, ordenada por frecuencia
+        (mismo formato que analizar_temas_detallados)
+    """
     # Analizar en detalle cada tema
     temas_detallados = []
 
@@ -73,6 +106,32 @@ def analizar_temas_detallados(texto: str) -> List[Dict]:
     return temas_detallados
 
 
+def palabra_emocional_sin_desarrollo(texto: str, texto_lower: str, palabra: str) -> bool:
+    """
+    Indica si alguna aparición de la palabra tiene muy poco contexto alrededor.
+
+    Args:
+        texto: Texto (limpio) en el que se busca
+        texto_lower: El mismo texto en minúsculas
+        palabra: Palabra emocional a buscar
+
+    Returns:
+        True si hay una aparición con menos de 10 palabras en su contexto
+    """
+    # Buscar el contexto (50 caracteres alrededor)
+    for m in re.finditer(palabra, texto_lower):
+        pos = m.start()
+        contexto_inicio = max(0, pos - RADIO_CONTEXTO_EMOCIONAL)
+        contexto_fin = min(len(texto), pos + RADIO_CONTEXTO_EMOCIONAL)
+        contexto = texto[contexto_inicio:contexto_fin]
+
+        # Si el contexto es muy corto, puede ser un bloqueo
+        if len(tokenizar(contexto)) < 10:
+            return True
+
+    return False
+
+
 def detectar_patrones_evitacion(texto: str, temas_detectados: List[Dict]) -> List[str]:
     """
     Detecta patrones de evitación o bloqueo en el discurso.
@@ -90,9 +149,58 @@ def detectar_patrones_evitacion(texto: str, temas_detectados: List[Dict]) -> Lis
     Returns:
         Lista de posibles bloqueos identificados
     """
-    posibles_bloqueos = []
     texto_lower = texto.lower()
 
+    # Palabras emocionales sin contexto
+    palabras_sin_desarrollo = [
+        palabra for palabra in PALABRAS_EMOCIONALES_IMPORTANTES
+        if palabra in texto_lower
+        and palabra_emocional_sin_desarrollo(texto, texto_lower, palabra)
+    ]
+
+    # Generalizaciones
+    conteo_generalizaciones = sum(
+        1 for gen in GENERALIZACIONES if gen in texto_lower
+    )
+
+    # Frases cortas y fragmentadas
+    frases = [f.strip() for f in re.split(r'[.!?]', texto) if f.strip()]
+    frases_muy_cortas = [f for f in frases if len(tokenizar(f)) < 5]
+
+    return interpretar_patrones_evitacion(
+        temas_detectados,
+        palabras_sin_desarrollo,
+        conteo_generalizaciones,
+        len(frases),
+        len(frases_muy_cortas)
+    )
+
+
+def interpretar_patrones_evitacion(
+    temas_detectados: List[Dict],
+    palabras_sin_desarrollo: List[str],
+    conteo_generalizaciones: int,
+    numero_frases: int,
+    numero_frases_cortas: int
+) -> List[str]:
+    """
+    Traduce los indicios de evitación ya calculados a posibles bloqueos.
+
+    Separado de detectar_patrones_evitacion() para poder usarlo también
+    con indicios obtenidos de un resumen del texto (ver resumen_texto.py).
+
+    Args:
+        temas_detectados: Lista de temas ya analizados
+        palabras_sin_desarrollo: Palabras emocionales con poco contexto
+        conteo_generalizaciones: Número de generalizaciones distintas usadas
+        numero_frases: Número de frases no vacías
+        numero_frases_cortas: Número de frases con menos de 5 palabras
+
+    Returns:
+        Lista de posibles bloqueos identificados
+    """
+    posibles_bloqueos = []
+
     # Detectar temas frecuentes con bajo detalle
     for tema_info in temas_detectados:
         if tema_info['frecuencia'] >= 3 and tema_info['detalle_medio'] <= 2:
@@ -102,39 +210,13 @@ def detectar_patrones_evitacion(texto: str, temas_detectados: List[Dict]) -> Lis
             )
 
     # Detectar palabras emocionales sin contexto
-    palabras_emocionales_importantes = [
-        'miedo', 'angustia', 'trauma', 'violencia', 'dolor',
-        'tristeza', 'depresión', 'ansiedad', 'pánico'
-    ]
-
-    for palabra in palabras_emocionales_importantes:
-        if palabra in texto_lower:
-            # Buscar el contexto (50 caracteres alrededor)
-            posiciones = [m.start() for m in re.finditer(palabra, texto_lower)]
-            for pos in posiciones:
-                contexto_inicio = max(0, pos - 50)
-                contexto_fin = min(len(texto), pos + 50)
-                contexto = texto[contexto_inicio:contexto_fin]
-
-                # Si el contexto es muy corto, puede ser un bloqueo
-                palabras_contexto = len(tokenizar(contexto))
-                if palabras_contexto < 10:
-                    posibles_bloqueos.append(
-                        f"Aparece la palabra '{palabra}' pero no se describe "
-                        f"la situación concreta o se desarrolla mínimamente."
-                    )
-                    break  # Solo reportar una vez por palabra
+    for palabra in palabras_sin_desarrollo:
+        posibles_bloqueos.append(
+            f"Aparece la palabra '{palabra}' pero no se describe "
+            f"la situación concreta o se desarrolla mínimamente."
+        )
 
     # Detectar generalizaciones excesivas
-    generalizaciones = [
-        'siempre', 'nunca', 'todo', 'nada', 'todos', 'nadie',
-        'todo el tiempo', 'para siempre', 'en general'
-    ]
-
-    conteo_generalizaciones = sum(
-        1 for gen in generalizaciones if gen in texto_lower
-    )
-
     if conteo_generalizaciones >= 3:
         posibles_bloqueos.append(
             f"Uso frecuente de generalizaciones ({conteo_generalizaciones} veces), "
@@ -142,10 +224,7 @@ def detectar_patrones_evitacion(texto: str, temas_detectados: List[Dict]) -> Lis
         )
 
     # Detectar frases cortas y fragmentadas (posible inhibición)
-    frases = [f.strip() for f in re.split(r'[.!?]', texto) if f.strip()]
-    frases_muy_cortas = [f for f in frases if len(tokenizar(f)) < 5]
-
-    if len(frases_muy_cortas) > len(frases) * 0.5 and len(frases) > 3:
+    if numero_frases_cortas > numero_frases * 0.5 and numero_frases > 3:
         posibles_bloqueos.append(
             f"Más de la mitad de las frases son muy cortas (< 5 palabras), "
             f"posible inhibición o dificultad de expresión."
@@ -154,42 +233,169 @@ def detectar_patrones_evitacion(texto: str, temas_detectados: List[Dict]) -> Lis
     return posibles_bloqueos
 
 
+# =============================================================================
+# AGREGADO DE TEMAS POR SUJETO
+# =============================================================================
+
+def crear_agregado_temas(ventana: Optional[int] = None) -> Dict:
+    """
+    Crea un agregado de temas vacío para un sujeto.
+
+    El agregado resume el historial de temas (número de sesiones en que
+    aparece cada tema, suma de frecuencias y última sesión en que se vio)
+    para que la comparación con el historial no tenga que recorrer todos
+    los análisis previos. Se serializa a JSON con default=convertir_para_json
+    (la ventana de sesiones recientes es un deque y se guarda como lista),
+    de modo que puede guardarse junto al historial del sujeto; un agregado
+    leído de JSON se sigue actualizando igual.
+
+    Args:
+        ventana: Si se indica, solo se tienen en cuenta las últimas N sesiones
+
+    Returns:
+        Dict con la estructura:
+            {
+                "ventana": int o None,
+                "sesiones": int,
+                "temas": {tema: {"conteo": int, "suma": int, "ultima_sesion": ...}},
+                "recientes": deque de Dict, de longitud máxima ventana
+                    (solo con ventana)
+            }
+    """
+    if ventana is not None and ventana < 1:
+        raise ValueError("La ventana debe ser de al menos una sesión")
+
+    agregado = {
+        "ventana": ventana,
+        "sesiones": 0,
+        "temas": {}
+    }
+
+    if ventana is not None:
+        agregado["recientes"] = deque(maxlen=ventana)
+
+    return agregado
+
+
+def actualizar_agregado_temas(
+    agregado: Dict,
+    temas_detectados: List[Dict],
+    sesion=None
+) -> Dict:
+    """
+    Incorpora al agregado los temas de una nueva sesión.
+
+    El coste depende solo del número de temas de la sesión (y de la sesión
+    que sale de la ventana, si la hay), no del tamaño del historial.
+
+    Args:
+        agregado: Agregado creado con crear_agregado_temas()
+        temas_detectados: Temas de la sesión (salida de analizar_temas_detallados)
+        sesion: Identificador de la sesión (ej: fecha); por defecto, su número de orden
+
+    Returns:
+        El mismo agregado, actualizado
+    """
+    agregado["sesiones"] += 1
+    if sesion is None:
+        sesion = agregado["sesiones"]
+
+    temas = agregado["temas"]
+    frecuencias = {}
+    for tema_info in temas_detectados:
+        tema = tema_info['tema']
+        frecuencias[tema] = tema_info['frecuencia']
+
+        if tema not in temas:
+            temas[tema] = {"conteo": 0, "suma": 0, "ultima_sesion": sesion}
+        temas[tema]["conteo"] += 1
+        temas[tema]["suma"] += tema_info['frecuencia']
+        temas[tema]["ultima_sesion"] = sesion
+
+    # Modo ventana: descontar la sesión más antigua
+    if agregado.get("ventana") is not None:
+        recientes = agregado["recientes"]
+        if not isinstance(recientes, deque):
+            # Agregado leído de JSON: la ventana vuelve a ser un deque
+            recientes = agregado["recientes"] = deque(recientes, maxlen=agregado["ventana"])
+        if len(recientes) == recientes.maxlen:
+            for tema, frecuencia in recientes.popleft().items():
+                temas[tema]["conteo"] -= 1
+                temas[tema]["suma"] -= frecuencia
+                if temas[tema]["conteo"] == 0:
+                    del temas[tema]
+        recientes.append(frecuencias)
+
+    return agregado
+
+
+def agregado_temas_desde_historial(
+    historial: Optional[List[Dict]],
+    ventana: Optional[int] = None
+) -> Dict:
+    """
+    Construye un agregado de temas a partir de una lista de análisis previos.
+
+    Útil para migrar historiales existentes; a partir de ahí basta con
+    actualizar el agregado en cada sesión nueva.
+
+    Args:
+        historial: Lista de análisis previos ordenados cronológicamente
+        ventana: Si se indica, solo se tienen en cuenta las últimas N sesiones
+
+    Returns:
+        Agregado de temas
+    """
+    agregado = crear_agregado_temas(ventana)
+
+    for analisis_previo in historial or []:
+        if 'temas_detectados' in analisis_previo:
+            actualizar_agregado_temas(
+                agregado,
+                analisis_previo['temas_detectados'],
+                analisis_previo.get('fecha')
+            )
+
+    return agregado
+
+
 def comparar_con_historial(
     temas_actuales: List[Dict],
-    historial: Optional[List[Dict]]
+    historial: Optional[List[Dict]],
+    agregado: Optional[Dict] = None
 ) -> List[str]:
     """
     Compara los temas actuales con el historial para detectar patrones.
 
+    Si se pasa un agregado de temas, la comparación se hace contra él y no
+    se recorre el historial, por lo que cuesta lo mismo con 3 sesiones que
+    con 300.
+
     Args:
         temas_actuales: Temas del texto actual
         historial: Lista de análisis previos (opcional)
+        agregado: Agregado de temas del sujeto (opcional, tiene prioridad)
 
     Returns:
         Lista de observaciones sobre patrones en el tiempo
     """
-    if not historial or len(historial) == 0:
+    if agregado is None:
+        if not historial or len(historial) == 0:
+            return ["Sin historial previo para comparar."]
+        agregado = agregado_temas_desde_historial(historial)
+    elif agregado["sesiones"] == 0:
         return ["Sin historial previo para comparar."]
 
     observaciones = []
-
-    # Extraer temas del historial
-    temas_historicos = {}
-    for analisis_previo in historial:
-        if 'temas_detectados' in analisis_previo:
-            for tema_info in analisis_previo['temas_detectados']:
-                tema = tema_info['tema']
-                if tema not in temas_historicos:
-                    temas_historicos[tema] = []
-                temas_historicos[tema].append(tema_info['frecuencia'])
+    temas_historicos = agregado["temas"]
 
     # Comparar con temas actuales
     temas_actuales_dict = {t['tema']: t['frecuencia'] for t in temas_actuales}
 
-    for tema, frecuencias_previas in temas_historicos.items():
+    for tema, datos in temas_historicos.items():
         if tema in temas_actuales_dict:
             freq_actual = temas_actuales_dict[tema]
-            freq_media_previa = sum(frecuencias_previas) / len(frecuencias_previas)
+            freq_media_previa = datos["suma"] / datos["conteo"]
 
             if freq_actual > freq_media_previa * 1.5:
                 observaciones.append(
@@ -224,8 +430,9 @@ def comparar_con_historial(
 
 def deteccion_bloqueos_discursivos(
     entrada: Dict,
-    historial: Optional[List[Dict]] = None
-) -> Dict:
+    historial: Optional[List[Dict]] = None,
+    agregado_temas: Optional[Dict] = None
+) -> Bloqueos:
     """
     Detecta bloqueos o patrones problemáticos en el discurso.
 
@@ -238,9 +445,12 @@ def deteccion_bloqueos_discursivos(
                 "texto": str
             }
         historial: Lista opcional de análisis previos del mismo sujeto
+        agregado_temas: Agregado de temas opcional del mismo sujeto (ver
+            crear_agregado_temas). Si se pasa, la comparación se hace contra
+            él y después se actualiza con los temas de este texto.
 
     Returns:
-        Dict con el análisis de bloqueos:
+        Bloqueos (se lee como un dict) con el análisis de bloqueos:
             {
                 "id_sujeto": str,
                 "temas_detectados": List[Dict],
@@ -262,10 +472,83 @@ def deteccion_bloqueos_discursivos(
     # Detectar patrones de evitación
     posibles_bloqueos = detectar_patrones_evitacion(texto, temas_detectados)
 
+    return construir_resultado_bloqueos(
+        entrada, temas_detectados, posibles_bloqueos, historial, agregado_temas
+    )
+
+
+def bloqueos_desde_resumen(
+    entrada: Dict,
+    resumen,
+    historial: Optional[List[Dict]] = None,
+    agregado_temas: Optional[Dict] = None
+) -> Bloqueos:
+    """
+    Detecta bloqueos a partir de un ResumenTexto en lugar del texto completo.
+
+    Produce el mismo resultado que deteccion_bloqueos_discursivos() sobre el
+    texto resumido; útil para textos muy largos procesados por trozos.
+
+    Args:
+        entrada: Dict con al menos "id_sujeto" (no necesita "texto")
+        resumen: ResumenTexto del texto (ver resumen_texto.py)
+        historial: Lista opcional de análisis previos del mismo sujeto
+        agregado_temas: Agregado de temas opcional del mismo sujeto
+
+    Returns:
+        Bloqueos con el análisis de bloqueos (mismo formato que deteccion_bloqueos_discursivos)
+    """
+    if 'id_sujeto' not in entrada:
+        raise ValueError("La entrada debe contener al menos 'id_sujeto'")
+
+    temas_detectados = detallar_temas(resumen.detectar_temas())
+
+    posibles_bloqueos = interpretar_patrones_evitacion(
+        temas_detectados,
+        resumen.palabras_emocionales_sin_desarrollo(),
+        sum(1 for gen in GENERALIZACIONES if resumen.contiene(gen)),
+        resumen.numero_frases,
+        resumen.numero_frases_cortas
+    )
+
+    return construir_resultado_bloqueos(
+        entrada, temas_detectados, posibles_bloqueos, historial, agregado_temas
+    )
+
+
+def construir_resultado_bloqueos(
+    entrada: Dict,
+    temas_detectados: List[Dict],
+    posibles_bloqueos: List[str],
+    historial: Optional[List[Dict]],
+    agregado_temas: Optional[Dict]
+) -> Bloqueos:
+    """
+    Completa el análisis de bloqueos: historial, nivel de riesgo y resultado.
+
+    Args:
+        entrada: Entrada original del sujeto
+        temas_detectados: Temas del texto actual
+        posibles_bloqueos: Bloqueos identificados en el texto actual
+        historial: Lista opcional de análisis previos del mismo sujeto
+        agregado_temas: Agregado de temas opcional del mismo sujeto
+
+    Returns:
+        Bloqueos con el análisis de bloqueos
+    """
     # Comparar con historial si está disponible
     comparacion_historial = []
-    if historial:
-        comparacion_historial = comparar_con_historial(temas_detectados, historial)
+    hay_historial = bool(historial) or (
+        agregado_temas is not None and agregado_temas["sesiones"] > 0
+    )
+    if hay_historial:
+        comparacion_historial = comparar_con_historial(
+            temas_detectados, historial, agregado_temas
+        )
+
+    # Incorporar la sesión actual al agregado
+    if agregado_temas is not None:
+        actualizar_agregado_temas(agregado_temas, temas_detectados, entrada.get('fecha'))
 
     # Estimar nivel de riesgo de bloqueo
     if len(posibles_bloqueos) == 0:
@@ -276,15 +559,15 @@ def deteccion_bloqueos_discursivos(
         nivel_riesgo = "alto"
 
     # Construir resultado
-    resultado = {
-        "id_sujeto": entrada['id_sujeto'],
-        "temas_detectados": temas_detectados,
-        "posibles_bloqueos": posibles_bloqueos,
-        "nivel_riesgo_bloqueo": nivel_riesgo
-    }
+    resultado = Bloqueos(
+        id_sujeto=entrada['id_sujeto'],
+        temas_detectados=temas_detectados,
+        posibles_bloqueos=posibles_bloqueos,
+        nivel_riesgo_bloqueo=nivel_riesgo
+    )
 
-    if historial:
-        resultado["comparacion_historial"] = comparacion_historial
+    if hay_historial:
+        resultado.comparacion_historial = comparacion_historial
 
     return resultado
 
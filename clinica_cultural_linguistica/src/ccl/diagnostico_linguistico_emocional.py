@@ -11,7 +11,8 @@ Analiza textos de estudiantes/pacientes y genera un diagnóstico que incluye:
 - Hipótesis clínicas lingüísticas
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
+from .resultados import Diagnostico
 from .utils import (
     validar_entrada,
     limpiar_texto,
@@ -24,6 +25,10 @@ from .utils import (
 )
 
 
+# Caracteres que indican presencia de diálogo en el texto
+MARCAS_DIALOGO = ('"', '—', '-')
+
+
 def estimar_nivel_linguistico(metricas: Dict) -> str:
     """
     Estima el nivel lingüístico basándose en las métricas del texto.
@@ -110,7 +115,11 @@ def detectar_estado_emocional(emociones: Dict[str, int]) -> str:
     return emocion_dominante[0]
 
 
-def identificar_recursos_discursivos(texto: str, metricas: Dict) -> List[str]:
+def identificar_recursos_discursivos(
+    texto: str,
+    metricas: Dict,
+    hay_dialogo: Optional[bool] = None
+) -> List[str]:
     """
     Identifica los recursos discursivos principales utilizados en el texto.
 
@@ -123,6 +132,8 @@ def identificar_recursos_discursivos(texto: str, metricas: Dict) -> List[str]:
     Args:
         texto: Texto original
         metricas: Métricas calculadas
+        hay_dialogo: Si ya se sabe, si el texto tiene marcas de diálogo
+            (en ese caso no se examina el texto)
 
     Returns:
         Lista de recursos discursivos identificados
@@ -142,7 +153,9 @@ def identificar_recursos_discursivos(texto: str, metricas: Dict) -> List[str]:
         recursos.append("argumentación")
 
     # Detectar diálogo
-    if '"' in texto or '—' in texto or '-' in texto:
+    if hay_dialogo is None:
+        hay_dialogo = any(marca in texto for marca in MARCAS_DIALOGO)
+    if hay_dialogo:
         recursos.append("diálogo")
 
     # Si no se detecta nada específico
@@ -228,7 +241,7 @@ def generar_hipotesis_clinica(metricas: Dict, recursos: List[str], errores: List
     return hipotesis
 
 
-def diagnostico_linguistico_emocional(entrada: Dict) -> Dict:
+def diagnostico_linguistico_emocional(entrada: Dict) -> Diagnostico:
     """
     Realiza un diagnóstico lingüístico y emocional completo del texto.
 
@@ -247,7 +260,7 @@ def diagnostico_linguistico_emocional(entrada: Dict) -> Dict:
             }
 
     Returns:
-        Dict con el diagnóstico completo:
+        Diagnostico (se lee como un dict) con el diagnóstico completo:
             {
                 "nivel_probable": str,
                 "estado_emocional_dominante": str,
@@ -282,23 +295,78 @@ def diagnostico_linguistico_emocional(entrada: Dict) -> Dict:
         'emociones_detectadas': emociones
     }
 
+    return construir_diagnostico(entrada, metricas, texto)
+
+
+def diagnostico_desde_resumen(entrada: Dict, resumen) -> Diagnostico:
+    """
+    Realiza el diagnóstico a partir de un ResumenTexto en lugar del texto.
+
+    Produce el mismo resultado que diagnostico_linguistico_emocional() sobre
+    el texto resumido; útil para textos muy largos procesados por trozos.
+
+    Args:
+        entrada: Dict con al menos "id_sujeto" (no necesita "texto")
+        resumen: ResumenTexto del texto (ver resumen_texto.py)
+
+    Returns:
+        Diagnostico con el diagnóstico completo (mismo formato que diagnostico_linguistico_emocional)
+    """
+    if 'id_sujeto' not in entrada:
+        raise ValueError("La entrada debe contener al menos 'id_sujeto'")
+
+    metricas = {
+        'longitud_texto': resumen.contar_palabras(),
+        'variedad_lexica': round(resumen.calcular_variedad_lexica(), 2),
+        'porcentaje_pronombres_primera_persona':
+            resumen.contar_pronombres_primera_persona()['porcentaje'],
+        'porcentaje_verbos_pasado': resumen.detectar_verbos_pasado()['porcentaje'],
+        'porcentaje_conectores': resumen.contar_conectores()['porcentaje'],
+        'emociones_detectadas': resumen.detectar_emociones()
+    }
+
+    hay_dialogo = any(resumen.contiene_caracter(marca) for marca in MARCAS_DIALOGO)
+
+    return construir_diagnostico(entrada, metricas, hay_dialogo=hay_dialogo)
+
+
+def construir_diagnostico(
+    entrada: Dict,
+    metricas: Dict,
+    texto: str = "",
+    hay_dialogo: Optional[bool] = None
+) -> Diagnostico:
+    """
+    Interpreta las métricas del texto y construye el diagnóstico.
+
+    Args:
+        entrada: Entrada original del sujeto
+        metricas: Métricas calculadas del texto
+        texto: Texto limpio (solo se usa para detectar diálogo)
+        hay_dialogo: Si ya se sabe, si el texto tiene marcas de diálogo
+
+    Returns:
+        Diagnostico con el diagnóstico completo
+    """
+    emociones = metricas['emociones_detectadas']
+
     # Realizar análisis
     nivel_probable = estimar_nivel_linguistico(metricas)
     estado_emocional = detectar_estado_emocional(emociones)
-    recursos_discursivos = identificar_recursos_discursivos(texto, metricas)
+    recursos_discursivos = identificar_recursos_discursivos(texto, metricas, hay_dialogo)
     errores_clave = identificar_errores_clave(metricas)
     hipotesis_clinica = generar_hipotesis_clinica(metricas, recursos_discursivos, errores_clave)
 
     # Construir y retornar el diagnóstico
-    diagnostico = {
-        "id_sujeto": entrada['id_sujeto'],
-        "nivel_probable": nivel_probable,
-        "estado_emocional_dominante": estado_emocional,
-        "recursos_discursivos": recursos_discursivos,
-        "errores_clave": errores_clave,
-        "hipotesis_clinica_linguistica": hipotesis_clinica,
-        "metricas": metricas
-    }
+    diagnostico = Diagnostico(
+        id_sujeto=entrada['id_sujeto'],
+        nivel_probable=nivel_probable,
+        estado_emocional_dominante=estado_emocional,
+        recursos_discursivos=recursos_discursivos,
+        errores_clave=errores_clave,
+        hipotesis_clinica_linguistica=hipotesis_clinica,
+        metricas=metricas
+    )
 
     return diagnostico
 
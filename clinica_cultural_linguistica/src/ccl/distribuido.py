@@ -0,0 +1,591 @@
+"""
+distribuido.py
+
+Reanálisis de un corpus repartido entre varios trabajadores por TCP.
+
+El coordinador reparte las entradas de un corpus .jsonl en fragmentos según
+un hash estable de id_sujeto, de modo que todas las sesiones de un sujeto
+caen en el mismo fragmento y se analizan en orden en el mismo trabajador:
+su historial (seguimiento_progreso), su agregado de temas
+(comparar_con_historial) y su vigilancia no salen de él. Los fragmentos se
+asignan a los trabajadores según quedan libres; si un trabajador se cae, su
+fragmento vuelve a la cola. Mientras analiza, el trabajador envía un latido
+cada INTERVALO_LATIDO segundos; si el coordinador pasa plazo_trabajador
+segundos sin recibir nada de él (máquina colgada, red partida), da la
+conexión por perdida y devuelve el fragmento a la cola.
+
+Al terminar, el coordinador une los resultados en el orden del corpus
+(igual que con un solo proceso) y combina los agregados de cohorte que
+devuelve cada fragmento. Como cada sujeto está en un solo fragmento, el
+número de sujetos distintos se obtiene sumando.
+
+Protocolo: mensajes con un prefijo de longitud (4 bytes, big-endian) y una
+cabecera JSON; los datos en bloque (entradas y resultados, en JSONL) van a
+continuación de la cabecera, con su tamaño en "bytes":
+
+    trabajador -> coordinador  {"tipo": "hola", "version", "trabajador"}
+    coordinador -> trabajador  {"tipo": "fragmento", "fragmento", "opciones", "bytes"} + entradas
+    trabajador -> coordinador  {"tipo": "resultados", "bytes"} + resultados (varias veces)
+    trabajador -> coordinador  {"tipo": "latido"} (entre entradas, si no ha enviado nada)
+    trabajador -> coordinador  {"tipo": "hecho", "fragmento", "cohorte"}
+    trabajador -> coordinador  {"tipo": "error", "fragmento", "mensaje"}
+    coordinador -> trabajador  {"tipo": "terminar"}
+
+El protocolo no autentica ni cifra: úsese en localhost o en una red de
+confianza.
+
+Uso (varios procesos locales en lugar de un clúster):
+    python -m ccl coordinar archivo.jsonl -o resultados.jsonl --locales 4
+
+Con trabajadores en otras máquinas:
+    python -m ccl coordinar archivo.jsonl -o resultados.jsonl --host 0.0.0.0 --puerto 5555
+    python -m ccl trabajador coordinador.local:5555      # en cada nodo
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import queue
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .utils import convertir_para_json
+
+
+# Versión del protocolo entre coordinador y trabajadores
+VERSION_PROTOCOLO = 2
+
+# Fragmentos por defecto (más que trabajadores, para repartir la carga)
+FRAGMENTOS = 64
+
+# Resultados que el trabajador acumula antes de enviarlos
+TAM_ENVIO = 1 << 22
+
+# Segundos sin enviar nada tras los que el trabajador envía un latido
+INTERVALO_LATIDO = 5.0
+
+# Segundos sin noticias de un trabajador tras los que se le quita el fragmento.
+# Debe superar lo que tarda en analizarse la entrada más lenta, porque los
+# latidos solo se envían entre entradas
+PLAZO_TRABAJADOR = 120.0
+
+# Tamaño máximo de una cabecera JSON
+_MAX_CABECERA = 1 << 20
+
+_LONGITUD = struct.Struct(">I")
+
+
+# =============================================================================
+# REPARTO POR SUJETO
+# =============================================================================
+
+def fragmento_de(id_sujeto, fragmentos: int) -> int:
+    """
+    Fragmento de un sujeto: hash estable (no depende de PYTHONHASHSEED ni
+    de la máquina) de id_sujeto módulo el número de fragmentos.
+    """
+    resumen = hashlib.blake2b(str(id_sujeto).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(resumen, "big") % fragmentos
+
+
+# =============================================================================
+# PROTOCOLO
+# =============================================================================
+
+def _recibir_exacto(conexion: socket.socket, n: int) -> bytes:
+    partes = []
+    while n:
+        parte = conexion.recv(min(n, 1 << 20))
+        if not parte:
+            raise ConnectionError("Conexión cerrada")
+        partes.append(parte)
+        n -= len(parte)
+    return b"".join(partes)
+
+
+def enviar_mensaje(conexion: socket.socket, mensaje: Dict, datos: bytes = b""):
+    """Envía una cabecera JSON y, si los hay, datos en bloque."""
+    cabecera = json.dumps({**mensaje, "bytes": len(datos)}, ensure_ascii=False).encode("utf-8")
+    conexion.sendall(_LONGITUD.pack(len(cabecera)) + cabecera)
+    if datos:
+        conexion.sendall(datos)
+
+
+def recibir_mensaje(conexion: socket.socket) -> Tuple[Dict, bytes]:
+    """
+    Recibe un mensaje.
+
+    Returns:
+        (cabecera, datos en bloque)
+
+    Raises:
+        ConnectionError: Si la conexión se cierra o el mensaje no es válido
+    """
+    (longitud,) = _LONGITUD.unpack(_recibir_exacto(conexion, _LONGITUD.size))
+    if longitud > _MAX_CABECERA:
+        raise ConnectionError(f"Cabecera demasiado larga ({longitud} bytes)")
+    mensaje = json.loads(_recibir_exacto(conexion, longitud).decode("utf-8"))
+    datos = _recibir_exacto(conexion, mensaje["bytes"]) if mensaje.get("bytes") else b""
+    return mensaje, datos
+
+
+# =============================================================================
+# AGREGADOS DE COHORTE
+# =============================================================================
+
+def crear_cohorte() -> Dict:
+    """Agregado de cohorte vacío (conteos que se combinan sumando)."""
+    return {
+        "resultados": 0,
+        "sujetos": 0,
+        "palabras": 0,
+        "nivel_probable": {},
+        "estado_emocional_dominante": {},
+        "tension_dominante": {},
+        "nivel_riesgo": {},
+        "nivel_riesgo_bloqueo": {},
+        "alertas_tempranas": {},
+    }
+
+
+def acumular_cohorte(cohorte: Dict, resultado: Dict) -> Dict:
+    """Añade un resultado de analisis_completo al agregado de cohorte."""
+    def contar(clave, valor):
+        if valor is not None:
+            cohorte[clave][valor] = cohorte[clave].get(valor, 0) + 1
+
+    diagnostico = resultado.get("diagnostico_linguistico_emocional") or {}
+    cohorte["resultados"] += 1
+    cohorte["palabras"] += (diagnostico.get("metricas") or {}).get("longitud_texto", 0)
+    contar("nivel_probable", diagnostico.get("nivel_probable"))
+    contar("estado_emocional_dominante", diagnostico.get("estado_emocional_dominante"))
+    contar("tension_dominante", (resultado.get("radiografia_cultural") or {}).get("tension_dominante"))
+    contar("nivel_riesgo", (resultado.get("riesgo_psico_emocional") or {}).get("nivel_riesgo"))
+    contar("nivel_riesgo_bloqueo", (resultado.get("deteccion_bloqueos") or {}).get("nivel_riesgo_bloqueo"))
+    for alerta in resultado.get("alertas_tempranas") or ():
+        contar("alertas_tempranas", alerta["serie"])
+    return cohorte
+
+
+def combinar_cohortes(a: Dict, b: Dict) -> Dict:
+    """
+    Combina dos agregados de cohorte de conjuntos de sujetos disjuntos.
+
+    Returns:
+        Nuevo agregado
+    """
+    combinado = {}
+    for clave, valor in a.items():
+        if isinstance(valor, dict):
+            combinado[clave] = dict(Counter(valor) + Counter(b.get(clave, {})))
+        else:
+            combinado[clave] = valor + b.get(clave, 0)
+    return combinado
+
+
+# =============================================================================
+# TRABAJADOR
+# =============================================================================
+
+def analizar_fragmento(lineas: List[bytes], opciones: Dict) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Analiza en orden las entradas de un fragmento, con el estado de cada sujeto.
+
+    Args:
+        lineas: Entradas del fragmento (líneas JSON), en el orden del corpus
+        opciones: {"incluir_riesgo", "seguimiento", "vigilancia"}
+
+    Yields:
+        (resultado, cohorte acumulada hasta ese resultado)
+    """
+    from . import analisis_completo, crear_agregado_temas, crear_vigilancia
+
+    campo_texto = opciones.get("campo_texto", "texto")
+    agregados: Dict[str, Dict] = {}
+    historiales: Dict[str, List[Dict]] = {}
+    vigilancias: Dict[str, Dict] = {}
+    cohorte = crear_cohorte()
+
+    for linea in lineas:
+        entrada = json.loads(linea)
+        if campo_texto != "texto":
+            entrada["texto"] = entrada.pop(campo_texto, "")
+        id_sujeto = entrada.get("id_sujeto")
+        if id_sujeto not in agregados:
+            cohorte["sujetos"] += 1
+            agregados[id_sujeto] = crear_agregado_temas()
+            historiales[id_sujeto] = []
+            if opciones.get("vigilancia"):
+                vigilancias[id_sujeto] = crear_vigilancia()
+
+        historial = historiales[id_sujeto] if opciones.get("seguimiento") else None
+        resultado = analisis_completo(
+            entrada,
+            incluir_riesgo=opciones.get("incluir_riesgo", True),
+            historial=historial or None,
+            agregado_temas=agregados[id_sujeto],
+            vigilancia=vigilancias.get(id_sujeto),
+        )
+        if historial is not None:
+            historial.append({
+                **resultado["diagnostico_linguistico_emocional"],
+                **resultado["radiografia_cultural"],
+                "fecha": entrada.get("fecha", "actual"),
+            })
+        yield resultado, acumular_cohorte(cohorte, resultado)
+
+
+def ejecutar_trabajador(host: str, puerto: int, nombre: Optional[str] = None) -> int:
+    """
+    Conecta con un coordinador y analiza fragmentos hasta que se lo indique.
+
+    Args:
+        host: Máquina del coordinador
+        puerto: Puerto del coordinador
+        nombre: Nombre del trabajador en los mensajes (por defecto, máquina:pid)
+
+    Returns:
+        Número de fragmentos analizados
+    """
+    nombre = nombre or f"{socket.gethostname()}:{os.getpid()}"
+    analizados = 0
+    with socket.create_connection((host, puerto)) as conexion:
+        enviar_mensaje(conexion, {"tipo": "hola", "version": VERSION_PROTOCOLO, "trabajador": nombre})
+        while True:
+            mensaje, datos = recibir_mensaje(conexion)
+            if mensaje["tipo"] == "terminar":
+                return analizados
+            if mensaje["tipo"] != "fragmento":
+                raise ConnectionError(f"Mensaje inesperado: {mensaje['tipo']}")
+
+            cohorte = crear_cohorte()
+            pendiente = []
+            tamaño = 0
+            ultimo_envio = time.monotonic()
+            try:
+                for resultado, cohorte in analizar_fragmento(datos.splitlines(), mensaje["opciones"]):
+                    linea = json.dumps(
+                        resultado, ensure_ascii=False, default=convertir_para_json
+                    ).encode("utf-8") + b"\n"
+                    pendiente.append(linea)
+                    tamaño += len(linea)
+                    if tamaño >= TAM_ENVIO:
+                        enviar_mensaje(conexion, {"tipo": "resultados"}, b"".join(pendiente))
+                        pendiente, tamaño = [], 0
+                        ultimo_envio = time.monotonic()
+                    elif time.monotonic() - ultimo_envio >= INTERVALO_LATIDO:
+                        enviar_mensaje(conexion, {"tipo": "latido"})
+                        ultimo_envio = time.monotonic()
+            except Exception as e:  # noqa: BLE001 (se informa al coordinador)
+                enviar_mensaje(conexion, {
+                    "tipo": "error", "fragmento": mensaje["fragmento"], "mensaje": f"{type(e).__name__}: {e}"
+                })
+                continue
+            if pendiente:
+                enviar_mensaje(conexion, {"tipo": "resultados"}, b"".join(pendiente))
+            enviar_mensaje(conexion, {"tipo": "hecho", "fragmento": mensaje["fragmento"], "cohorte": cohorte})
+            analizados += 1
+
+
+# =============================================================================
+# COORDINADOR
+# =============================================================================
+
+class Coordinador:
+    """
+    Reparte un corpus .jsonl entre trabajadores conectados por TCP y une los resultados.
+    """
+
+    def __init__(
+        self,
+        entrada: Union[str, Path],
+        salida: Union[str, Path],
+        fragmentos: int = FRAGMENTOS,
+        host: str = "127.0.0.1",
+        puerto: int = 0,
+        incluir_riesgo: bool = True,
+        seguimiento: bool = False,
+        vigilancia: bool = False,
+        campo_texto: str = "texto",
+        directorio_temporal: Optional[Union[str, Path]] = None,
+        plazo_trabajador: Optional[float] = PLAZO_TRABAJADOR
+    ):
+        """
+        Args:
+            entrada: Corpus .jsonl (una entrada por línea, con id_sujeto)
+            salida: Fichero de resultados (un JSON por línea, en el orden del corpus)
+            fragmentos: Número de fragmentos en que se reparte el corpus
+            host: Dirección en la que se escucha ("0.0.0.0" para otras máquinas)
+            puerto: Puerto (0 para uno libre; ver self.puerto)
+            incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
+            seguimiento: Si True, cada sesión se analiza con el historial de
+                su sujeto (seguimiento_progreso)
+            vigilancia: Si True, añade las alertas tempranas de cada sujeto
+            campo_texto: Campo con el texto en cada línea
+            directorio_temporal: Dónde guardar los fragmentos y los resultados
+                parciales (por defecto, junto a la salida)
+            plazo_trabajador: Segundos sin recibir nada de un trabajador
+                (resultados o latidos) tras los que su fragmento vuelve a la
+                cola; None para esperar sin límite
+        """
+        self.entrada = Path(entrada)
+        self.salida = Path(salida)
+        self.fragmentos = fragmentos
+        self.plazo_trabajador = plazo_trabajador
+        self.opciones = {
+            "incluir_riesgo": incluir_riesgo,
+            "seguimiento": seguimiento,
+            "vigilancia": vigilancia,
+            "campo_texto": campo_texto,
+        }
+        self._temporal = Path(tempfile.mkdtemp(
+            prefix=".ccl-", dir=directorio_temporal or self.salida.parent
+        ))
+
+        self._servidor = socket.create_server((host, puerto))
+        self.host = host
+        self.puerto = self._servidor.getsockname()[1]
+
+        self._cola: "queue.Queue[int]" = queue.Queue()
+        self._cerrojo = threading.Lock()
+        self._pendientes = 0
+        self._terminado = threading.Event()
+        self._error: Optional[str] = None
+        self._conectados = 0
+        self._cohortes: Dict[int, Dict] = {}
+        self._indices: List[array] = []
+        self.trabajadores: Counter = Counter()
+
+    def _ruta_fragmento(self, fragmento: int) -> Path:
+        return self._temporal / f"fragmento-{fragmento:05d}.jsonl"
+
+    def _ruta_resultados(self, fragmento: int) -> Path:
+        return self._temporal / f"resultados-{fragmento:05d}.jsonl"
+
+    def particionar(self) -> int:
+        """
+        Reparte las entradas del corpus en ficheros de fragmento, en orden.
+
+        Returns:
+            Número de entradas
+
+        Raises:
+            ValueError: Si una línea no es un objeto JSON
+        """
+        ficheros = [open(self._ruta_fragmento(i), "wb") for i in range(self.fragmentos)]
+        self._indices = [array("q") for _ in range(self.fragmentos)]
+        total = 0
+        try:
+            with open(self.entrada, "rb") as f:
+                for numero_linea, linea in enumerate(f, 1):
+                    if not linea.strip():
+                        continue
+                    try:
+                        entrada = json.loads(linea)
+                    except ValueError as e:
+                        raise ValueError(f"Línea {numero_linea} de {self.entrada} no es JSON válido: {e}") from e
+                    if not isinstance(entrada, dict):
+                        raise ValueError(f"Línea {numero_linea} de {self.entrada} no es un objeto JSON")
+                    fragmento = fragmento_de(entrada.get("id_sujeto"), self.fragmentos)
+                    ficheros[fragmento].write(linea.rstrip(b"\r\n") + b"\n")
+                    self._indices[fragmento].append(total)
+                    total += 1
+        finally:
+            for fichero in ficheros:
+                fichero.close()
+
+        for fragmento in range(self.fragmentos):
+            if self._indices[fragmento]:
+                self._cola.put(fragmento)
+                self._pendientes += 1
+            else:
+                self._ruta_fragmento(fragmento).unlink()
+        if self._pendientes == 0:
+            self._terminado.set()
+        return total
+
+    def _atender(self, conexion: socket.socket):
+        """Hilo de un trabajador: le envía fragmentos mientras queden."""
+        fragmento = None
+        nombre = "?"
+        with self._cerrojo:
+            self._conectados += 1
+        try:
+            mensaje, _ = recibir_mensaje(conexion)
+            if mensaje.get("tipo") != "hola" or mensaje.get("version") != VERSION_PROTOCOLO:
+                raise ConnectionError(f"Saludo no válido: {mensaje}")
+            nombre = mensaje.get("trabajador", "?")
+
+            while not self._terminado.is_set():
+                try:
+                    fragmento = self._cola.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+
+                datos = self._ruta_fragmento(fragmento).read_bytes()
+                enviar_mensaje(
+                    conexion,
+                    {"tipo": "fragmento", "fragmento": fragmento, "opciones": self.opciones},
+                    datos,
+                )
+                escritos = 0
+                with open(self._ruta_resultados(fragmento), "wb") as resultados:
+                    while True:
+                        mensaje, datos = recibir_mensaje(conexion)
+                        if mensaje["tipo"] == "resultados":
+                            resultados.write(datos)
+                            escritos += datos.count(b"\n")
+                        elif mensaje["tipo"] == "latido":
+                            continue
+                        elif mensaje["tipo"] == "hecho":
+                            break
+                        elif mensaje["tipo"] == "error":
+                            raise RuntimeError(
+                                f"El trabajador {nombre} falló en el fragmento {fragmento}: "
+                                f"{mensaje['mensaje']}"
+                            )
+                        else:
+                            raise ConnectionError(f"Mensaje inesperado: {mensaje['tipo']}")
+                if escritos != len(self._indices[fragmento]):
+                    raise ConnectionError(
+                        f"Fragmento {fragmento}: {escritos} resultados para "
+                        f"{len(self._indices[fragmento])} entradas"
+                    )
+
+                with self._cerrojo:
+                    self._cohortes[fragmento] = mensaje["cohorte"]
+                    self.trabajadores[nombre] += 1
+                    self._pendientes -= 1
+                    if self._pendientes == 0:
+                        self._terminado.set()
+                fragmento = None
+
+            enviar_mensaje(conexion, {"tipo": "terminar"})
+        except RuntimeError as e:
+            # Error del análisis: se repetiría en otro trabajador
+            self._error = str(e)
+            self._terminado.set()
+        except (ConnectionError, OSError, ValueError):
+            # Trabajador caído o sin noticias en plazo_trabajador (socket.timeout
+            # es un OSError): su fragmento vuelve a la cola
+            if fragmento is not None:
+                self._cola.put(fragmento)
+        finally:
+            conexion.close()
+            with self._cerrojo:
+                self._conectados -= 1
+
+    def _aceptar(self):
+        self._servidor.settimeout(0.2)
+        while not self._terminado.is_set():
+            try:
+                conexion, _ = self._servidor.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conexion.settimeout(self.plazo_trabajador)
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    def _unir_resultados(self):
+        """Une los resultados de los fragmentos en el orden del corpus."""
+        ficheros = {
+            fragmento: open(self._ruta_resultados(fragmento), "rb")
+            for fragmento in range(self.fragmentos) if self._indices[fragmento]
+        }
+        try:
+            def lineas(fragmento):
+                for indice, linea in zip(self._indices[fragmento], ficheros[fragmento]):
+                    yield indice, linea
+
+            with open(self.salida, "wb") as salida:
+                for _, linea in heapq.merge(*(lineas(fragmento) for fragmento in ficheros)):
+                    salida.write(linea)
+        finally:
+            for fichero in ficheros.values():
+                fichero.close()
+
+    def ejecutar(self, trabajadores_locales: int = 0) -> Dict:
+        """
+        Reparte el corpus, espera a que los trabajadores lo analicen y une
+        los resultados.
+
+        Args:
+            trabajadores_locales: Procesos trabajador que se lanzan en esta
+                máquina (además de los que se conecten desde otras)
+
+        Returns:
+            Dict {"entradas", "fragmentos", "trabajadores", "cohorte", "segundos"};
+            la cohorte se guarda también en "<salida>.cohorte.json"
+
+        Raises:
+            RuntimeError: Si el análisis de un fragmento falla
+        """
+        inicio = time.perf_counter()
+        procesos = []
+        try:
+            total = self.particionar()
+            hilo = threading.Thread(target=self._aceptar, daemon=True)
+            hilo.start()
+            procesos = [
+                lanzar_trabajador_local(self.host, self.puerto) for _ in range(trabajadores_locales)
+            ]
+            while not self._terminado.wait(timeout=1.0):
+                # Sin trabajadores remotos, si los locales han muerto no queda nadie
+                if procesos and self._conectados == 0 and all(
+                    proceso.poll() is not None for proceso in procesos
+                ):
+                    raise RuntimeError(
+                        "Los trabajadores locales terminaron sin completar el análisis"
+                    )
+            hilo.join()
+            if self._error is not None:
+                raise RuntimeError(self._error)
+
+            self._unir_resultados()
+            cohorte = crear_cohorte()
+            for fragmento in sorted(self._cohortes):
+                cohorte = combinar_cohortes(cohorte, self._cohortes[fragmento])
+            ruta_cohorte = self.salida.with_name(self.salida.name + ".cohorte.json")
+            with open(ruta_cohorte, "w", encoding="utf-8") as f:
+                json.dump(cohorte, f, ensure_ascii=False, indent=2)
+        finally:
+            self._terminado.set()
+            self._servidor.close()
+            for proceso in procesos:
+                try:
+                    proceso.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proceso.kill()
+            shutil.rmtree(self._temporal, ignore_errors=True)
+
+        return {
+            "entradas": total,
+            "fragmentos": len(self._cohortes),
+            "trabajadores": dict(self.trabajadores),
+            "cohorte": cohorte,
+            "segundos": round(time.perf_counter() - inicio, 3),
+        }
+
+
+def lanzar_trabajador_local(host: str, puerto: int) -> subprocess.Popen:
+    """Lanza en esta máquina un proceso `python -m ccl trabajador host:puerto`."""
+    entorno = dict(os.environ)
+    raiz = str(Path(__file__).resolve().parent.parent)
+    entorno["PYTHONPATH"] = os.pathsep.join(filter(None, [raiz, entorno.get("PYTHONPATH")]))
+    host_conexion = "127.0.0.1" if host in ("0.0.0.0", "") else host
+    return subprocess.Popen(
+        [sys.executable, "-m", "ccl", "trabajador", f"{host_conexion}:{puerto}"],
+        env=entorno,
+    )
@@ -0,0 +1,277 @@
+"""
+duplicados.py
+
+Detección de textos casi duplicados con MinHash y LSH.
+
+Los estudiantes reenvían textos casi idénticos y los ejercicios de los
+materiales producen muchas respuestas parecidas a una plantilla. Este módulo
+calcula firmas MinHash sobre shingles de palabras (secuencias de
+TAM_SHINGLE tokens consecutivos) y las indexa por bandas (LSH), de modo que
+los candidatos a duplicado de un texto se encuentran sin compararlo con
+todos los anteriores.
+
+La similitud estimada entre dos firmas aproxima el índice de Jaccard entre
+los conjuntos de shingles de los dos textos.
+
+Uso:
+    >>> indice = IndiceLSH()
+    >>> indice.añadir("texto_1", firma_minhash(texto_1))
+    >>> indice.buscar(firma_minhash(texto_2), umbral=0.9)
+    ('texto_1', 0.95)
+"""
+
+import hashlib
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from .utils import iter_palabras
+
+
+# =============================================================================
+# PARÁMETROS
+# =============================================================================
+
+# Número de componentes de cada firma
+NUM_PERMUTACIONES = 128
+
+# Palabras por shingle
+TAM_SHINGLE = 3
+
+# Bandas del índice LSH (NUM_PERMUTACIONES / BANDAS filas por banda). Con
+# 16 bandas de 8 filas, los pares con similitud por encima de ~0.7 son
+# candidatos casi con seguridad.
+BANDAS_LSH = 16
+
+# Umbral de similitud por defecto para considerar dos textos duplicados
+UMBRAL_SIMILITUD = 0.9
+
+# Mayor que cualquier valor de cubeta (hash de 64 bits / número de cubetas)
+_DESPLAZAMIENTO_DENSIFICACION = 1 << 64
+
+
+# =============================================================================
+# FIRMAS MINHASH
+# =============================================================================
+
+def _hash_estable(texto: str) -> int:
+    """Hash de 64 bits estable entre procesos (a diferencia de hash())."""
+    return int.from_bytes(
+        hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little'
+    )
+
+
+def shingles(texto: str, tam_shingle: int = TAM_SHINGLE) -> Set[int]:
+    """
+    Calcula los shingles de palabras de un texto, como hashes de 64 bits.
+
+    Los textos con menos de tam_shingle palabras forman un único shingle.
+
+    Args:
+        texto: Texto a analizar
+        tam_shingle: Palabras por shingle
+
+    Returns:
+        Set con el hash de cada shingle distinto
+    """
+    resultado = set()
+    ventana = []
+    for token in iter_palabras(texto):
+        ventana.append(token)
+        if len(ventana) > tam_shingle:
+            del ventana[0]
+        if len(ventana) == tam_shingle:
+            resultado.add(_hash_estable(' '.join(ventana)))
+
+    if not resultado and ventana:
+        resultado.add(_hash_estable(' '.join(ventana)))
+    return resultado
+
+
+def firma_minhash(
+    texto: str,
+    num_permutaciones: int = NUM_PERMUTACIONES,
+    tam_shingle: int = TAM_SHINGLE
+) -> Tuple[int, ...]:
+    """
+    Calcula la firma MinHash de un texto.
+
+    Se usa MinHash de una sola permutación: el hash de cada shingle se
+    asigna a una de num_permutaciones cubetas y cada componente de la firma
+    es el mínimo de su cubeta. Las cubetas vacías toman el valor de la
+    siguiente cubeta no vacía (densificación por rotación), de modo que las
+    firmas siguen siendo comparables componente a componente y aptas para
+    LSH. El coste es lineal en el número de shingles, en lugar de
+    proporcional a shingles x permutaciones.
+
+    Args:
+        texto: Texto a analizar
+        num_permutaciones: Número de componentes de la firma
+        tam_shingle: Palabras por shingle
+
+    Returns:
+        Tupla con un valor por componente, o una tupla vacía si el texto no
+        tiene palabras
+    """
+    hashes = shingles(texto, tam_shingle)
+    if not hashes:
+        return ()
+
+    cubetas = [None] * num_permutaciones
+    for h in hashes:
+        indice, valor = h % num_permutaciones, h // num_permutaciones
+        actual = cubetas[indice]
+        if actual is None or valor < actual:
+            cubetas[indice] = valor
+
+    if None not in cubetas:
+        return tuple(cubetas)
+
+    # Densificación: cada cubeta vacía toma la siguiente no vacía (circular),
+    # desplazada según la distancia para no coincidir por casualidad. Se
+    # recorre dos veces hacia atrás para dar la vuelta.
+    firma = list(cubetas)
+    origen = posicion_origen = None
+    for posicion in range(2 * num_permutaciones - 1, -1, -1):
+        indice = posicion % num_permutaciones
+        if cubetas[indice] is not None:
+            origen, posicion_origen = cubetas[indice], posicion
+        elif posicion < num_permutaciones:
+            distancia = posicion_origen - posicion
+            firma[indice] = origen + distancia * _DESPLAZAMIENTO_DENSIFICACION
+    return tuple(firma)
+
+
+def similitud_firmas(firma_a: Sequence[int], firma_b: Sequence[int]) -> float:
+    """
+    Estima la similitud de Jaccard entre dos textos a partir de sus firmas.
+
+    Args:
+        firma_a: Firma MinHash del primer texto
+        firma_b: Firma MinHash del segundo texto
+
+    Returns:
+        Fracción de componentes iguales (0.0 si alguna firma está vacía)
+
+    Raises:
+        ValueError: Si las firmas tienen distinto número de componentes
+    """
+    if not firma_a or not firma_b:
+        return 0.0
+    if len(firma_a) != len(firma_b):
+        raise ValueError("Las firmas deben tener el mismo número de componentes")
+
+    iguales = sum(1 for a, b in zip(firma_a, firma_b) if a == b)
+    return iguales / len(firma_a)
+
+
+# =============================================================================
+# ÍNDICE LSH
+# =============================================================================
+
+class IndiceLSH:
+    """
+    Índice LSH por bandas sobre firmas MinHash.
+
+    Cada firma se divide en bandas de filas consecutivas; dos firmas son
+    candidatas si coinciden por completo en alguna banda.
+    """
+
+    def __init__(
+        self,
+        num_permutaciones: int = NUM_PERMUTACIONES,
+        bandas: int = BANDAS_LSH
+    ):
+        """
+        Args:
+            num_permutaciones: Componentes de las firmas que se indexarán
+            bandas: Número de bandas (debe dividir a num_permutaciones)
+
+        Raises:
+            ValueError: Si bandas no divide a num_permutaciones
+        """
+        if bandas < 1 or num_permutaciones % bandas != 0:
+            raise ValueError(
+                f"El número de bandas ({bandas}) debe dividir al de "
+                f"permutaciones ({num_permutaciones})"
+            )
+        self.num_permutaciones = num_permutaciones
+        self.bandas = bandas
+        self.filas = num_permutaciones // bandas
+        self._cubetas: List[Dict[Tuple[int, ...], List[Hashable]]] = [
+            {} for _ in range(bandas)
+        ]
+        self._firmas: Dict[Hashable, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._firmas)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._firmas
+
+    def añadir(self, clave: Hashable, firma: Sequence[int]):
+        """
+        Añade una firma al índice.
+
+        Las firmas vacías (textos sin palabras) no se indexan.
+
+        Raises:
+            ValueError: Si la clave ya existe o la firma no tiene el tamaño esperado
+        """
+        if clave in self._firmas:
+            raise ValueError(f"La clave {clave!r} ya está en el índice")
+        if not firma:
+            return
+        self._comprobar_tamaño(firma)
+
+        firma = tuple(firma)
+        self._firmas[clave] = firma
+        for banda, cubeta in zip(self._bandas(firma), self._cubetas):
+            cubeta.setdefault(banda, []).append(clave)
+
+    def candidatos(self, firma: Sequence[int]) -> Set[Hashable]:
+        """Claves que coinciden con la firma en al menos una banda."""
+        if not firma:
+            return set()
+        self._comprobar_tamaño(firma)
+
+        encontrados = set()
+        for banda, cubeta in zip(self._bandas(tuple(firma)), self._cubetas):
+            encontrados.update(cubeta.get(banda, ()))
+        return encontrados
+
+    def buscar(
+        self,
+        firma: Sequence[int],
+        umbral: float = UMBRAL_SIMILITUD,
+        aceptar: Optional[Callable[[Hashable], bool]] = None
+    ) -> Optional[Tuple[Hashable, float]]:
+        """
+        Busca el texto indexado más parecido por encima de un umbral.
+
+        Args:
+            firma: Firma MinHash del texto a buscar
+            umbral: Similitud estimada mínima (0-1)
+            aceptar: Función opcional que decide qué claves pueden
+                devolverse (ej: solo las del mismo grupo)
+
+        Returns:
+            Tupla (clave, similitud) del mejor candidato, o None
+        """
+        mejor = None
+        for clave in self.candidatos(firma):
+            if aceptar is not None and not aceptar(clave):
+                continue
+            similitud = similitud_firmas(firma, self._firmas[clave])
+            if similitud >= umbral and (mejor is None or similitud > mejor[1]):
+                mejor = (clave, similitud)
+        return mejor
+
+    def _bandas(self, firma: Tuple[int, ...]):
+        filas = self.filas
+        return (firma[i:i + filas] for i in range(0, self.num_permutaciones, filas))
+
+    def _comprobar_tamaño(self, firma: Sequence[int]):
+        if len(firma) != self.num_permutaciones:
+            raise ValueError(
+                f"La firma tiene {len(firma)} componentes; se esperaban "
+                f"{self.num_permutaciones}"
+            )
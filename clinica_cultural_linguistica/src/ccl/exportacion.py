@@ -0,0 +1,507 @@
+"""
+exportacion.py
+
+Exportación de resultados de lotes en formatos compactos.
+
+Dos formatos, además del JSON de siempre:
+
+- Registros binarios: un fichero con una cabecera y, por cada resultado, su
+  longitud (4 bytes) seguida del resultado codificado con msgpack si está
+  instalado, o con JSON compacto si no. Se leen de uno en uno sin cargar el
+  fichero entero.
+- Columnas: una columna por métrica (nivel, variedad léxica, emociones,
+  tensiones...) según ESQUEMA_COLUMNAS, en .npz (numpy) o Arrow/Parquet
+  (pyarrow). Los análisis de cohorte cargan solo las columnas que necesitan
+  en lugar de leer un objeto JSON por sesión.
+
+ESQUEMA_COLUMNAS es la única tabla de aplanado de los resultados: los
+vectores de características de caracteristicas.py se derivan de ella y
+comparten su versión (VERSION_ESQUEMA_COLUMNAS).
+
+msgpack, numpy y pyarrow son opcionales: solo se importan al usar el
+formato que los necesita.
+
+Uso:
+    >>> resultados = analizar_lote(entradas)
+    >>> escribir_registros(resultados, "cohorte.cclr")
+    >>> exportar_columnas(resultados, "cohorte.npz")
+    >>> leer_columnas("cohorte.npz", ["id_sujeto", "diagnostico.variedad_lexica"])
+"""
+
+import json
+import math
+import struct
+from types import MappingProxyType
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .radiografia_cultural import CAMPOS_CULTURALES, INDICADORES_TENSION
+from .riesgo_psico_emocional import CATEGORIAS_SEÑALES
+from .utils import PALABRAS_EMOCIONALES, TEMAS_PALABRAS_CLAVE, convertir_para_json
+
+
+# =============================================================================
+# REGISTROS BINARIOS
+# =============================================================================
+
+# Cabecera: identificador del formato y códec de los registros
+MAGIA_REGISTROS = b"CCLR\x01"
+CODEC_MSGPACK = b"M"
+CODEC_JSON = b"J"
+
+# Longitud de cada registro: entero sin signo de 4 bytes, big-endian
+_LONGITUD = struct.Struct(">I")
+
+
+def _importar_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _codificadores(codec: bytes) -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """Funciones (codificar, decodificar) de un códec de registros."""
+    if codec == CODEC_MSGPACK:
+        msgpack = _importar_msgpack()
+        if msgpack is None:
+            raise ImportError(
+                "El fichero está codificado con msgpack; instálalo con: pip install msgpack"
+            )
+        return (
+            lambda obj: msgpack.packb(obj, default=convertir_para_json, use_bin_type=True),
+            lambda datos: msgpack.unpackb(datos, raw=False),
+        )
+    if codec == CODEC_JSON:
+        return (
+            lambda obj: json.dumps(
+                obj, ensure_ascii=False, separators=(",", ":"), default=convertir_para_json
+            ).encode("utf-8"),
+            lambda datos: json.loads(datos.decode("utf-8")),
+        )
+    raise ValueError(f"Códec de registros desconocido: {codec!r}")
+
+
+def escribir_registros(
+    resultados: Iterable[Dict],
+    destino: Union[str, Path, BinaryIO],
+    codec: Optional[str] = None
+) -> int:
+    """
+    Escribe resultados como registros binarios con prefijo de longitud.
+
+    Args:
+        resultados: Resultados a escribir (ej: de analizar_lote); puede ser
+            un generador, se escriben según llegan
+        destino: Ruta del fichero o fichero binario abierto para escritura
+        codec: "msgpack", "json" o None (msgpack si está instalado)
+
+    Returns:
+        Número de registros escritos
+
+    Raises:
+        ImportError: Si se pide "msgpack" y no está instalado
+        ValueError: Si el códec no es válido
+    """
+    if codec is None:
+        codec_bytes = CODEC_MSGPACK if _importar_msgpack() is not None else CODEC_JSON
+    elif codec in ("msgpack", "json"):
+        codec_bytes = CODEC_MSGPACK if codec == "msgpack" else CODEC_JSON
+    else:
+        raise ValueError(f"Códec no soportado: {codec!r} (usa 'msgpack' o 'json')")
+    codificar, _ = _codificadores(codec_bytes)
+
+    if isinstance(destino, (str, Path)):
+        with open(destino, "wb") as f:
+            return escribir_registros(resultados, f, codec)
+
+    destino.write(MAGIA_REGISTROS + codec_bytes)
+    escritos = 0
+    for resultado in resultados:
+        datos = codificar(resultado)
+        destino.write(_LONGITUD.pack(len(datos)))
+        destino.write(datos)
+        escritos += 1
+    return escritos
+
+
+def leer_registros(origen: Union[str, Path, BinaryIO]) -> Iterator[Dict]:
+    """
+    Lee uno a uno los resultados de un fichero de registros binarios.
+
+    Args:
+        origen: Ruta del fichero o fichero binario abierto para lectura
+
+    Yields:
+        Cada resultado, como dict
+
+    Raises:
+        ValueError: Si el fichero no es de registros o está truncado
+        ImportError: Si el fichero usa msgpack y no está instalado
+    """
+    if isinstance(origen, (str, Path)):
+        with open(origen, "rb") as f:
+            yield from leer_registros(f)
+        return
+
+    cabecera = origen.read(len(MAGIA_REGISTROS) + 1)
+    if cabecera[:-1] != MAGIA_REGISTROS:
+        raise ValueError("No es un fichero de registros de CCL")
+    _, decodificar = _codificadores(cabecera[-1:])
+
+    while True:
+        prefijo = origen.read(_LONGITUD.size)
+        if not prefijo:
+            return
+        if len(prefijo) < _LONGITUD.size:
+            raise ValueError("Fichero de registros truncado")
+        (longitud,) = _LONGITUD.unpack(prefijo)
+        datos = origen.read(longitud)
+        if len(datos) < longitud:
+            raise ValueError("Fichero de registros truncado")
+        yield decodificar(datos)
+
+
+# =============================================================================
+# ESQUEMA DE COLUMNAS
+# =============================================================================
+
+# Versión del esquema; cambia si se añaden, quitan o renombran columnas. Es
+# también la versión de los vectores de características (caracteristicas.py),
+# que se derivan de este esquema
+VERSION_ESQUEMA_COLUMNAS = 2
+
+# Tipos de columna
+TIPO_TEXTO = "texto"
+TIPO_ENTERO = "entero"
+TIPO_REAL = "real"
+
+# Niveles en orden creciente
+NIVELES_LINGUISTICOS = ("A1/A2", "B1", "B2", "B2/C1")
+NIVELES_RIESGO_BLOQUEO = ("bajo", "medio", "alto")
+NIVELES_RIESGO = ("bajo", "moderado", "alto", "crítico")
+
+# Métricas de diagnostico_linguistico_emocional["metricas"] y su tipo
+METRICAS_DIAGNOSTICO = (
+    ("longitud_texto", TIPO_ENTERO),
+    ("variedad_lexica", TIPO_REAL),
+    ("porcentaje_pronombres_primera_persona", TIPO_REAL),
+    ("porcentaje_verbos_pasado", TIPO_REAL),
+    ("porcentaje_conectores", TIPO_REAL),
+)
+
+
+def _valor(seccion: str, *claves: str) -> Callable[[Dict], Any]:
+    """Extractor de resultado[seccion][clave][...] (None si falta algo)."""
+    def extraer(resultado):
+        valor = resultado.get(seccion)
+        for clave in claves:
+            if valor is None:
+                return None
+            valor = valor.get(clave)
+        return valor
+    return extraer
+
+
+def _conteo(seccion: str, *claves: str) -> Callable[[Dict], Any]:
+    """
+    Extractor de un conteo de resultado[seccion][...][clave]: 0 si la clave
+    falta (los conteos a cero se omiten), None si falta la sección.
+    """
+    *ruta, ultima = claves
+
+    def extraer(resultado):
+        valor = resultado.get(seccion)
+        if valor is None:
+            return None
+        for clave in ruta:
+            valor = valor.get(clave, {})
+        return valor.get(ultima, 0)
+    return extraer
+
+
+def _longitud(seccion: str, clave: str) -> Callable[[Dict], Any]:
+    """Extractor del número de elementos de resultado[seccion][clave]."""
+    def extraer(resultado):
+        valor = resultado.get(seccion)
+        if valor is None:
+            return None
+        return len(valor.get(clave, ()))
+    return extraer
+
+
+def _indicador(seccion: str, clave: str, elemento: str) -> Callable[[Dict], Any]:
+    """Extractor de 1/0 según elemento esté o no en resultado[seccion][clave]."""
+    def extraer(resultado):
+        valor = resultado.get(seccion)
+        if valor is None:
+            return None
+        return 1 if elemento in valor.get(clave, ()) else 0
+    return extraer
+
+
+def _frecuencia_tema(tema: str) -> Callable[[Dict], Any]:
+    """Extractor de la frecuencia de un tema en deteccion_bloqueos."""
+    def extraer(resultado):
+        bloqueos = resultado.get("deteccion_bloqueos")
+        if bloqueos is None:
+            return None
+        for tema_info in bloqueos["temas_detectados"]:
+            if tema_info["tema"] == tema:
+                return tema_info["frecuencia"]
+        return 0
+    return extraer
+
+
+def _construir_esquema() -> List[Tuple[str, str, Callable[[Dict], Any]]]:
+    diag = "diagnostico_linguistico_emocional"
+    radio = "radiografia_cultural"
+
+    esquema = [
+        ("id_sujeto", TIPO_TEXTO, lambda resultado: resultado.get("id_sujeto")),
+        ("diagnostico.nivel_probable", TIPO_TEXTO, _valor(diag, "nivel_probable")),
+        ("diagnostico.estado_emocional_dominante", TIPO_TEXTO,
+         _valor(diag, "estado_emocional_dominante")),
+    ]
+    esquema += [
+        (f"diagnostico.{metrica}", tipo, _valor(diag, "metricas", metrica))
+        for metrica, tipo in METRICAS_DIAGNOSTICO
+    ]
+    esquema += [
+        ("diagnostico.numero_errores", TIPO_ENTERO, _longitud(diag, "errores_clave")),
+        ("diagnostico.numero_recursos", TIPO_ENTERO, _longitud(diag, "recursos_discursivos")),
+    ]
+    esquema += [
+        (f"diagnostico.emocion.{emocion}", TIPO_ENTERO,
+         _conteo(diag, "metricas", "emociones_detectadas", emocion))
+        for emocion in PALABRAS_EMOCIONALES
+    ]
+
+    esquema.append(("radiografia.tension_dominante", TIPO_TEXTO, _valor(radio, "tension_dominante")))
+    esquema += [
+        (f"radiografia.tension.{tension}", TIPO_ENTERO,
+         _conteo(radio, "tensiones_detectadas", tension))
+        for tension in INDICADORES_TENSION
+    ]
+    esquema += [
+        (f"radiografia.campo.{campo}", TIPO_ENTERO, _conteo(radio, "campos_culturales", campo))
+        for campo in CAMPOS_CULTURALES
+    ]
+    esquema += [
+        ("radiografia.referentes_origen", TIPO_ENTERO, _longitud(radio, "referentes_origen")),
+        ("radiografia.referentes_acogida", TIPO_ENTERO, _longitud(radio, "referentes_acogida")),
+    ]
+
+    esquema += [
+        (f"bloqueos.tema.{tema}", TIPO_ENTERO, _frecuencia_tema(tema))
+        for tema in TEMAS_PALABRAS_CLAVE
+    ]
+    esquema += [
+        ("bloqueos.nivel_riesgo_bloqueo", TIPO_TEXTO,
+         _valor("deteccion_bloqueos", "nivel_riesgo_bloqueo")),
+        ("bloqueos.numero_bloqueos", TIPO_ENTERO,
+         _longitud("deteccion_bloqueos", "posibles_bloqueos")),
+        ("tareas.numero_tareas", TIPO_ENTERO, _valor("prescripcion_tareas", "numero_tareas")),
+        ("riesgo.nivel_riesgo", TIPO_TEXTO, _valor("riesgo_psico_emocional", "nivel_riesgo")),
+        ("riesgo.numero_alertas", TIPO_ENTERO, _longitud("riesgo_psico_emocional", "alertas")),
+    ]
+    esquema += [
+        (f"riesgo.categoria.{categoria}", TIPO_ENTERO,
+         _indicador("riesgo_psico_emocional", "señales_detectadas", categoria))
+        for categoria in CATEGORIAS_SEÑALES
+    ]
+    return esquema
+
+
+# Columnas exportadas: (nombre, tipo, extractor del resultado de analisis_completo)
+ESQUEMA_COLUMNAS = tuple(_construir_esquema())
+
+# Escala de las columnas de texto que son niveles; en los vectores de
+# características se codifican por su posición en la escala
+ESCALAS_COLUMNAS = MappingProxyType({
+    "diagnostico.nivel_probable": NIVELES_LINGUISTICOS,
+    "bloqueos.nivel_riesgo_bloqueo": NIVELES_RIESGO_BLOQUEO,
+    "riesgo.nivel_riesgo": NIVELES_RIESGO,
+})
+
+# Valor de las celdas sin dato en .npz (Arrow usa nulos)
+VALORES_AUSENTES = MappingProxyType({TIPO_TEXTO: "", TIPO_ENTERO: -1, TIPO_REAL: math.nan})
+
+
+def columnas_resultados(resultados: Iterable[Dict]) -> Dict[str, List[Any]]:
+    """
+    Reparte resultados de analisis_completo en columnas según ESQUEMA_COLUMNAS.
+
+    Args:
+        resultados: Resultados de analisis_completo (o analizar_lote)
+
+    Returns:
+        Dict {nombre de columna: lista de valores}, None donde falta el dato
+        (ej: riesgo no evaluado)
+    """
+    columnas = {nombre: [] for nombre, _, _ in ESQUEMA_COLUMNAS}
+    for resultado in resultados:
+        for nombre, _, extraer in ESQUEMA_COLUMNAS:
+            columnas[nombre].append(extraer(resultado))
+    return columnas
+
+
+# =============================================================================
+# EXPORTACIÓN EN COLUMNAS
+# =============================================================================
+
+_FORMATOS_COLUMNAS = MappingProxyType({
+    ".npz": "npz",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".parquet": "parquet",
+})
+
+_CLAVE_VERSION_NPZ = "__version_esquema__"
+_CLAVE_VERSION_ARROW = b"ccl.version_esquema"
+
+
+def _formato_columnas(ruta: Path, formato: Optional[str]) -> str:
+    if formato is None:
+        formato = _FORMATOS_COLUMNAS.get(ruta.suffix.lower())
+        if formato is None:
+            raise ValueError(
+                f"No se reconoce el formato de '{ruta.name}'; "
+                "usa .npz, .arrow, .feather o .parquet, o indica formato"
+            )
+    if formato not in ("npz", "arrow", "parquet"):
+        raise ValueError(f"Formato no soportado: {formato!r}")
+    return formato
+
+
+def _importar_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Para exportar a .npz instala numpy: pip install numpy") from None
+    return numpy
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Para exportar a Arrow o Parquet instala pyarrow: pip install pyarrow"
+        ) from None
+    return pyarrow
+
+
+def exportar_columnas(
+    resultados: Iterable[Dict],
+    ruta: Union[str, Path],
+    formato: Optional[str] = None
+) -> int:
+    """
+    Exporta resultados en columnas, una por métrica de ESQUEMA_COLUMNAS.
+
+    En .npz, las celdas sin dato toman los valores de VALORES_AUSENTES
+    ("" en texto, -1 en enteros, NaN en reales); en Arrow y Parquet son
+    nulos.
+
+    Args:
+        resultados: Resultados de analisis_completo (o analizar_lote)
+        ruta: Fichero de salida (.npz, .arrow, .feather o .parquet)
+        formato: "npz", "arrow" o "parquet"; por defecto, según la extensión
+
+    Returns:
+        Número de filas exportadas
+
+    Raises:
+        ImportError: Si falta numpy (npz) o pyarrow (arrow/parquet)
+        ValueError: Si el formato no es válido
+    """
+    ruta = Path(ruta)
+    formato = _formato_columnas(ruta, formato)
+    columnas = columnas_resultados(resultados)
+    filas = len(columnas["id_sujeto"])
+
+    if formato == "npz":
+        np = _importar_numpy()
+        tipos = {TIPO_TEXTO: str, TIPO_ENTERO: np.int64, TIPO_REAL: np.float64}
+        arrays = {}
+        for nombre, tipo, _ in ESQUEMA_COLUMNAS:
+            ausente = VALORES_AUSENTES[tipo]
+            valores = [ausente if v is None else v for v in columnas[nombre]]
+            arrays[nombre] = np.array(valores, dtype=tipos[tipo])
+        arrays[_CLAVE_VERSION_NPZ] = np.array(VERSION_ESQUEMA_COLUMNAS)
+        with open(ruta, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        return filas
+
+    pa = _importar_pyarrow()
+    tipos = {TIPO_TEXTO: pa.string(), TIPO_ENTERO: pa.int64(), TIPO_REAL: pa.float64()}
+    esquema = pa.schema(
+        [pa.field(nombre, tipos[tipo]) for nombre, tipo, _ in ESQUEMA_COLUMNAS],
+        metadata={_CLAVE_VERSION_ARROW: str(VERSION_ESQUEMA_COLUMNAS).encode()}
+    )
+    tabla = pa.table(columnas, schema=esquema)
+    if formato == "parquet":
+        pa.parquet.write_table(tabla, ruta)
+    else:
+        pa.feather.write_feather(tabla, ruta)
+    return filas
+
+
+def leer_columnas(
+    ruta: Union[str, Path],
+    columnas: Optional[List[str]] = None,
+    formato: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Lee columnas de un fichero creado con exportar_columnas.
+
+    Solo se leen del disco las columnas pedidas.
+
+    Args:
+        ruta: Fichero a leer
+        columnas: Nombres de las columnas (por defecto, todas)
+        formato: "npz", "arrow" o "parquet"; por defecto, según la extensión
+
+    Returns:
+        Dict {nombre: array de numpy} para .npz, o {nombre: ChunkedArray}
+        para Arrow y Parquet
+
+    Raises:
+        ImportError: Si falta numpy (npz) o pyarrow (arrow/parquet)
+        ValueError: Si el fichero es de otra versión del esquema
+        KeyError: Si se pide una columna que no existe
+    """
+    ruta = Path(ruta)
+    formato = _formato_columnas(ruta, formato)
+
+    if formato == "npz":
+        np = _importar_numpy()
+        with np.load(ruta, allow_pickle=False) as datos:
+            version = datos[_CLAVE_VERSION_NPZ] if _CLAVE_VERSION_NPZ in datos.files else None
+            _comprobar_version(None if version is None else int(version))
+            nombres = columnas if columnas is not None else [
+                nombre for nombre in datos.files if nombre != _CLAVE_VERSION_NPZ
+            ]
+            return {nombre: datos[nombre] for nombre in nombres}
+
+    pa = _importar_pyarrow()
+    if formato == "parquet":
+        tabla = pa.parquet.read_table(ruta, columns=columnas)
+    else:
+        tabla = pa.feather.read_table(ruta, columns=columnas)
+    metadatos = tabla.schema.metadata or {}
+    version = metadatos.get(_CLAVE_VERSION_ARROW)
+    _comprobar_version(int(version) if version is not None else None)
+    return {nombre: tabla.column(nombre) for nombre in tabla.column_names}
+
+
+def _comprobar_version(version: Optional[int]):
+    if version != VERSION_ESQUEMA_COLUMNAS:
+        raise ValueError(
+            f"El fichero usa la versión {version} del esquema de columnas; "
+            f"se esperaba la {VERSION_ESQUEMA_COLUMNAS}"
+        )
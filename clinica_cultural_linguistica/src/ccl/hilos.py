@@ -0,0 +1,161 @@
+"""
+hilos.py
+
+Análisis por lotes con un pool de hilos.
+
+Con ProcessPoolExecutor cada proceso carga su propia copia de los léxicos,
+del catálogo de tareas y del motor de reglas, y cada entrada y cada
+resultado se serializan con pickle para ir y volver. Con hilos no hay
+copias ni serialización, pero con el GIL solo avanza un hilo a la vez; en
+las versiones de CPython sin GIL (3.13t y posteriores, ver gil_activo())
+los hilos analizan en paralelo de verdad.
+
+Para poder compartirlo entre hilos sin cerrojos, el estado de módulo de
+ccl es inmutable: los léxicos son frozensets, las tablas (CATALOGO_TAREAS,
+REFERENTES_CULTURALES...) son MappingProxyType (ver utils.congelar) y el
+motor de reglas por defecto congela sus índices al compilarse. La única
+caché de módulo es un functools.lru_cache (corpus.py), que protege su
+estado interno. estado_mutable() comprueba que ninguna constante de los
+módulos se puede modificar.
+
+Uso:
+    >>> resultados = analizar_lote_en_hilos(entradas, hilos=8)
+    >>> # el mismo resultado que analizar_lote(entradas)
+
+Ver examples/estres_hilos.py para la prueba de estrés y la comparación de
+rendimiento con procesos.
+"""
+
+import importlib
+import os
+import pkgutil
+import re
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import BuiltinFunctionType, FunctionType, MappingProxyType, ModuleType
+from typing import Any, Dict, Iterable, List, Optional
+
+from .duplicados import IndiceLSH, UMBRAL_SIMILITUD
+from .lotes import AlmacenResultados, analizar_lote
+
+
+# Nombres de las constantes de módulo: MAYÚSCULAS, con o sin "_" delante
+_PATRON_CONSTANTE = re.compile(r'_?[A-ZÑ][A-ZÑ0-9_]*')
+
+# Valores que no se pueden modificar
+_TIPOS_INMUTABLES = (
+    str, bytes, int, float, complex, bool, type(None), range,
+    re.Pattern, struct.Struct, FunctionType, BuiltinFunctionType, type,
+)
+
+
+def gil_activo() -> bool:
+    """True si el intérprete ejecuta con GIL (siempre, antes de Python 3.13)."""
+    comprobar = getattr(sys, "_is_gil_enabled", None)
+    return True if comprobar is None else comprobar()
+
+
+def hilos_por_defecto() -> int:
+    """Hilos del pool por defecto: uno por CPU."""
+    return os.cpu_count() or 1
+
+
+def analizar_lote_en_hilos(
+    entradas: List[Dict],
+    hilos: Optional[int] = None,
+    incluir_riesgo: bool = True,
+    deduplicar: bool = False,
+    umbral_similitud: float = UMBRAL_SIMILITUD,
+    agrupar_por: Optional[str] = 'id_sujeto',
+    almacen: Optional[AlmacenResultados] = None,
+    indice: Optional[IndiceLSH] = None
+) -> List[Dict]:
+    """
+    Ejecuta analizar_lote() repartiendo las entradas entre un pool de hilos.
+
+    Args:
+        entradas: Lista de entradas (mismo formato que analisis_completo)
+        hilos: Hilos del pool (por defecto, hilos_por_defecto())
+        incluir_riesgo, deduplicar, umbral_similitud, agrupar_por, almacen,
+            indice: Ver analizar_lote
+
+    Returns:
+        Lista de resultados, en el orden de las entradas (la misma que
+        devuelve analizar_lote sin ejecutor)
+    """
+    with ThreadPoolExecutor(max_workers=hilos or hilos_por_defecto()) as ejecutor:
+        return analizar_lote(
+            entradas,
+            incluir_riesgo=incluir_riesgo,
+            deduplicar=deduplicar,
+            umbral_similitud=umbral_similitud,
+            agrupar_por=agrupar_por,
+            ejecutor=ejecutor,
+            almacen=almacen,
+            indice=indice,
+        )
+
+
+# =============================================================================
+# ESTADO DE MÓDULO
+# =============================================================================
+
+def _modulos_ccl() -> List[ModuleType]:
+    """Todos los módulos del paquete ccl (salvo __main__)."""
+    paquete = sys.modules[__package__]
+    modulos = [paquete]
+    for info in pkgutil.iter_modules(paquete.__path__):
+        if not info.name.startswith("__"):
+            modulos.append(importlib.import_module(f"{__package__}.{info.name}"))
+    return modulos
+
+
+def _mutables(valor: Any, ruta: str, vistos: set) -> Iterable[str]:
+    """Rutas de las partes modificables de un valor (recursivamente)."""
+    if isinstance(valor, _TIPOS_INMUTABLES) or id(valor) in vistos:
+        return
+    vistos.add(id(valor))
+
+    if isinstance(valor, (tuple, frozenset)):
+        for posicion, elemento in enumerate(valor):
+            yield from _mutables(elemento, f"{ruta}[{posicion}]", vistos)
+    elif isinstance(valor, MappingProxyType):
+        for clave, elemento in valor.items():
+            yield from _mutables(elemento, f"{ruta}[{clave!r}]", vistos)
+    elif hasattr(valor, "__dict__"):
+        # Objetos (ej: MotorReglas): se comprueban sus atributos
+        for nombre, atributo in vars(valor).items():
+            yield from _mutables(atributo, f"{ruta}.{nombre}", vistos)
+    elif hasattr(valor, "__slots__") and type(valor).__setattr__ is not object.__setattr__:
+        # Objetos con __slots__ que impiden asignar (ej: Tarea)
+        return
+    else:
+        yield ruta
+
+
+def estado_mutable(modulos: Optional[Iterable[ModuleType]] = None) -> List[str]:
+    """
+    Constantes de módulo que se pueden modificar.
+
+    Recorre las constantes (nombres en MAYÚSCULAS) de los módulos y, dentro
+    de cada una, tuplas, frozensets, MappingProxyType y los atributos de
+    los objetos. Lo que puede compartirse entre hilos sin cerrojos son los
+    valores inmutables (str, números, regex compiladas...) y esos
+    contenedores de solo lectura.
+
+    Args:
+        modulos: Módulos a revisar (por defecto, todos los de ccl)
+
+    Returns:
+        Rutas de las partes modificables (ej: "ccl.utils.CONECTORES");
+        vacía si todo el estado de módulo es inmutable
+    """
+    mutables = []
+    # Las constantes importadas por otros módulos se revisan una sola vez
+    vistos = set()
+    for modulo in (_modulos_ccl() if modulos is None else modulos):
+        for nombre, valor in vars(modulo).items():
+            if _PATRON_CONSTANTE.fullmatch(nombre) and not isinstance(valor, ModuleType):
+                mutables.extend(_mutables(valor, f"{modulo.__name__}.{nombre}", vistos))
+    return mutables
@@ -0,0 +1,405 @@
+"""
+indice_materiales.py
+
+Índice de búsqueda sobre los materiales del curso (materiales/semana*.md).
+
+Divide cada archivo de materiales en secciones por encabezado (#, ##, ###,
+####) y construye un índice invertido con puntuación BM25. Cada tarea
+prescrita se relaciona con las secciones que mejor encajan con su
+objetivo lingüístico (ej: "uso de conectores causales y consecutivos"
+encuentra las secciones de conectores de los materiales).
+
+El índice se guarda en disco (JSON) con el hash de cada archivo indexado y
+se actualiza de forma incremental: solo se vuelven a dividir e indexar los
+archivos nuevos o modificados, y se quitan los que ya no existen. En el
+JSON se guardan las frecuencias de términos de cada sección; las listas
+invertidas se reconstruyen al cargar, en tiempo lineal.
+
+Las búsquedas solo recorren las listas de los términos de la consulta, de
+modo que su coste depende de lo frecuentes que sean esos términos y no del
+tamaño total de la biblioteca.
+
+Uso:
+    >>> indice = IndiceMateriales.cargar("materiales.idx.json")
+    >>> indice.actualizar("materiales/")
+    >>> indice.guardar("materiales.idx.json")
+    >>> indice.buscar("conectores causales", k=3)
+    [{'id': 'semana3.md:120', 'titulo': 'Semana 3 › Conectores', ...}, ...]
+    >>> materiales_para_tareas(prescripcion, indice)
+    {'conectores_causales': [...], ...}
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .utils import iter_palabras
+
+
+# =============================================================================
+# PARÁMETROS
+# =============================================================================
+
+# Versión del formato del índice en disco
+VERSION_INDICE = 1
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Veces que cuenta el encabezado propio de una sección frente a su texto
+PESO_ENCABEZADO = 3
+
+# Secciones devueltas por defecto para cada consulta
+K_POR_DEFECTO = 3
+
+# Archivos de materiales que se indexan
+PATRON_MATERIALES = "semana*.md"
+
+# Palabras vacías que no se indexan
+PALABRAS_VACIAS = frozenset({
+    "a", "al", "algo", "como", "con", "cual", "de", "del", "e", "el", "en",
+    "entre", "es", "esta", "este", "esto", "la", "las", "le", "les", "lo",
+    "los", "mas", "me", "mi", "muy", "ni", "no", "o", "para", "pero", "por",
+    "que", "se", "si", "sin", "sobre", "su", "sus", "te", "tu", "tus", "u",
+    "un", "una", "uno", "unos", "unas", "y", "ya", "yo",
+})
+
+_ENCABEZADO = re.compile(r'(#{1,4})\s+(.*)')
+
+
+# =============================================================================
+# TÉRMINOS
+# =============================================================================
+
+def _sin_acentos(palabra: str) -> str:
+    if palabra.isascii():
+        return palabra
+    return "".join(
+        c for c in unicodedata.normalize("NFD", palabra)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+def normalizar_termino(palabra: str) -> str:
+    """
+    Forma indexada de una palabra: sin acentos y sin plural regular.
+
+    Ej: "Pretéritos" -> "preterito", "causales" -> "causal".
+    """
+    termino = _sin_acentos(palabra.lower())
+    if len(termino) > 4:
+        if termino.endswith("es") and termino[-3] in "lnrdz":
+            return termino[:-2]
+        if termino.endswith("s"):
+            return termino[:-1]
+    return termino
+
+
+def terminos(texto: str) -> List[str]:
+    """Términos indexables de un texto (sin palabras vacías ni números)."""
+    resultado = []
+    for palabra in iter_palabras(texto):
+        if palabra.isdigit():
+            continue
+        termino = normalizar_termino(palabra)
+        if termino not in PALABRAS_VACIAS and len(termino) > 1:
+            resultado.append(termino)
+    return resultado
+
+
+# =============================================================================
+# SECCIONES
+# =============================================================================
+
+def dividir_secciones(texto: str, archivo: str) -> List[Dict]:
+    """
+    Divide un archivo Markdown en secciones por encabezado.
+
+    Cada encabezado abre una sección que llega hasta el siguiente
+    encabezado. El título incluye los encabezados de nivel superior
+    ("Semana 3 › Contenido Gramatical › Conectores").
+
+    Args:
+        texto: Contenido del archivo
+        archivo: Nombre del archivo (forma parte del id de cada sección)
+
+    Returns:
+        Lista de dicts {"id", "archivo", "titulo", "encabezado", "linea",
+        "texto"}; "linea" es la línea del encabezado (1 = primera)
+    """
+    secciones = []
+    ruta_titulos: List[Tuple[int, str]] = []   # (nivel, título) de los encabezados abiertos
+    actual = None
+
+    for numero, linea in enumerate(texto.split("\n"), start=1):
+        encabezado = _ENCABEZADO.match(linea)
+        if encabezado is None:
+            if actual is not None:
+                actual["texto"].append(linea)
+            continue
+
+        nivel = len(encabezado.group(1))
+        titulo = encabezado.group(2).strip().replace("*", "")
+        while ruta_titulos and ruta_titulos[-1][0] >= nivel:
+            ruta_titulos.pop()
+        ruta_titulos.append((nivel, titulo))
+
+        actual = {
+            "id": f"{archivo}:{numero}",
+            "archivo": archivo,
+            "titulo": " › ".join(t for _, t in ruta_titulos),
+            "encabezado": titulo,
+            "linea": numero,
+            "texto": [],
+        }
+        secciones.append(actual)
+
+    for seccion in secciones:
+        seccion["texto"] = "\n".join(seccion["texto"]).strip()
+    return secciones
+
+
+def _hash_archivo(ruta: Path) -> str:
+    return hashlib.sha256(ruta.read_bytes()).hexdigest()
+
+
+# =============================================================================
+# ÍNDICE
+# =============================================================================
+
+class IndiceMateriales:
+    """
+    Índice invertido BM25 de las secciones de los materiales.
+
+    Atributos:
+        archivos: {archivo: {"hash", "secciones": [ids]}} de lo indexado
+        secciones: {id: {"archivo", "titulo", "linea", "longitud", "frecuencias"}}
+    """
+
+    def __init__(self):
+        self.archivos: Dict[str, Dict] = {}
+        self.secciones: Dict[str, Dict] = {}
+        self._listas: Dict[str, Dict[str, int]] = defaultdict(dict)   # término -> {id: tf}
+        self._longitud_total = 0
+
+    # -- Construcción --------------------------------------------------------
+
+    def añadir_seccion(self, seccion: Dict):
+        """
+        Indexa una sección (ver dividir_secciones).
+
+        Se indexan su texto y su propio encabezado, que cuenta PESO_ENCABEZADO
+        veces; los encabezados de nivel superior no, porque los comparten
+        todas las secciones que cuelgan de ellos.
+        """
+        frecuencias: Dict[str, int] = {}
+        for termino in terminos(seccion["texto"]):
+            frecuencias[termino] = frecuencias.get(termino, 0) + 1
+        for termino in terminos(seccion["encabezado"]):
+            frecuencias[termino] = frecuencias.get(termino, 0) + PESO_ENCABEZADO
+        self._registrar({
+            "id": seccion["id"],
+            "archivo": seccion["archivo"],
+            "titulo": seccion["titulo"],
+            "linea": seccion["linea"],
+            "longitud": sum(frecuencias.values()),
+            "frecuencias": frecuencias,
+        })
+
+    def _registrar(self, datos: Dict):
+        id_seccion = datos["id"]
+        self.secciones[id_seccion] = datos
+        self._longitud_total += datos["longitud"]
+        for termino, tf in datos["frecuencias"].items():
+            self._listas[termino][id_seccion] = tf
+
+    def quitar_seccion(self, id_seccion: str):
+        datos = self.secciones.pop(id_seccion, None)
+        if datos is None:
+            return
+        self._longitud_total -= datos["longitud"]
+        for termino in datos["frecuencias"]:
+            lista = self._listas[termino]
+            lista.pop(id_seccion, None)
+            if not lista:
+                del self._listas[termino]
+
+    def indexar_archivo(self, ruta: Union[str, Path], huella: Optional[str] = None):
+        """
+        (Re)indexa un archivo de materiales, sustituyendo sus secciones.
+
+        Args:
+            ruta: Archivo Markdown
+            huella: Hash del contenido si ya se ha calculado
+        """
+        ruta = Path(ruta)
+        self.quitar_archivo(ruta.name)
+        secciones = dividir_secciones(ruta.read_text(encoding="utf-8"), ruta.name)
+        for seccion in secciones:
+            self.añadir_seccion(seccion)
+        self.archivos[ruta.name] = {
+            "hash": huella or _hash_archivo(ruta),
+            "secciones": [seccion["id"] for seccion in secciones],
+        }
+
+    def quitar_archivo(self, archivo: str):
+        """Quita del índice todas las secciones de un archivo."""
+        registro = self.archivos.pop(archivo, None)
+        if registro is not None:
+            for id_seccion in registro["secciones"]:
+                self.quitar_seccion(id_seccion)
+
+    def actualizar(
+        self,
+        directorio: Union[str, Path],
+        patron: str = PATRON_MATERIALES
+    ) -> Dict[str, List[str]]:
+        """
+        Pone el índice al día con los archivos de un directorio.
+
+        Solo se reindexan los archivos nuevos o cuyo contenido ha cambiado;
+        los que ya no existen se quitan.
+
+        Args:
+            directorio: Directorio de materiales
+            patron: Patrón de los archivos a indexar
+
+        Returns:
+            Dict {"indexados": [...], "sin_cambios": [...], "eliminados": [...]}
+        """
+        cambios: Dict[str, List[str]] = {"indexados": [], "sin_cambios": [], "eliminados": []}
+        presentes = set()
+
+        for ruta in sorted(Path(directorio).glob(patron)):
+            presentes.add(ruta.name)
+            huella = _hash_archivo(ruta)
+            registro = self.archivos.get(ruta.name)
+            if registro is not None and registro["hash"] == huella:
+                cambios["sin_cambios"].append(ruta.name)
+                continue
+            self.indexar_archivo(ruta, huella)
+            cambios["indexados"].append(ruta.name)
+
+        for archivo in sorted(set(self.archivos) - presentes):
+            self.quitar_archivo(archivo)
+            cambios["eliminados"].append(archivo)
+
+        return cambios
+
+    # -- Búsqueda ------------------------------------------------------------
+
+    def buscar(self, consulta: str, k: int = K_POR_DEFECTO) -> List[Dict]:
+        """
+        Secciones que mejor encajan con una consulta, según BM25.
+
+        Args:
+            consulta: Texto de la consulta (ej: un objetivo lingüístico)
+            k: Número máximo de secciones
+
+        Returns:
+            Lista de dicts {"id", "archivo", "titulo", "linea", "puntuacion"},
+            de mayor a menor puntuación (vacía si ningún término aparece)
+        """
+        num_secciones = len(self.secciones)
+        if not num_secciones:
+            return []
+        longitud_media = self._longitud_total / num_secciones
+
+        puntuaciones: Dict[str, float] = defaultdict(float)
+        for termino in set(terminos(consulta)):
+            lista = self._listas.get(termino)
+            if not lista:
+                continue
+            idf = math.log(1 + (num_secciones - len(lista) + 0.5) / (len(lista) + 0.5))
+            for id_seccion, tf in lista.items():
+                longitud = self.secciones[id_seccion]["longitud"]
+                norma = BM25_K1 * (1 - BM25_B + BM25_B * longitud / longitud_media)
+                puntuaciones[id_seccion] += idf * tf * (BM25_K1 + 1) / (tf + norma)
+
+        mejores = heapq.nlargest(k, puntuaciones.items(), key=lambda par: (par[1], par[0]))
+        resultado = []
+        for id_seccion, puntuacion in mejores:
+            datos = self.secciones[id_seccion]
+            resultado.append({
+                "id": id_seccion,
+                "archivo": datos["archivo"],
+                "titulo": datos["titulo"],
+                "linea": datos["linea"],
+                "puntuacion": round(puntuacion, 4),
+            })
+        return resultado
+
+    # -- Persistencia --------------------------------------------------------
+
+    def guardar(self, ruta: Union[str, Path]):
+        """Guarda el índice en un JSON (escritura atómica)."""
+        ruta = Path(ruta)
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": VERSION_INDICE,
+                    "archivos": self.archivos,
+                    "secciones": list(self.secciones.values()),
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        temporal.replace(ruta)
+
+    @classmethod
+    def cargar(cls, ruta: Union[str, Path]) -> "IndiceMateriales":
+        """
+        Carga un índice guardado con guardar().
+
+        Si el archivo no existe o es de otra versión, devuelve un índice
+        vacío (actualizar() lo reconstruye entero).
+        """
+        indice = cls()
+        ruta = Path(ruta)
+        if not ruta.exists():
+            return indice
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos.get("version") != VERSION_INDICE:
+            return indice
+
+        indice.archivos = datos["archivos"]
+        for seccion in datos["secciones"]:
+            indice._registrar(seccion)
+        return indice
+
+
+# =============================================================================
+# TAREAS PRESCRITAS
+# =============================================================================
+
+def materiales_para_tareas(
+    prescripcion: Dict,
+    indice: IndiceMateriales,
+    k: int = K_POR_DEFECTO
+) -> Dict[str, List[Dict]]:
+    """
+    Relaciona cada tarea prescrita con las secciones de materiales que la
+    trabajan, usando su objetivo lingüístico como consulta.
+
+    Args:
+        prescripcion: Resultado de prescripcion_tareas
+        indice: Índice de materiales
+        k: Secciones por tarea
+
+    Returns:
+        Dict {tipo de tarea: lista de secciones (ver IndiceMateriales.buscar)}
+    """
+    return {
+        tarea["tipo"]: indice.buscar(tarea["objetivo_linguistico"], k)
+        for tarea in prescripcion["tareas_recomendadas"]
+    }
@@ -0,0 +1,412 @@
+"""
+indice_sesiones.py
+
+Índice posicional de los textos de las sesiones de cada sujeto.
+
+Permite responder preguntas como "¿cuándo mencionó por primera vez
+'Bogotá' o 'miedo'?" sin volver a leer todos los textos guardados. Cada
+sesión se indexa al añadirla (por ejemplo, al analizarla con
+analisis_completo(..., indice_sesiones=indice)), con los mismos tokens que
+utils.tokenizar.
+
+Para cada sujeto, término y sesión se guarda una lista de apariciones
+(posición del token, inicio y longitud en el texto) codificada con
+diferencias y enteros de longitud variable (varint): en un texto normal,
+cada aparición ocupa 3-4 bytes. Todo se guarda en SQLite (una tabla de
+sesiones y otra de listas), de modo que una búsqueda solo lee las filas de
+los términos consultados para ese sujeto.
+
+Consultas:
+- Frase: los tokens de la consulta, seguidos ("me siento solo")
+- Proximidad: todos los tokens a una distancia máxima, en cualquier orden
+
+Cada coincidencia incluye las posiciones de inicio y fin en el texto para
+mostrar el fragmento (ver fragmento()).
+
+Uso:
+    >>> indice = IndiceSesiones("sesiones.db")
+    >>> indice.añadir_sesion("paciente_001", texto, fecha="2024-03-01")
+    >>> indice.primera_mencion("paciente_001", "Bogotá")
+    {'sesion': 3, 'fecha': '2024-03-01', 'coincidencias': [...]}
+    >>> indice.buscar("paciente_001", "miedo solo", distancia=5)
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .utils import iter_tokens, tokenizar
+
+
+# Versión del esquema de la base de datos (PRAGMA user_version)
+VERSION_INDICE_SESIONES = 1
+
+# Caracteres de contexto a cada lado en los fragmentos
+CONTEXTO_FRAGMENTO = 40
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    sesion INTEGER PRIMARY KEY,
+    id_sujeto TEXT NOT NULL,
+    fecha TEXT,
+    texto TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sesiones_sujeto ON sesiones (id_sujeto, sesion);
+CREATE TABLE IF NOT EXISTS apariciones (
+    id_sujeto TEXT NOT NULL,
+    termino TEXT NOT NULL,
+    sesion INTEGER NOT NULL,
+    lista BLOB NOT NULL,
+    PRIMARY KEY (id_sujeto, termino, sesion)
+) WITHOUT ROWID;
+"""
+
+
+# =============================================================================
+# CODIFICACIÓN DE LAS LISTAS
+# =============================================================================
+
+def codificar_varints(valores: Sequence[int]) -> bytes:
+    """Codifica enteros no negativos como varints (7 bits por byte)."""
+    salida = bytearray()
+    for valor in valores:
+        while valor >= 0x80:
+            salida.append((valor & 0x7F) | 0x80)
+            valor >>= 7
+        salida.append(valor)
+    return bytes(salida)
+
+
+def decodificar_varints(datos: bytes) -> List[int]:
+    """Inversa de codificar_varints."""
+    valores = []
+    valor = 0
+    desplazamiento = 0
+    for byte in datos:
+        valor |= (byte & 0x7F) << desplazamiento
+        if byte & 0x80:
+            desplazamiento += 7
+        else:
+            valores.append(valor)
+            valor = 0
+            desplazamiento = 0
+    return valores
+
+
+def _codificar_apariciones(apariciones: List[Tuple[int, int, int]]) -> bytes:
+    """(posición, inicio, fin) en orden -> (Δposición, Δinicio, longitud) en varints."""
+    valores = []
+    posicion_anterior = inicio_anterior = 0
+    for posicion, inicio, fin in apariciones:
+        valores += (posicion - posicion_anterior, inicio - inicio_anterior, fin - inicio)
+        posicion_anterior, inicio_anterior = posicion, inicio
+    return codificar_varints(valores)
+
+
+def _decodificar_apariciones(datos: bytes) -> List[Tuple[int, int, int]]:
+    valores = decodificar_varints(datos)
+    apariciones = []
+    posicion = inicio = 0
+    for i in range(0, len(valores), 3):
+        posicion += valores[i]
+        inicio += valores[i + 1]
+        apariciones.append((posicion, inicio, inicio + valores[i + 2]))
+    return apariciones
+
+
+# =============================================================================
+# COINCIDENCIAS
+# =============================================================================
+
+def _coincidencias_frase(listas: List[List[Tuple[int, int, int]]]) -> List[Tuple[int, int, int]]:
+    """Apariciones consecutivas de todos los términos, en orden."""
+    siguientes = [{posicion: fin for posicion, _, fin in lista} for lista in listas[1:]]
+    coincidencias = []
+    for posicion, inicio, fin in listas[0]:
+        for desplazamiento, posiciones in enumerate(siguientes, start=1):
+            fin = posiciones.get(posicion + desplazamiento)
+            if fin is None:
+                break
+        else:
+            coincidencias.append((posicion, inicio, fin))
+    return coincidencias
+
+
+def _coincidencias_proximidad(
+    listas: List[List[Tuple[int, int, int]]],
+    distancia: int
+) -> List[Tuple[int, int, int]]:
+    """
+    Ventanas mínimas que contienen todos los términos, con los tokens
+    extremos a no más de `distancia` posiciones.
+    """
+    mezcla = sorted(
+        (posicion, inicio, fin, indice)
+        for indice, lista in enumerate(listas)
+        for posicion, inicio, fin in lista
+    )
+    num_terminos = len(listas)
+    cuentas = [0] * num_terminos
+    presentes = 0
+    izquierda = 0
+    coincidencias = []
+    for posicion, _, fin, indice in mezcla:
+        if cuentas[indice] == 0:
+            presentes += 1
+        cuentas[indice] += 1
+
+        while True:
+            # Quita por la izquierda los términos repetidos dentro de la ventana
+            while cuentas[mezcla[izquierda][3]] > 1:
+                cuentas[mezcla[izquierda][3]] -= 1
+                izquierda += 1
+            # y los que ya quedan demasiado lejos
+            if presentes == num_terminos and posicion - mezcla[izquierda][0] > distancia:
+                cuentas[mezcla[izquierda][3]] -= 1
+                presentes -= 1
+                izquierda += 1
+                continue
+            break
+
+        if presentes == num_terminos:
+            posicion_inicio, inicio = mezcla[izquierda][0], mezcla[izquierda][1]
+            coincidencias.append((posicion_inicio, inicio, fin))
+            # No se solapan: la siguiente ventana empieza después de esta
+            cuentas[mezcla[izquierda][3]] -= 1
+            presentes -= 1
+            izquierda += 1
+    return coincidencias
+
+
+# =============================================================================
+# ÍNDICE
+# =============================================================================
+
+class IndiceSesiones:
+    """Índice posicional por sujeto de los textos de las sesiones, en SQLite."""
+
+    def __init__(self, ruta: str = ":memory:"):
+        """
+        Args:
+            ruta: Archivo SQLite (se crea si no existe); ":memory:" para un
+                índice temporal
+
+        Raises:
+            ValueError: Si el archivo es de otra versión del índice
+        """
+        # La conexión puede usarse desde otros hilos (ej: el análisis en
+        # segundo plano de analisis_con_plazo); las escrituras se serializan
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._cerrojo = threading.Lock()
+        # Cada sesión se añade en su propia transacción: WAL evita reescribir
+        # el archivo completo en cada una
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        version = self.conexion.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            with self.conexion:
+                self.conexion.executescript(_ESQUEMA)
+                self.conexion.execute(f"PRAGMA user_version = {VERSION_INDICE_SESIONES}")
+        elif version != VERSION_INDICE_SESIONES:
+            self.conexion.close()
+            raise ValueError(
+                f"El índice usa la versión {version}; se esperaba la {VERSION_INDICE_SESIONES}"
+            )
+
+    def __enter__(self) -> "IndiceSesiones":
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    # -- Indexación ----------------------------------------------------------
+
+    def añadir_sesion(self, id_sujeto: str, texto: str, fecha: Optional[str] = None) -> int:
+        """
+        Indexa el texto de una nueva sesión de un sujeto.
+
+        Las sesiones de cada sujeto se consideran en el orden en que se
+        añaden (el orden de análisis).
+
+        Args:
+            id_sujeto: Identificador del sujeto
+            texto: Texto de la sesión
+            fecha: Fecha de la sesión (opcional, se devuelve en las búsquedas)
+
+        Returns:
+            Número de la sesión en el índice
+        """
+        apariciones: Dict[str, List[Tuple[int, int, int]]] = {}
+        for posicion, (token, inicio, fin) in enumerate(iter_tokens(texto)):
+            lista = apariciones.get(token)
+            if lista is None:
+                apariciones[token] = [(posicion, inicio, fin)]
+            else:
+                lista.append((posicion, inicio, fin))
+
+        with self._cerrojo, self.conexion:
+            cursor = self.conexion.execute(
+                "INSERT INTO sesiones (id_sujeto, fecha, texto) VALUES (?, ?, ?)",
+                (id_sujeto, fecha, texto),
+            )
+            sesion = cursor.lastrowid
+            self.conexion.executemany(
+                "INSERT INTO apariciones (id_sujeto, termino, sesion, lista) VALUES (?, ?, ?, ?)",
+                (
+                    (id_sujeto, termino, sesion, _codificar_apariciones(lista))
+                    for termino, lista in apariciones.items()
+                ),
+            )
+        return sesion
+
+    def indexar_entrada(self, entrada: Dict) -> Optional[int]:
+        """
+        Indexa una entrada de análisis ({"id_sujeto", "texto", "fecha"...}).
+
+        Returns:
+            Número de la sesión, o None si la entrada no tiene texto
+        """
+        texto = entrada.get("texto")
+        if not texto:
+            return None
+        return self.añadir_sesion(entrada.get("id_sujeto"), texto, entrada.get("fecha"))
+
+    # -- Búsqueda ------------------------------------------------------------
+
+    def _iter_sesiones_con_terminos(
+        self,
+        id_sujeto: str,
+        terminos: List[str]
+    ) -> Iterator[Tuple[int, List[List[Tuple[int, int, int]]]]]:
+        """Sesiones (en orden) en las que aparecen todos los términos, con sus listas."""
+        distintos = list(dict.fromkeys(terminos))
+        por_termino: List[Dict[int, bytes]] = []
+        for termino in distintos:
+            filas = self.conexion.execute(
+                "SELECT sesion, lista FROM apariciones WHERE id_sujeto = ? AND termino = ?",
+                (id_sujeto, termino),
+            ).fetchall()
+            if not filas:
+                return
+            por_termino.append(dict(filas))
+
+        # Intersección empezando por el término más raro
+        comunes = set(min(por_termino, key=len))
+        for listas in por_termino:
+            comunes.intersection_update(listas)
+
+        for sesion in sorted(comunes):
+            decodificadas = {
+                termino: _decodificar_apariciones(listas[sesion])
+                for termino, listas in zip(distintos, por_termino)
+            }
+            yield sesion, [decodificadas[termino] for termino in terminos]
+
+    def buscar(
+        self,
+        id_sujeto: str,
+        consulta: str,
+        distancia: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Busca una frase o unas palabras cercanas en las sesiones de un sujeto.
+
+        Args:
+            id_sujeto: Identificador del sujeto
+            consulta: Texto de la consulta (se tokeniza como los textos)
+            distancia: None para buscar la frase exacta; si no, distancia
+                máxima (en tokens) entre el primer y el último término, en
+                cualquier orden
+            limite: Número máximo de sesiones devueltas (las primeras)
+
+        Returns:
+            Lista de dicts {"sesion", "fecha", "coincidencias"} en el orden de
+            las sesiones; cada coincidencia es {"posicion", "inicio", "fin"}
+            (posición del primer token y caracteres del texto)
+        """
+        terminos = tokenizar(consulta)
+        if not terminos:
+            return []
+
+        resultados = []
+        for sesion, listas in self._iter_sesiones_con_terminos(id_sujeto, terminos):
+            if distancia is None:
+                coincidencias = _coincidencias_frase(listas)
+            else:
+                # En proximidad, un término repetido en la consulta cuenta una vez
+                distintas = list({id(lista): lista for lista in listas}.values())
+                coincidencias = _coincidencias_proximidad(distintas, distancia)
+            if not coincidencias:
+                continue
+            resultados.append({
+                "sesion": sesion,
+                "coincidencias": [
+                    {"posicion": posicion, "inicio": inicio, "fin": fin}
+                    for posicion, inicio, fin in coincidencias
+                ],
+            })
+            if limite is not None and len(resultados) >= limite:
+                break
+
+        if resultados:
+            sesiones = [resultado["sesion"] for resultado in resultados]
+            fechas = dict(self.conexion.execute(
+                f"SELECT sesion, fecha FROM sesiones WHERE sesion IN ({','.join('?' * len(sesiones))})",
+                sesiones,
+            ))
+            for resultado in resultados:
+                resultado["fecha"] = fechas.get(resultado["sesion"])
+        return resultados
+
+    def primera_mencion(
+        self,
+        id_sujeto: str,
+        consulta: str,
+        distancia: Optional[int] = None
+    ) -> Optional[Dict]:
+        """Primera sesión que contiene la consulta (ver buscar), o None."""
+        resultados = self.buscar(id_sujeto, consulta, distancia, limite=1)
+        return resultados[0] if resultados else None
+
+    def fragmento(
+        self,
+        sesion: int,
+        coincidencia: Dict,
+        contexto: int = CONTEXTO_FRAGMENTO
+    ) -> str:
+        """
+        Fragmento del texto de una sesión alrededor de una coincidencia.
+
+        Args:
+            sesion: Número de sesión
+            coincidencia: Coincidencia devuelta por buscar()
+            contexto: Caracteres a cada lado
+
+        Returns:
+            Texto del fragmento, con "…" si se ha recortado
+        """
+        inicio = max(0, coincidencia["inicio"] - contexto)
+        fila = self.conexion.execute(
+            "SELECT substr(texto, ?, ?), length(texto) FROM sesiones WHERE sesion = ?",
+            (inicio + 1, coincidencia["fin"] + contexto - inicio, sesion),
+        ).fetchone()
+        if fila is None:
+            raise KeyError(sesion)
+        texto, longitud = fila
+        prefijo = "…" if inicio > 0 else ""
+        sufijo = "…" if coincidencia["fin"] + contexto < longitud else ""
+        return prefijo + texto + sufijo
+
+    def sesiones(self, id_sujeto: str) -> List[Dict]:
+        """Sesiones indexadas de un sujeto: [{"sesion", "fecha"}], en orden."""
+        return [
+            {"sesion": sesion, "fecha": fecha}
+            for sesion, fecha in self.conexion.execute(
+                "SELECT sesion, fecha FROM sesiones WHERE id_sujeto = ? ORDER BY sesion",
+                (id_sujeto,),
+            )
+        ]
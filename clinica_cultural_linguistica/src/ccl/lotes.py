@@ -0,0 +1,363 @@
+"""
+lotes.py
+
+Análisis por lotes de muchas entradas.
+
+analizar_lote() ejecuta analisis_completo() sobre una lista de entradas.
+Opcionalmente, antes de analizar cada texto busca con MinHash/LSH (ver
+duplicados.py) un texto casi idéntico ya analizado en el mismo lote: mismo
+sujeto (o misma cohorte) y mismo contexto (metadatos, nivel declarado...).
+Si lo encuentra, reutiliza su resultado y lo marca en "reutilizado_de".
+
+Con un AlmacenResultados (SQLite), la búsqueda abarca también los textos
+analizados en lotes y ejecuciones anteriores: cada resultado analizado se
+guarda en el almacén con su firma, y un IndiceLSH sobre esas firmas
+(almacen.indice_lsh()) que el llamante puede conservar entre lotes evita
+reconstruirlo en cada llamada.
+
+El análisis de riesgo psico-emocional se ejecuta siempre sobre el texto
+propio: una sola frase distinta puede cambiar la evaluación y no debe
+heredarse de otro texto.
+
+Con un ejecutor (ThreadPoolExecutor o ProcessPoolExecutor), las entradas
+que hay que analizar se reparten entre sus hilos o procesos. Qué entradas
+reutilizan qué resultado se decide antes, en orden, solo con las firmas,
+así que el resultado es el mismo que sin ejecutor. Ver hilos.py para el
+modo con hilos.
+
+Uso:
+    >>> resultados = analizar_lote(entradas, deduplicar=True, umbral_similitud=0.9)
+    >>> [r["reutilizado_de"] for r in resultados if "reutilizado_de" in r]
+
+    >>> with AlmacenResultados("resultados.db") as almacen:
+    ...     indice = almacen.indice_lsh()
+    ...     for lote in lotes:
+    ...         resultados = analizar_lote(lote, almacen=almacen, indice=indice)
+"""
+
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+from functools import partial
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .duplicados import BANDAS_LSH, NUM_PERMUTACIONES, IndiceLSH, UMBRAL_SIMILITUD, firma_minhash
+from .perfilado import perfilar
+from .resultados import Resultado, a_dicts
+from .riesgo_psico_emocional import riesgo_psico_emocional_basico
+from .utils import convertir_para_json
+
+
+# Campos de la entrada que no forman parte del contexto del análisis
+_CAMPOS_FUERA_DE_CONTEXTO = ('texto', 'id_sujeto', 'fecha')
+
+# Entradas por envío al ejecutor (con procesos, reduce los viajes entre ellos)
+TAM_TROZO_EJECUTOR = 8
+
+# Versión del esquema del almacén de resultados (PRAGMA user_version)
+VERSION_ALMACEN = 1
+
+_ESQUEMA_ALMACEN = """
+CREATE TABLE IF NOT EXISTS resultados (
+    clave INTEGER PRIMARY KEY,
+    grupo INTEGER NOT NULL,
+    firma TEXT NOT NULL,
+    resultado TEXT NOT NULL
+);
+"""
+
+
+# =============================================================================
+# ALMACÉN DE RESULTADOS
+# =============================================================================
+
+class AlmacenResultados:
+    """
+    Resultados analizados y sus firmas MinHash, en SQLite, para reutilizarlos
+    en lotes posteriores (ver analizar_lote).
+
+    Cada resultado se guarda con su grupo de búsqueda (sujeto o cohorte y
+    contexto, como en analizar_lote) resumido en un entero de 64 bits.
+    """
+
+    def __init__(self, ruta: str = ":memory:"):
+        """
+        Args:
+            ruta: Archivo SQLite (se crea si no existe); ":memory:" para un
+                almacén temporal
+
+        Raises:
+            ValueError: Si el archivo es de otra versión del almacén
+        """
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._cerrojo = threading.Lock()
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        version = self.conexion.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            with self.conexion:
+                self.conexion.executescript(_ESQUEMA_ALMACEN)
+                self.conexion.execute(f"PRAGMA user_version = {VERSION_ALMACEN}")
+        elif version != VERSION_ALMACEN:
+            self.conexion.close()
+            raise ValueError(
+                f"El almacén usa la versión {version}; se esperaba la {VERSION_ALMACEN}"
+            )
+
+    def __enter__(self) -> "AlmacenResultados":
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __len__(self) -> int:
+        return self.conexion.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+
+    def añadir(self, filas: Iterable[Tuple[int, Sequence[int], Dict]]) -> List[int]:
+        """
+        Guarda resultados, en una sola transacción.
+
+        Args:
+            filas: Tuplas (grupo, firma, resultado de analisis_completo)
+
+        Returns:
+            Clave de cada resultado en el almacén, en orden
+        """
+        claves = []
+        with self._cerrojo, self.conexion:
+            for grupo, firma, resultado in filas:
+                cursor = self.conexion.execute(
+                    "INSERT INTO resultados (grupo, firma, resultado) VALUES (?, ?, ?)",
+                    (
+                        grupo,
+                        json.dumps(list(firma), separators=(",", ":")),
+                        json.dumps(resultado, ensure_ascii=False, default=convertir_para_json),
+                    ),
+                )
+                claves.append(cursor.lastrowid)
+        return claves
+
+    def resultado(self, clave: int) -> Dict:
+        """
+        Resultado guardado con una clave.
+
+        Raises:
+            KeyError: Si la clave no está en el almacén
+        """
+        fila = self.conexion.execute(
+            "SELECT resultado FROM resultados WHERE clave = ?", (clave,)
+        ).fetchone()
+        if fila is None:
+            raise KeyError(clave)
+        return json.loads(fila[0])
+
+    def indice_lsh(
+        self,
+        num_permutaciones: int = NUM_PERMUTACIONES,
+        bandas: int = BANDAS_LSH
+    ) -> IndiceLSH:
+        """
+        Índice LSH de las firmas guardadas, con claves (grupo, clave).
+
+        analizar_lote lo mantiene al día al añadir resultados, así que puede
+        conservarse entre lotes mientras solo se use con este almacén.
+        """
+        indice = IndiceLSH(num_permutaciones, bandas)
+        for clave, grupo, firma in self.conexion.execute(
+            "SELECT clave, grupo, firma FROM resultados ORDER BY clave"
+        ):
+            indice.añadir((grupo, clave), json.loads(firma))
+        return indice
+
+
+# =============================================================================
+# LOTES
+# =============================================================================
+
+
+def analizar_lote(
+    entradas: List[Dict],
+    incluir_riesgo: bool = True,
+    deduplicar: bool = False,
+    umbral_similitud: float = UMBRAL_SIMILITUD,
+    agrupar_por: Optional[str] = 'id_sujeto',
+    ejecutor=None,
+    perfil: Optional[Union[str, Path]] = None,
+    almacen: Optional[AlmacenResultados] = None,
+    indice: Optional[IndiceLSH] = None
+) -> List[Dict]:
+    """
+    Ejecuta el análisis completo sobre un lote de entradas.
+
+    Args:
+        entradas: Lista de entradas (mismo formato que analisis_completo)
+        incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
+        deduplicar: Si True, reutiliza el resultado de textos casi duplicados
+        umbral_similitud: Similitud estimada mínima (0-1) para reutilizar
+        agrupar_por: Campo de la entrada (o de sus metadatos) que delimita
+            dónde se buscan duplicados: 'id_sujeto' para cada sujeto, otro
+            campo (ej: 'cohorte') para un grupo, o None para todo el lote
+        ejecutor: concurrent.futures.Executor opcional para analizar las
+            entradas en paralelo (ej: ThreadPoolExecutor, ver hilos.py)
+        perfil: Prefijo opcional de los ficheros de perfilado; si se pasa,
+            el lote se ejecuta bajo perfilar() (ver perfilado.py)
+        almacen: AlmacenResultados opcional (implica deduplicar): también se
+            reutilizan resultados guardados en lotes anteriores, y los
+            analizados en este se guardan en él
+        indice: IndiceLSH de las firmas del almacén (ver
+            AlmacenResultados.indice_lsh), para no reconstruirlo en cada
+            lote; por defecto se construye. Se actualiza con los resultados
+            añadidos
+
+    Returns:
+        Lista de resultados, en el orden de las entradas. Los reutilizados
+        incluyen "reutilizado_de": {"posicion", "id_sujeto", "similitud"}, o
+        {"almacen", "id_sujeto", "similitud"} si el resultado viene del
+        almacén ("almacen" es su clave)
+
+    Raises:
+        ValueError: Si se pasa indice sin almacen
+    """
+    if perfil is not None:
+        with perfilar(perfil, todos_los_hilos=ejecutor is not None):
+            return analizar_lote(
+                entradas, incluir_riesgo, deduplicar, umbral_similitud, agrupar_por, ejecutor,
+                almacen=almacen, indice=indice
+            )
+
+    if almacen is not None:
+        deduplicar = True
+        if indice is None:
+            indice = almacen.indice_lsh()
+    elif indice is not None:
+        raise ValueError("indice requiere almacen: sus claves son las del almacén")
+
+    if not deduplicar:
+        return _analizar(entradas, incluir_riesgo, ejecutor)
+
+    # Origen de cada entrada: None si se analiza, (posición, similitud) si
+    # reutiliza el resultado de una anterior del lote, o ((grupo, clave),
+    # similitud) si reutiliza uno del almacén
+    indices: Dict[Hashable, IndiceLSH] = {}
+    origenes = []
+    firmas = []
+    grupos = []
+    for posicion, entrada in enumerate(entradas):
+        firma = firma_minhash(entrada.get('texto', ''))
+        clave_grupo = _clave_grupo(entrada, agrupar_por)
+        indice_lote = indices.setdefault(clave_grupo, IndiceLSH())
+
+        encontrado = indice_lote.buscar(firma, umbral_similitud)
+        if indice is not None:
+            grupo = _huella_grupo(clave_grupo)
+            guardado = indice.buscar(
+                firma, umbral_similitud, aceptar=lambda clave: clave[0] == grupo
+            )
+            # A igual similitud, el resultado guardado (el más antiguo)
+            if guardado is not None and (encontrado is None or guardado[1] >= encontrado[1]):
+                encontrado = guardado
+            firmas.append(firma)
+            grupos.append(grupo)
+        if encontrado is None:
+            indice_lote.añadir(posicion, firma)
+        origenes.append(encontrado)
+
+    analizadas = [posicion for posicion, origen in enumerate(origenes) if origen is None]
+    resultados: List[Optional[Dict]] = [None] * len(entradas)
+    for posicion, resultado in zip(
+        analizadas,
+        _analizar([entradas[posicion] for posicion in analizadas], incluir_riesgo, ejecutor)
+    ):
+        resultados[posicion] = resultado
+
+    if almacen is not None:
+        guardadas = [posicion for posicion in analizadas if firmas[posicion]]
+        claves = almacen.añadir(
+            (grupos[posicion], firmas[posicion], resultados[posicion]) for posicion in guardadas
+        )
+        for posicion, clave in zip(guardadas, claves):
+            indice.añadir((grupos[posicion], clave), firmas[posicion])
+
+    for posicion, encontrado in enumerate(origenes):
+        if encontrado is None:
+            continue
+        origen, similitud = encontrado
+        if isinstance(origen, tuple):
+            anterior = almacen.resultado(origen[1])
+            reutilizado_de = {'almacen': origen[1], 'id_sujeto': anterior.get('id_sujeto')}
+        else:
+            anterior = resultados[origen]
+            reutilizado_de = {'posicion': origen, 'id_sujeto': entradas[origen].get('id_sujeto')}
+        resultado = _reutilizar_resultado(anterior, entradas[posicion], incluir_riesgo)
+        resultado['reutilizado_de'] = {**reutilizado_de, 'similitud': round(similitud, 3)}
+        resultados[posicion] = resultado
+
+    return resultados
+
+
+def _analizar(entradas: List[Dict], incluir_riesgo: bool, ejecutor=None) -> List[Dict]:
+    """analisis_completo de cada entrada, en orden, con o sin ejecutor."""
+    from . import analisis_completo
+
+    if ejecutor is None:
+        return [analisis_completo(entrada, incluir_riesgo) for entrada in entradas]
+    return list(ejecutor.map(
+        partial(analisis_completo, incluir_riesgo=incluir_riesgo),
+        entradas,
+        chunksize=TAM_TROZO_EJECUTOR,
+    ))
+
+
+def _clave_grupo(entrada: Dict, agrupar_por: Optional[str]) -> Hashable:
+    """Grupo de búsqueda de duplicados: valor del campo más el contexto."""
+    if agrupar_por is None:
+        grupo = None
+    elif agrupar_por in entrada:
+        grupo = entrada[agrupar_por]
+    else:
+        grupo = entrada.get('metadatos', {}).get(agrupar_por)
+
+    contexto = {
+        campo: valor for campo, valor in entrada.items()
+        if campo not in _CAMPOS_FUERA_DE_CONTEXTO
+    }
+    return (
+        json.dumps(grupo, sort_keys=True, default=str),
+        json.dumps(contexto, sort_keys=True, default=str),
+    )
+
+
+def _huella_grupo(clave_grupo: Hashable) -> int:
+    """Entero de 64 bits con signo, estable entre ejecuciones, de un grupo."""
+    resumen = hashlib.blake2b(
+        json.dumps(clave_grupo).encode('utf-8'), digest_size=8
+    ).digest()
+    return int.from_bytes(resumen, 'big', signed=True)
+
+
+def _reutilizar_resultado(anterior: Dict, entrada: Dict, incluir_riesgo: bool) -> Dict:
+    """Copia un resultado para otra entrada y recalcula su riesgo."""
+    resultado = copy.deepcopy(anterior)
+    resultado.pop('reutilizado_de', None)
+
+    id_sujeto = entrada.get('id_sujeto')
+    resultado['id_sujeto'] = id_sujeto
+    for clave, seccion in resultado.items():
+        if isinstance(seccion, Resultado) and 'id_sujeto' in seccion:
+            resultado[clave] = seccion.reemplazar(id_sujeto=id_sujeto)
+        elif isinstance(seccion, dict) and 'id_sujeto' in seccion:
+            seccion['id_sujeto'] = id_sujeto
+
+    resultado.pop('riesgo_psico_emocional', None)
+    if incluir_riesgo:
+        riesgo = riesgo_psico_emocional_basico(entrada)
+        if riesgo:
+            resultado['riesgo_psico_emocional'] = a_dicts(riesgo)
+
+    return resultado
@@ -0,0 +1,331 @@
+"""
+perfilado.py
+
+Perfilado del análisis: estadísticas de cProfile, pilas para flamegraph y
+tiempo de cada etapa.
+
+perfilar() es un gestor de contexto que ejecuta su bloque bajo cProfile y,
+a la vez, muestrea cada INTERVALO_MUESTREO segundos de CPU la pila de
+llamadas del hilo que lo abre (o de todos, con todos_los_hilos=True). Al
+salir escribe, con el prefijo dado:
+
+- "<prefijo>.pstats": estadísticas de cProfile (python -m pstats, snakeviz...)
+- "<prefijo>.pilas.txt": pilas muestreadas en formato "collapsed", una por
+  línea: marcos de la raíz a la hoja separados por ';' y el número de
+  muestras (flamegraph.pl, inferno, speedscope...)
+- "<prefijo>.etapas.json": llamadas y tiempo de cada una de las seis etapas
+  del análisis (ver ETAPAS_PERFIL), del resumen del texto que comparten
+  (ver FUNCIONES_RESUMEN) y del resto ("otros": lectura, escritura de
+  resultados...), que suman el tiempo total
+
+cProfile solo ve el hilo que abre el contexto; con un pool de hilos, el
+reparto del trabajo entre etapas se ve en las pilas muestreadas. Lo que
+se ejecuta en otros procesos (ProcessPoolExecutor, trabajadores) no se
+perfila.
+
+Uso:
+    >>> with perfilar("perfiles/lote") as perfil:
+    ...     resultados = analizar_lote(entradas)
+    >>> print(tabla_etapas(perfil.etapas))
+    >>> perfil.rutas["pilas"]
+    PosixPath('perfiles/lote.pilas.txt')
+
+Desde la línea de comandos:
+    python -m ccl reanalizar archivo.jsonl -o resultados.jsonl --profile
+"""
+
+import cProfile
+import json
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from .utils import congelar
+
+
+# Segundos entre muestras de las pilas
+INTERVALO_MUESTREO = 0.005
+
+# Etapas del análisis: módulo -> funciones de entrada. El tiempo de una
+# etapa es el acumulado de sus funciones de entrada (que no se llaman entre
+# sí), con todo lo que llaman, aunque esté en otros módulos
+ETAPAS_PERFIL = congelar({
+    "diagnostico_linguistico_emocional": (
+        "diagnostico_linguistico_emocional", "diagnostico_desde_resumen"
+    ),
+    "radiografia_cultural": ("radiografia_cultural", "radiografia_desde_resumen"),
+    "deteccion_bloqueos_discursivos": (
+        "deteccion_bloqueos_discursivos", "bloqueos_desde_resumen"
+    ),
+    "prescripcion_tareas": ("prescripcion_tareas",),
+    "seguimiento_progreso": ("seguimiento_progreso", "actualizar_vigilancia"),
+    "riesgo_psico_emocional": ("riesgo_psico_emocional_basico", "riesgo_desde_resumen"),
+})
+
+# Resumen del texto, que comparten las etapas *_desde_resumen: (módulo,
+# función). Estas funciones sí se llaman entre sí; su tiempo es el de las
+# llamadas que llegan desde fuera del grupo
+FUNCIONES_RESUMEN = frozenset({
+    ("resumen_texto", "resumir_segmento"),
+    ("resumen_texto", "resumir_texto"),
+    ("resumen_texto", "resumir_trozos"),
+    ("corpus", "_resumir_segmento_corpus"),
+    ("corpus", "resumir_bytes"),
+})
+
+# Filas del resumen por etapa además de las de ETAPAS_PERFIL
+ETAPA_RESUMEN = "resumen_texto"
+ETAPA_OTROS = "otros"
+
+# Módulos en los que espera un hilo sin trabajo (no se muestrean sus pilas)
+_MODULOS_ESPERA = tuple(
+    str(Path(*partes)) for partes in (
+        ("threading.py",), ("queue.py",), ("selectors.py",),
+        ("futures", "thread.py"), ("futures", "process.py"),
+    )
+)
+
+
+def rutas_perfil(prefijo: Union[str, Path]) -> Dict[str, Path]:
+    """Ficheros que escribe perfilar() con un prefijo."""
+    prefijo = Path(prefijo)
+    if prefijo.suffix == ".pstats":
+        prefijo = prefijo.with_suffix("")
+    return {
+        "pstats": prefijo.with_name(prefijo.name + ".pstats"),
+        "pilas": prefijo.with_name(prefijo.name + ".pilas.txt"),
+        "etapas": prefijo.with_name(prefijo.name + ".etapas.json"),
+    }
+
+
+class Perfil:
+    """Resultado de perfilar(): se completa al salir del bloque."""
+
+    def __init__(self, rutas: Dict[str, Path]):
+        self.rutas = rutas
+        self.segundos = 0.0
+        self.muestras = 0
+        self.etapas: Dict[str, Dict] = {}
+
+
+# =============================================================================
+# MUESTREO DE PILAS
+# =============================================================================
+
+def _marco(codigo) -> str:
+    """Nombre de un marco en las pilas: función (fichero:línea de la definición)."""
+    nombre = getattr(codigo, "co_qualname", codigo.co_name)
+    return f"{nombre} ({Path(codigo.co_filename).name}:{codigo.co_firstlineno})"
+
+
+class _Muestreador:
+    """
+    Cuenta las pilas de llamadas de un hilo (o de todos) a intervalos.
+
+    Desde el hilo principal, en Unix, muestrea con SIGPROF (setitimer): el
+    manejador se ejecuta en la siguiente instrucción del intérprete, esté
+    donde esté. En otro caso usa un hilo que se despierta a intervalos;
+    con GIL, este solo ve los otros hilos cuando sueltan el GIL, lo que
+    sobrerrepresenta los puntos de E/S.
+    """
+
+    def __init__(self, hilo: Optional[int], intervalo: float):
+        """
+        Args:
+            hilo: Identificador del hilo a muestrear, o None para todos
+            intervalo: Segundos entre muestras (de CPU, con SIGPROF)
+        """
+        self.hilo = hilo
+        self.intervalo = intervalo
+        self.pilas: Counter = Counter()
+        self.muestras = 0
+        self._hilo_muestreo: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._manejador_anterior = None
+
+    def iniciar(self):
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self._manejador_anterior = signal.signal(
+                signal.SIGPROF, lambda _, marco: self._muestrear(threading.get_ident(), marco)
+            )
+            signal.setitimer(signal.ITIMER_PROF, self.intervalo, self.intervalo)
+        else:
+            self._hilo_muestreo = threading.Thread(
+                target=self._bucle, name="ccl-perfilado", daemon=True
+            )
+            self._hilo_muestreo.start()
+
+    def parar(self):
+        if self._hilo_muestreo is None:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            # None: el manejador anterior no se instaló desde Python
+            signal.signal(signal.SIGPROF, self._manejador_anterior or signal.SIG_DFL)
+        else:
+            self._parar.set()
+            self._hilo_muestreo.join()
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            self._muestrear(propio, None)
+
+    def _muestrear(self, actual: int, marco_actual):
+        """
+        Una muestra. `actual` es el hilo que muestrea y `marco_actual` su
+        marco (el interrumpido por la señal, o None para no contarlo).
+        """
+        self.muestras += 1
+        marcos = sys._current_frames()
+        marcos[actual] = marco_actual
+        if self.hilo is not None:
+            marco = marcos.get(self.hilo)
+            if marco is not None:
+                self._contar(marco)
+            return
+        for marco in marcos.values():
+            if marco is not None and not marco.f_code.co_filename.endswith(_MODULOS_ESPERA):
+                self._contar(marco)
+
+    def _contar(self, marco):
+        pila = []
+        while marco is not None:
+            pila.append(_marco(marco.f_code))
+            marco = marco.f_back
+        self.pilas[";".join(reversed(pila))] += 1
+
+
+def escribir_pilas(pilas: Counter, ruta: Union[str, Path]):
+    """Escribe pilas contadas en formato "collapsed" ("a;b;c 12" por línea)."""
+    with open(ruta, "w", encoding="utf-8") as f:
+        for pila, muestras in sorted(pilas.items()):
+            f.write(f"{pila} {muestras}\n")
+
+
+# =============================================================================
+# ETAPAS
+# =============================================================================
+
+def resumen_etapas(estadisticas: pstats.Stats) -> Dict[str, Dict]:
+    """
+    Llamadas y tiempo de cada etapa del análisis (ver ETAPAS_PERFIL), del
+    resumen del texto (ETAPA_RESUMEN) y del resto (ETAPA_OTROS).
+
+    Las filas no se solapan (las etapas no se llaman entre sí ni resumen
+    el texto), así que sus "segundos" suman el tiempo total.
+
+    Args:
+        estadisticas: pstats.Stats de la ejecución
+
+    Returns:
+        Dict {fila: {"llamadas", "segundos", "segundos_propios",
+        "fraccion"}}: llamadas a las funciones de entrada, su tiempo
+        acumulado, el tiempo en funciones del propio módulo (en el resumen,
+        en las de FUNCIONES_RESUMEN; en "otros", todo su tiempo) y la
+        fracción del tiempo total que supone la fila
+    """
+    etapas = {
+        modulo: {"llamadas": 0, "segundos": 0.0, "segundos_propios": 0.0}
+        for modulo in ETAPAS_PERFIL
+    }
+    resumen = {"llamadas": 0, "segundos": 0.0, "segundos_propios": 0.0}
+    for (fichero, _, funcion), (llamadas, _, propio, acumulado, llamadores) in estadisticas.stats.items():
+        modulo = Path(fichero).stem
+        if (modulo, funcion) in FUNCIONES_RESUMEN:
+            resumen["segundos_propios"] += propio
+            for (fichero_llamador, _, llamador), (_, n, _, segundos) in llamadores.items():
+                if (Path(fichero_llamador).stem, llamador) not in FUNCIONES_RESUMEN:
+                    resumen["llamadas"] += n
+                    resumen["segundos"] += segundos
+        etapa = etapas.get(modulo)
+        if etapa is None:
+            continue
+        etapa["segundos_propios"] += propio
+        if funcion in ETAPAS_PERFIL[modulo]:
+            etapa["llamadas"] += llamadas
+            etapa["segundos"] += acumulado
+    etapas[ETAPA_RESUMEN] = resumen
+
+    total = estadisticas.total_tt or 1.0
+    resto = max(0.0, estadisticas.total_tt - sum(etapa["segundos"] for etapa in etapas.values()))
+    etapas[ETAPA_OTROS] = {"llamadas": 0, "segundos": resto, "segundos_propios": resto}
+    for etapa in etapas.values():
+        etapa["fraccion"] = round(etapa["segundos"] / total, 4)
+        etapa["segundos"] = round(etapa["segundos"], 6)
+        etapa["segundos_propios"] = round(etapa["segundos_propios"], 6)
+    return etapas
+
+
+def tabla_etapas(etapas: Dict[str, Dict]) -> str:
+    """Tabla de texto con el resumen de resumen_etapas() ("otros" al final)."""
+    lineas = [f"{'etapa':<36}{'llamadas':>10}{'segundos':>11}{'propios':>11}{'total':>8}"]
+    for modulo, etapa in sorted(etapas.items(), key=lambda e: (e[0] == ETAPA_OTROS, -e[1]["segundos"])):
+        lineas.append(
+            f"{modulo:<36}{etapa['llamadas']:>10,}{etapa['segundos']:>11.3f}"
+            f"{etapa['segundos_propios']:>11.3f}{etapa['fraccion']:>8.1%}"
+        )
+    return "\n".join(lineas)
+
+
+# =============================================================================
+# GESTOR DE CONTEXTO
+# =============================================================================
+
+@contextmanager
+def perfilar(
+    prefijo: Union[str, Path],
+    intervalo: float = INTERVALO_MUESTREO,
+    todos_los_hilos: bool = False
+) -> Iterator[Perfil]:
+    """
+    Ejecuta el bloque bajo cProfile y muestreando sus pilas de llamadas.
+
+    Los ficheros se escriben también si el bloque termina con una excepción
+    (ej: KeyboardInterrupt), con lo que se haya ejecutado hasta entonces.
+
+    Args:
+        prefijo: Prefijo de los ficheros (ver rutas_perfil); se crea su
+            directorio si no existe
+        intervalo: Segundos entre muestras de las pilas
+        todos_los_hilos: Si True, muestrea todos los hilos con trabajo (ej:
+            los de un ThreadPoolExecutor), no solo el que abre el contexto
+
+    Returns:
+        Perfil con las rutas escritas, la duración, las muestras y el
+        resumen por etapa (al salir del bloque)
+
+    Raises:
+        ValueError: Si ya hay otro perfilador activo en el hilo
+    """
+    perfil = Perfil(rutas_perfil(prefijo))
+    perfilador = cProfile.Profile()
+    muestreador = _Muestreador(None if todos_los_hilos else threading.get_ident(), intervalo)
+
+    inicio = time.perf_counter()
+    perfilador.enable()
+    muestreador.iniciar()
+    try:
+        yield perfil
+    finally:
+        perfilador.disable()
+        muestreador.parar()
+        perfil.segundos = round(time.perf_counter() - inicio, 3)
+        perfil.muestras = muestreador.muestras
+
+        perfil.rutas["pstats"].parent.mkdir(parents=True, exist_ok=True)
+        estadisticas = pstats.Stats(perfilador)
+        estadisticas.dump_stats(perfil.rutas["pstats"])
+        escribir_pilas(muestreador.pilas, perfil.rutas["pilas"])
+        perfil.etapas = resumen_etapas(estadisticas)
+        with open(perfil.rutas["etapas"], "w", encoding="utf-8") as f:
+            json.dump(
+                {"segundos": perfil.segundos, "muestras": perfil.muestras, "etapas": perfil.etapas},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
@@ -0,0 +1,300 @@
+"""
+plazos.py
+
+Análisis con un tiempo máximo y resultados parciales.
+
+Para el panel interactivo, el análisis de una sesión debe responder en un
+tiempo acotado aunque el texto sea enorme (ej: una transcripción pegada
+entera). analisis_con_plazo() resume el texto por segmentos (ver
+resumen_texto.py), comprobando antes de cada segmento que cabe en el plazo,
+y con el tiempo reservado para ello (FRACCION_ETAPAS) calcula las etapas a
+partir del resumen en orden de prioridad:
+
+1. riesgo_psico_emocional (se calcula siempre, aunque el plazo haya vencido)
+2. diagnostico_linguistico_emocional
+3. deteccion_bloqueos
+4. radiografia_cultural
+5. prescripcion_tareas
+6. seguimiento_progreso (solo con historial)
+
+Cada etapa se marca en resultado["etapas"] como "completa" (sobre todo el
+texto), "truncada" (sobre el principio del texto que dio tiempo a resumir)
+o "pendiente" (no dio tiempo a calcularla). Lo que queda (resumir el resto
+del texto, calcular el análisis completo e indexar la sesión) puede
+enviarse a un ejecutor en segundo plano; como los resúmenes se combinan,
+el trabajo ya hecho no se repite.
+
+Uso:
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> cola = ThreadPoolExecutor(max_workers=1)
+    >>> parcial, futuro = analisis_con_plazo(entrada, 0.2, ejecutor=cola)
+    >>> parcial["etapas"]
+    {'riesgo_psico_emocional': 'truncada', ...}
+    >>> completo = futuro.result()   # el mismo resultado que analisis_completo
+"""
+
+import copy
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .utils import validar_entrada
+from .resultados import a_dicts
+from .resumen_texto import ResumenTexto, resumir_segmento, segmentos_limpios
+from .diagnostico_linguistico_emocional import diagnostico_desde_resumen
+from .radiografia_cultural import radiografia_desde_resumen
+from .deteccion_bloqueos_discursivos import bloqueos_desde_resumen
+from .prescripcion_tareas import prescripcion_tareas
+from .riesgo_psico_emocional import riesgo_desde_resumen
+from .seguimiento_progreso import seguimiento_progreso, actualizar_vigilancia
+
+
+# Tamaño de los segmentos cuando hay plazo: cada uno se resume en unos
+# 20 ms, que es lo que puede pasarse el análisis del plazo
+TAM_SEGMENTO_PLAZO = 1 << 14
+
+# Segundos aproximados que se tarda en resumir un carácter (unos 20 ms por
+# segmento de TAM_SEGMENTO_PLAZO): un segmento solo se resume si cabe en lo
+# que queda del plazo
+SEGUNDOS_POR_CARACTER = 0.02 / TAM_SEGMENTO_PLAZO
+
+# Fracción del plazo que se reserva para calcular las etapas a partir del
+# resumen (cada una tarda como mucho unos milisegundos)
+FRACCION_ETAPAS = 0.1
+
+# Estados de las etapas
+COMPLETA = "completa"
+TRUNCADA = "truncada"
+PENDIENTE = "pendiente"
+
+# Etapas en orden de prioridad (claves del resultado de analisis_completo)
+ORDEN_ETAPAS = (
+    "riesgo_psico_emocional",
+    "diagnostico_linguistico_emocional",
+    "deteccion_bloqueos",
+    "radiografia_cultural",
+    "prescripcion_tareas",
+    "seguimiento_progreso",
+)
+
+# Orden de las claves en el resultado, como en analisis_completo
+_ORDEN_RESULTADO = (
+    "diagnostico_linguistico_emocional",
+    "radiografia_cultural",
+    "deteccion_bloqueos",
+    "prescripcion_tareas",
+    "riesgo_psico_emocional",
+    "seguimiento_progreso",
+    "alertas_tempranas",
+)
+
+
+class Plazo:
+    """Instante límite para un cálculo, medido con un reloj monótono."""
+
+    def __init__(self, segundos: float):
+        """
+        Args:
+            segundos: Tiempo disponible a partir de ahora
+        """
+        self.limite = time.monotonic() + segundos
+
+    def restante(self) -> float:
+        """Segundos que quedan (negativo si el plazo ya venció)."""
+        return self.limite - time.monotonic()
+
+    def vencido(self) -> bool:
+        return time.monotonic() >= self.limite
+
+
+def _trozos(texto: str, tam: int) -> Iterator[str]:
+    """Corta el texto en trozos para que segmentos_limpios no lo procese de una vez."""
+    for inicio in range(0, len(texto), tam):
+        yield texto[inicio:inicio + tam]
+
+
+def resumir_con_plazo(
+    texto: str,
+    plazo: Plazo,
+    tam_segmento: int = TAM_SEGMENTO_PLAZO
+) -> Tuple[ResumenTexto, Optional[Iterator[str]]]:
+    """
+    Resume un texto por segmentos mientras quepan en el plazo.
+
+    Los segmentos se cortan en los espacios, así que un tramo largo sin
+    espacios (ej: base64 pegado) llega como un solo segmento; si no cabe en
+    lo que queda del plazo (ver SEGUNDOS_POR_CARACTER), se deja con lo
+    demás para el resto.
+
+    Args:
+        texto: Texto a resumir
+        plazo: Plazo del análisis
+        tam_segmento: Tamaño aproximado de cada segmento en caracteres
+
+    Returns:
+        (resumen, resto): resumen del principio del texto (de todo, si dio
+        tiempo) y un iterador sobre los segmentos que faltan, o None si el
+        texto se resumió entero. Resumir el resto y extender el resumen da
+        el mismo resultado que resumir_texto(texto)
+    """
+    resumen = ResumenTexto()
+    segmentos = segmentos_limpios(_trozos(texto, tam_segmento), tam_segmento)
+    for segmento in segmentos:
+        if len(segmento) * SEGUNDOS_POR_CARACTER > plazo.restante():
+            return resumen, _encadenar(segmento, segmentos)
+        resumen.extender(resumir_segmento(segmento))
+    return resumen, None
+
+
+def _encadenar(primero: str, resto: Iterator[str]) -> Iterator[str]:
+    yield primero
+    yield from resto
+
+
+def _completar(
+    entrada: Dict,
+    resumen: ResumenTexto,
+    resto: Optional[Iterator[str]],
+    opciones: Dict
+) -> Dict:
+    """Termina el resumen y calcula el análisis completo (en segundo plano)."""
+    from . import analisis_completo
+
+    for segmento in resto or ():
+        resumen.extender(resumir_segmento(segmento))
+    resultado = analisis_completo(entrada, resumen=resumen, **opciones)
+    resultado["etapas"] = {etapa: COMPLETA for etapa in ORDEN_ETAPAS if etapa in resultado}
+    return resultado
+
+
+def analisis_con_plazo(
+    entrada: Dict,
+    plazo: Union[float, Plazo],
+    incluir_riesgo: bool = True,
+    historial: Optional[List[Dict]] = None,
+    agregado_temas: Optional[Dict] = None,
+    indice_sesiones=None,
+    vigilancia: Optional[Dict] = None,
+    ejecutor=None,
+    tam_segmento: int = TAM_SEGMENTO_PLAZO
+):
+    """
+    Análisis completo con un tiempo máximo, con resultados parciales.
+
+    Los argumentos son los de analisis_completo. El agregado de temas, la
+    vigilancia y el índice de sesiones solo se actualizan con el análisis
+    completo: en primer plano si todo terminó a tiempo, y si no, en la tarea
+    en segundo plano (o no se actualizan, si no hay ejecutor).
+
+    Args:
+        entrada: Dict con los datos del sujeto y texto
+        plazo: Segundos disponibles, o un Plazo ya en marcha
+        incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
+        historial: Lista opcional de análisis previos para seguimiento
+        agregado_temas: Agregado de temas opcional del sujeto
+        indice_sesiones: IndiceSesiones opcional
+        vigilancia: Estado de vigilancia opcional del sujeto
+        ejecutor: concurrent.futures.Executor opcional (ej:
+            ThreadPoolExecutor(max_workers=1)) al que se envía lo que no
+            terminó a tiempo
+        tam_segmento: Tamaño de los segmentos entre comprobaciones del plazo
+
+    Returns:
+        (resultado, futuro): el resultado tiene las claves de
+        analisis_completo de las etapas calculadas, más "etapas" ({etapa:
+        "completa" | "truncada" | "pendiente"}) y "cobertura" (fracción del
+        texto analizada, aproximada). futuro es un Future con el resultado
+        completo si se envió trabajo al ejecutor, y None si no
+
+    Raises:
+        ValueError: Si la entrada no tiene 'id_sujeto' y 'texto'
+    """
+    if not validar_entrada(entrada):
+        raise ValueError("La entrada debe contener al menos 'id_sujeto' y 'texto'")
+    if not isinstance(plazo, Plazo):
+        plazo = Plazo(plazo)
+
+    texto = entrada['texto']
+    plazo_resumen = Plazo(max(0.0, plazo.restante() * (1 - FRACCION_ETAPAS)))
+    resumen, resto = resumir_con_plazo(texto, plazo_resumen, tam_segmento)
+    truncado = resto is not None
+
+    # Las etapas trabajan sobre una copia del agregado: solo el análisis
+    # completo debe incorporar la sesión
+    agregado = copy.deepcopy(agregado_temas) if agregado_temas is not None else None
+
+    calculos = {
+        "riesgo_psico_emocional": lambda: riesgo_desde_resumen(entrada, resumen),
+        "diagnostico_linguistico_emocional": lambda: diagnostico_desde_resumen(entrada, resumen),
+        "deteccion_bloqueos": lambda: bloqueos_desde_resumen(entrada, resumen, historial, agregado),
+        "radiografia_cultural": lambda: radiografia_desde_resumen(entrada, resumen),
+        "prescripcion_tareas": lambda: prescripcion_tareas(
+            entrada,
+            secciones["diagnostico_linguistico_emocional"],
+            secciones["radiografia_cultural"],
+            secciones["deteccion_bloqueos"],
+        ),
+        "seguimiento_progreso": lambda: seguimiento_progreso(historial + [{
+            **secciones["diagnostico_linguistico_emocional"],
+            **secciones["radiografia_cultural"],
+            "fecha": entrada.get("fecha", "actual")
+        }]),
+    }
+    etapas_pedidas = [
+        etapa for etapa in ORDEN_ETAPAS
+        if (etapa != "riesgo_psico_emocional" or incluir_riesgo)
+        and (etapa != "seguimiento_progreso" or historial)
+    ]
+
+    secciones = {}
+    etapas = {}
+    for etapa in etapas_pedidas:
+        # El riesgo va primero y se calcula siempre
+        if etapa != "riesgo_psico_emocional" and plazo.vencido():
+            etapas[etapa] = PENDIENTE
+            continue
+        secciones[etapa] = calculos[etapa]()
+        etapas[etapa] = TRUNCADA if truncado else COMPLETA
+
+    completo = all(estado == COMPLETA for estado in etapas.values())
+    if completo:
+        if agregado_temas is not None:
+            agregado_temas.clear()
+            agregado_temas.update(agregado)
+        if vigilancia is not None:
+            secciones["alertas_tempranas"] = actualizar_vigilancia(
+                vigilancia, {"id_sujeto": entrada.get("id_sujeto"), **secciones}, entrada.get("fecha")
+            )
+
+    resultado = {"id_sujeto": entrada.get("id_sujeto")}
+    for clave in _ORDEN_RESULTADO:
+        if clave in secciones:
+            resultado[clave] = a_dicts(secciones[clave])
+    resultado["etapas"] = etapas
+    resultado["cobertura"] = 1.0 if not truncado else round(
+        min(1.0, resumen.contar_palabras() / max(1, texto.count(' ') + 1)), 3
+    )
+
+    futuro = None
+    if completo:
+        if indice_sesiones is not None:
+            if ejecutor is not None:
+                futuro = ejecutor.submit(_indexar, indice_sesiones, entrada, resultado)
+            else:
+                indice_sesiones.indexar_entrada(entrada)
+    elif ejecutor is not None:
+        opciones = {
+            "incluir_riesgo": incluir_riesgo,
+            "historial": historial,
+            "agregado_temas": agregado_temas,
+            "indice_sesiones": indice_sesiones,
+            "vigilancia": vigilancia,
+        }
+        futuro = ejecutor.submit(_completar, entrada, resumen.copiar(), resto, opciones)
+
+    return resultado, futuro
+
+
+def _indexar(indice_sesiones, entrada: Dict, resultado: Dict) -> Dict:
+    """Indexa la sesión (en segundo plano) y devuelve el resultado ya completo."""
+    indice_sesiones.indexar_entrada(entrada)
+    return resultado
@@ -9,14 +9,19 @@ A partir de los resultados de los otros módulos, genera recomendaciones de:
 - Actividades de elaboración cultural y emocional
 """
 
-from typing import Dict, List
+import json
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .utils import congelar
 
 
 # =============================================================================
 # CATÁLOGO DE TAREAS TERAPÉUTICAS
 # =============================================================================
 
-CATALOGO_TAREAS = {
+CATALOGO_TAREAS = congelar({
     # Tareas lingüísticas
     "escritura_autobiografica_breve": {
         "descripcion": "Escribe un recuerdo concreto de tu infancia usando pasado y primera persona (100-150 palabras).",
@@ -97,103 +102,488 @@ CATALOGO_TAREAS = {
         "objetivo_linguistico": "narración positiva, expresión emocional",
         "objetivo_clinico_cultural": "reforzar autoeficacia"
     }
-}
+})
 
 
 # =============================================================================
-# REGLAS DE PRESCRIPCIÓN
+# TAREAS INMUTABLES
 # =============================================================================
 
-def prescribir_por_errores_linguisticos(errores: List[str]) -> List[str]:
+class Tarea:
     """
-    Recomienda tareas basadas en los errores lingüísticos detectados.
+    Tarea del catálogo, inmutable.
 
-    Args:
-        errores: Lista de errores identificados
+    Cada motor de reglas crea una sola instancia por tarea del catálogo y la
+    comparten todas las prescripciones, en lugar de copiar la entrada del
+    catálogo en cada resultado.
+    """
 
-    Returns:
-        Lista de IDs de tareas recomendadas
+    __slots__ = ('tipo', 'descripcion', 'objetivo_linguistico', 'objetivo_clinico_cultural')
+
+    def __init__(
+        self,
+        tipo: str,
+        descripcion: str,
+        objetivo_linguistico: str,
+        objetivo_clinico_cultural: str
+    ):
+        object.__setattr__(self, 'tipo', tipo)
+        object.__setattr__(self, 'descripcion', descripcion)
+        object.__setattr__(self, 'objetivo_linguistico', objetivo_linguistico)
+        object.__setattr__(self, 'objetivo_clinico_cultural', objetivo_clinico_cultural)
+
+    @classmethod
+    def desde_catalogo(cls, id_tarea: str, entrada_catalogo: Dict) -> 'Tarea':
+        """Crea la tarea a partir de su entrada en un catálogo."""
+        return cls(
+            id_tarea,
+            entrada_catalogo["descripcion"],
+            entrada_catalogo["objetivo_linguistico"],
+            entrada_catalogo["objetivo_clinico_cultural"]
+        )
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("Las tareas del catálogo son inmutables")
+
+    def __delattr__(self, nombre):
+        raise AttributeError("Las tareas del catálogo son inmutables")
+
+    def __reduce__(self):
+        return (Tarea, tuple(getattr(self, campo) for campo in self.__slots__))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __eq__(self, otra):
+        if not isinstance(otra, Tarea):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(otra, c) for c in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, campo) for campo in self.__slots__))
+
+    def __repr__(self):
+        return f"Tarea({self.tipo!r})"
+
+    def to_dict(self) -> Dict[str, str]:
+        """Dict con el formato de salida de una tarea."""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class TareaPrescrita(Mapping):
     """
-    tareas = []
+    Tarea recomendada en una prescripción: la tarea compartida del catálogo
+    más una nota personalizada opcional, que se guarda aparte.
 
-    if "problemas_tiempos_pasado" in errores:
-        tareas.append("escritura_autobiografica_breve")
+    Se comporta como un dict de solo lectura con las claves de salida
+    ("tipo", "descripcion", ..., "nota_personalizada" si la hay); to_dict()
+    lo convierte al dict de salida.
+    """
 
-    if "escasez_conectores" in errores:
-        tareas.append("conectores_causales")
+    __slots__ = ('tarea', 'nota_personalizada')
 
-    if "pobreza_lexica" in errores:
-        tareas.append("descripcion_sensorial")
+    def __init__(self, tarea: Tarea, nota_personalizada: str = ""):
+        object.__setattr__(self, 'tarea', tarea)
+        object.__setattr__(self, 'nota_personalizada', nota_personalizada)
 
-    if "texto_muy_corto" in errores:
-        tareas.append("expansion_tema")
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("Las tareas prescritas son inmutables")
 
-    return tareas
+    def __reduce__(self):
+        return (TareaPrescrita, (self.tarea, self.nota_personalizada))
 
+    def __copy__(self):
+        return self
 
-def prescribir_por_patrones_emocionales(diagnostico: Dict) -> List[str]:
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getitem__(self, clave: str):
+        if clave == "nota_personalizada":
+            if self.nota_personalizada:
+                return self.nota_personalizada
+            raise KeyError(clave)
+        if clave in Tarea.__slots__:
+            return getattr(self.tarea, clave)
+        raise KeyError(clave)
+
+    def __iter__(self):
+        yield from Tarea.__slots__
+        if self.nota_personalizada:
+            yield "nota_personalizada"
+
+    def __len__(self) -> int:
+        return len(Tarea.__slots__) + (1 if self.nota_personalizada else 0)
+
+    def __repr__(self):
+        return f"TareaPrescrita({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, str]:
+        """Dict con el formato de salida (el de construir_tarea hasta ahora)."""
+        tarea = self.tarea.to_dict()
+        if self.nota_personalizada:
+            tarea["nota_personalizada"] = self.nota_personalizada
+        return tarea
+
+
+# =============================================================================
+# REGLAS DE PRESCRIPCIÓN
+# =============================================================================
+
+# Máximo de tareas por prescripción, para no abrumar
+MAX_TAREAS = 5
+
+# Cada regla recomienda sus tareas cuando están presentes todos sus
+# disparadores. Las reglas de mayor prioridad van primero; a igual prioridad,
+# en el orden de la lista. Mismo formato que los ficheros JSON de cargar_reglas().
+#
+# Disparadores (ver extraer_disparadores):
+#   error:<error>                   errores_clave del diagnóstico
+#   emocion:<estado>                estado_emocional_dominante
+#   pocos_pronombres_primera_persona
+#   tension:<tension>               tension_dominante de la radiografía
+#   bloqueo:<nivel>                 nivel_riesgo_bloqueo
+#   tema_repetitivo:<tema>          tema repetitivo con poco detalle
+#
+# Las reglas de las familias de FAMILIAS_EN_ORDEN_DE_APARICION (lo que va
+# antes de ':') no siguen el orden de la lista: a igual prioridad, van en el
+# orden en que aparecen sus disparadores (ej: los temas, por frecuencia).
+REGLAS_PRESCRIPCION = congelar([
+    # Errores lingüísticos
+    {"disparadores": ["error:problemas_tiempos_pasado"], "tareas": ["escritura_autobiografica_breve"]},
+    {"disparadores": ["error:escasez_conectores"], "tareas": ["conectores_causales"]},
+    {"disparadores": ["error:pobreza_lexica"], "tareas": ["descripcion_sensorial"]},
+    {"disparadores": ["error:texto_muy_corto"], "tareas": ["expansion_tema"]},
+
+    # Patrones emocionales
+    {"disparadores": ["emocion:tristeza"], "tareas": ["carta_no_enviada", "logros_pequenos"]},
+    {"disparadores": ["emocion:miedo"], "tareas": ["momento_dificil", "carta_al_futuro"]},
+    {"disparadores": ["emocion:rabia"], "tareas": ["carta_no_enviada", "reescritura_perspectiva"]},
+    {
+        "disparadores": ["pocos_pronombres_primera_persona"],
+        "tareas": ["escritura_autobiografica_breve", "inventario_emocional"]
+    },
+
+    # Tensión cultural
+    {
+        "disparadores": ["tension:nostalgia"],
+        "tareas": ["ritual_o_celebracion", "receta_significativa", "exploracion_cultura_acogida"]
+    },
+    {"disparadores": ["tension:choque"], "tareas": ["comparacion_cultural", "exploracion_cultura_acogida"]},
+    {"disparadores": ["tension:integracion"], "tareas": ["comparacion_cultural"]},
+    {"disparadores": ["tension:exploracion"], "tareas": ["exploracion_cultura_acogida"]},
+
+    # Bloqueos
+    {"disparadores": ["bloqueo:medio"], "tareas": ["expansion_tema", "dialogo_imaginario"]},
+    {"disparadores": ["bloqueo:alto"], "tareas": ["expansion_tema", "dialogo_imaginario"]},
+    {"disparadores": ["tema_repetitivo:familia"], "tareas": ["carta_no_enviada"]},
+    {"disparadores": ["tema_repetitivo:trabajo"], "tareas": ["momento_dificil"]},
+])
+
+
+# Familias de disparadores cuyas reglas se ordenan por aparición
+FAMILIAS_EN_ORDEN_DE_APARICION = frozenset({"tema_repetitivo"})
+
+
+def extraer_disparadores(
+    diagnostico: Optional[Dict] = None,
+    radiografia: Optional[Dict] = None,
+    bloqueos: Optional[Dict] = None
+) -> List[str]:
     """
-    Recomienda tareas basadas en el estado emocional.
+    Traduce los resultados de los módulos a disparadores de reglas.
 
     Args:
         diagnostico: Resultado del diagnóstico lingüístico-emocional
+        radiografia: Resultado de la radiografía cultural
+        bloqueos: Resultado de la detección de bloqueos
 
     Returns:
-        Lista de IDs de tareas recomendadas
+        Lista de disparadores presentes
     """
-    tareas = []
-    estado_emocional = diagnostico.get('estado_emocional_dominante', 'neutro')
+    disparadores = []
 
-    if estado_emocional == "tristeza":
-        tareas.append("carta_no_enviada")
-        tareas.append("logros_pequenos")
+    if diagnostico is not None:
+        for error in diagnostico.get('errores_clave', []):
+            disparadores.append(f"error:{error}")
 
-    elif estado_emocional == "miedo":
-        tareas.append("momento_dificil")
-        tareas.append("carta_al_futuro")
+        estado_emocional = diagnostico.get('estado_emocional_dominante', 'neutro')
+        disparadores.append(f"emocion:{estado_emocional}")
 
-    elif estado_emocional == "rabia":
-        tareas.append("carta_no_enviada")
-        tareas.append("reescritura_perspectiva")
+        # Si evita primera persona
+        metricas = diagnostico.get('metricas', {})
+        if metricas.get('porcentaje_pronombres_primera_persona', 0) < 2:
+            disparadores.append("pocos_pronombres_primera_persona")
 
-    # Si evita primera persona
-    metricas = diagnostico.get('metricas', {})
-    if metricas.get('porcentaje_pronombres_primera_persona', 0) < 2:
-        tareas.append("escritura_autobiografica_breve")
-        tareas.append("inventario_emocional")
+    if radiografia is not None:
+        tension = radiografia.get('tension_dominante', 'sin_indicadores')
+        disparadores.append(f"tension:{tension}")
 
-    return tareas
+    if bloqueos is not None:
+        nivel_riesgo = bloqueos.get('nivel_riesgo_bloqueo', 'bajo')
+        disparadores.append(f"bloqueo:{nivel_riesgo}")
 
+        # Si hay temas repetitivos con bajo detalle
+        for tema_info in bloqueos.get('temas_detectados', []):
+            if tema_info.get('patron') == "repetitivo" and tema_info.get('detalle_medio', 0) <= 2:
+                disparadores.append(f"tema_repetitivo:{tema_info['tema']}")
 
-def prescribir_por_tension_cultural(radiografia: Dict) -> List[str]:
+    return disparadores
+
+
+class MotorReglas:
+    """
+    Motor de reglas de prescripción compilado a índices.
+
+    Cada disparador del vocabulario de las reglas ocupa un bit; cada regla
+    se compila a la máscara de sus disparadores y se indexa por uno de
+    ellos. Al evaluar, solo se examinan las reglas indexadas por los
+    disparadores presentes, de modo que el coste depende de los disparadores
+    presentes y no del número total de reglas.
+
+    Las reglas de igual prioridad cuyo primer disparador es de una familia
+    ordenada forman un bloque, en el lugar de la primera de ellas, y dentro
+    del bloque se ordenan por la posición de ese disparador en la entrada.
     """
-    Recomienda tareas basadas en la tensión cultural detectada.
+
+    def __init__(
+        self,
+        reglas: List[Dict],
+        catalogo: Optional[Dict] = None,
+        familias_ordenadas: Iterable[str] = FAMILIAS_EN_ORDEN_DE_APARICION
+    ):
+        """
+        Args:
+            reglas: Lista de reglas (mismo formato que REGLAS_PRESCRIPCION)
+            catalogo: Catálogo de tareas (por defecto, CATALOGO_TAREAS)
+            familias_ordenadas: Familias de disparadores (prefijo antes de
+                ':') cuyas reglas se ordenan por aparición del disparador
+
+        Raises:
+            ValueError: Si una regla no tiene tareas o usa tareas fuera del catálogo
+        """
+        self.catalogo = CATALOGO_TAREAS if catalogo is None else catalogo
+        # Una instancia compartida por tarea del catálogo
+        self.tareas: Dict[str, Tarea] = {
+            id_tarea: Tarea.desde_catalogo(id_tarea, entrada)
+            for id_tarea, entrada in self.catalogo.items()
+        }
+        self.vocabulario: Dict[str, int] = {}
+        self._siempre = []
+        self._por_disparador: Dict[int, List[int]] = {}
+        self._reglas = []
+        # Por regla: posición de su bloque y bit por el que se ordena dentro
+        # de él (None si la regla sigue el orden de la lista)
+        self._orden: List[Tuple[int, Optional[int]]] = []
+        familias_ordenadas = frozenset(familias_ordenadas)
+        bloques: Dict[Tuple[int, str], int] = {}
+
+        # Orden de evaluación: prioridad descendente y, a igualdad, el de la lista
+        orden = sorted(
+            range(len(reglas)),
+            key=lambda i: (-reglas[i].get('prioridad', 0), i)
+        )
+        for posicion, indice in enumerate(orden):
+            regla = reglas[indice]
+            tareas = tuple(regla.get('tareas', ()))
+            if not tareas:
+                raise ValueError(f"La regla {indice} no recomienda ninguna tarea")
+            desconocidas = [t for t in tareas if t not in self.catalogo]
+            if desconocidas:
+                raise ValueError(
+                    f"La regla {indice} usa tareas que no están en el catálogo: "
+                    f"{', '.join(desconocidas)}"
+                )
+
+            mascara = 0
+            bits = []
+            for disparador in regla.get('disparadores', ()):
+                bit = self.vocabulario.setdefault(disparador, len(self.vocabulario))
+                mascara |= 1 << bit
+                bits.append(bit)
+
+            self._reglas.append((mascara, tareas))
+            familia = regla['disparadores'][0].partition(':')[0] if bits else None
+            if familia in familias_ordenadas:
+                bloque = bloques.setdefault((regla.get('prioridad', 0), familia), posicion)
+                self._orden.append((bloque, bits[0]))
+            else:
+                self._orden.append((posicion, None))
+            if bits:
+                self._por_disparador.setdefault(bits[0], []).append(posicion)
+            else:
+                self._siempre.append(posicion)
+
+        # Compilado el motor, sus índices solo se leen: se congelan para
+        # poder compartirlo entre hilos
+        self.tareas = congelar(self.tareas)
+        self.vocabulario = congelar(self.vocabulario)
+        self._siempre = congelar(self._siempre)
+        self._por_disparador = congelar(self._por_disparador)
+        self._reglas = congelar(self._reglas)
+        self._orden = congelar(self._orden)
+
+    def __len__(self) -> int:
+        return len(self._reglas)
+
+    @classmethod
+    def desde_ficheros(
+        cls,
+        ruta_reglas: Union[str, Path],
+        ruta_catalogo: Optional[Union[str, Path]] = None
+    ) -> 'MotorReglas':
+        """Crea un motor a partir de ficheros JSON de reglas y de catálogo."""
+        catalogo = cargar_catalogo(ruta_catalogo) if ruta_catalogo else None
+        return cls(cargar_reglas(ruta_reglas), catalogo)
+
+    def construir_tarea(self, id_tarea: str, personalizacion: str = "") -> Optional[TareaPrescrita]:
+        """Tarea prescrita que comparte la Tarea del catálogo de este motor."""
+        tarea = self.tareas.get(id_tarea)
+        if tarea is None:
+            return None
+        return TareaPrescrita(tarea, personalizacion)
+
+    def mascara(self, disparadores: Iterable[str]) -> int:
+        """Bitset de los disparadores (se ignoran los que ninguna regla usa)."""
+        return self._mascara_y_bits(disparadores)[0]
+
+    def _mascara_y_bits(self, disparadores: Iterable[str]) -> Tuple[int, Dict[int, int]]:
+        """Bitset de los disparadores y {bit: orden de aparición}."""
+        mascara = 0
+        bits: Dict[int, int] = {}
+        vocabulario = self.vocabulario
+        for disparador in disparadores:
+            bit = vocabulario.get(disparador)
+            if bit is not None:
+                mascara |= 1 << bit
+                bits.setdefault(bit, len(bits))
+        return mascara, bits
+
+    def evaluar(
+        self,
+        disparadores: Iterable[str],
+        max_tareas: Optional[int] = MAX_TAREAS
+    ) -> List[str]:
+        """
+        Devuelve las tareas recomendadas para unos disparadores.
+
+        Args:
+            disparadores: Disparadores presentes (ver extraer_disparadores)
+            max_tareas: Máximo de tareas (None para no limitar)
+
+        Returns:
+            IDs de tareas sin repetir, por prioridad de la regla que las recomienda
+        """
+        presentes, bits = self._mascara_y_bits(disparadores)
+
+        # Solo se miran las reglas indexadas por un disparador presente (no
+        # se recorre todo el vocabulario)
+        activadas = list(self._siempre)
+        for bit in bits:
+            for posicion in self._por_disparador.get(bit, ()):
+                mascara = self._reglas[posicion][0]
+                if mascara & presentes == mascara:
+                    activadas.append(posicion)
+        orden = self._orden
+        activadas.sort(key=lambda posicion: (
+            orden[posicion][0],
+            bits.get(orden[posicion][1], -1),
+            posicion,
+        ))
+
+        tareas = {}
+        for posicion in activadas:
+            for tarea in self._reglas[posicion][1]:
+                tareas.setdefault(tarea, None)
+                if max_tareas is not None and len(tareas) >= max_tareas:
+                    return list(tareas)
+        return list(tareas)
+
+
+def cargar_reglas(ruta: Union[str, Path]) -> List[Dict]:
+    """
+    Carga reglas de prescripción de un fichero JSON.
+
+    El fichero contiene una lista de reglas, o un objeto con la clave
+    "reglas", con el mismo formato que REGLAS_PRESCRIPCION.
+
+    Raises:
+        ValueError: Si el fichero no tiene el formato esperado
+    """
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    if isinstance(datos, dict):
+        datos = datos.get('reglas')
+    if not isinstance(datos, list) or not all(isinstance(r, dict) for r in datos):
+        raise ValueError(f"{ruta} debe contener una lista de reglas")
+    return datos
+
+
+def cargar_catalogo(ruta: Union[str, Path]) -> Dict[str, Dict]:
+    """
+    Carga un catálogo de tareas de un fichero JSON.
+
+    El fichero contiene un objeto con el mismo formato que CATALOGO_TAREAS.
+
+    Raises:
+        ValueError: Si el fichero no tiene el formato esperado
+    """
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    if not isinstance(datos, dict) or not all(isinstance(t, dict) for t in datos.values()):
+        raise ValueError(f"{ruta} debe contener un objeto con las tareas por ID")
+    return datos
+
+
+# Motor con las reglas y el catálogo por defecto
+MOTOR_PRESCRIPCION = MotorReglas(REGLAS_PRESCRIPCION)
+
+
+def prescribir_por_errores_linguisticos(errores: List[str]) -> List[str]:
+    """
+    Recomienda tareas basadas en los errores lingüísticos detectados.
 
     Args:
-        radiografia: Resultado de la radiografía cultural
+        errores: Lista de errores identificados
 
     Returns:
         Lista de IDs de tareas recomendadas
     """
-    tareas = []
-    tension = radiografia.get('tension_dominante', 'sin_indicadores')
+    disparadores = extraer_disparadores(diagnostico={'errores_clave': errores})
+    disparadores = [d for d in disparadores if d.startswith('error:')]
+    return MOTOR_PRESCRIPCION.evaluar(disparadores, max_tareas=None)
 
-    if tension == "nostalgia":
-        tareas.append("ritual_o_celebracion")
-        tareas.append("receta_significativa")
-        tareas.append("exploracion_cultura_acogida")
 
-    elif tension == "choque":
-        tareas.append("comparacion_cultural")
-        tareas.append("exploracion_cultura_acogida")
+def prescribir_por_patrones_emocionales(diagnostico: Dict) -> List[str]:
+    """
+    Recomienda tareas basadas en el estado emocional.
 
-    elif tension == "integracion":
-        tareas.append("comparacion_cultural")
+    Args:
+        diagnostico: Resultado del diagnóstico lingüístico-emocional
 
-    elif tension == "exploracion":
-        tareas.append("exploracion_cultura_acogida")
+    Returns:
+        Lista de IDs de tareas recomendadas
+    """
+    disparadores = extraer_disparadores(diagnostico=diagnostico)
+    disparadores = [d for d in disparadores if not d.startswith('error:')]
+    return MOTOR_PRESCRIPCION.evaluar(disparadores, max_tareas=None)
+
+
+def prescribir_por_tension_cultural(radiografia: Dict) -> List[str]:
+    """
+    Recomienda tareas basadas en la tensión cultural detectada.
 
-    return tareas
+    Args:
+        radiografia: Resultado de la radiografía cultural
+
+    Returns:
+        Lista de IDs de tareas recomendadas
+    """
+    disparadores = extraer_disparadores(radiografia=radiografia)
+    return MOTOR_PRESCRIPCION.evaluar(disparadores, max_tareas=None)
 
 
 def prescribir_por_bloqueos(bloqueos: Dict) -> List[str]:
@@ -206,58 +596,43 @@ def prescribir_por_bloqueos(bloqueos: Dict) -> List[str]:
     Returns:
         Lista de IDs de tareas recomendadas
     """
-    tareas = []
-    nivel_riesgo = bloqueos.get('nivel_riesgo_bloqueo', 'bajo')
-    temas_detectados = bloqueos.get('temas_detectados', [])
+    disparadores = extraer_disparadores(bloqueos=bloqueos)
+    return MOTOR_PRESCRIPCION.evaluar(disparadores, max_tareas=None)
 
-    if nivel_riesgo in ["medio", "alto"]:
-        tareas.append("expansion_tema")
-        tareas.append("dialogo_imaginario")
 
-    # Si hay temas repetitivos con bajo detalle
-    for tema_info in temas_detectados:
-        if tema_info.get('patron') == "repetitivo" and tema_info.get('detalle_medio', 0) <= 2:
-            if tema_info['tema'] == "familia":
-                tareas.append("carta_no_enviada")
-            elif tema_info['tema'] == "trabajo":
-                tareas.append("momento_dificil")
-
-    return tareas
-
-
-def construir_tarea(id_tarea: str, personalizacion: str = "") -> Dict:
+def construir_tarea(
+    id_tarea: str,
+    personalizacion: str = "",
+    catalogo: Optional[Dict] = None
+) -> Optional[TareaPrescrita]:
     """
-    Construye un dict con la información completa de una tarea.
+    Construye la tarea completa a partir de su ID.
+
+    Con el catálogo por defecto, la tarea devuelta comparte la instancia de
+    Tarea de MOTOR_PRESCRIPCION; solo la nota personalizada es propia.
 
     Args:
         id_tarea: ID de la tarea en el catálogo
         personalizacion: Texto adicional para personalizar la tarea
+        catalogo: Catálogo de tareas (por defecto, CATALOGO_TAREAS)
 
     Returns:
-        Dict con la tarea completa
+        TareaPrescrita (de solo lectura, con la interfaz de un dict), o None
+        si la tarea no está en el catálogo
     """
-    if id_tarea not in CATALOGO_TAREAS:
+    if catalogo is None:
+        return MOTOR_PRESCRIPCION.construir_tarea(id_tarea, personalizacion)
+    if id_tarea not in catalogo:
         return None
-
-    tarea_base = CATALOGO_TAREAS[id_tarea].copy()
-    tarea = {
-        "tipo": id_tarea,
-        "descripcion": tarea_base["descripcion"],
-        "objetivo_linguistico": tarea_base["objetivo_linguistico"],
-        "objetivo_clinico_cultural": tarea_base["objetivo_clinico_cultural"]
-    }
-
-    if personalizacion:
-        tarea["nota_personalizada"] = personalizacion
-
-    return tarea
+    return TareaPrescrita(Tarea.desde_catalogo(id_tarea, catalogo[id_tarea]), personalizacion)
 
 
 def prescripcion_tareas(
     entrada: Dict,
     diagnostico: Dict,
     radiografia: Dict,
-    bloqueos: Dict
+    bloqueos: Dict,
+    motor: Optional[MotorReglas] = None
 ) -> Dict:
     """
     Genera una prescripción de tareas terapéuticas personalizada.
@@ -270,46 +645,27 @@ def prescripcion_tareas(
         diagnostico: Resultado del diagnóstico lingüístico-emocional
         radiografia: Resultado de la radiografía cultural
         bloqueos: Resultado de la detección de bloqueos
+        motor: MotorReglas a usar (por defecto, MOTOR_PRESCRIPCION)
 
     Returns:
         Dict con la prescripción:
             {
                 "id_sujeto": str,
-                "tareas_recomendadas": List[Dict],
+                "tareas_recomendadas": List[TareaPrescrita],
                 "justificacion": str
             }
     """
     id_sujeto = entrada.get('id_sujeto', 'unknown')
 
-    # Recolectar recomendaciones de cada módulo
-    tareas_por_errores = prescribir_por_errores_linguisticos(
-        diagnostico.get('errores_clave', [])
-    )
-    tareas_por_emociones = prescribir_por_patrones_emocionales(diagnostico)
-    tareas_por_cultura = prescribir_por_tension_cultural(radiografia)
-    tareas_por_bloqueos = prescribir_por_bloqueos(bloqueos)
-
-    # Combinar y eliminar duplicados manteniendo orden
-    todas_tareas_ids = (
-        tareas_por_errores +
-        tareas_por_emociones +
-        tareas_por_cultura +
-        tareas_por_bloqueos
-    )
-
-    # Eliminar duplicados manteniendo orden
-    tareas_ids_unicas = []
-    for tarea_id in todas_tareas_ids:
-        if tarea_id not in tareas_ids_unicas:
-            tareas_ids_unicas.append(tarea_id)
-
-    # Limitar a máximo 5 tareas para no abrumar
-    tareas_ids_unicas = tareas_ids_unicas[:5]
+    # Evaluar las reglas sobre los disparadores de todos los módulos
+    motor = MOTOR_PRESCRIPCION if motor is None else motor
+    disparadores = extraer_disparadores(diagnostico, radiografia, bloqueos)
+    tareas_ids_unicas = motor.evaluar(disparadores)
 
     # Construir tareas completas
     tareas_recomendadas = []
     for tarea_id in tareas_ids_unicas:
-        tarea = construir_tarea(tarea_id)
+        tarea = motor.construir_tarea(tarea_id)
         if tarea:
             tareas_recomendadas.append(tarea)
 
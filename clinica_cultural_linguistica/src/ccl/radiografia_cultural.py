@@ -11,7 +11,8 @@ Analiza:
 """
 
 from typing import Dict, List
-from .utils import tokenizar, limpiar_texto, validar_entrada
+from .resultados import Radiografia
+from .utils import congelar, tokenizar, limpiar_texto, validar_entrada
 
 
 # =============================================================================
@@ -19,7 +20,7 @@ from .utils import tokenizar, limpiar_texto, validar_entrada
 # =============================================================================
 
 # Referentes por países (ejemplos - se pueden expandir)
-REFERENTES_CULTURALES = {
+REFERENTES_CULTURALES = congelar({
     'colombia': {
         'lugares': {'bogotá', 'medellín', 'cartagena', 'cali', 'barranquilla'},
         'comidas': {'arepa', 'bandeja paisa', 'ajiaco', 'sancocho', 'empanada'},
@@ -63,10 +64,10 @@ REFERENTES_CULTURALES = {
         'fiestas': {'semana santa', 'feria de abril', 'san fermines', 'tomatina'},
         'cultura': {'flamenco', 'fútbol', 'siesta', 'corrida'}
     }
-}
+})
 
 # Campos culturales temáticos
-CAMPOS_CULTURALES = {
+CAMPOS_CULTURALES = congelar({
     'familia': {
         'familia', 'madre', 'padre', 'hermano', 'hermana', 'abuelo', 'hijo',
         'parientes', 'tío', 'primo', 'familias', 'hogar', 'casa familiar'
@@ -95,10 +96,10 @@ CAMPOS_CULTURALES = {
         'iglesia', 'dios', 'fe', 'religión', 'oración', 'misa',
         'santo', 'virgen', 'creencia', 'espiritual'
     }
-}
+})
 
 # Palabras indicadoras de tensión cultural
-INDICADORES_TENSION = {
+INDICADORES_TENSION = congelar({
     'nostalgia': {
         'extrañar', 'echar de menos', 'añorar', 'recordar', 'antes',
         'allá', 'mi país', 'mi tierra', 'nostalgia', 'lejos', 'distancia'
@@ -119,7 +120,7 @@ INDICADORES_TENSION = {
         'no me gusta', 'odio', 'malo', 'peor', 'horrible',
         'rechazar', 'desprecio', 'discriminación', 'racismo'
     }
-}
+})
 
 
 # =============================================================================
@@ -312,7 +313,7 @@ def generar_comentarios_culturales(
     return comentarios
 
 
-def radiografia_cultural(entrada: Dict) -> Dict:
+def radiografia_cultural(entrada: Dict) -> Radiografia:
     """
     Realiza una radiografía cultural completa del texto.
 
@@ -330,7 +331,7 @@ def radiografia_cultural(entrada: Dict) -> Dict:
             }
 
     Returns:
-        Dict con la radiografía cultural:
+        Radiografia (se lee como un dict) con la radiografía cultural:
             {
                 "id_sujeto": str,
                 "referentes_origen": List[str],
@@ -367,6 +368,124 @@ def radiografia_cultural(entrada: Dict) -> Dict:
 
     # Detectar tensión cultural
     tensiones = detectar_tension_cultural(texto)
+
+    return construir_radiografia(
+        entrada, referentes_origen, referentes_acogida, campos_culturales, tensiones
+    )
+
+
+def detectar_referentes_pais_en_resumen(resumen, pais: str) -> List[str]:
+    """
+    Detecta referentes culturales de un país usando un ResumenTexto.
+
+    Args:
+        resumen: ResumenTexto del texto
+        pais: País del que buscar referentes (en minúsculas)
+
+    Returns:
+        Lista de referentes detectados (mismo orden que detectar_referentes_pais)
+    """
+    if pais not in REFERENTES_CULTURALES:
+        return []
+
+    return [
+        item
+        for items in REFERENTES_CULTURALES[pais].values()
+        for item in items
+        if resumen.contiene(item)
+    ]
+
+
+def contar_lexico_en_resumen(resumen, lexico: Dict[str, set]) -> Dict[str, int]:
+    """
+    Cuenta las menciones de cada categoría de un léxico usando un ResumenTexto.
+
+    Sigue el mismo criterio que detectar_campos_culturales() y
+    detectar_tension_cultural(): las expresiones de varias palabras cuentan
+    una vez si aparecen y las palabras sueltas cuentan cada aparición.
+
+    Args:
+        resumen: ResumenTexto del texto
+        lexico: Dict categoría -> set de palabras/expresiones
+
+    Returns:
+        Dict con conteo de menciones por categoría
+    """
+    conteos = {}
+
+    for categoria, palabras in lexico.items():
+        conteo = 0
+        for palabra in palabras:
+            if ' ' in palabra:
+                if resumen.contiene(palabra):
+                    conteo += 1
+            else:
+                conteo += resumen.conteo_token(palabra)
+
+        conteos[categoria] = conteo
+
+    return conteos
+
+
+def radiografia_desde_resumen(entrada: Dict, resumen) -> Radiografia:
+    """
+    Realiza la radiografía cultural a partir de un ResumenTexto.
+
+    Produce el mismo resultado que radiografia_cultural() sobre el texto
+    resumido; útil para textos muy largos procesados por trozos.
+
+    Args:
+        entrada: Dict con al menos "id_sujeto" (no necesita "texto")
+        resumen: ResumenTexto del texto (ver resumen_texto.py)
+
+    Returns:
+        Radiografia con la radiografía cultural (mismo formato que radiografia_cultural)
+    """
+    if 'id_sujeto' not in entrada:
+        raise ValueError("La entrada debe contener al menos 'id_sujeto'")
+
+    metadatos = entrada.get('metadatos', {})
+    pais_origen = metadatos.get('pais_origen', '').lower()
+    pais_residencia = metadatos.get('pais_residencia', '').lower()
+
+    referentes_origen = []
+    referentes_acogida = []
+
+    if pais_origen:
+        referentes_origen = detectar_referentes_pais_en_resumen(resumen, pais_origen)
+
+    if pais_residencia and pais_residencia != pais_origen:
+        referentes_acogida = detectar_referentes_pais_en_resumen(resumen, pais_residencia)
+
+    return construir_radiografia(
+        entrada,
+        referentes_origen,
+        referentes_acogida,
+        contar_lexico_en_resumen(resumen, CAMPOS_CULTURALES),
+        contar_lexico_en_resumen(resumen, INDICADORES_TENSION)
+    )
+
+
+def construir_radiografia(
+    entrada: Dict,
+    referentes_origen: List[str],
+    referentes_acogida: List[str],
+    campos_culturales: Dict[str, int],
+    tensiones: Dict[str, int]
+) -> Radiografia:
+    """
+    Interpreta los referentes, campos y tensiones y construye la radiografía.
+
+    Args:
+        entrada: Entrada original del sujeto
+        referentes_origen: Referentes del país de origen detectados
+        referentes_acogida: Referentes del país de acogida detectados
+        campos_culturales: Conteo de menciones por campo cultural
+        tensiones: Conteo de indicadores por tipo de tensión
+
+    Returns:
+        Radiografia con la radiografía cultural
+    """
     tension_dominante = determinar_tension_dominante(tensiones)
 
     # Generar comentarios
@@ -378,15 +497,15 @@ def radiografia_cultural(entrada: Dict) -> Dict:
     )
 
     # Construir y retornar resultado
-    resultado = {
-        "id_sujeto": entrada['id_sujeto'],
-        "referentes_origen": referentes_origen,
-        "referentes_acogida": referentes_acogida,
-        "campos_culturales": {k: v for k, v in campos_culturales.items() if v > 0},
-        "tension_dominante": tension_dominante,
-        "tensiones_detectadas": tensiones,
-        "comentarios": comentarios
-    }
+    resultado = Radiografia(
+        id_sujeto=entrada['id_sujeto'],
+        referentes_origen=referentes_origen,
+        referentes_acogida=referentes_acogida,
+        campos_culturales={k: v for k, v in campos_culturales.items() if v > 0},
+        tension_dominante=tension_dominante,
+        tensiones_detectadas=tensiones,
+        comentarios=comentarios
+    )
 
     return resultado
 
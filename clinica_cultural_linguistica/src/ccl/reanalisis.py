@@ -0,0 +1,262 @@
+"""
+reanalisis.py
+
+Reanálisis de un corpus completo con puntos de control, para poder
+reanudarlo si se interrumpe.
+
+reanalizar_corpus() analiza cada documento de un corpus (.jsonl o .txt, ver
+corpus.py) y escribe un resultado JSON por línea en el fichero de salida.
+Cada cierto número de documentos (o de segundos) vacía la salida a disco y
+guarda un punto de control en "<salida>.punto.json":
+
+    {
+        "version": 1,
+        "entrada": {"ruta", "tamaño", "modificado"},
+        "opciones": {"incluir_riesgo", "campo_texto"},
+        "posicion_entrada": int,   # bytes del corpus ya analizados
+        "registros": int,          # resultados escritos
+        "posicion_salida": int,    # bytes de la salida ya volcados a disco
+        "crc_salida": int,         # CRC32 de esos bytes
+        "terminado": bool
+    }
+
+Al reanudar se comprueba que el corpus y las opciones no han cambiado y que
+la salida coincide con el punto de control (tamaño y CRC32); después se
+recorta la salida a la posición guardada, descartando lo escrito tras el
+último punto de control, y se continúa desde la posición guardada del
+corpus. Así cada documento aparece exactamente una vez en la salida.
+
+Uso:
+    >>> reanalizar_corpus("archivo.jsonl", "resultados.jsonl")
+    >>> # tras una interrupción:
+    >>> reanalizar_corpus("archivo.jsonl", "resultados.jsonl", reanudar=True)
+
+Desde la línea de comandos:
+    python -m ccl reanalizar archivo.jsonl -o resultados.jsonl --resume
+"""
+
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from .corpus import LectorCorpus
+from .utils import convertir_para_json
+
+
+# Versión del formato del punto de control
+VERSION_PUNTO_CONTROL = 1
+
+# Por defecto, un punto de control cada tantos documentos o segundos
+CADA_REGISTROS = 1000
+CADA_SEGUNDOS = 60.0
+
+# Bloque de lectura al verificar la salida
+_TAM_BLOQUE_CRC = 1 << 24
+
+
+def ruta_punto_control(salida: Union[str, Path]) -> Path:
+    salida = Path(salida)
+    return salida.with_name(salida.name + ".punto.json")
+
+
+def leer_punto_control(salida: Union[str, Path]) -> Optional[Dict]:
+    """
+    Punto de control guardado para una salida, o None si no hay.
+
+    Raises:
+        ValueError: Si es de otra versión del formato
+    """
+    ruta = ruta_punto_control(salida)
+    if not ruta.exists():
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        punto = json.load(f)
+    if punto.get("version") != VERSION_PUNTO_CONTROL:
+        raise ValueError(
+            f"{ruta} usa la versión {punto.get('version')} del punto de control; "
+            f"se esperaba la {VERSION_PUNTO_CONTROL}"
+        )
+    return punto
+
+
+def _guardar_punto_control(salida: Path, punto: Dict):
+    """Escribe el punto de control de forma atómica (fichero temporal y rename)."""
+    ruta = ruta_punto_control(salida)
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(punto, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def _descripcion_entrada(ruta: Path) -> Dict:
+    estado = ruta.stat()
+    return {"ruta": str(ruta), "tamaño": estado.st_size, "modificado": estado.st_mtime_ns}
+
+
+def _crc_fichero(fichero, hasta: int) -> int:
+    """CRC32 de los primeros `hasta` bytes de un fichero abierto en binario."""
+    fichero.seek(0)
+    crc = 0
+    restantes = hasta
+    while restantes:
+        bloque = fichero.read(min(_TAM_BLOQUE_CRC, restantes))
+        if not bloque:
+            break
+        crc = zlib.crc32(bloque, crc)
+        restantes -= len(bloque)
+    return crc
+
+
+def _comprobar_punto_control(punto: Dict, entrada: Dict, opciones: Dict, salida: Path):
+    """
+    Comprueba que se puede reanudar desde un punto de control.
+
+    Raises:
+        ValueError: Si el corpus, las opciones o la salida no coinciden
+    """
+    guardada = punto["entrada"]
+    if (guardada["tamaño"], guardada["modificado"]) != (entrada["tamaño"], entrada["modificado"]):
+        raise ValueError(
+            f"El corpus ha cambiado desde el punto de control ({guardada['ruta']}); "
+            f"no se puede reanudar"
+        )
+    if punto["opciones"] != opciones:
+        raise ValueError(
+            f"Las opciones no coinciden con las del punto de control: {punto['opciones']}"
+        )
+    if not salida.exists() or salida.stat().st_size < punto["posicion_salida"]:
+        raise ValueError(
+            f"La salida {salida} es más corta que en el punto de control; no se puede reanudar"
+        )
+    with open(salida, "rb") as f:
+        if _crc_fichero(f, punto["posicion_salida"]) != punto["crc_salida"]:
+            raise ValueError(
+                f"La salida {salida} no coincide con el punto de control (CRC32 distinto)"
+            )
+
+
+def reanalizar_corpus(
+    entrada: Union[str, Path],
+    salida: Union[str, Path],
+    reanudar: bool = False,
+    incluir_riesgo: bool = True,
+    campo_texto: str = "texto",
+    ejecutor=None,
+    cada_registros: int = CADA_REGISTROS,
+    cada_segundos: float = CADA_SEGUNDOS,
+    al_avanzar: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Analiza un corpus entero escribiendo puntos de control periódicos.
+
+    Args:
+        entrada: Fichero de corpus (.jsonl o .txt)
+        salida: Fichero de resultados (un JSON por línea)
+        reanudar: Si True y hay punto de control, continúa desde él; si no,
+            empieza desde el principio (y sobrescribe la salida)
+        incluir_riesgo: Si True, incluye análisis de riesgo psico-emocional
+        campo_texto: Campo con el texto en cada línea JSONL
+        ejecutor: concurrent.futures.Executor opcional para resumir los
+            segmentos en paralelo (ej: ProcessPoolExecutor)
+        cada_registros: Documentos entre puntos de control
+        cada_segundos: Segundos máximos entre puntos de control
+        al_avanzar: Función opcional a la que se pasa cada punto de control
+            guardado (ej: para mostrar el progreso)
+
+    Returns:
+        Dict {"registros", "nuevos", "reanudado_desde", "segundos"}:
+        resultados en la salida, analizados en esta ejecución, documentos
+        que ya estaban hechos y duración
+
+    Raises:
+        ValueError: Si al reanudar el corpus, las opciones o la salida no
+            coinciden con el punto de control
+    """
+    entrada = Path(entrada)
+    salida = Path(salida)
+    opciones = {"incluir_riesgo": incluir_riesgo, "campo_texto": campo_texto}
+    descripcion = _descripcion_entrada(entrada)
+
+    punto = leer_punto_control(salida) if reanudar else None
+    if punto is not None:
+        _comprobar_punto_control(punto, descripcion, opciones, salida)
+    else:
+        # Un punto de control anterior ya no corresponde a la nueva salida
+        ruta_punto_control(salida).unlink(missing_ok=True)
+        punto = {
+            "version": VERSION_PUNTO_CONTROL,
+            "entrada": descripcion,
+            "opciones": opciones,
+            "posicion_entrada": 0,
+            "registros": 0,
+            "posicion_salida": 0,
+            "crc_salida": 0,
+            "terminado": False,
+        }
+
+    reanudado_desde = punto["registros"]
+    inicio = time.perf_counter()
+    if punto["terminado"]:
+        return {
+            "registros": punto["registros"],
+            "nuevos": 0,
+            "reanudado_desde": reanudado_desde,
+            "segundos": 0.0,
+        }
+
+    from . import analisis_completo
+
+    # Lo escrito tras el último punto de control se descarta y se rehace
+    with open(salida, "r+b" if punto["posicion_salida"] else "wb") as f:
+        f.truncate(punto["posicion_salida"])
+        f.seek(punto["posicion_salida"])
+
+        def guardar(posicion_entrada: int, terminado: bool = False):
+            f.flush()
+            os.fsync(f.fileno())
+            punto.update(
+                posicion_entrada=posicion_entrada,
+                posicion_salida=f.tell(),
+                terminado=terminado,
+            )
+            _guardar_punto_control(salida, punto)
+            if al_avanzar is not None:
+                al_avanzar(dict(punto))
+
+        ultimo_guardado = time.monotonic()
+        pendientes = 0
+        posicion_entrada = punto["posicion_entrada"]
+        with LectorCorpus(entrada, campo_texto=campo_texto) as lector:
+            for documento, resumen, posicion_entrada in lector.documentos_desde(
+                punto["posicion_entrada"], ejecutor
+            ):
+                resultado = analisis_completo(
+                    documento, incluir_riesgo=incluir_riesgo, resumen=resumen
+                )
+                linea = (json.dumps(
+                    resultado, ensure_ascii=False, default=convertir_para_json
+                ) + "\n").encode("utf-8")
+                f.write(linea)
+                punto["crc_salida"] = zlib.crc32(linea, punto["crc_salida"])
+                punto["registros"] += 1
+                pendientes += 1
+
+                if (pendientes >= cada_registros
+                        or time.monotonic() - ultimo_guardado >= cada_segundos):
+                    guardar(posicion_entrada)
+                    ultimo_guardado = time.monotonic()
+                    pendientes = 0
+
+        guardar(max(posicion_entrada, punto["posicion_entrada"]), terminado=True)
+
+    return {
+        "registros": punto["registros"],
+        "nuevos": punto["registros"] - reanudado_desde,
+        "reanudado_desde": reanudado_desde,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
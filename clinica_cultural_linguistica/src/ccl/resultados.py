@@ -0,0 +1,195 @@
+"""
+resultados.py
+
+Clases de resultado de los módulos de análisis.
+
+Cada módulo devolvía un dict con las mismas claves en cada llamada. Estas
+clases guardan los campos en __slots__, sin un dict por instancia, lo que
+reduce la memoria de los resultados que se mantienen (ej: los de una
+cohorte para un panel). Siguen comportándose como un dict de solo lectura:
+resultado["nivel_probable"], resultado.get(...), "clave" in resultado,
+{**resultado}, y se comparan iguales al dict equivalente. to_dict()
+devuelve el dict de antes, y utils.convertir_para_json permite pasarlos a
+json.dump. analisis_completo() devuelve sus secciones ya convertidas con
+a_dicts(), así que su resultado se pasa a json.dump directamente.
+
+Los campos opcionales que no se asignan no aparecen como claves, igual que
+en los dicts originales (ej: "comparacion_historial" sin historial).
+
+Uso:
+    >>> diagnostico = diagnostico_linguistico_emocional(entrada)
+    >>> diagnostico["nivel_probable"]
+    'B1'
+    >>> diagnostico.to_dict()
+    {'id_sujeto': ..., 'nivel_probable': 'B1', ...}
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, FrozenSet, Iterator
+
+
+class Resultado(Mapping):
+    """
+    Base de los resultados: un Mapping de solo lectura sobre __slots__.
+
+    Las subclases declaran sus campos en __slots__, en el orden de las
+    claves de salida, y los que pueden faltar en _OPCIONALES.
+    """
+
+    __slots__ = ()
+    _OPCIONALES: FrozenSet[str] = frozenset()
+
+    def __init__(self, **campos):
+        """
+        Args:
+            **campos: Valor de cada campo, por nombre de clave
+
+        Raises:
+            TypeError: Si falta un campo obligatorio o sobra alguno
+        """
+        for campo in self.__slots__:
+            if campo in campos:
+                setattr(self, campo, campos.pop(campo))
+            elif campo not in self._OPCIONALES:
+                raise TypeError(f"{type(self).__name__}: falta el campo '{campo}'")
+        if campos:
+            raise TypeError(
+                f"{type(self).__name__}: campos desconocidos: {', '.join(campos)}"
+            )
+
+    def __getitem__(self, clave: str) -> Any:
+        if clave in self.__slots__:
+            try:
+                return getattr(self, clave)
+            except AttributeError:
+                pass
+        raise KeyError(clave)
+
+    def __iter__(self) -> Iterator[str]:
+        for campo in self.__slots__:
+            if hasattr(self, campo):
+                yield campo
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict con las claves y valores del resultado (formato de salida)."""
+        return {campo: getattr(self, campo) for campo in self}
+
+    def reemplazar(self, **cambios) -> 'Resultado':
+        """
+        Copia del resultado con algunos campos cambiados.
+
+        Args:
+            **cambios: Nuevo valor de cada campo a cambiar
+
+        Returns:
+            Nuevo resultado del mismo tipo
+        """
+        return type(self)(**{**self.to_dict(), **cambios})
+
+
+class Diagnostico(Resultado):
+    """Resultado de diagnostico_linguistico_emocional."""
+
+    __slots__ = (
+        'id_sujeto',
+        'nivel_probable',
+        'estado_emocional_dominante',
+        'recursos_discursivos',
+        'errores_clave',
+        'hipotesis_clinica_linguistica',
+        'metricas',
+    )
+
+
+class Radiografia(Resultado):
+    """Resultado de radiografia_cultural."""
+
+    __slots__ = (
+        'id_sujeto',
+        'referentes_origen',
+        'referentes_acogida',
+        'campos_culturales',
+        'tension_dominante',
+        'tensiones_detectadas',
+        'comentarios',
+    )
+
+
+class Bloqueos(Resultado):
+    """Resultado de deteccion_bloqueos_discursivos."""
+
+    __slots__ = (
+        'id_sujeto',
+        'temas_detectados',
+        'posibles_bloqueos',
+        'nivel_riesgo_bloqueo',
+        'comparacion_historial',
+    )
+    _OPCIONALES = frozenset({'comparacion_historial'})
+
+
+class Riesgo(Resultado):
+    """Resultado de riesgo_psico_emocional_basico."""
+
+    __slots__ = (
+        'id_sujeto',
+        'nivel_riesgo',
+        'alertas',
+        'señales_detectadas',
+        'recomendaciones',
+        'aviso_legal',
+    )
+
+
+class Progreso(Resultado):
+    """
+    Resultado de seguimiento_progreso.
+
+    Sin historial solo tiene "numero_sesiones" (0) y "mensaje".
+    """
+
+    __slots__ = (
+        'numero_sesiones',
+        'tendencias',
+        'evolucion_emocional',
+        'evolucion_cultural',
+        'interpretacion_general',
+        'recomendaciones',
+        'mensaje',
+    )
+    _OPCIONALES = frozenset({
+        'tendencias',
+        'evolucion_emocional',
+        'evolucion_cultural',
+        'interpretacion_general',
+        'recomendaciones',
+        'mensaje',
+    })
+
+
+def a_dicts(valor: Any) -> Any:
+    """
+    Convierte los objetos de resultado (Resultado, TareaPrescrita...) de un
+    valor a sus dicts de salida, recursivamente dentro de dicts y listas.
+
+    Args:
+        valor: Resultado, dict, lista o valor JSON
+
+    Returns:
+        El mismo contenido solo con tipos que json.dumps acepta sin default
+    """
+    to_dict = getattr(valor, 'to_dict', None)
+    if to_dict is not None:
+        valor = to_dict()
+    if isinstance(valor, dict):
+        return {clave: a_dicts(elemento) for clave, elemento in valor.items()}
+    if isinstance(valor, list):
+        return [a_dicts(elemento) for elemento in valor]
+    return valor
+
@@ -0,0 +1,602 @@
+"""
+resumen_texto.py
+
+Resúmenes combinables de las características de un texto.
+
+Un ResumenTexto guarda todo lo que los módulos de análisis necesitan de un
+texto (número de tokens, conjunto de tipos, conteos por léxico, verbos en
+pasado, estadísticas de frases, expresiones presentes...) sin guardar el
+texto en sí. Los resúmenes de segmentos consecutivos se combinan de forma
+asociativa, de modo que un texto muy largo (por ejemplo, la transcripción de
+una entrevista de varias horas) puede resumirse por trozos en memoria acotada
+o repartirse entre varios procesos, con el mismo resultado que el análisis
+en una sola pasada.
+
+Los segmentos deben ser trozos consecutivos del texto ya limpio
+(ver limpiar_texto) cortados por un espacio, para no partir palabras;
+segmentos_limpios() los obtiene a partir de trozos arbitrarios de texto.
+(Única salvedad: con 'İ', cuya minúscula tiene dos caracteres, el contexto
+de las palabras emocionales puede diferir del análisis en una pasada.)
+
+Uso:
+    >>> resumen = resumir_trozos(open("entrevista.txt", encoding="utf-8"))
+    >>> diagnostico_desde_resumen({"id_sujeto": "p1"}, resumen)
+"""
+
+import re
+from collections import Counter, deque
+from collections.abc import Mapping
+from functools import reduce
+from typing import Dict, Iterable, Iterator, List, Set
+
+from .utils import (
+    PRONOMBRES_PRIMERA_PERSONA,
+    CONECTORES,
+    PALABRAS_EMOCIONALES,
+    TEMAS_PALABRAS_CLAVE,
+    es_verbo_pasado,
+    limpiar_texto,
+    tokenizar,
+)
+from .diagnostico_linguistico_emocional import MARCAS_DIALOGO
+from .radiografia_cultural import (
+    REFERENTES_CULTURALES,
+    CAMPOS_CULTURALES,
+    INDICADORES_TENSION,
+)
+from .deteccion_bloqueos_discursivos import (
+    PALABRAS_EMOCIONALES_IMPORTANTES,
+    GENERALIZACIONES,
+    RADIO_CONTEXTO_EMOCIONAL,
+)
+from .riesgo_psico_emocional import CATEGORIAS_SEÑALES
+
+
+# =============================================================================
+# LÉXICOS QUE SE RESUMEN
+# =============================================================================
+
+def _palabras(*lexicos) -> Set[str]:
+    """Une varios léxicos (sets o dicts de sets) en un único set."""
+    union = set()
+    for lexico in lexicos:
+        if isinstance(lexico, Mapping):
+            for palabras in lexico.values():
+                union.update(palabras)
+        else:
+            union.update(lexico)
+    return union
+
+
+# Palabras sueltas cuyas apariciones se cuentan token a token
+VOCABULARIO_LEXICO = frozenset(
+    palabra for palabra in _palabras(
+        PRONOMBRES_PRIMERA_PERSONA,
+        CONECTORES,
+        PALABRAS_EMOCIONALES,
+        TEMAS_PALABRAS_CLAVE,
+        CAMPOS_CULTURALES,
+        INDICADORES_TENSION,
+    )
+    if ' ' not in palabra
+)
+
+# Expresiones cuya presencia se busca como subcadena del texto en minúsculas
+EXPRESIONES_BUSCADAS = frozenset(
+    _palabras(
+        *REFERENTES_CULTURALES.values(),
+        GENERALIZACIONES,
+        CATEGORIAS_SEÑALES,
+    )
+    | {
+        palabra
+        for palabra in _palabras(CAMPOS_CULTURALES, INDICADORES_TENSION)
+        if ' ' in palabra
+    }
+)
+
+# Caracteres cuya presencia se registra (texto original, sin pasar a minúsculas)
+CARACTERES_BUSCADOS = frozenset(MARCAS_DIALOGO)
+
+# Caracteres que se conservan de cada extremo de un segmento. Deben bastar
+# para el contexto de las palabras emocionales y para la expresión más larga.
+LONGITUD_BORDE = max(
+    2 * RADIO_CONTEXTO_EMOCIONAL,
+    max(len(expresion) for expresion in EXPRESIONES_BUSCADAS),
+)
+
+# Tamaño aproximado (en caracteres) de los segmentos de segmentos_limpios()
+TAM_SEGMENTO = 1 << 20
+
+_PATRON_TOKEN = re.compile(r'\w+')
+_PATRON_FRASE = re.compile(r'[.!?]')
+_PATRON_ESPACIOS = re.compile(r'\s+')
+
+
+# =============================================================================
+# RESUMEN DE UN TEXTO
+# =============================================================================
+
+class ResumenTexto:
+    """
+    Resumen combinable de un segmento de texto limpio.
+
+    Las consultas (contar_palabras(), detectar_emociones(), numero_frases...)
+    tratan el segmento resumido como un documento completo y devuelven lo
+    mismo que las funciones equivalentes de utils.py sobre ese texto.
+    """
+
+    __slots__ = (
+        'longitud', 'cabeza', 'cola',
+        'numero_tokens', 'tipos', 'conteos', 'numero_pasado',
+        'expresiones', 'caracteres', 'sin_desarrollo',
+        'con_delimitador', 'frase_inicio', 'frase_fin',
+        'frases', 'frases_cortas',
+    )
+
+    def __init__(self):
+        self.longitud = 0
+        self.cabeza = ''
+        self.cola = ''
+        self.numero_tokens = 0
+        self.tipos = set()
+        self.conteos = Counter()
+        self.numero_pasado = 0
+        self.expresiones = set()
+        self.caracteres = set()
+        self.sin_desarrollo = set()
+        # Frases: fragmentos abiertos en los extremos como (tokens, no_vacía)
+        self.con_delimitador = False
+        self.frase_inicio = (0, False)
+        self.frase_fin = (0, False)
+        # Frases completas (entre dos delimitadores) del interior del segmento
+        self.frases = 0
+        self.frases_cortas = 0
+
+    def __repr__(self):
+        return (
+            f"ResumenTexto(longitud={self.longitud}, tokens={self.numero_tokens}, "
+            f"tipos={len(self.tipos)})"
+        )
+
+    def copiar(self) -> 'ResumenTexto':
+        """Devuelve una copia independiente del resumen."""
+        copia = ResumenTexto()
+        for campo in self.__slots__:
+            valor = getattr(self, campo)
+            if isinstance(valor, (set, Counter)):
+                valor = valor.copy()
+            setattr(copia, campo, valor)
+        return copia
+
+    # -------------------------------------------------------------------------
+    # Combinación
+    # -------------------------------------------------------------------------
+
+    def combinar(self, otro: 'ResumenTexto') -> 'ResumenTexto':
+        """
+        Devuelve el resumen del texto de este segmento seguido del de `otro`.
+
+        La operación es asociativa y el resumen vacío es su elemento neutro.
+        """
+        combinado = self.copiar()
+        combinado.extender(otro)
+        return combinado
+
+    def extender(self, otro: 'ResumenTexto') -> 'ResumenTexto':
+        """Como combinar(), pero modificando este resumen en el sitio."""
+        if otro.longitud == 0:
+            return self
+        if self.longitud == 0:
+            for campo in self.__slots__:
+                valor = getattr(otro, campo)
+                if isinstance(valor, (set, Counter)):
+                    valor = valor.copy()
+                setattr(self, campo, valor)
+            return self
+
+        # Zona de unión: lo único que hay que volver a mirar del texto
+        union = self.cola + otro.cabeza
+        union_lower = union.lower()
+        desplazamiento = self.longitud - len(self.cola)
+        longitud_total = self.longitud + otro.longitud
+
+        # Expresiones que cruzan el corte
+        for expresion in EXPRESIONES_BUSCADAS:
+            if expresion not in self.expresiones and expresion not in otro.expresiones:
+                if expresion in union_lower:
+                    self.expresiones.add(expresion)
+        self.expresiones |= otro.expresiones
+        self.caracteres |= otro.caracteres
+
+        # Palabras emocionales cuyo contexto cruza el corte
+        radio = RADIO_CONTEXTO_EMOCIONAL
+        for palabra in PALABRAS_EMOCIONALES_IMPORTANTES:
+            if palabra in self.sin_desarrollo or palabra in otro.sin_desarrollo:
+                continue
+            for m in re.finditer(palabra, union_lower):
+                pos = m.start()
+                completo = (
+                    pos >= radio and pos + radio <= len(union)
+                    and desplazamiento + pos + radio <= longitud_total
+                )
+                if completo and _contexto_breve(union[pos - radio:pos + radio]):
+                    self.sin_desarrollo.add(palabra)
+                    break
+        self.sin_desarrollo |= otro.sin_desarrollo
+
+        # Tokens y léxicos
+        self.numero_tokens += otro.numero_tokens
+        self.tipos |= otro.tipos
+        self.conteos.update(otro.conteos)
+        self.numero_pasado += otro.numero_pasado
+
+        # Frases: el fragmento abierto final se une al abierto inicial del otro
+        if not self.con_delimitador:
+            self.frase_inicio = _unir_fragmentos(self.frase_inicio, otro.frase_inicio)
+            self.frase_fin = otro.frase_fin if otro.con_delimitador else self.frase_inicio
+        elif not otro.con_delimitador:
+            self.frase_fin = _unir_fragmentos(self.frase_fin, otro.frase_inicio)
+        else:
+            tokens, no_vacia = _unir_fragmentos(self.frase_fin, otro.frase_inicio)
+            if no_vacia:
+                self.frases += 1
+                if tokens < 5:
+                    self.frases_cortas += 1
+            self.frase_fin = otro.frase_fin
+        self.frases += otro.frases
+        self.frases_cortas += otro.frases_cortas
+        self.con_delimitador = self.con_delimitador or otro.con_delimitador
+
+        # Bordes
+        if self.longitud < LONGITUD_BORDE:
+            self.cabeza = (self.cabeza + otro.cabeza)[:LONGITUD_BORDE]
+        if otro.longitud < LONGITUD_BORDE:
+            self.cola = (self.cola + otro.cola)[-LONGITUD_BORDE:]
+        else:
+            self.cola = otro.cola
+        self.longitud = longitud_total
+
+        return self
+
+    # -------------------------------------------------------------------------
+    # Consultas (el segmento se trata como documento completo)
+    # -------------------------------------------------------------------------
+
+    def contar_palabras(self) -> int:
+        """Equivalente a utils.contar_palabras()."""
+        return self.numero_tokens
+
+    def calcular_variedad_lexica(self) -> float:
+        """Equivalente a utils.calcular_variedad_lexica()."""
+        if self.numero_tokens == 0:
+            return 0.0
+        return len(self.tipos) / self.numero_tokens
+
+    def contar_pronombres_primera_persona(self) -> Dict[str, float]:
+        """Equivalente a utils.contar_pronombres_primera_persona()."""
+        return self._conteo_y_porcentaje(self.contar(PRONOMBRES_PRIMERA_PERSONA))
+
+    def detectar_verbos_pasado(self) -> Dict[str, float]:
+        """Equivalente a utils.detectar_verbos_pasado()."""
+        return self._conteo_y_porcentaje(self.numero_pasado)
+
+    def contar_conectores(self) -> Dict[str, float]:
+        """Equivalente a utils.contar_conectores()."""
+        return self._conteo_y_porcentaje(self.contar(CONECTORES))
+
+    def detectar_emociones(self) -> Dict[str, int]:
+        """Equivalente a utils.detectar_emociones()."""
+        return {
+            emocion: self.contar(palabras)
+            for emocion, palabras in PALABRAS_EMOCIONALES.items()
+        }
+
+    def detectar_temas(self) -> Dict[str, int]:
+        """Equivalente a utils.detectar_temas()."""
+        return {
+            tema: self.contar(palabras)
+            for tema, palabras in TEMAS_PALABRAS_CLAVE.items()
+        }
+
+    def conteo_token(self, token: str) -> int:
+        """
+        Número de apariciones de un token del vocabulario resumido.
+
+        Raises:
+            ValueError: Si el token no está en VOCABULARIO_LEXICO
+        """
+        if token not in VOCABULARIO_LEXICO:
+            raise ValueError(f"'{token}' no forma parte del vocabulario resumido")
+        return self.conteos[token]
+
+    def contar(self, lexico: Iterable[str]) -> int:
+        """Suma de apariciones (como tokens) de las palabras de un léxico."""
+        return sum(self.conteos[palabra] for palabra in lexico)
+
+    def contiene(self, expresion: str) -> bool:
+        """
+        Indica si la expresión aparece en el texto en minúsculas.
+
+        Raises:
+            ValueError: Si la expresión no está en EXPRESIONES_BUSCADAS
+        """
+        if expresion not in EXPRESIONES_BUSCADAS:
+            raise ValueError(f"'{expresion}' no forma parte de las expresiones resumidas")
+        return expresion in self.expresiones
+
+    def contiene_caracter(self, caracter: str) -> bool:
+        """
+        Indica si el carácter aparece en el texto.
+
+        Raises:
+            ValueError: Si el carácter no está en CARACTERES_BUSCADOS
+        """
+        if caracter not in CARACTERES_BUSCADOS:
+            raise ValueError(f"'{caracter}' no forma parte de los caracteres resumidos")
+        return caracter in self.caracteres
+
+    @property
+    def numero_frases(self) -> int:
+        """Número de frases no vacías (separadas por . ! ?)."""
+        return self.frases + sum(
+            1 for _, no_vacia in self._fragmentos_extremos() if no_vacia
+        )
+
+    @property
+    def numero_frases_cortas(self) -> int:
+        """Número de frases no vacías con menos de 5 palabras."""
+        return self.frases_cortas + sum(
+            1 for tokens, no_vacia in self._fragmentos_extremos()
+            if no_vacia and tokens < 5
+        )
+
+    def palabras_emocionales_sin_desarrollo(self) -> List[str]:
+        """
+        Palabras de PALABRAS_EMOCIONALES_IMPORTANTES con alguna aparición
+        de contexto breve, en el orden de esa lista.
+        """
+        radio = RADIO_CONTEXTO_EMOCIONAL
+        encontradas = set(self.sin_desarrollo)
+        desplazamiento_cola = self.longitud - len(self.cola)
+        cabeza_lower = self.cabeza.lower()
+        cola_lower = self.cola.lower()
+
+        for palabra in PALABRAS_EMOCIONALES_IMPORTANTES:
+            if palabra in encontradas:
+                continue
+
+            # Apariciones cerca del inicio: el contexto se recorta por la izquierda
+            for m in re.finditer(palabra, cabeza_lower):
+                pos = m.start()
+                if pos < radio:
+                    fin = min(self.longitud, pos + radio)
+                    if _contexto_breve(self.cabeza[:fin]):
+                        encontradas.add(palabra)
+                        break
+            if palabra in encontradas:
+                continue
+
+            # Apariciones cerca del final: el contexto se recorta por la derecha
+            for m in re.finditer(palabra, cola_lower):
+                pos = m.start()
+                posicion_global = desplazamiento_cola + pos
+                if posicion_global >= radio and posicion_global + radio > self.longitud:
+                    if _contexto_breve(self.cola[pos - radio:]):
+                        encontradas.add(palabra)
+                        break
+
+        return [p for p in PALABRAS_EMOCIONALES_IMPORTANTES if p in encontradas]
+
+    def _conteo_y_porcentaje(self, conteo: int) -> Dict[str, float]:
+        if self.numero_tokens == 0:
+            return {'conteo': 0, 'porcentaje': 0.0}
+        porcentaje = (conteo / self.numero_tokens) * 100
+        return {
+            'conteo': conteo,
+            'porcentaje': round(porcentaje, 2)
+        }
+
+    def _fragmentos_extremos(self):
+        if self.con_delimitador:
+            return (self.frase_inicio, self.frase_fin)
+        return (self.frase_inicio,)
+
+
+def _unir_fragmentos(a, b):
+    """Une dos trozos de una misma frase: suma tokens y combina si hay texto."""
+    return (a[0] + b[0], a[1] or b[1])
+
+
+def _contexto_breve(contexto: str) -> bool:
+    """Criterio de detectar_patrones_evitacion(): menos de 10 palabras."""
+    return len(tokenizar(contexto)) < 10
+
+
+# =============================================================================
+# CONSTRUCCIÓN DE RESÚMENES
+# =============================================================================
+
+def resumir_segmento(segmento: str) -> ResumenTexto:
+    """
+    Resume un segmento de texto limpio.
+
+    Args:
+        segmento: Trozo del texto ya limpio, cortado por un espacio
+
+    Returns:
+        ResumenTexto del segmento
+    """
+    resumen = ResumenTexto()
+    if not segmento:
+        return resumen
+
+    resumen.longitud = len(segmento)
+    resumen.cabeza = segmento[:LONGITUD_BORDE]
+    resumen.cola = segmento[-LONGITUD_BORDE:]
+
+    # Tokens, léxicos y frases, fragmento a fragmento. Se pasa a minúsculas
+    # el segmento entero (y no cada fragmento) porque str.lower() depende
+    # del contexto en algunos casos (sigma final griega).
+    segmento_lower = segmento.lower()
+    fragmentos = _PATRON_FRASE.split(segmento_lower)
+    ultimo = len(fragmentos) - 1
+    tipos = resumen.tipos
+    conteos = resumen.conteos
+
+    for i, fragmento in enumerate(fragmentos):
+        tokens = _PATRON_TOKEN.findall(fragmento)
+        resumen.numero_tokens += len(tokens)
+        tipos.update(tokens)
+        for token in tokens:
+            if token in VOCABULARIO_LEXICO:
+                conteos[token] += 1
+            if es_verbo_pasado(token):
+                resumen.numero_pasado += 1
+
+        estado = (len(tokens), bool(fragmento.strip()))
+        if i == 0:
+            resumen.frase_inicio = estado
+        if i == ultimo:
+            resumen.frase_fin = estado
+        if 0 < i < ultimo and estado[1]:
+            resumen.frases += 1
+            if estado[0] < 5:
+                resumen.frases_cortas += 1
+
+    resumen.con_delimitador = ultimo > 0
+
+    # Expresiones y caracteres presentes
+    resumen.expresiones = {e for e in EXPRESIONES_BUSCADAS if e in segmento_lower}
+    resumen.caracteres = {c for c in CARACTERES_BUSCADOS if c in segmento}
+
+    # Palabras emocionales cuyo contexto completo cae dentro del segmento
+    radio = RADIO_CONTEXTO_EMOCIONAL
+    for palabra in PALABRAS_EMOCIONALES_IMPORTANTES:
+        for m in re.finditer(palabra, segmento_lower):
+            pos = m.start()
+            if pos >= radio and pos + radio <= len(segmento):
+                if _contexto_breve(segmento[pos - radio:pos + radio]):
+                    resumen.sin_desarrollo.add(palabra)
+                    break
+
+    return resumen
+
+
+def segmentos_limpios(
+    trozos: Iterable[str],
+    tam_segmento: int = TAM_SEGMENTO
+) -> Iterator[str]:
+    """
+    Limpia un flujo de trozos de texto y lo reparte en segmentos resumibles.
+
+    La concatenación de los segmentos es igual a limpiar_texto() del texto
+    completo, y cada corte cae justo antes de un espacio. La memoria usada
+    está acotada por tam_segmento más el trozo de entrada más largo.
+
+    Args:
+        trozos: Iterable de trozos de texto (ej: un fichero abierto en modo texto)
+        tam_segmento: Tamaño aproximado de cada segmento en caracteres
+
+    Yields:
+        Segmentos de texto limpio
+    """
+    pendiente = []
+    longitud_pendiente = 0
+    espacio = False
+    inicio = True
+    # Partes de pendiente en las que ya se buscó un corte: no se vuelven a
+    # recorrer con cada trozo (ej: en un texto sin espacios)
+    revisadas = 0
+
+    for trozo in trozos:
+        for i, parte in enumerate(_PATRON_ESPACIOS.split(trozo)):
+            if i > 0:
+                espacio = True
+            if parte:
+                if espacio and not inicio:
+                    pendiente.append(' ')
+                    longitud_pendiente += 1
+                pendiente.append(parte)
+                longitud_pendiente += len(parte)
+                espacio = False
+                inicio = False
+
+        if longitud_pendiente >= tam_segmento:
+            # Los espacios son partes sueltas; el primero de pendiente es el
+            # del corte anterior
+            for corte in range(len(pendiente) - 1, max(revisadas, 1) - 1, -1):
+                if pendiente[corte] == ' ':
+                    segmento = ''.join(pendiente[:corte])
+                    yield segmento
+                    pendiente = pendiente[corte:]
+                    longitud_pendiente -= len(segmento)
+                    break
+            revisadas = len(pendiente)
+
+    if longitud_pendiente:
+        yield ''.join(pendiente)
+
+
+def resumir_texto(texto: str) -> ResumenTexto:
+    """
+    Resume un texto completo en una sola pasada.
+
+    Args:
+        texto: Texto a resumir (se limpia con limpiar_texto)
+
+    Returns:
+        ResumenTexto del texto
+    """
+    return resumir_segmento(limpiar_texto(texto))
+
+
+def resumir_trozos(
+    trozos: Iterable[str],
+    tam_segmento: int = TAM_SEGMENTO,
+    ejecutor=None,
+    max_en_vuelo: int = 8
+) -> ResumenTexto:
+    """
+    Resume un texto que llega por trozos, en memoria acotada.
+
+    Args:
+        trozos: Iterable de trozos de texto (ej: un fichero abierto en modo texto)
+        tam_segmento: Tamaño aproximado de cada segmento en caracteres
+        ejecutor: concurrent.futures.Executor opcional para resumir los
+            segmentos en paralelo (ej: ProcessPoolExecutor)
+        max_en_vuelo: Máximo de segmentos enviados al ejecutor sin recoger
+
+    Returns:
+        ResumenTexto del texto completo (igual que resumir_texto)
+    """
+    resumen = ResumenTexto()
+    segmentos = segmentos_limpios(trozos, tam_segmento)
+
+    if ejecutor is None:
+        for segmento in segmentos:
+            resumen.extender(resumir_segmento(segmento))
+        return resumen
+
+    pendientes = deque()
+    for segmento in segmentos:
+        pendientes.append(ejecutor.submit(resumir_segmento, segmento))
+        if len(pendientes) >= max_en_vuelo:
+            resumen.extender(pendientes.popleft().result())
+    while pendientes:
+        resumen.extender(pendientes.popleft().result())
+
+    return resumen
+
+
+def combinar_resumenes(resumenes: Iterable[ResumenTexto]) -> ResumenTexto:
+    """
+    Combina, en orden, los resúmenes de segmentos consecutivos.
+
+    Args:
+        resumenes: Resúmenes de segmentos consecutivos del mismo texto
+
+    Returns:
+        ResumenTexto del texto completo
+    """
+    return reduce(ResumenTexto.extender, resumenes, ResumenTexto())
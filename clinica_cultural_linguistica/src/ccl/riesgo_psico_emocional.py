@@ -13,8 +13,10 @@ Detecta:
 - Síntomas de trastornos graves
 """
 
+from types import MappingProxyType
 from typing import Dict, List
 import re
+from .resultados import Riesgo
 from .utils import tokenizar, limpiar_texto, validar_entrada
 
 
@@ -22,44 +24,55 @@ from .utils import tokenizar, limpiar_texto, validar_entrada
 # LISTAS DE SEÑALES DE ALERTA
 # =============================================================================
 
-SEÑALES_AUTODAÑO_SUICIDIO = {
+SEÑALES_AUTODAÑO_SUICIDIO = frozenset({
     'suicidarme', 'suicidio', 'quitarme la vida', 'acabar con todo',
     'no quiero vivir', 'mejor muerto', 'mejor muerta', 'matarme',
     'desaparecer para siempre', 'cortarme', 'hacerme daño',
     'terminar con mi vida', 'dejar de existir'
-}
+})
 
-SEÑALES_DESESPERANZA = {
+SEÑALES_DESESPERANZA = frozenset({
     'sin esperanza', 'no hay salida', 'todo está perdido',
     'nunca mejorará', 'no tiene sentido', 'inútil', 'fracaso total',
     'sin futuro', 'no hay solución', 'imposible', 'condenado',
     'condenada', 'atrapado', 'atrapada', 'sin escape'
-}
+})
 
-SEÑALES_TRAUMA = {
+SEÑALES_TRAUMA = frozenset({
     'abuso', 'violación', 'maltrato', 'golpes', 'tortura',
     'trauma', 'pesadillas', 'flashback', 'revivo', 'atacado',
     'atacada', 'violencia sexual', 'agresión'
-}
+})
 
-SEÑALES_DISOCIACION = {
+SEÑALES_DISOCIACION = frozenset({
     'no soy yo', 'fuera de mi cuerpo', 'como si no fuera real',
     'no siento nada', 'vacío total', 'como un robot',
     'despersonalización', 'irreal', 'desconectado', 'desconectada'
-}
+})
 
-SEÑALES_PARANOIA_PSICOSIS = {
+SEÑALES_PARANOIA_PSICOSIS = frozenset({
     'me persiguen', 'conspiran contra mí', 'me vigilan',
     'voces en mi cabeza', 'escucho voces', 'me hablan',
     'controlado por', 'controlada por', 'implantaron',
     'leen mis pensamientos', 'me espían'
-}
+})
 
-SEÑALES_CONSUMO_SUSTANCIAS = {
+SEÑALES_CONSUMO_SUSTANCIAS = frozenset({
     'drogas', 'cocaína', 'heroína', 'adicto', 'adicta',
     'dependencia', 'alcoholismo', 'beber todos los días',
     'necesito drogas', 'síndrome de abstinencia'
-}
+})
+
+
+# Categorías de señales, en el orden en que se evalúan
+CATEGORIAS_SEÑALES = MappingProxyType({
+    'autodaño_suicidio': SEÑALES_AUTODAÑO_SUICIDIO,
+    'desesperanza': SEÑALES_DESESPERANZA,
+    'trauma': SEÑALES_TRAUMA,
+    'disociacion': SEÑALES_DISOCIACION,
+    'paranoia_psicosis': SEÑALES_PARANOIA_PSICOSIS,
+    'consumo_sustancias': SEÑALES_CONSUMO_SUSTANCIAS,
+})
 
 
 # =============================================================================
@@ -253,7 +266,7 @@ def generar_recomendaciones_riesgo(nivel_riesgo: str, alertas: List[str]) -> Lis
     return recomendaciones
 
 
-def riesgo_psico_emocional_basico(entrada: Dict) -> Dict:
+def riesgo_psico_emocional_basico(entrada: Dict) -> Riesgo:
     """
     Evalúa el nivel de riesgo psico-emocional básico del texto.
 
@@ -270,7 +283,7 @@ def riesgo_psico_emocional_basico(entrada: Dict) -> Dict:
             }
 
     Returns:
-        Dict con la evaluación de riesgo:
+        Riesgo (se lee como un dict) con la evaluación de riesgo:
             {
                 "id_sujeto": str,
                 "nivel_riesgo": str ("bajo", "moderado", "alto", "crítico"),
@@ -288,13 +301,58 @@ def riesgo_psico_emocional_basico(entrada: Dict) -> Dict:
     texto = limpiar_texto(entrada['texto'])
 
     # Detectar señales de cada categoría
-    señales_autodaño = detectar_señales_categoria(texto, SEÑALES_AUTODAÑO_SUICIDIO)
-    señales_desesperanza = detectar_señales_categoria(texto, SEÑALES_DESESPERANZA)
-    señales_trauma = detectar_señales_categoria(texto, SEÑALES_TRAUMA)
-    señales_disociacion = detectar_señales_categoria(texto, SEÑALES_DISOCIACION)
-    señales_paranoia = detectar_señales_categoria(texto, SEÑALES_PARANOIA_PSICOSIS)
-    señales_sustancias = detectar_señales_categoria(texto, SEÑALES_CONSUMO_SUSTANCIAS)
+    señales = [
+        detectar_señales_categoria(texto, categoria)
+        for categoria in CATEGORIAS_SEÑALES.values()
+    ]
+
+    return construir_evaluacion_riesgo(entrada, *señales)
+
+
+def riesgo_desde_resumen(entrada: Dict, resumen) -> Riesgo:
+    """
+    Evalúa el riesgo psico-emocional a partir de un ResumenTexto.
+
+    Produce el mismo resultado que riesgo_psico_emocional_basico() sobre el
+    texto resumido; útil para textos muy largos procesados por trozos.
 
+    Args:
+        entrada: Dict con al menos "id_sujeto" (no necesita "texto")
+        resumen: ResumenTexto del texto (ver resumen_texto.py)
+
+    Returns:
+        Riesgo con la evaluación de riesgo (mismo formato que riesgo_psico_emocional_basico)
+    """
+    if 'id_sujeto' not in entrada:
+        raise ValueError("La entrada debe contener al menos 'id_sujeto'")
+
+    señales = [
+        [señal for señal in categoria if resumen.contiene(señal)]
+        for categoria in CATEGORIAS_SEÑALES.values()
+    ]
+
+    return construir_evaluacion_riesgo(entrada, *señales)
+
+
+def construir_evaluacion_riesgo(
+    entrada: Dict,
+    señales_autodaño: List[str],
+    señales_desesperanza: List[str],
+    señales_trauma: List[str],
+    señales_disociacion: List[str],
+    señales_paranoia: List[str],
+    señales_sustancias: List[str]
+) -> Riesgo:
+    """
+    Calcula nivel, alertas y recomendaciones a partir de las señales detectadas.
+
+    Args:
+        entrada: Entrada original del sujeto
+        (resto: señales de cada categoría, como en calcular_nivel_riesgo)
+
+    Returns:
+        Riesgo con la evaluación de riesgo
+    """
     # Calcular nivel de riesgo
     nivel_riesgo = calcular_nivel_riesgo(
         señales_autodaño,
@@ -334,17 +392,17 @@ def riesgo_psico_emocional_basico(entrada: Dict) -> Dict:
         señales_detectadas['consumo_sustancias'] = señales_sustancias
 
     # Construir resultado
-    resultado = {
-        "id_sujeto": entrada['id_sujeto'],
-        "nivel_riesgo": nivel_riesgo,
-        "alertas": alertas,
-        "señales_detectadas": señales_detectadas,
-        "recomendaciones": recomendaciones,
-        "aviso_legal": (
+    resultado = Riesgo(
+        id_sujeto=entrada['id_sujeto'],
+        nivel_riesgo=nivel_riesgo,
+        alertas=alertas,
+        señales_detectadas=señales_detectadas,
+        recomendaciones=recomendaciones,
+        aviso_legal=(
             "Esta evaluación es orientativa y NO sustituye un diagnóstico clínico profesional. "
             "Ante cualquier señal de riesgo, derivar a servicios de salud mental especializados."
         )
-    }
+    )
 
     return resultado
 
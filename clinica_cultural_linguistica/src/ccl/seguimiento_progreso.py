@@ -8,11 +8,17 @@ Analiza:
 - Evolución de patrones emocionales y culturales
 - Tendencias positivas o negativas
 - Recomendaciones basadas en la evolución
+- Vigilancia en línea (EWMA y CUSUM) para detectar deterioros bruscos en
+  cuanto llega una sesión, sin recorrer el historial
 """
 
-from typing import Dict, List
+import math
+from types import MappingProxyType
+from typing import Dict, List, Optional
 from statistics import mean
 
+from .resultados import Progreso
+
 
 # =============================================================================
 # FUNCIONES DE ANÁLISIS TEMPORAL
@@ -263,7 +269,7 @@ def generar_recomendaciones_progreso(tendencias: Dict, interpretacion: List[str]
     return recomendaciones
 
 
-def seguimiento_progreso(historial_analisis: List[Dict]) -> Dict:
+def seguimiento_progreso(historial_analisis: List[Dict]) -> Progreso:
     """
     Realiza un seguimiento del progreso a partir del historial de análisis.
 
@@ -275,7 +281,7 @@ def seguimiento_progreso(historial_analisis: List[Dict]) -> Dict:
                            de un análisis (diagnóstico, radiografía, etc.)
 
     Returns:
-        Dict con el seguimiento:
+        Progreso (se lee como un dict) con el seguimiento:
             {
                 "numero_sesiones": int,
                 "tendencias": Dict con tendencias de métricas clave,
@@ -286,10 +292,10 @@ def seguimiento_progreso(historial_analisis: List[Dict]) -> Dict:
             }
     """
     if not historial_analisis or len(historial_analisis) == 0:
-        return {
-            "numero_sesiones": 0,
-            "mensaje": "No hay historial suficiente para hacer seguimiento."
-        }
+        return Progreso(
+            numero_sesiones=0,
+            mensaje="No hay historial suficiente para hacer seguimiento."
+        )
 
     numero_sesiones = len(historial_analisis)
 
@@ -362,18 +368,286 @@ def seguimiento_progreso(historial_analisis: List[Dict]) -> Dict:
     recomendaciones = generar_recomendaciones_progreso(tendencias, interpretacion_general)
 
     # Construir resultado
-    resultado = {
-        "numero_sesiones": numero_sesiones,
-        "tendencias": tendencias,
-        "evolucion_emocional": evolucion_emocional,
-        "evolucion_cultural": evolucion_cultural,
-        "interpretacion_general": interpretacion_general,
-        "recomendaciones": recomendaciones
-    }
+    resultado = Progreso(
+        numero_sesiones=numero_sesiones,
+        tendencias=tendencias,
+        evolucion_emocional=evolucion_emocional,
+        evolucion_cultural=evolucion_cultural,
+        interpretacion_general=interpretacion_general,
+        recomendaciones=recomendaciones
+    )
 
     return resultado
 
 
+# =============================================================================
+# VIGILANCIA EN LÍNEA (EWMA Y CUSUM)
+# =============================================================================
+
+# Series vigiladas: nombre -> (sección del análisis, clave, dirección que
+# indica deterioro, desviación mínima). La dirección es "baja", "sube" o
+# "ambas"; la desviación mínima evita que una serie casi constante dispare
+# alertas por cambios pequeños.
+SERIES_VIGILADAS = MappingProxyType({
+    'longitud_texto': ('metricas', 'longitud_texto', 'baja', 10.0),
+    'variedad_lexica': ('metricas', 'variedad_lexica', 'baja', 0.05),
+    'porcentaje_pronombres_primera_persona': (
+        'metricas', 'porcentaje_pronombres_primera_persona', 'ambas', 1.0
+    ),
+    'porcentaje_verbos_pasado': ('metricas', 'porcentaje_verbos_pasado', 'ambas', 1.0),
+    'porcentaje_conectores': ('metricas', 'porcentaje_conectores', 'baja', 0.5),
+    'emocion_alegría': ('emociones', 'alegría', 'baja', 1.0),
+    'emocion_tristeza': ('emociones', 'tristeza', 'sube', 1.0),
+    'emocion_miedo': ('emociones', 'miedo', 'sube', 1.0),
+    'emocion_rabia': ('emociones', 'rabia', 'sube', 1.0),
+    'nivel_riesgo': ('riesgo', 'nivel_riesgo', 'sube', 0.25),
+})
+
+# Nivel de riesgo como número, para poder vigilarlo como una serie
+NIVELES_RIESGO = MappingProxyType({"bajo": 0, "moderado": 1, "alto": 2, "crítico": 3})
+
+# Parámetros por defecto de los detectores
+PARAMETROS_VIGILANCIA = MappingProxyType({
+    # Sesiones que se usan solo para estimar la referencia, sin alertas
+    "calentamiento": 3,
+    # Peso de la sesión nueva en la referencia (media y varianza móviles)
+    "alfa_referencia": 0.1,
+    # EWMA: peso de la sesión nueva y anchura del límite en desviaciones
+    "lambda_ewma": 0.3,
+    "limite_ewma": 3.0,
+    # CUSUM: holgura y umbral, en desviaciones
+    "holgura_cusum": 0.5,
+    "umbral_cusum": 4.0,
+})
+
+
+def _valores_vigilados(analisis: Dict) -> Dict[str, float]:
+    """
+    Extrae de un análisis los valores de las series vigiladas.
+
+    Acepta tanto el resultado de analisis_completo como las entradas del
+    historial de seguimiento_progreso (con "metricas" en el primer nivel).
+    """
+    diagnostico = analisis.get('diagnostico_linguistico_emocional', analisis)
+    metricas = diagnostico.get('metricas') or {}
+    riesgo = analisis.get('riesgo_psico_emocional', analisis)
+
+    secciones = {
+        'metricas': metricas,
+        'emociones': metricas.get('emociones_detectadas') or {},
+        'riesgo': {'nivel_riesgo': NIVELES_RIESGO.get(riesgo.get('nivel_riesgo'))},
+    }
+
+    valores = {}
+    for nombre, (seccion, clave, _, _) in SERIES_VIGILADAS.items():
+        valor = secciones[seccion].get(clave)
+        if isinstance(valor, (int, float)):
+            valores[nombre] = float(valor)
+    return valores
+
+
+def crear_vigilancia(**parametros) -> Dict:
+    """
+    Crea el estado de vigilancia vacío de un sujeto.
+
+    Para cada serie (métricas, emociones y nivel de riesgo, ver
+    SERIES_VIGILADAS) se guarda una referencia móvil (media y varianza con
+    peso exponencial) y el estado de dos detectores sobre la desviación
+    estandarizada de cada sesión respecto a esa referencia:
+    - EWMA: media móvil de las desviaciones; reacciona a cambios bruscos
+    - CUSUM: suma acumulada de las desviaciones; reacciona a derivas lentas
+
+    Como el agregado de temas, es un dict serializable a JSON que se guarda
+    junto al historial del sujeto, y actualizarlo cuesta lo mismo con 3
+    sesiones que con 300.
+
+    Args:
+        **parametros: Sustituyen a los de PARAMETROS_VIGILANCIA
+
+    Returns:
+        Dict con la estructura:
+            {
+                "parametros": Dict,
+                "sesiones": int,
+                "series": {serie: {"n", "media", "varianza", "ewma",
+                                   "cusum_sube", "cusum_baja"}}
+            }
+
+    Raises:
+        ValueError: Si se pasa un parámetro desconocido
+    """
+    desconocidos = set(parametros) - set(PARAMETROS_VIGILANCIA)
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(desconocidos))}")
+
+    return {
+        "parametros": {**PARAMETROS_VIGILANCIA, **parametros},
+        "sesiones": 0,
+        "series": {}
+    }
+
+
+def _mensaje_alerta(serie: str, detector: str, direccion: str, valor: float, media: float) -> str:
+    """Describe una alerta en una frase."""
+    cambio = "Caída" if direccion == "baja" else "Subida"
+    tipo = "brusca" if detector == "ewma" else "sostenida"
+    return f"{cambio} {tipo} de {serie}: {valor:g} frente a {media:.2f} habitual."
+
+
+def actualizar_vigilancia(estado: Dict, analisis: Dict, sesion=None) -> List[Dict]:
+    """
+    Incorpora una sesión al estado de vigilancia y devuelve sus alertas.
+
+    Cada serie se estandariza con la referencia de las sesiones anteriores
+    (z = (valor - media) / desviación); EWMA alerta cuando la media móvil
+    de z sale de ±limite_ewma·√(λ/(2-λ)) y CUSUM cuando la suma acumulada
+    pasa de umbral_cusum. Solo se avisa en la dirección que indica deterioro
+    para cada serie (una vez por serie, aunque salten los dos detectores) y
+    el detector que salta se reinicia. Después, la sesión se incorpora a la
+    referencia, recortada a ±3 desviaciones para que un valor atípico no la
+    desplace.
+
+    Args:
+        estado: Estado creado con crear_vigilancia()
+        analisis: Resultado de analisis_completo, o entrada del historial
+            con "metricas" (y opcionalmente "nivel_riesgo")
+        sesion: Identificador de la sesión (ej: fecha); por defecto, su número de orden
+
+    Returns:
+        Lista de alertas, cada una:
+            {
+                "serie": str,
+                "detector": str ("ewma" o "cusum"),
+                "direccion": str ("sube" o "baja"),
+                "valor": float,
+                "referencia": float,
+                "estadistico": float,
+                "sesion": ...,
+                "mensaje": str
+            }
+    """
+    parametros = estado["parametros"]
+    estado["sesiones"] += 1
+    if sesion is None:
+        sesion = estado["sesiones"]
+
+    lam = parametros["lambda_ewma"]
+    limite_ewma = parametros["limite_ewma"] * math.sqrt(lam / (2 - lam))
+    holgura = parametros["holgura_cusum"]
+    umbral = parametros["umbral_cusum"]
+
+    alertas = []
+    for nombre, valor in _valores_vigilados(analisis).items():
+        _, _, deterioro, desviacion_minima = SERIES_VIGILADAS[nombre]
+        serie = estado["series"].get(nombre)
+        if serie is None:
+            serie = estado["series"][nombre] = {
+                "n": 0, "media": 0.0, "varianza": 0.0,
+                "ewma": 0.0, "cusum_sube": 0.0, "cusum_baja": 0.0
+            }
+
+        diferencia = valor - serie["media"]
+        if serie["n"] >= parametros["calentamiento"]:
+            media = serie["media"]
+            desviacion = max(math.sqrt(serie["varianza"]), desviacion_minima)
+            z = diferencia / desviacion
+
+            serie["ewma"] = lam * z + (1 - lam) * serie["ewma"]
+            serie["cusum_sube"] = max(0.0, serie["cusum_sube"] + z - holgura)
+            serie["cusum_baja"] = max(0.0, serie["cusum_baja"] - z - holgura)
+
+            disparos = []
+            if serie["ewma"] > limite_ewma:
+                disparos.append(("ewma", "sube", serie["ewma"]))
+            elif serie["ewma"] < -limite_ewma:
+                disparos.append(("ewma", "baja", serie["ewma"]))
+            if serie["cusum_sube"] > umbral:
+                disparos.append(("cusum", "sube", serie["cusum_sube"]))
+            if serie["cusum_baja"] > umbral:
+                disparos.append(("cusum", "baja", -serie["cusum_baja"]))
+
+            avisadas = set()
+            for detector, direccion, estadistico in disparos:
+                # Reiniciar el detector que ha saltado
+                if detector == "ewma":
+                    serie["ewma"] = 0.0
+                else:
+                    serie["cusum_" + direccion] = 0.0
+
+                # Un salto brusco dispara los dos detectores: se avisa una vez
+                if deterioro not in ("ambas", direccion) or direccion in avisadas:
+                    continue
+                avisadas.add(direccion)
+                alertas.append({
+                    "serie": nombre,
+                    "detector": detector,
+                    "direccion": direccion,
+                    "valor": valor,
+                    "referencia": round(media, 4),
+                    "estadistico": round(estadistico, 4),
+                    "sesion": sesion,
+                    "mensaje": _mensaje_alerta(nombre, detector, direccion, valor, media)
+                })
+
+            # Una sesión atípica no debe ensanchar la referencia: se recorta a ±3σ
+            diferencia = max(-3 * desviacion, min(3 * desviacion, diferencia))
+
+        # Referencia: media acumulada durante el calentamiento, exponencial después
+        serie["n"] += 1
+        alfa = max(1 / serie["n"], parametros["alfa_referencia"])
+        serie["media"] += alfa * diferencia
+        serie["varianza"] = (1 - alfa) * (serie["varianza"] + alfa * diferencia ** 2)
+
+    return alertas
+
+
+def vigilancia_desde_historial(historial: Optional[List[Dict]], **parametros) -> Dict:
+    """
+    Construye el estado de vigilancia a partir de una lista de análisis previos.
+
+    Útil para migrar historiales existentes; a partir de ahí basta con
+    actualizar el estado en cada sesión nueva. Las alertas del historial se
+    descartan.
+
+    Args:
+        historial: Lista de análisis previos ordenados cronológicamente
+        **parametros: Sustituyen a los de PARAMETROS_VIGILANCIA
+
+    Returns:
+        Estado de vigilancia
+    """
+    estado = crear_vigilancia(**parametros)
+    for analisis_previo in historial or []:
+        actualizar_vigilancia(estado, analisis_previo, analisis_previo.get('fecha'))
+    return estado
+
+
+def vigilar_cohorte(estados: Dict[str, Dict], analisis: Dict, sesion=None, **parametros) -> List[Dict]:
+    """
+    Actualiza la vigilancia del sujeto de un análisis dentro de una cohorte.
+
+    Args:
+        estados: Dict {id_sujeto: estado de vigilancia}; los sujetos nuevos se
+            añaden con crear_vigilancia(**parametros)
+        analisis: Análisis de la sesión, con "id_sujeto"
+        sesion: Identificador de la sesión; por defecto, analisis["fecha"] si
+            existe, y si no, su número de orden
+        **parametros: Parámetros para los sujetos nuevos
+
+    Returns:
+        Alertas de la sesión (ver actualizar_vigilancia), cada una con "id_sujeto"
+    """
+    id_sujeto = analisis['id_sujeto']
+    estado = estados.get(id_sujeto)
+    if estado is None:
+        estado = estados[id_sujeto] = crear_vigilancia(**parametros)
+
+    alertas = actualizar_vigilancia(estado, analisis, sesion if sesion is not None else analisis.get('fecha'))
+    for alerta in alertas:
+        alerta["id_sujeto"] = id_sujeto
+    return alertas
+
+
 # =============================================================================
 # EJEMPLO DE USO
 # =============================================================================
@@ -6,20 +6,50 @@ módulos de análisis de la clínica cultural y lingüística.
 """
 
 import re
-from typing import List, Dict, Set
-from collections import Counter
+from types import MappingProxyType
+from typing import Any, List, Dict, Set, Iterable, Iterator, Tuple, Union, TextIO
+from collections import Counter, deque
+
+
+# =============================================================================
+# ESTADO DE MÓDULO INMUTABLE
+# =============================================================================
+
+def congelar(valor: Any) -> Any:
+    """
+    Copia inmutable de un léxico o tabla de referencia.
+
+    Los léxicos y tablas de los módulos se comparten entre todos los hilos
+    que analizan a la vez (ver hilos.py); al congelarlos, ningún análisis
+    puede modificarlos y leerlos no necesita cerrojos.
+
+    Args:
+        valor: Dict, set o lista, posiblemente anidados
+
+    Returns:
+        El mismo contenido con los dicts como MappingProxyType, los sets
+        como frozenset y las listas como tuplas (recursivamente); el resto
+        de valores se devuelve tal cual
+    """
+    if isinstance(valor, dict):
+        return MappingProxyType({clave: congelar(v) for clave, v in valor.items()})
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(valor)
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(v) for v in valor)
+    return valor
 
 
 # =============================================================================
 # LISTAS DE REFERENCIA LINGÜÍSTICAS
 # =============================================================================
 
-PRONOMBRES_PRIMERA_PERSONA = {
+PRONOMBRES_PRIMERA_PERSONA = frozenset({
     'yo', 'me', 'mi', 'mí', 'mis', 'conmigo', 'nosotros', 'nosotras',
     'nos', 'nuestro', 'nuestra', 'nuestros', 'nuestras'
-}
+})
 
-CONECTORES = {
+CONECTORES = frozenset({
     # Causa/consecuencia
     'porque', 'por', 'ya que', 'dado que', 'puesto que', 'como',
     'por tanto', 'por lo tanto', 'así que', 'entonces', 'consecuentemente',
@@ -31,9 +61,9 @@ CONECTORES = {
     # Temporal
     'cuando', 'mientras', 'antes', 'después', 'luego', 'entonces',
     'finalmente', 'posteriormente', 'anteriormente'
-}
+})
 
-PALABRAS_EMOCIONALES = {
+PALABRAS_EMOCIONALES = congelar({
     'alegría': {
         'feliz', 'alegre', 'contento', 'contenta', 'alegría', 'gozo', 'felicidad',
         'sonrisa', 'risa', 'reír', 'disfrutar', 'disfruté', 'emocionado',
@@ -54,17 +84,17 @@ PALABRAS_EMOCIONALES = {
         'furia', 'furioso', 'furiosa', 'molesto', 'molesta', 'irritado',
         'irritada', 'frustrado', 'frustrada', 'indignación'
     }
-}
+})
 
-VERBOS_MODALES = {
+VERBOS_MODALES = frozenset({
     'quiero', 'quieres', 'quiere', 'queremos', 'queréis', 'quieren',
     'puedo', 'puedes', 'puede', 'podemos', 'podéis', 'pueden',
     'debo', 'debes', 'debe', 'debemos', 'debéis', 'deben',
     'tengo que', 'tienes que', 'tiene que', 'tenemos que', 'tenéis que', 'tienen que',
     'necesito', 'necesitas', 'necesita', 'necesitamos', 'necesitáis', 'necesitan'
-}
+})
 
-TEMAS_PALABRAS_CLAVE = {
+TEMAS_PALABRAS_CLAVE = congelar({
     'familia': {
         'familia', 'madre', 'padre', 'hermano', 'hermana', 'hijo', 'hija',
         'abuelo', 'abuela', 'tío', 'tía', 'primo', 'prima', 'mamá', 'papá',
@@ -88,7 +118,30 @@ TEMAS_PALABRAS_CLAVE = {
         'casa', 'hogar', 'piso', 'apartamento', 'vivienda', 'habitación',
         'vecino', 'vecina', 'barrio', 'alquiler', 'comprar', 'vivir'
     }
-}
+})
+
+
+# Patrones de terminaciones de pasado
+PATRONES_PASADO = (
+    re.compile(r'\w+é$'),      # hablé, comí
+    re.compile(r'\w+aste$'),   # hablaste
+    re.compile(r'\w+ó$'),      # habló
+    re.compile(r'\w+amos$'),   # hablamos (puede ser presente también)
+    re.compile(r'\w+asteis$'), # hablasteis
+    re.compile(r'\w+aron$'),   # hablaron
+    re.compile(r'\w+ieron$'),  # comieron
+    re.compile(r'\w+aba$'),    # hablaba
+    re.compile(r'\w+ían$'),    # hablaban
+    re.compile(r'\w+ía$'),     # comía
+)
+
+# Tamaño (en caracteres) de los bloques que lee iter_tokens()
+TAM_BLOQUE_TOKENS = 1 << 16
+
+_PATRON_PALABRA = re.compile(r'\w+')
+
+# Último espacio de un bloque (el corte queda justo detrás)
+_PATRON_ULTIMO_ESPACIO = re.compile(r'\s\S*\Z')
 
 
 # =============================================================================
@@ -111,21 +164,150 @@ def tokenizar(texto: str) -> List[str]:
     return tokens
 
 
-def contar_palabras(texto: str) -> int:
+def iter_tokens(
+    fuente: Union[str, TextIO, Iterable[str]],
+    tam_bloque: int = TAM_BLOQUE_TOKENS
+) -> Iterator[Tuple[str, int, int]]:
+    """
+    Recorre los tokens de un texto sin construir listas ni copias completas.
+
+    Produce los mismos tokens que tokenizar(), junto con su posición en el
+    texto original. El texto se lee por bloques que se cortan en el último
+    espacio, de modo que la memoria usada está acotada por el tamaño del
+    bloque más el fragmento sin espacios más largo.
+
+    Args:
+        fuente: Texto, fichero abierto en modo texto o iterable de trozos
+        tam_bloque: Caracteres que se leen de cada vez
+
+    Yields:
+        Tuplas (token en minúsculas, inicio, fin) con las posiciones del
+        token en el texto original
+    """
+    for bloque, desplazamiento in _bloques_cortados(fuente, tam_bloque):
+        yield from _tokens_con_posiciones(bloque, desplazamiento)
+
+
+def iter_palabras(
+    fuente: Union[str, TextIO, Iterable[str]],
+    tam_bloque: int = TAM_BLOQUE_TOKENS
+) -> Iterator[str]:
+    """
+    Como iter_tokens(), pero solo los tokens (sin posiciones).
+
+    Es la variante que usan las funciones de conteo: evita crear una tupla
+    por token.
+
+    Args:
+        fuente: Texto, fichero abierto en modo texto o iterable de trozos
+        tam_bloque: Caracteres que se leen de cada vez
+
+    Yields:
+        Tokens en minúsculas, en el mismo orden que tokenizar()
+    """
+    for bloque, _ in _bloques_cortados(fuente, tam_bloque):
+        yield from _PATRON_PALABRA.findall(bloque.lower())
+
+
+def _bloques_cortados(
+    fuente: Union[str, TextIO, Iterable[str]],
+    tam_bloque: int
+) -> Iterator[Tuple[str, int]]:
+    """
+    Bloques del texto cortados tras el último espacio (salvo el último),
+    con la posición de su inicio en el texto original.
+    """
+    # Lo pendiente no tiene espacios: solo se busca el corte en cada bloque
+    # nuevo y los trozos se unen una vez, al encontrarlo
+    pendiente: List[str] = []
+    desplazamiento = 0
+
+    for bloque in _bloques_texto(fuente, tam_bloque):
+        ultimo = _PATRON_ULTIMO_ESPACIO.search(bloque)
+        if ultimo is None:
+            # Sin espacios: se espera al siguiente bloque
+            pendiente.append(bloque)
+            continue
+
+        corte = ultimo.start() + 1
+        pendiente.append(bloque[:corte])
+        texto = ''.join(pendiente)
+        yield texto, desplazamiento
+        desplazamiento += len(texto)
+        pendiente = [bloque[corte:]]
+
+    texto = ''.join(pendiente)
+    if texto:
+        yield texto, desplazamiento
+
+
+def _bloques_texto(
+    fuente: Union[str, TextIO, Iterable[str]],
+    tam_bloque: int
+) -> Iterator[str]:
+    """Reparte un texto, fichero o iterable de trozos en bloques."""
+    if isinstance(fuente, str):
+        for inicio in range(0, len(fuente), tam_bloque):
+            yield fuente[inicio:inicio + tam_bloque]
+    elif hasattr(fuente, 'read'):
+        bloque = fuente.read(tam_bloque)
+        while bloque:
+            yield bloque
+            bloque = fuente.read(tam_bloque)
+    else:
+        yield from fuente
+
+
+def _tokens_con_posiciones(
+    texto: str,
+    desplazamiento: int
+) -> Iterator[Tuple[str, int, int]]:
+    """Tokens de un bloque que termina en espacio, con posiciones absolutas."""
+    texto_lower = texto.lower()
+    if len(texto_lower) == len(texto):
+        for m in _PATRON_PALABRA.finditer(texto_lower):
+            yield m.group(), desplazamiento + m.start(), desplazamiento + m.end()
+        return
+
+    # Algún carácter cambia de longitud al pasar a minúsculas ('İ'):
+    # se traducen las posiciones carácter a carácter
+    origen = []
+    for i, caracter in enumerate(texto):
+        origen.extend([i] * len(caracter.lower()))
+    origen.append(len(texto))
+    for m in _PATRON_PALABRA.finditer(texto_lower):
+        inicio = origen[m.start()]
+        fin = origen[m.end() - 1] + 1
+        yield m.group(), desplazamiento + inicio, desplazamiento + fin
+
+
+def es_verbo_pasado(token: str) -> bool:
+    """
+    Indica si un token tiene una terminación típica de verbo en pasado.
+
+    Args:
+        token: Token en minúsculas
+
+    Returns:
+        True si coincide con alguno de PATRONES_PASADO
+    """
+    return any(patron.match(token) for patron in PATRONES_PASADO)
+
+
+def contar_palabras(texto: Union[str, TextIO]) -> int:
     """
     Cuenta el número total de palabras en el texto.
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Número de palabras
     """
-    tokens = tokenizar(texto)
-    return len(tokens)
+    return sum(1 for _ in iter_palabras(texto))
 
 
-def calcular_variedad_lexica(texto: str) -> float:
+def calcular_variedad_lexica(texto: Union[str, TextIO]) -> float:
     """
     Calcula la variedad léxica (type-token ratio).
 
@@ -133,45 +315,37 @@ def calcular_variedad_lexica(texto: str) -> float:
     Valores cercanos a 1 = alta variedad; cercanos a 0 = baja variedad
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Valor entre 0 y 1 indicando variedad léxica
     """
-    tokens = tokenizar(texto)
-    if len(tokens) == 0:
+    total_palabras = 0
+    tokens_unicos = set()
+    for token in iter_palabras(texto):
+        total_palabras += 1
+        tokens_unicos.add(token)
+
+    if total_palabras == 0:
         return 0.0
 
-    tokens_unicos = set(tokens)
-    return len(tokens_unicos) / len(tokens)
+    return len(tokens_unicos) / total_palabras
 
 
-def contar_pronombres_primera_persona(texto: str) -> Dict[str, float]:
+def contar_pronombres_primera_persona(texto: Union[str, TextIO]) -> Dict[str, float]:
     """
     Cuenta los pronombres de primera persona en el texto.
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Dict con conteo absoluto y porcentaje respecto al total de palabras
     """
-    tokens = tokenizar(texto)
-    total_palabras = len(tokens)
-
-    if total_palabras == 0:
-        return {'conteo': 0, 'porcentaje': 0.0}
-
-    conteo = sum(1 for token in tokens if token in PRONOMBRES_PRIMERA_PERSONA)
-    porcentaje = (conteo / total_palabras) * 100
-
-    return {
-        'conteo': conteo,
-        'porcentaje': round(porcentaje, 2)
-    }
+    return _conteo_y_porcentaje(texto, PRONOMBRES_PRIMERA_PERSONA)
 
 
-def detectar_verbos_pasado(texto: str) -> Dict[str, float]:
+def detectar_verbos_pasado(texto: Union[str, TextIO]) -> Dict[str, float]:
     """
     Detecta verbos en pasado usando patrones de terminaciones típicas.
 
@@ -180,109 +354,99 @@ def detectar_verbos_pasado(texto: str) -> Dict[str, float]:
     - Imperfecto: -aba, -ía
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Dict con conteo y porcentaje de verbos en pasado
     """
-    tokens = tokenizar(texto)
-    total_palabras = len(tokens)
+    return _conteo_y_porcentaje(texto, es_verbo_pasado)
 
-    if total_palabras == 0:
-        return {'conteo': 0, 'porcentaje': 0.0}
-
-    # Patrones de terminaciones de pasado
-    patrones_pasado = [
-        r'\w+é$',      # hablé, comí
-        r'\w+aste$',   # hablaste
-        r'\w+ó$',      # habló
-        r'\w+amos$',   # hablamos (puede ser presente también)
-        r'\w+asteis$', # hablasteis
-        r'\w+aron$',   # hablaron
-        r'\w+ieron$',  # comieron
-        r'\w+aba$',    # hablaba
-        r'\w+ían$',    # hablaban
-        r'\w+ía$',     # comía
-    ]
-
-    conteo = 0
-    for token in tokens:
-        for patron in patrones_pasado:
-            if re.match(patron, token):
-                conteo += 1
-                break
-
-    porcentaje = (conteo / total_palabras) * 100
 
-    return {
-        'conteo': conteo,
-        'porcentaje': round(porcentaje, 2)
-    }
-
-
-def contar_conectores(texto: str) -> Dict[str, float]:
+def contar_conectores(texto: Union[str, TextIO]) -> Dict[str, float]:
     """
     Cuenta el uso de conectores discursivos en el texto.
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Dict con conteo y porcentaje de conectores
     """
-    tokens = tokenizar(texto)
-    total_palabras = len(tokens)
-
-    if total_palabras == 0:
-        return {'conteo': 0, 'porcentaje': 0.0}
-
-    conteo = sum(1 for token in tokens if token in CONECTORES)
-    porcentaje = (conteo / total_palabras) * 100
-
-    return {
-        'conteo': conteo,
-        'porcentaje': round(porcentaje, 2)
-    }
+    return _conteo_y_porcentaje(texto, CONECTORES)
 
 
-def detectar_emociones(texto: str) -> Dict[str, int]:
+def detectar_emociones(texto: Union[str, TextIO]) -> Dict[str, int]:
     """
     Detecta palabras emocionales en el texto.
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Dict con conteo de cada emoción detectada
     """
-    tokens = tokenizar(texto)
-
-    emociones_detectadas = {}
-    for emocion, palabras in PALABRAS_EMOCIONALES.items():
-        conteo = sum(1 for token in tokens if token in palabras)
-        emociones_detectadas[emocion] = conteo
-
-    return emociones_detectadas
+    return _conteo_por_categoria(texto, PALABRAS_EMOCIONALES)
 
 
-def detectar_temas(texto: str) -> Dict[str, int]:
+def detectar_temas(texto: Union[str, TextIO]) -> Dict[str, int]:
     """
     Detecta temas principales mencionados en el texto.
 
     Args:
-        texto: Texto a analizar
+        texto: Texto a analizar (o fichero abierto en modo texto)
 
     Returns:
         Dict con conteo de menciones de cada tema
     """
-    tokens = tokenizar(texto)
+    return _conteo_por_categoria(texto, TEMAS_PALABRAS_CLAVE)
 
-    temas_detectados = {}
-    for tema, palabras_clave in TEMAS_PALABRAS_CLAVE.items():
-        conteo = sum(1 for token in tokens if token in palabras_clave)
-        temas_detectados[tema] = conteo
 
-    return temas_detectados
+def _conteo_y_porcentaje(texto: Union[str, TextIO], criterio) -> Dict[str, float]:
+    """
+    Cuenta en una pasada los tokens que cumplen el criterio y su porcentaje.
+
+    El criterio es un set de palabras o una función que recibe el token.
+    """
+    total_palabras = 0
+    conteo = 0
+    if isinstance(criterio, (set, frozenset)):
+        for token in iter_palabras(texto):
+            total_palabras += 1
+            if token in criterio:
+                conteo += 1
+    else:
+        for token in iter_palabras(texto):
+            total_palabras += 1
+            if criterio(token):
+                conteo += 1
+
+    if total_palabras == 0:
+        return {'conteo': 0, 'porcentaje': 0.0}
+
+    porcentaje = (conteo / total_palabras) * 100
+
+    return {
+        'conteo': conteo,
+        'porcentaje': round(porcentaje, 2)
+    }
+
+
+def _conteo_por_categoria(
+    texto: Union[str, TextIO],
+    categorias: Dict[str, Set[str]]
+) -> Dict[str, int]:
+    """Cuenta en una pasada los tokens de cada categoría de un léxico."""
+    categorias_por_palabra = {}
+    for categoria, palabras in categorias.items():
+        for palabra in palabras:
+            categorias_por_palabra.setdefault(palabra, []).append(categoria)
+
+    conteos = dict.fromkeys(categorias, 0)
+    for token in iter_palabras(texto):
+        for categoria in categorias_por_palabra.get(token, ()):
+            conteos[categoria] += 1
+
+    return conteos
 
 
 def validar_entrada(entrada: Dict) -> bool:
@@ -314,3 +478,30 @@ def limpiar_texto(texto: str) -> str:
     # Eliminar espacios al inicio y final
     texto = texto.strip()
     return texto
+
+
+def convertir_para_json(objeto):
+    """
+    Convierte los objetos de los resultados que no son tipos JSON (tareas
+    prescritas, etc.) a su dict de salida, y los deque (ej: la ventana de un
+    agregado de temas) a listas. Pensado para json.dump:
+
+        >>> json.dump(resultado, f, default=convertir_para_json)
+
+    Args:
+        objeto: Objeto que json no sabe serializar
+
+    Returns:
+        Dict de salida del objeto (objeto.to_dict()), o lista si es un deque
+
+    Raises:
+        TypeError: Si el objeto no tiene to_dict() ni es un deque
+    """
+    if isinstance(objeto, deque):
+        return list(objeto)
+    to_dict = getattr(objeto, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(
+            f"Object of type {type(objeto).__name__} is not JSON serializable"
+        )
+    return to_dict()
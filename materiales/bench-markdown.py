@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark del conversor de Markdown (markdown_render.py)
+
+Genera documentos grandes repitiendo los semana*.md (más una tabla) y mide
+el tiempo de conversión a distintos tamaños, para comprobar que crece de
+forma lineal. También mide un documento de líneas largas con mucho formato
+en línea (** y * abiertos y sin cerrar).
+
+Uso:
+    python3 bench-markdown.py [--mb 1 4 16] [--repeticiones 3]
+"""
+
+import argparse
+import io
+import time
+from pathlib import Path
+
+from markdown_render import escribir_html, markdown_to_html
+
+TABLA = """
+| Verbo | Presente | Pretérito |
+|:------|:--------:|----------:|
+| **ser** | soy | fui |
+| *ir* | voy | fui |
+"""
+
+
+def generar_documento(base, megabytes):
+    """Repite base hasta alcanzar aproximadamente el tamaño pedido."""
+    objetivo = int(megabytes * 1024 * 1024)
+    veces = max(1, objetivo // len(base.encode('utf-8')))
+    return base * veces
+
+
+def generar_formato_denso(megabytes):
+    """Líneas de 10 KB con negritas, itálicas y delimitadores sin pareja."""
+    linea = ('palabra **negrita** *itálica* **abierta ' * 250)[:10000]
+    lineas = int(megabytes * 1024 * 1024) // (len(linea) + 2)
+    return (linea + '\n\n') * max(1, lineas)
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo de varias ejecuciones, en segundos."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mb', type=float, nargs='+', default=[1, 4, 16],
+                        help='Tamaños de documento en MB')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent
+    base = ''.join(
+        md.read_text(encoding='utf-8') + '\n'
+        for md in sorted(script_dir.glob('semana*.md'))
+    ) + TABLA
+
+    print(f"\n{'Documento':<14}{'MB':>8}{'cadena (s)':>14}{'flujo (s)':>12}{'MB/s':>10}")
+    for megabytes in args.mb:
+        for nombre, texto in (
+            ('semanas', generar_documento(base, megabytes)),
+            ('formato denso', generar_formato_denso(megabytes)),
+        ):
+            tamaño = len(texto.encode('utf-8')) / (1024 * 1024)
+            t_cadena = medir(lambda: markdown_to_html(texto), args.repeticiones)
+            t_flujo = medir(
+                lambda: escribir_html(io.StringIO(texto), io.StringIO()),
+                args.repeticiones
+            )
+            print(f"{nombre:<14}{tamaño:>8.1f}{t_cadena:>14.3f}{t_flujo:>12.3f}"
+                  f"{tamaño / t_cadena:>10.1f}")
+    print()
+
+
+if __name__ == '__main__':
+    main()
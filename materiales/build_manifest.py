@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Manifiesto de construcción incremental para los scripts de materiales
+
+Guarda, para cada archivo generado (html/semanaN.html, pdfs/semanaN.pdf),
+el hash SHA-256 de todas sus entradas: el Markdown de origen, pdf-style.css,
+el conversor (markdown_render.py) y el propio script, que contiene la
+plantilla. Un archivo solo se vuelve a generar si falta, si no está en el
+manifiesto o si alguna de sus entradas ha cambiado; así, un cambio en el CSS
+o en el conversor invalida todos los archivos que dependen de ellos.
+
+El manifiesto es un JSON en materiales/.build-manifest.json (no se versiona).
+
+Uso:
+    manifiesto = Manifiesto(script_dir)
+    entradas = [md_file, css_file, RENDERER, Path(__file__)]
+    if forzar or manifiesto.necesita_generar(salida, entradas):
+        manifiesto.descartar(salida)
+        ...generar salida...
+        manifiesto.registrar(salida, entradas)
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+# Conversor de Markdown: su contenido forma parte de las entradas de los HTML
+RENDERER = Path(__file__).parent / 'markdown_render.py'
+
+NOMBRE_MANIFIESTO = '.build-manifest.json'
+
+# Versión del formato del manifiesto
+VERSION_MANIFIESTO = 1
+
+_TAM_BLOQUE = 1 << 20
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido de un archivo, en hexadecimal."""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(_TAM_BLOQUE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class Manifiesto:
+    """Hashes de las entradas con las que se generó cada archivo."""
+
+    def __init__(self, directorio):
+        """
+        Args:
+            directorio: Directorio de materiales; las rutas del manifiesto
+                se guardan relativas a él
+        """
+        self.directorio = Path(directorio).resolve()
+        self.ruta = self.directorio / NOMBRE_MANIFIESTO
+        self._hashes = {}        # caché de hashes de esta ejecución
+        self.salidas = {}
+
+        if self.ruta.exists():
+            try:
+                with open(self.ruta, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+            except (OSError, ValueError):
+                datos = {}
+            if datos.get('version') == VERSION_MANIFIESTO:
+                self.salidas = datos.get('salidas', {})
+
+    def _clave(self, ruta):
+        ruta = Path(ruta).resolve()
+        try:
+            return ruta.relative_to(self.directorio).as_posix()
+        except ValueError:
+            return ruta.as_posix()
+
+    def hashes(self, entradas):
+        """Dict {ruta relativa: hash} de las entradas (cada archivo se lee una vez)."""
+        resultado = {}
+        for entrada in entradas:
+            clave = self._clave(entrada)
+            if clave not in self._hashes:
+                self._hashes[clave] = hash_archivo(entrada)
+            resultado[clave] = self._hashes[clave]
+        return resultado
+
+    def necesita_generar(self, salida, entradas):
+        """
+        Indica si hay que (re)generar un archivo.
+
+        Args:
+            salida: Archivo generado
+            entradas: Archivos de los que depende
+
+        Returns:
+            True si la salida no existe, no está en el manifiesto o alguna
+            entrada ha cambiado (o se ha añadido o quitado)
+        """
+        if not Path(salida).exists():
+            return True
+        registro = self.salidas.get(self._clave(salida))
+        if registro is None:
+            return True
+        return registro != self.hashes(entradas)
+
+    def registrar(self, salida, entradas):
+        """Anota (y guarda) las entradas con las que se acaba de generar un archivo."""
+        self.salidas[self._clave(salida)] = self.hashes(entradas)
+        self.guardar()
+
+    def descartar(self, salida):
+        """
+        Quita (y guarda) el registro de un archivo antes de regenerarlo, para
+        que una generación interrumpida no deje una salida a medias que
+        parezca al día.
+        """
+        if self.salidas.pop(self._clave(salida), None) is not None:
+            self.guardar()
+
+    def guardar(self):
+        """Escribe el manifiesto (de forma atómica)."""
+        temporal = self.ruta.with_name(self.ruta.name + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'version': VERSION_MANIFIESTO, 'salidas': self.salidas},
+                f, ensure_ascii=False, indent=2, sort_keys=True
+            )
+        temporal.replace(self.ruta)
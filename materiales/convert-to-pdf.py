@@ -3,29 +3,75 @@
 Script para convertir archivos HTML a PDF usando WeasyPrint
 """
 
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from weasyprint import HTML, CSS
 import sys
 
+from build_manifest import Manifiesto
+
+# Bloque <style> que generate-html.py incrusta con el contenido de pdf-style.css
+STYLE_BLOCK = re.compile(r'<style>(.*?)</style>', re.DOTALL)
+
+# Hoja de estilos analizada una sola vez por proceso (ver init_worker)
+_css_cache = None
+
+def init_worker(css_file):
+    """Analiza pdf-style.css una vez por proceso y la guarda para reutilizarla"""
+    global _css_cache
+    with open(css_file, 'r', encoding='utf-8') as f:
+        css_text = f.read()
+    _css_cache = (css_text.strip(), CSS(string=css_text, base_url=str(Path(css_file).parent)))
+
 def convert_html_to_pdf(html_file, pdf_file):
-    """Convierte un archivo HTML a PDF usando WeasyPrint"""
+    """
+    Convierte un archivo HTML a PDF usando WeasyPrint.
+
+    Si el HTML lleva incrustado pdf-style.css, se quita el bloque <style> y
+    se usa la hoja ya analizada en este proceso en lugar de volver a
+    analizarla; si no (HTML editado a mano), se usan sus propios estilos.
+
+    Returns:
+        (éxito, segundos, mensaje de error o None)
+    """
+    inicio = time.perf_counter()
     try:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_text = f.read()
+
+        stylesheets = None  # Los estilos ya están en el HTML
+        style = STYLE_BLOCK.search(html_text)
+        if _css_cache is not None and style and style.group(1).strip() == _css_cache[0]:
+            html_text = html_text[:style.start()] + html_text[style.end():]
+            stylesheets = [_css_cache[1]]
+
         # Convertir HTML a PDF
-        HTML(filename=str(html_file)).write_pdf(
+        HTML(string=html_text, base_url=str(Path(html_file).parent)).write_pdf(
             str(pdf_file),
-            stylesheets=None,  # Los estilos ya están en el HTML
+            stylesheets=stylesheets,
             optimize_size=('fonts', 'images')
         )
-        return True
+        return True, time.perf_counter() - inicio, None
     except Exception as e:
-        print(f"Error: {str(e)}")
-        return False
+        return False, time.perf_counter() - inicio, str(e)
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description='Convierte los HTML de los materiales a PDF')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenera todos los archivos aunque no hayan cambiado')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Procesos de conversión (por defecto, uno por núcleo)')
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
     html_dir = script_dir / 'html'
     pdf_dir = script_dir / 'pdfs'
+    css_file = script_dir / 'pdf-style.css'
 
     # Crear carpeta para PDFs si no existe
     pdf_dir.mkdir(exist_ok=True)
@@ -40,27 +86,64 @@ def main():
     print(f"\n🚀 Convirtiendo {len(html_files)} archivos HTML a PDF...\n")
 
     success_count = 0
+    skipped_count = 0
+    manifiesto = Manifiesto(script_dir)
 
+    # Archivos a convertir
+    jobs = []
     for html_file in html_files:
-        print(f"📄 Procesando: {html_file.name}")
+        # Nombre del PDF de salida y archivos de los que depende (el CSS
+        # incrustado en el HTML se sustituye por pdf-style.css ya analizado)
+        pdf_file = pdf_dir / f"{html_file.stem}.pdf"
+        entradas = [html_file, css_file, Path(__file__)]
+        if not args.force and not manifiesto.necesita_generar(pdf_file, entradas):
+            print(f"⏭️  Sin cambios: {html_file.name}")
+            skipped_count += 1
+            continue
+        jobs.append((html_file, pdf_file, entradas))
+
+    def report(pdf_file, entradas, result):
+        nonlocal success_count
+        ok, seconds, error = result
+        if ok:
+            manifiesto.registrar(pdf_file, entradas)
+            print(f"✅ PDF generado: {pdf_file.name} ({seconds:.2f} s)")
+            success_count += 1
+        else:
+            print(f"❌ Error al generar {pdf_file.name} ({seconds:.2f} s): {error}")
 
-        try:
-            # Nombre del PDF de salida
-            pdf_file = pdf_dir / f"{html_file.stem}.pdf"
+    inicio = time.perf_counter()
+    for _, pdf_file, _ in jobs:
+        manifiesto.descartar(pdf_file)
 
-            # Convertir a PDF
-            if convert_html_to_pdf(html_file, pdf_file):
-                print(f"✅ PDF generado: {pdf_file.name}")
-                success_count += 1
-            else:
-                print(f"❌ Error al generar {pdf_file.name}")
+    if args.jobs == 1 or len(jobs) <= 1:
+        # En este mismo proceso
+        init_worker(css_file)
+        for html_file, pdf_file, entradas in jobs:
+            print(f"📄 Procesando: {html_file.name}")
+            report(pdf_file, entradas, convert_html_to_pdf(html_file, pdf_file))
+    else:
+        # Un archivo por tarea; cada proceso analiza el CSS una sola vez
+        workers = min(args.jobs, len(jobs))
+        print(f"⚙️  {len(jobs)} archivos en {workers} procesos")
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(str(css_file),)) as pool:
+            futures = [
+                pool.submit(convert_html_to_pdf, str(html_file), str(pdf_file))
+                for html_file, pdf_file, _ in jobs
+            ]
+            for (_, pdf_file, entradas), future in zip(jobs, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = (False, 0.0, str(e))
+                report(pdf_file, entradas, result)
 
-        except Exception as e:
-            print(f"❌ Error procesando {html_file.name}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+    if jobs:
+        print(f"\n⏱️  Tiempo total: {time.perf_counter() - inicio:.2f} s")
 
-    print(f"\n✨ ¡Proceso completado! {success_count}/{len(html_files)} PDFs generados")
+    print(f"\n✨ ¡Proceso completado! {success_count}/{len(html_files) - skipped_count} PDFs generados"
+          f" ({skipped_count} sin cambios)")
     print(f"\n📂 Los PDFs están en: {pdf_dir}\n")
 
 if __name__ == '__main__':
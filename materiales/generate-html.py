@@ -4,10 +4,13 @@ Script para generar archivos HTML bonitos desde archivos Markdown
 Estos pueden ser abiertos en un navegador y guardados como PDF
 """
 
+import argparse
 import os
-import re
 from pathlib import Path
 
+from build_manifest import RENDERER, Manifiesto
+from markdown_render import escribir_html
+
 # Plantilla HTML con estilos CSS incluidos
 HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang="es">
@@ -48,142 +51,34 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </html>
 """
 
-def markdown_to_html(markdown_text):
-    """Convierte markdown a HTML con formato mejorado"""
-    lines = markdown_text.split('\n')
-    html_lines = []
-    in_list = False
-    in_paragraph = False
-
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-
-        # Headers
-        if stripped.startswith('#### '):
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-            html_lines.append(f'<h4>{stripped[5:]}</h4>')
-
-        elif stripped.startswith('### '):
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-            html_lines.append(f'<h3>{stripped[4:]}</h3>')
-
-        elif stripped.startswith('## '):
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-            html_lines.append(f'<h2>{stripped[3:]}</h2>')
-
-        elif stripped.startswith('# '):
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-            html_lines.append(f'<h1>{stripped[2:]}</h1>')
-
-        # Lists
-        elif stripped.startswith('- '):
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-            if not in_list:
-                html_lines.append('<ul>')
-                in_list = True
-            content = stripped[2:]
-            # Procesar bold e italic en el contenido
-            content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', content)
-            content = re.sub(r'(?<!\*)\*(?!\*)([^*]+?)\*(?!\*)', r'<em>\1</em>', content)
-            html_lines.append(f'<li>{content}</li>')
-
-        # Horizontal rule
-        elif stripped == '---':
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-            html_lines.append('<hr>')
-
-        # Empty line
-        elif not stripped:
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if in_paragraph:
-                html_lines.append('</p>')
-                in_paragraph = False
-
-        # Regular text
-        else:
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-
-            # Procesar bold e italic
-            content = stripped
-            content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', content)
-            content = re.sub(r'(?<!\*)\*(?!\*)([^*]+?)\*(?!\*)', r'<em>\1</em>', content)
-
-            if not in_paragraph:
-                html_lines.append(f'<p>{content}')
-                in_paragraph = True
-            else:
-                html_lines.append(f'<br>{content}')
-
-    # Cerrar tags abiertas
-    if in_list:
-        html_lines.append('</ul>')
-    if in_paragraph:
-        html_lines.append('</p>')
-
-    return '\n'.join(html_lines)
-
 def generate_html_file(markdown_file, css_file, output_dir):
     """Genera archivo HTML desde markdown con estilos CSS"""
-    # Leer archivos
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        markdown_text = f.read()
-
     with open(css_file, 'r', encoding='utf-8') as f:
         css_text = f.read()
 
-    # Convertir markdown a HTML
-    html_content = markdown_to_html(markdown_text)
-
     # Obtener título del archivo
     title = Path(markdown_file).stem.replace('_', ' ').replace('semana', 'Semana ')
 
-    # Crear HTML completo
-    full_html = HTML_TEMPLATE.format(
-        title=title,
-        css=css_text,
-        content=html_content
-    )
+    # Plantilla antes y después del contenido
+    cabecera, pie = HTML_TEMPLATE.split('{content}')
 
-    # Guardar archivo HTML
+    # Convertir markdown a HTML escribiendo el contenido según se genera
     output_file = output_dir / f"{Path(markdown_file).stem}.html"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(full_html)
+    with open(markdown_file, 'r', encoding='utf-8') as entrada, \
+            open(output_file, 'w', encoding='utf-8') as f:
+        f.write(cabecera.format(title=title, css=css_text))
+        escribir_html(entrada, f)
+        f.write(pie.format())
 
     return output_file
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description='Genera los HTML de los materiales')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenera todos los archivos aunque no hayan cambiado')
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
     html_dir = script_dir / 'html'
     css_file = script_dir / 'pdf-style.css'
@@ -201,13 +96,25 @@ def main():
     print(f"\n🚀 Generando archivos HTML para {len(md_files)} archivos...\n")
 
     success_count = 0
+    skipped_count = 0
+    manifiesto = Manifiesto(script_dir)
 
     for md_file in md_files:
+        # Dependencias: el Markdown, el CSS, el conversor y este script (plantilla)
+        output_file = html_dir / f"{md_file.stem}.html"
+        entradas = [md_file, css_file, RENDERER, Path(__file__)]
+        if not args.force and not manifiesto.necesita_generar(output_file, entradas):
+            print(f"⏭️  Sin cambios: {md_file.name}")
+            skipped_count += 1
+            continue
+
         print(f"📄 Procesando: {md_file.name}")
 
         try:
             # Generar HTML
+            manifiesto.descartar(output_file)
             output_file = generate_html_file(md_file, css_file, html_dir)
+            manifiesto.registrar(output_file, entradas)
             print(f"✅ HTML generado: {output_file.name}")
             success_count += 1
 
@@ -216,7 +123,8 @@ def main():
             import traceback
             traceback.print_exc()
 
-    print(f"\n✨ ¡Proceso completado! {success_count}/{len(md_files)} archivos HTML generados")
+    print(f"\n✨ ¡Proceso completado! {success_count}/{len(md_files) - skipped_count} archivos HTML generados"
+          f" ({skipped_count} sin cambios)")
     print(f"\n📂 Los archivos están en: {html_dir}")
     print("\n💡 Abre los archivos HTML en un navegador y usa 'Imprimir > Guardar como PDF' para generar los PDFs\n")
 
@@ -1,16 +1,26 @@
 #!/usr/bin/env python3
 """
 Script para generar PDFs bonitos desde archivos Markdown
-Usa subprocess para llamar a playwright desde Node.js
+Usa un proceso persistente de Node.js (pdf-worker.js) con Playwright
 """
 
-import os
-import re
-import sys
+import argparse
+import json
 import subprocess
-import tempfile
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from pathlib import Path
 
+from build_manifest import RENDERER, Manifiesto
+from markdown_render import markdown_to_html
+
+# Proceso de Node que convierte HTML a PDF
+WORKER_SCRIPT = Path(__file__).parent / 'pdf-worker.js'
+
+# Segundos como máximo por documento; si se pasa, se reinicia el proceso de
+# Node (pdf-worker.js limita además cada página a PAGE_TIMEOUT)
+JOB_TIMEOUT = 60
+
 # Plantilla HTML con estilos CSS incluidos
 HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang="es">
@@ -28,79 +38,6 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </html>
 """
 
-def markdown_to_html(markdown_text):
-    """Convierte markdown a HTML con formato básico pero funcional"""
-    html = markdown_text
-
-    # Escapar caracteres HTML especiales primero
-    # html = html.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-
-    # Headers (de mayor a menor para evitar conflictos)
-    html = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', html, flags=re.MULTILINE)
-    html = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-
-    # Bold
-    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-
-    # Italic
-    html = re.sub(r'(?<!\*)\*(?!\*)([^*]+)\*(?!\*)', r'<em>\1</em>', html)
-
-    # Lists - primero identificar items de lista
-    html = re.sub(r'^- (.*?)$', r'<li>\1</li>', html, flags=re.MULTILINE)
-
-    # Envolver listas consecutivas en <ul>
-    lines = html.split('\n')
-    in_list = False
-    result = []
-
-    for line in lines:
-        if line.strip().startswith('<li>'):
-            if not in_list:
-                result.append('<ul>')
-                in_list = True
-            result.append(line)
-        else:
-            if in_list:
-                result.append('</ul>')
-                in_list = False
-            result.append(line)
-
-    if in_list:
-        result.append('</ul>')
-
-    html = '\n'.join(result)
-
-    # Horizontal rules
-    html = re.sub(r'^---$', '<hr>', html, flags=re.MULTILINE)
-
-    # Párrafos - dividir por líneas vacías
-    paragraphs = html.split('\n\n')
-    processed = []
-
-    for para in paragraphs:
-        para = para.strip()
-        if not para:
-            continue
-
-        # Si ya tiene una etiqueta HTML, no envolver en <p>
-        if (para.startswith('<h') or para.startswith('<ul') or
-            para.startswith('<ol') or para.startswith('<hr') or
-            para.startswith('<div')):
-            processed.append(para)
-        else:
-            # Reemplazar saltos de línea simples con <br>
-            para = para.replace('\n', '<br>\n')
-            if not para.startswith('<li>'):
-                processed.append(f'<p>{para}</p>')
-            else:
-                processed.append(para)
-
-    html = '\n\n'.join(processed)
-
-    return html
-
 def generate_html(markdown_file, css_file):
     """Genera HTML desde markdown con estilos CSS"""
     # Leer archivos
@@ -125,82 +62,159 @@ def generate_html(markdown_file, css_file):
 
     return full_html
 
-def html_to_pdf_playwright(html_content, output_pdf):
-    """Convierte HTML a PDF usando Playwright vía Node.js"""
-    # Crear un archivo temporal con el HTML
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-        temp_html = f.name
-        f.write(html_content)
-
-    # Script de Node.js para generar PDF
-    node_script = f"""
-const {{ chromium }} = require('/opt/node22/lib/node_modules/playwright');
-const fs = require('fs');
-
-(async () => {{
-    const browser = await chromium.launch();
-    const page = await browser.newPage();
-
-    const html = fs.readFileSync('{temp_html}', 'utf-8');
-    await page.setContent(html, {{ waitUntil: 'networkidle' }});
-
-    await page.pdf({{
-        path: '{output_pdf}',
-        format: 'A4',
-        margin: {{
-            top: '2cm',
-            right: '2cm',
-            bottom: '2cm',
-            left: '2cm'
-        }},
-        printBackground: true,
-        displayHeaderFooter: true,
-        headerTemplate: `
-            <div style="font-size: 9pt; color: #999; width: 100%; text-align: right; padding-right: 1cm;">
-                Curso Intensivo de Español - CILE
-            </div>
-        `,
-        footerTemplate: `
-            <div style="font-size: 9pt; color: #999; width: 100%; text-align: center;">
-                Página <span class="pageNumber"></span> de <span class="totalPages"></span>
-            </div>
-        `
-    }});
-
-    await browser.close();
-}})();
-"""
-
-    # Crear archivo temporal con el script de Node.js
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-        temp_script = f.name
-        f.write(node_script)
-
-    try:
-        # Ejecutar el script de Node.js
-        result = subprocess.run(
-            ['node', temp_script],
-            capture_output=True,
+class PdfWorker:
+    """
+    Proceso de Node (pdf-worker.js) que convierte HTML a PDF con Playwright.
+
+    El navegador se lanza una sola vez y renderiza varios documentos a la
+    vez; el HTML se envía en memoria por stdin, sin archivos temporales.
+    """
+
+    def __init__(self, concurrency=4):
+        self.concurrency = concurrency
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            ['node', str(WORKER_SCRIPT), str(self.concurrency)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
             text=True,
-            timeout=60
+            encoding='utf-8'
         )
-
-        if result.returncode != 0:
-            print(f"❌ Error al generar PDF: {result.stderr}")
-            return False
-
-        return True
-
-    finally:
-        # Limpiar archivos temporales
+        self._pending = {}  # id -> Future
+        self._finished = False
+        self._reader = threading.Thread(
+            target=self._read_responses, args=(self.process,), daemon=True
+        )
+        self._reader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, html_content, output_pdf):
+        """
+        Encarga la conversión de un documento.
+
+        Returns:
+            Future que se resuelve con True al escribirse el PDF, o con la
+            excepción RuntimeError si falla
+        """
+        future = Future()
+        with self._lock:
+            if self._finished:
+                future.set_exception(RuntimeError("El proceso de PDF ha terminado"))
+                return future
+            self._next_id += 1
+            job_id = self._next_id
+            self._pending[job_id] = future
+        message = json.dumps({'id': job_id, 'html': html_content, 'output': str(output_pdf)})
         try:
-            os.unlink(temp_html)
-            os.unlink(temp_script)
-        except:
+            self.process.stdin.write(message + '\n')
+            self.process.stdin.flush()
+        except OSError:
+            # El proceso ha terminado; _read_responses hace fallar el trabajo
             pass
+        return future
+
+    def _read_responses(self, process):
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                future = self._pending.pop(response.get('id'), None)
+            if future is None:
+                continue
+            if response.get('ok'):
+                future.set_result(True)
+            else:
+                future.set_exception(RuntimeError(response.get('error', 'error desconocido')))
+
+        # El proceso ha terminado: fallan los trabajos sin respuesta
+        with self._lock:
+            self._finished = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("El proceso de PDF ha terminado antes de responder"))
+
+    def close(self, timeout=60):
+        """Termina los trabajos pendientes y cierra el navegador."""
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._reader.join()
+
+    def restart(self):
+        """
+        Mata el proceso de Node (sus trabajos pendientes fallan con
+        RuntimeError) y lanza otro en su lugar.
+        """
+        self.process.kill()
+        self.process.wait()
+        self._reader.join()
+        self._start()
+
+def render_pdfs(worker, jobs, timeout=JOB_TIMEOUT):
+    """
+    Convierte varios documentos con un PdfWorker, reiniciándolo si uno tarda
+    demasiado.
+
+    El documento que agota el tiempo falla; los que estaban pendientes en el
+    proceso reiniciado se vuelven a encargar al nuevo.
+
+    Args:
+        worker: PdfWorker en marcha
+        jobs: Lista de (html_content, output_pdf)
+        timeout: Segundos de espera como máximo por documento
+
+    Yields:
+        (índice en jobs, None si se generó el PDF o el mensaje de error), a
+        medida que terminan
+    """
+    indices = list(range(len(jobs)))
+    while indices:
+        futures = [(i, worker.submit(*jobs[i])) for i in indices]
+        indices = []
+        restarted = False
+        for i, future in futures:
+            if restarted and future.exception() is not None:
+                indices.append(i)
+                continue
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeoutError:
+                worker.restart()
+                restarted = True
+                yield i, f"tiempo agotado ({timeout} s)"
+                continue
+            except RuntimeError as e:
+                yield i, str(e)
+                continue
+            yield i, None
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description='Genera los PDFs de los materiales')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenera todos los archivos aunque no hayan cambiado')
+    parser.add_argument('--jobs', type=int, default=4,
+                        help='Documentos que se renderizan a la vez (por defecto 4)')
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
     pdf_dir = script_dir / 'pdfs'
     css_file = script_dir / 'pdf-style.css'
@@ -218,28 +232,54 @@ def main():
     print(f"\n🚀 Generando PDFs para {len(md_files)} archivos...\n")
 
     success_count = 0
+    skipped_count = 0
+    manifiesto = Manifiesto(script_dir)
 
+    # Archivos a generar: el PDF, sus entradas y el HTML
+    jobs = []
     for md_file in md_files:
+        # Nombre del PDF de salida y archivos de los que depende (las
+        # opciones de página están en pdf-worker.js)
+        pdf_file = pdf_dir / f"{md_file.stem}.pdf"
+        entradas = [md_file, css_file, RENDERER, WORKER_SCRIPT, Path(__file__)]
+        if not args.force and not manifiesto.necesita_generar(pdf_file, entradas):
+            print(f"⏭️  Sin cambios: {md_file.name}")
+            skipped_count += 1
+            continue
+
         print(f"📄 Procesando: {md_file.name}")
 
         try:
             # Generar HTML
             html_content = generate_html(md_file, css_file)
+        except Exception as e:
+            print(f"❌ Error procesando {md_file.name}: {str(e)}")
+            continue
+        jobs.append((pdf_file, entradas, html_content))
 
-            # Nombre del PDF de salida
-            pdf_file = pdf_dir / f"{md_file.stem}.pdf"
-
-            # Convertir a PDF
-            if html_to_pdf_playwright(html_content, str(pdf_file)):
+    if jobs:
+        # Un solo navegador para todos los documentos
+        try:
+            worker = PdfWorker(concurrency=args.jobs)
+        except FileNotFoundError:
+            print("❌ No se encontró Node.js (node) para generar los PDFs")
+            return
+        with worker:
+            for pdf_file, _, _ in jobs:
+                manifiesto.descartar(pdf_file)
+
+            pdf_jobs = [(html_content, pdf_file.resolve()) for pdf_file, _, html_content in jobs]
+            for i, error in render_pdfs(worker, pdf_jobs):
+                pdf_file, entradas, _ = jobs[i]
+                if error is not None:
+                    print(f"❌ Error al generar {pdf_file.name}: {error}")
+                    continue
+                manifiesto.registrar(pdf_file, entradas)
                 print(f"✅ PDF generado: {pdf_file.name}")
                 success_count += 1
-            else:
-                print(f"❌ Error al generar {pdf_file.name}")
-
-        except Exception as e:
-            print(f"❌ Error procesando {md_file.name}: {str(e)}")
 
-    print(f"\n✨ ¡Proceso completado! {success_count}/{len(md_files)} PDFs generados\n")
+    print(f"\n✨ ¡Proceso completado! {success_count}/{len(md_files) - skipped_count} PDFs generados"
+          f" ({skipped_count} sin cambios)\n")
 
 if __name__ == '__main__':
     main()
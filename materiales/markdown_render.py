@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Conversor de Markdown a HTML compartido por los scripts de materiales
+(generate-html.py y generate-pdf.py).
+
+Recorre el documento una sola vez, línea a línea, y va emitiendo el HTML
+según lo genera, sin sustituciones sobre el documento completo. El formato
+en línea (negrita e itálica) se resuelve con un único recorrido de cada
+línea, de modo que el coste es lineal en el tamaño del texto.
+
+Construcciones soportadas (las que usan los semana*.md):
+- Encabezados: #, ##, ###, ####
+- Listas con viñetas (- ) y numeradas (1. ), anidadas por sangría
+- **negrita**, *itálica* y ***ambas***
+- Reglas horizontales (---)
+- Tablas con barras (| a | b |, con fila separadora |---|:---:|)
+- Párrafos: líneas seguidas forman un párrafo, separadas con <br>
+
+El HTML en línea del Markdown se deja tal cual.
+
+Uso:
+    from markdown_render import markdown_to_html, escribir_html
+
+    html = markdown_to_html(texto)
+
+    with open('semana1.md', encoding='utf-8') as entrada, \\
+         open('semana1.html', 'w', encoding='utf-8') as salida:
+        escribir_html(entrada, salida)
+"""
+
+import re
+
+# Delimitadores de formato en línea: secuencias de asteriscos (se conservan
+# al dividir la línea)
+_ASTERISCOS = re.compile(r'(\*+)')
+
+# Elemento de lista numerada: "1. texto"
+_ITEM_NUMERADO = re.compile(r'(\d+)\.\s+(.*)')
+
+# Celda de la fila separadora de una tabla: "---", ":---", "---:", ":---:"
+_SEPARADOR_TABLA = re.compile(r'\s*(:?)-+(:?)\s*')
+
+_ETIQUETAS_FORMATO = {
+    'b': ('<strong>', '</strong>'),
+    'i': ('<em>', '</em>'),
+}
+
+
+# =============================================================================
+# FORMATO EN LÍNEA
+# =============================================================================
+
+def renderizar_en_linea(texto):
+    """
+    Convierte **negrita** e *itálica* de una línea en un solo recorrido.
+
+    Cada delimitador abre o cierra su formato; los que no se cierran, o los
+    que quedan cruzados con otro formato, se dejan como texto.
+    """
+    if '*' not in texto:
+        return texto
+
+    # Posiciones impares: secuencias de asteriscos; pares: texto
+    partes = _ASTERISCOS.split(texto)
+    abiertos = []                # [tipo, posición, mitad] de los abiertos
+    trozos = {}                  # posición -> [mitades] de las secuencias ***
+    num_abiertos = {'b': 0, 'i': 0}
+
+    for posicion in range(1, len(partes), 2):
+        longitud = len(partes[posicion])
+        if longitud == 1:
+            tipos = ('i',)
+        elif longitud == 2:
+            tipos = ('b',)
+        elif longitud == 3:
+            # Cierra primero el formato abierto más interno
+            tipos = ('i', 'b') if abiertos and abiertos[-1][0] == 'i' else ('b', 'i')
+            trozos[posicion] = ['*' if tipo == 'i' else '**' for tipo in tipos]
+        else:
+            continue
+
+        for mitad, tipo in enumerate(tipos):
+            if not num_abiertos[tipo]:
+                abiertos.append((tipo, posicion, mitad))
+                num_abiertos[tipo] += 1
+                continue
+
+            # Si el abierto de encima es del otro tipo y de la misma secuencia
+            # *** que el que se cierra, se intercambia su anidamiento
+            if (len(abiertos) >= 2 and abiertos[-2][0] == tipo
+                    and abiertos[-1][1] == abiertos[-2][1]):
+                otro_tipo, inicio, mitad_otro = abiertos.pop()
+                _, _, mitad_tipo = abiertos.pop()
+                mitades = trozos[inicio]
+                mitades[mitad_otro], mitades[mitad_tipo] = mitades[mitad_tipo], mitades[mitad_otro]
+                abiertos.append((otro_tipo, inicio, mitad_tipo))
+                abiertos.append((tipo, inicio, mitad_otro))
+
+            # Cierra el último abierto de su tipo; los abiertos después de él
+            # quedan sin pareja
+            while True:
+                tipo_abierto, inicio, mitad_inicio = abiertos.pop()
+                num_abiertos[tipo_abierto] -= 1
+                if tipo_abierto == tipo:
+                    break
+            apertura, cierre = _ETIQUETAS_FORMATO[tipo]
+            for pos, mit, etiqueta in ((inicio, mitad_inicio, apertura), (posicion, mitad, cierre)):
+                if pos in trozos:
+                    trozos[pos][mit] = etiqueta
+                else:
+                    partes[pos] = etiqueta
+
+    for posicion, mitades in trozos.items():
+        partes[posicion] = ''.join(mitades)
+    return ''.join(partes)
+
+
+# =============================================================================
+# BLOQUES
+# =============================================================================
+
+def _celdas(linea):
+    """Celdas de una fila de tabla: "| a | b |" -> ["a", "b"]."""
+    linea = linea.strip()
+    if linea.startswith('|'):
+        linea = linea[1:]
+    if linea.endswith('|'):
+        linea = linea[:-1]
+    return [celda.strip() for celda in linea.split('|')]
+
+
+def _alineaciones(linea):
+    """Alineación de cada columna según la fila separadora, o None si no lo es."""
+    alineaciones = []
+    for celda in _celdas(linea):
+        separador = _SEPARADOR_TABLA.fullmatch(celda)
+        if separador is None:
+            return None
+        izquierda, derecha = separador.groups()
+        if izquierda and derecha:
+            alineaciones.append('center')
+        elif derecha:
+            alineaciones.append('right')
+        elif izquierda:
+            alineaciones.append('left')
+        else:
+            alineaciones.append(None)
+    return alineaciones
+
+
+def _fila_tabla(celdas, etiqueta, alineaciones):
+    html = []
+    for i, celda in enumerate(celdas):
+        alineacion = alineaciones[i] if i < len(alineaciones) else None
+        estilo = f' style="text-align: {alineacion}"' if alineacion else ''
+        html.append(f'<{etiqueta}{estilo}>{renderizar_en_linea(celda)}</{etiqueta}>')
+    return '<tr>' + ''.join(html) + '</tr>'
+
+
+def _apertura_lista(etiqueta, numero):
+    if etiqueta == 'ol' and numero != 1:
+        return f'<ol start="{numero}">'
+    return f'<{etiqueta}>'
+
+
+class _Conversor:
+    """
+    Estado de la conversión de un documento.
+
+    Cada llamada a linea() procesa una línea de Markdown y deja en
+    self.salida las líneas de HTML que ya pueden emitirse.
+    """
+
+    def __init__(self):
+        self.salida = []
+        self.en_parrafo = False
+        self.listas = []              # pila de (etiqueta, sangría) de las listas abiertas
+        self.item_pendiente = None    # último <li>, a falta de saber si lleva sublista
+        self.tabla = None             # alineaciones de la tabla abierta
+        self.fila_pendiente = None    # posible cabecera de tabla, a falta de la separadora
+
+    def linea(self, linea):
+        contenido = linea.strip()
+
+        if self.fila_pendiente is not None:
+            pendiente, self.fila_pendiente = self.fila_pendiente, None
+            alineaciones = _alineaciones(contenido) if contenido.startswith('|') else None
+            if alineaciones is not None:
+                self.cerrar_bloques()
+                self.tabla = alineaciones
+                self.salida += [
+                    '<table>',
+                    '<thead>',
+                    _fila_tabla(_celdas(pendiente), 'th', alineaciones),
+                    '</thead>',
+                    '<tbody>',
+                ]
+                return
+            self.texto(pendiente)
+
+        if not contenido:
+            # Una línea en blanco no corta una lista: sus elementos pueden ir
+            # separados por líneas en blanco
+            self.cerrar_bloques(salvo_listas=True)
+            return
+
+        inicial = contenido[0]
+
+        if inicial == '-':
+            if contenido.startswith('- '):
+                self.item_lista('ul', len(linea) - len(linea.lstrip()), contenido[2:])
+                return
+            if contenido == '---':
+                self.cerrar_bloques()
+                self.salida.append('<hr>')
+                return
+
+        elif inicial == '#':
+            nivel = len(contenido) - len(contenido.lstrip('#'))
+            if nivel <= 4 and contenido[nivel:nivel + 1] == ' ':
+                self.cerrar_bloques()
+                self.salida.append(
+                    f'<h{nivel}>{renderizar_en_linea(contenido[nivel + 1:])}</h{nivel}>'
+                )
+                return
+
+        elif inicial == '|':
+            if self.tabla is not None:
+                self.salida.append(_fila_tabla(_celdas(contenido), 'td', self.tabla))
+            else:
+                self.fila_pendiente = contenido
+            return
+
+        elif '0' <= inicial <= '9':
+            numerado = _ITEM_NUMERADO.match(contenido)
+            if numerado is not None:
+                self.item_lista(
+                    'ol', len(linea) - len(linea.lstrip()),
+                    numerado.group(2), int(numerado.group(1))
+                )
+                return
+
+        self.texto(contenido)
+
+    def terminar(self):
+        if self.fila_pendiente is not None:
+            self.texto(self.fila_pendiente)
+            self.fila_pendiente = None
+        self.cerrar_bloques()
+
+    def texto(self, contenido):
+        """Línea de párrafo: abre el párrafo o continúa el actual con <br>."""
+        if self.listas or self.tabla is not None:
+            self.cerrar_bloques()
+        if self.en_parrafo:
+            self.salida.append('<br>' + renderizar_en_linea(contenido))
+        else:
+            self.salida.append('<p>' + renderizar_en_linea(contenido))
+            self.en_parrafo = True
+
+    def item_lista(self, etiqueta, sangria, contenido, numero=1):
+        salida, listas = self.salida, self.listas
+        if self.en_parrafo or self.tabla is not None:
+            self.cerrar_bloques()
+
+        while listas and listas[-1][1] > sangria:
+            self.cerrar_lista()
+
+        if not listas or sangria > listas[-1][1]:
+            # Lista nueva, o anidada dentro del elemento pendiente
+            if self.item_pendiente is not None:
+                salida.append('<li>' + self.item_pendiente)
+            salida.append(_apertura_lista(etiqueta, numero))
+            listas.append((etiqueta, sangria))
+        else:
+            if self.item_pendiente is not None:
+                salida.append('<li>' + self.item_pendiente + '</li>')
+            if listas[-1][0] != etiqueta:
+                salida.append(f'</{listas.pop()[0]}>')
+                salida.append(_apertura_lista(etiqueta, numero))
+                listas.append((etiqueta, sangria))
+
+        self.item_pendiente = renderizar_en_linea(contenido)
+
+    def cerrar_lista(self):
+        """Cierra la lista más interna y, si estaba anidada, el <li> que la contiene."""
+        if self.item_pendiente is not None:
+            self.salida.append('<li>' + self.item_pendiente + '</li>')
+            self.item_pendiente = None
+        self.salida.append(f'</{self.listas.pop()[0]}>')
+        if self.listas:
+            self.salida.append('</li>')
+
+    def cerrar_bloques(self, salvo_listas=False):
+        if self.en_parrafo:
+            self.salida.append('</p>')
+            self.en_parrafo = False
+        if not salvo_listas:
+            while self.listas:
+                self.cerrar_lista()
+        if self.tabla is not None:
+            self.salida += ['</tbody>', '</table>']
+            self.tabla = None
+
+
+def iter_html(lineas):
+    """
+    Convierte Markdown en HTML línea a línea.
+
+    Args:
+        lineas: Iterable de líneas (un fichero abierto, una lista...)
+
+    Yields:
+        Líneas de HTML, sin salto de línea final
+    """
+    conversor = _Conversor()
+    salida = conversor.salida
+    for linea in lineas:
+        conversor.linea(linea)
+        if salida:
+            yield from salida
+            salida.clear()
+    conversor.terminar()
+    yield from salida
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+def markdown_to_html(markdown_text):
+    """Convierte un texto Markdown completo a HTML."""
+    return '\n'.join(iter_html(markdown_text.split('\n')))
+
+
+def escribir_html(lineas, salida):
+    """
+    Escribe en salida el HTML de unas líneas de Markdown según se genera.
+
+    Args:
+        lineas: Iterable de líneas de Markdown (ej: un fichero abierto)
+        salida: Objeto con write() (ej: un fichero abierto para escritura)
+    """
+    primera = True
+    for linea_html in iter_html(lineas):
+        if not primera:
+            salida.write('\n')
+        salida.write(linea_html)
+        primera = False
@@ -0,0 +1,176 @@
+#!/usr/bin/env node
+
+/**
+ * Proceso persistente que convierte HTML a PDF con Playwright
+ *
+ * Lo usa generate-pdf.py: lanza el navegador una sola vez por construcción y
+ * renderiza varios documentos a la vez, cada uno en su propia página.
+ *
+ * Protocolo (una línea JSON por mensaje):
+ *   stdin:  {"id": 1, "html": "<!DOCTYPE html>...", "output": "pdfs/semana1.pdf"}
+ *   stdout: {"id": 1, "ok": true}
+ *           {"id": 1, "ok": false, "error": "..."}
+ *
+ * Las respuestas llegan en el orden en que terminan los trabajos, no en el
+ * de llegada. Cada paso de un trabajo (cargar el HTML, escribir el PDF)
+ * falla si tarda más de PAGE_TIMEOUT; la página se cierra y no se reutiliza.
+ * Al cerrarse stdin termina los trabajos pendientes, cierra el navegador y
+ * sale.
+ *
+ * Uso:
+ *   node pdf-worker.js [páginas simultáneas, por defecto 4]
+ *
+ * Playwright se busca, por este orden, en PLAYWRIGHT_MODULE, en los módulos
+ * locales y en los módulos globales de la instalación de Node en uso.
+ */
+
+const path = require('path');
+const readline = require('readline');
+
+// Milisegundos como máximo para cargar el HTML y para escribir el PDF
+// (generate-pdf.py reinicia el proceso si un documento pasa de JOB_TIMEOUT)
+const PAGE_TIMEOUT = 30000;
+
+const PDF_OPTIONS = {
+    format: 'A4',
+    margin: {
+        top: '2cm',
+        right: '2cm',
+        bottom: '2cm',
+        left: '2cm'
+    },
+    printBackground: true,
+    displayHeaderFooter: true,
+    headerTemplate: `
+        <div style="font-size: 9pt; color: #999; width: 100%; text-align: right; padding-right: 1cm;">
+            Curso Intensivo de Español - CILE
+        </div>
+    `,
+    footerTemplate: `
+        <div style="font-size: 9pt; color: #999; width: 100%; text-align: center;">
+            Página <span class="pageNumber"></span> de <span class="totalPages"></span>
+        </div>
+    `
+};
+
+function loadPlaywright() {
+    const candidates = [
+        process.env.PLAYWRIGHT_MODULE,
+        'playwright',
+        // Módulos globales: <prefijo>/bin/node -> <prefijo>/lib/node_modules
+        path.join(path.dirname(process.execPath), '..', 'lib', 'node_modules', 'playwright')
+    ].filter(Boolean);
+
+    for (const candidate of candidates) {
+        try {
+            return require(candidate);
+        } catch (error) {
+            if (error.code !== 'MODULE_NOT_FOUND') {
+                throw error;
+            }
+        }
+    }
+    throw new Error(`No se encontró playwright (buscado en: ${candidates.join(', ')})`);
+}
+
+function withTimeout(promise, ms, what) {
+    let timer;
+    const timeout = new Promise((_, reject) => {
+        timer = setTimeout(() => reject(new Error(`${what}: tiempo agotado (${ms} ms)`)), ms);
+    });
+    return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+function respond(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function main() {
+    const concurrency = Math.max(1, parseInt(process.argv[2], 10) || 4);
+    const { chromium } = loadPlaywright();
+    const browser = await chromium.launch();
+
+    // Grupo de páginas: se crean según hacen falta, hasta `concurrency`
+    const freePages = [];
+    const waiting = [];
+    let openPages = 0;
+
+    async function newPage() {
+        const page = await browser.newPage();
+        page.setDefaultTimeout(PAGE_TIMEOUT);
+        return page;
+    }
+
+    async function acquirePage() {
+        if (freePages.length) {
+            return freePages.pop();
+        }
+        if (openPages < concurrency) {
+            openPages++;
+            try {
+                return await newPage();
+            } catch (error) {
+                openPages--;
+                throw error;
+            }
+        }
+        return new Promise(resolve => waiting.push(resolve));
+    }
+
+    function releasePage(page) {
+        const next = waiting.shift();
+        if (next) {
+            next(page);
+        } else {
+            freePages.push(page);
+        }
+    }
+
+    async function render(job) {
+        const page = await acquirePage();
+        try {
+            await page.setContent(job.html, { waitUntil: 'networkidle' });
+            // page.pdf() no tiene opción de tiempo máximo
+            await withTimeout(page.pdf({ ...PDF_OPTIONS, path: job.output }), PAGE_TIMEOUT, 'PDF');
+        } catch (error) {
+            // Una página que ha fallado no se reutiliza
+            openPages--;
+            page.close().catch(() => {});
+            if (waiting.length && openPages < concurrency) {
+                openPages++;
+                newPage().then(releasePage, () => { openPages--; });
+            }
+            throw error;
+        }
+        releasePage(page);
+    }
+
+    const pending = new Set();
+    const input = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+
+    for await (const line of input) {
+        if (!line.trim()) {
+            continue;
+        }
+        let job;
+        try {
+            job = JSON.parse(line);
+        } catch (error) {
+            respond({ id: null, ok: false, error: `Mensaje no válido: ${error.message}` });
+            continue;
+        }
+        const task = render(job)
+            .then(() => respond({ id: job.id, ok: true }))
+            .catch(error => respond({ id: job.id, ok: false, error: String(error && error.message || error) }))
+            .finally(() => pending.delete(task));
+        pending.add(task);
+    }
+
+    await Promise.all(pending);
+    await browser.close();
+}
+
+main().catch(error => {
+    console.error(`❌ ${error.message}`);
+    process.exit(1);
+});
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Modo vigilancia para los materiales
+
+Vigila semana*.md y pdf-style.css y, al guardar, regenera solo los HTML (y
+con --pdf, los PDF) afectados, con el mismo conversor y el mismo manifiesto
+que generate-html.py y generate-pdf.py. Un cambio en el CSS regenera todo.
+
+Los guardados seguidos (editores que escriben varias veces, varios archivos
+a la vez) se agrupan: se reconstruye cuando pasan --debounce segundos sin
+cambios. En Linux se usa inotify; en otros sistemas se consultan las fechas
+de modificación cada --intervalo segundos.
+
+Con --pdf se mantiene abierto un único proceso de Node (pdf-worker.js) con
+el navegador ya lanzado durante toda la sesión, así que cada PDF solo cuesta
+su renderizado. Los cambios en los scripts o en markdown_render.py requieren
+reiniciar el modo vigilancia.
+
+Uso:
+    python3 watch.py [--pdf] [--debounce 0.3] [--intervalo 0.5]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import importlib.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+from build_manifest import RENDERER, Manifiesto
+
+SCRIPT_DIR = Path(__file__).parent
+
+# Archivos vigilados
+PATRONES = ('semana*.md', 'pdf-style.css')
+
+
+def cargar_script(nombre):
+    """Importa uno de los scripts hermanos (tienen guiones en el nombre)."""
+    ruta = SCRIPT_DIR / nombre
+    spec = importlib.util.spec_from_file_location(ruta.stem.replace('-', '_'), ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def es_vigilado(nombre):
+    return any(fnmatch.fnmatch(nombre, patron) for patron in PATRONES)
+
+
+# =============================================================================
+# DETECCIÓN DE CAMBIOS
+# =============================================================================
+
+class VigilanteSondeo:
+    """Detecta cambios comparando las fechas de modificación."""
+
+    def __init__(self, directorio, intervalo=0.5):
+        self.directorio = Path(directorio)
+        self.intervalo = intervalo
+        self.fechas = self._fechas()
+
+    def _fechas(self):
+        fechas = {}
+        for entrada in os.scandir(self.directorio):
+            if es_vigilado(entrada.name):
+                try:
+                    estado = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                fechas[entrada.name] = (estado.st_mtime_ns, estado.st_size)
+        return fechas
+
+    def esperar(self, timeout=None):
+        """
+        Espera a que cambie algún archivo vigilado.
+
+        Args:
+            timeout: Segundos como máximo (None: sin límite)
+
+        Returns:
+            Conjunto de nombres de archivo cambiados (vacío si vence el plazo)
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            fechas = self._fechas()
+            cambios = {
+                nombre for nombre in fechas.keys() | self.fechas.keys()
+                if fechas.get(nombre) != self.fechas.get(nombre)
+            }
+            self.fechas = fechas
+            if cambios:
+                return cambios
+            if limite is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return set()
+                time.sleep(min(self.intervalo, restante))
+            else:
+                time.sleep(self.intervalo)
+
+    def cerrar(self):
+        pass
+
+
+class VigilanteInotify:
+    """Detecta cambios con inotify (Linux), sin consultar los archivos."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_CLOEXEC = 0o2000000
+
+    _EVENTO = struct.Struct('iIII')
+
+    def __init__(self, directorio):
+        nombre_libc = ctypes.util.find_library('c')
+        if nombre_libc is None:
+            raise OSError("libc no disponible")
+        libc = ctypes.CDLL(nombre_libc, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify no disponible")
+
+        self.fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mascara = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directorio)), mascara) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch")
+
+    def esperar(self, timeout=None):
+        """
+        Igual que VigilanteSondeo.esperar.
+
+        Los eventos de archivos no vigilados (ej: la prueba "4913" de vim,
+        copias de seguridad del editor o el manifiesto temporal de la propia
+        construcción) se descartan sin volver: el conjunto vacío solo
+        significa que venció el plazo.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            restante = None if limite is None else max(0.0, limite - time.monotonic())
+            listos, _, _ = select.select([self.fd], [], [], restante)
+            if not listos:
+                return set()
+
+            cambios = self._leer_eventos()
+            if cambios:
+                return cambios
+
+    def _leer_eventos(self):
+        """Nombres vigilados de los eventos pendientes."""
+        datos = os.read(self.fd, 64 * 1024)
+        cambios = set()
+        posicion = 0
+        while posicion < len(datos):
+            _, _, _, longitud = self._EVENTO.unpack_from(datos, posicion)
+            posicion += self._EVENTO.size
+            nombre = datos[posicion:posicion + longitud].rstrip(b'\0').decode('utf-8', 'replace')
+            posicion += longitud
+            if es_vigilado(nombre):
+                cambios.add(nombre)
+        return cambios
+
+    def cerrar(self):
+        os.close(self.fd)
+
+
+def crear_vigilante(directorio, intervalo, sondeo=False):
+    """inotify si está disponible; si no, sondeo."""
+    if not sondeo:
+        try:
+            return VigilanteInotify(directorio)
+        except (OSError, AttributeError):
+            pass
+    return VigilanteSondeo(directorio, intervalo)
+
+
+# =============================================================================
+# RECONSTRUCCIÓN
+# =============================================================================
+
+class Constructor:
+    """Regenera HTML y PDF de los materiales, manteniendo el manifiesto."""
+
+    def __init__(self, pdf=False, jobs=4):
+        self.generate_html = cargar_script('generate-html.py')
+        self.generate_pdf = cargar_script('generate-pdf.py') if pdf else None
+        self.css_file = SCRIPT_DIR / 'pdf-style.css'
+        self.html_dir = SCRIPT_DIR / 'html'
+        self.pdf_dir = SCRIPT_DIR / 'pdfs'
+        self.manifiesto = None
+        self.worker = None
+        self.jobs = jobs
+
+        self.html_dir.mkdir(exist_ok=True)
+        if pdf:
+            self.pdf_dir.mkdir(exist_ok=True)
+
+    def _entradas_html(self, md_file):
+        return [md_file, self.css_file, RENDERER, Path(self.generate_html.__file__)]
+
+    def _entradas_pdf(self, md_file):
+        return [md_file, self.css_file, RENDERER, self.generate_pdf.WORKER_SCRIPT,
+                Path(self.generate_pdf.__file__)]
+
+    def reconstruir(self, md_files, forzar=False):
+        """
+        Regenera las salidas de unos Markdown que estén desactualizadas.
+
+        Args:
+            md_files: Archivos semana*.md afectados
+            forzar: Si True, regenera aunque el manifiesto diga que están al día
+        """
+        # Los hashes de las entradas se guardan en caché por manifiesto:
+        # uno nuevo en cada reconstrucción
+        self.manifiesto = Manifiesto(SCRIPT_DIR)
+
+        # 1. HTML (rápido, en este proceso)
+        for md_file in md_files:
+            output_file = self.html_dir / f"{md_file.stem}.html"
+            entradas = self._entradas_html(md_file)
+            if not forzar and not self.manifiesto.necesita_generar(output_file, entradas):
+                continue
+            inicio = time.perf_counter()
+            try:
+                self.manifiesto.descartar(output_file)
+                self.generate_html.generate_html_file(md_file, self.css_file, self.html_dir)
+                self.manifiesto.registrar(output_file, entradas)
+            except Exception as e:
+                print(f"❌ Error procesando {md_file.name}: {str(e)}")
+                continue
+            print(f"✅ HTML generado: {output_file.name} ({time.perf_counter() - inicio:.2f} s)")
+
+        if self.generate_pdf is None:
+            return
+
+        # 2. PDF, en el proceso de Node que se mantiene abierto
+        inicio = time.perf_counter()
+        trabajos = []
+        for md_file in md_files:
+            pdf_file = self.pdf_dir / f"{md_file.stem}.pdf"
+            entradas = self._entradas_pdf(md_file)
+            if not forzar and not self.manifiesto.necesita_generar(pdf_file, entradas):
+                continue
+            try:
+                html_content = self.generate_pdf.generate_html(md_file, self.css_file)
+            except Exception as e:
+                print(f"❌ Error procesando {md_file.name}: {str(e)}")
+                continue
+            self.manifiesto.descartar(pdf_file)
+            trabajos.append((pdf_file, entradas, html_content))
+        if not trabajos:
+            return
+
+        worker = self._worker()
+        if worker is None:
+            return
+        pdf_jobs = [(html_content, pdf_file.resolve()) for pdf_file, _, html_content in trabajos]
+        for i, error in self.generate_pdf.render_pdfs(worker, pdf_jobs):
+            pdf_file, entradas, _ = trabajos[i]
+            if error is not None:
+                print(f"❌ Error al generar {pdf_file.name}: {error}")
+                continue
+            self.manifiesto.registrar(pdf_file, entradas)
+            print(f"✅ PDF generado: {pdf_file.name} ({time.perf_counter() - inicio:.2f} s)")
+
+        # Si el proceso ha terminado, se vuelve a lanzar en la siguiente reconstrucción
+        if worker.process.poll() is not None:
+            worker.close()
+            self.worker = None
+
+    def _worker(self):
+        """Proceso de PDF (se lanza la primera vez); None si no hay Node."""
+        if self.worker is None:
+            try:
+                self.worker = self.generate_pdf.PdfWorker(concurrency=self.jobs)
+            except FileNotFoundError:
+                print("❌ No se encontró Node.js (node) para generar los PDFs; "
+                      "se regenera solo el HTML")
+                self.generate_pdf = None
+        return self.worker
+
+    def cerrar(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Regenera los materiales al guardar los cambios')
+    parser.add_argument('--pdf', action='store_true',
+                        help='Regenera también los PDF (generate-pdf.py, con Playwright)')
+    parser.add_argument('--debounce', type=float, default=0.3,
+                        help='Segundos sin cambios antes de reconstruir (por defecto 0.3)')
+    parser.add_argument('--intervalo', type=float, default=0.5,
+                        help='Segundos entre consultas si no hay inotify (por defecto 0.5)')
+    parser.add_argument('--sondeo', action='store_true',
+                        help='Consulta las fechas de modificación aunque haya inotify')
+    parser.add_argument('--jobs', type=int, default=4,
+                        help='PDF que se renderizan a la vez (por defecto 4)')
+    args = parser.parse_args()
+
+    constructor = Constructor(pdf=args.pdf, jobs=args.jobs)
+    vigilante = crear_vigilante(SCRIPT_DIR, args.intervalo, sondeo=args.sondeo)
+    modo = 'inotify' if isinstance(vigilante, VigilanteInotify) else 'sondeo'
+
+    # Puesta al día inicial
+    constructor.reconstruir(sorted(SCRIPT_DIR.glob('semana*.md')))
+    print(f"\n👀 Vigilando {', '.join(PATRONES)} ({modo}). Ctrl+C para salir.\n")
+
+    pendientes = set()
+    try:
+        while True:
+            cambios = vigilante.esperar(args.debounce if pendientes else None)
+            if cambios:
+                # Todavía llegan cambios: se sigue esperando
+                pendientes |= cambios
+                continue
+
+            if 'pdf-style.css' in pendientes:
+                md_files = sorted(SCRIPT_DIR.glob('semana*.md'))
+            else:
+                md_files = sorted(
+                    SCRIPT_DIR / nombre for nombre in pendientes
+                    if (SCRIPT_DIR / nombre).exists()
+                )
+            pendientes.clear()
+
+            if md_files:
+                print(f"🔄 Cambios en: {', '.join(md.name for md in md_files)}")
+                constructor.reconstruir(md_files)
+    except KeyboardInterrupt:
+        print("\n👋 Fin del modo vigilancia\n")
+    finally:
+        vigilante.cerrar()
+        constructor.cerrar()
+
+
+if __name__ == '__main__':
+    main()